@@ -1,9 +1,12 @@
+import logging
+
 from fastapi import APIRouter, Depends, HTTPException, status
 from typing import List, Dict, Any
 from pydantic import BaseModel
 from app.core.database import supabase
 from app.core.security import get_current_user
-import traceback
+
+logger = logging.getLogger(__name__)
 
 # ✅ SIN PREFIX - Se agregará desde main.py
 router = APIRouter(tags=["achievements"])
@@ -23,23 +26,15 @@ async def get_user_achievements(
 ):
     """Obtiene todos los logros desbloqueados del usuario"""
     try:
-        print(f"🔍 get_user_achievements - user_id: {current_user['id']}")
-        
         result = supabase.table("user_achievements")\
             .select("*")\
             .eq("user_id", current_user["id"])\
             .execute()
         
-        print(f"✅ Resultado de user_achievements: {result.data}")
-        
         return result.data or []
         
     except Exception as e:
-        print(f"❌ ERROR en get_user_achievements:")
-        print(f"   Tipo: {type(e).__name__}")
-        print(f"   Mensaje: {str(e)}")
-        print(f"   Traceback completo:")
-        traceback.print_exc()
+        logger.exception("Error al obtener achievements del usuario")
         
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -53,8 +48,6 @@ async def unlock_achievement(
 ):
     """Desbloquea un logro para el usuario"""
     try:
-        print(f"🔍 unlock_achievement - user_id: {current_user['id']}, achievement_id: {achievement.achievement_id}")
-        
         # Verificar si ya está desbloqueado
         existing = supabase.table("user_achievements")\
             .select("*")\
@@ -63,7 +56,6 @@ async def unlock_achievement(
             .execute()
         
         if existing.data:
-            print(f"⚠️ Achievement ya desbloqueado")
             return {
                 "message": "Achievement already unlocked",
                 "achievement_id": achievement.achievement_id
@@ -81,7 +73,10 @@ async def unlock_achievement(
                 detail="Error al desbloquear achievement"
             )
         
-        print(f"✅ Achievement desbloqueado exitosamente")
+        logger.info(
+            "Achievement desbloqueado",
+            extra={"user_id": current_user["id"], "achievement_id": achievement.achievement_id},
+        )
         
         return {
             "message": "Achievement unlocked successfully",
@@ -92,10 +87,7 @@ async def unlock_achievement(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ ERROR en unlock_achievement:")
-        print(f"   Tipo: {type(e).__name__}")
-        print(f"   Mensaje: {str(e)}")
-        traceback.print_exc()
+        logger.exception("Error al desbloquear achievement")
         
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -106,21 +98,14 @@ async def unlock_achievement(
 async def get_all_achievements():
     """Obtiene todos los achievements disponibles"""
     try:
-        print(f"🔍 Obteniendo todos los achievements disponibles")
-        
         result = supabase.table("achievements")\
             .select("*")\
             .execute()
         
-        print(f"✅ Total achievements encontrados: {len(result.data) if result.data else 0}")
-        
         return result.data or []
         
     except Exception as e:
-        print(f"❌ ERROR en get_all_achievements:")
-        print(f"   Tipo: {type(e).__name__}")
-        print(f"   Mensaje: {str(e)}")
-        traceback.print_exc()
+        logger.exception("Error al obtener achievements")
         
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
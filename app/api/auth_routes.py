@@ -1,36 +1,53 @@
 # API_sueno/app/api/auth_routes.py
 
-from fastapi import APIRouter, Depends, Request, HTTPException, status
-from typing import Dict, Any
+import logging
+
+from fastapi import APIRouter, Depends, Query, Request, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from slowapi.util import get_remote_address
+from typing import Literal, Optional
 from app.api.services import (
     authenticate_user,
     get_user_by_id,
     list_users,
-    create_user,
+    register_user,
     update_user,
     delete_user,
     request_password_reset,
     reset_password_with_code,
-    hash_password,
-    create_access_token
+    issue_session,
+    refresh_session,
+    logout_session,
+    get_cached_profile,
+    get_cached_user,
+    upsert_user_profile,
+    PROFILE_CLAIMS
 )
 from app.schemas.auth import (
     LoginRequest, 
     LoginResponse, 
     ForgotPasswordRequest,
     ResetPasswordRequest,
+    RefreshRequest,
     TokenData
 )
-from app.schemas.users import UserResponse, UserCreate, UserUpdate
-from app.api.deps import get_current_user, require_role
+from app.schemas.users import UserResponse, UserCreate, UserUpdate, UserSearchPage
+from app.api.deps import get_current_user, get_token_claims, require_role
+from app.api.user_import import FORMATS, RequestStreamingResponse, format_from_content_type, import_users
+from app.api.user_export import FORMATS as EXPORT_FORMATS, export_users
+from app.api.user_search import search_users
 from app.core.recaptcha import verify_recaptcha
+from app.core.google_auth import verify_google_id_token
 from app.core.limiter import limiter
+from app.core import login_guard
 from app.core.database import supabase
 from pydantic import BaseModel
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
-print("✅ ARCHIVO DE RUTAS CARGADO CORRECTAMENTE (auth_routes.py)")
 
 # ============================
 #       AUTH ROUTES
@@ -40,12 +57,16 @@ print("✅ ARCHIVO DE RUTAS CARGADO CORRECTAMENTE (auth_routes.py)")
 @limiter.limit("5/minute")
 async def login(request: Request, data: LoginRequest):
     """
-    Login con rate limit y reCAPTCHA.
+    Login con rate limit, backoff de fallos y reCAPTCHA.
     Máximo 5 intentos por minuto.
     Ruta final: POST /api/auth/login
     """
+    client_ip = get_remote_address(request)
+    # Cuenta o IP bloqueadas: 429 sin reCAPTCHA, BD ni bcrypt
+    login_guard.check(data.email, client_ip)
     await verify_recaptcha(data.recaptcha_token)
-    return authenticate_user(data)
+    # bcrypt (y el rehash si toca) fuera del event loop
+    return await run_in_threadpool(authenticate_user, data, client_ip)
 
 
 @router.post("/register", response_model=UserResponse, summary="Registro Público de Usuario")
@@ -57,68 +78,56 @@ async def public_user_registration(request: Request, data: UserCreate):
     Ruta final: POST /api/auth/register
     """
     await verify_recaptcha(data.recaptcha_token)
-    return create_user(data)
+    return await register_user(data)
 
 
 # 🔥 Google Login
 class GoogleLoginRequest(BaseModel):
     google_token: str
-    email: str
-    name: str
-    google_id: str
+    # Se aceptan por compatibilidad con el frontend, pero los datos del
+    # usuario salen siempre del token verificado
+    email: Optional[str] = None
+    name: Optional[str] = None
+    google_id: Optional[str] = None
 
 
 @router.post("/google-login")
 async def google_login(data: GoogleLoginRequest):
     """
     Login/registro automático con Google OAuth
+    El ID token se verifica localmente contra las claves públicas de Google.
     Ruta final: POST /api/auth/google-login
     """
+    claims = await verify_google_id_token(data.google_token)
+    email = claims["email"]
+    name = claims.get("name") or email.split("@")[0]
+
     try:
-        print(f"🔍 Google Login - Email: {data.email}, Name: {data.name}")
-        
         user_response = None
         try:
-            user_response = supabase.table("users").select("*").eq("email", data.email).maybe_single().execute()
-            print(f"🔍 Respuesta de Supabase: {user_response}")
+            user_response = supabase.table("users").select("*").eq("email", email).maybe_single().execute()
         except Exception as db_error:
-            print(f"❌ Error al consultar base de datos: {db_error}")
+            logger.warning("Error al consultar el usuario de Google: %s", db_error)
         
         if user_response and user_response.data:
             # Usuario existe
             user_data = user_response.data
             user_id = int(user_data["id"])
             
-            print(f"✅ Usuario existente encontrado: {user_id}")
+            logger.debug("Login con Google de usuario existente", extra={"user_id": user_id})
             
             role_response = supabase.table("roles").select("name").eq("id", user_data["role_id"]).single().execute()
             
-            token = create_access_token({
-                "sub": str(user_id),
-                "email": user_data["email"],
-                "role": role_response.data["name"],
-                "name": data.name
-            })
-            
-            return {
-                "access_token": token,
-                "token_type": "bearer",
-                "role": role_response.data["name"],
-                "user": {
-                    "id": user_id,
-                    "email": user_data["email"],
-                    "name": data.name,
-                    "role": role_response.data["name"]
-                }
-            }
+            return issue_session(user_data, role_response.data["name"], name)
         else:
-            # Usuario no existe, registrarlo
-            print(f"⚠️ Usuario no existe, creando nuevo usuario con Google")
-            
+            # Usuario no existe, registrarlo sin contraseña (solo puede
+            # entrar con Google): no se paga el coste de bcrypt
             insert_response = supabase.table("users").insert({
-                "email": data.email,
-                "hashed_password": hash_password(data.google_id),
-                "full_name": data.name,
+                "email": email,
+                "hashed_password": None,
+                "google_id": claims["sub"],
+                "auth_provider": "google",
+                "full_name": name,
                 "role_id": 2,
                 "is_active": True,
                 "is_verified": True
@@ -130,48 +139,49 @@ async def google_login(data: GoogleLoginRequest):
             user_data = insert_response.data[0]
             user_id = int(user_data["id"])
             
-            print(f"✅ Nuevo usuario creado con Google: {user_id}")
+            logger.info("Usuario creado con Google", extra={"user_id": user_id})
             
             # Crear perfil
             try:
                 supabase.table("profiles").insert({
                     "id": user_id,
-                    "name": data.name,
+                    "name": name,
                 }).execute()
-                print(f"✅ Perfil creado para Google user: {user_id}")
             except Exception as profile_error:
-                print(f"⚠️ Error al crear perfil (no crítico): {profile_error}")
+                logger.warning("No se pudo crear el perfil (no crítico): %s", profile_error, extra={"user_id": user_id})
             
             role_response = supabase.table("roles").select("name").eq("id", 2).single().execute()
             
-            token = create_access_token({
-                "sub": str(user_id),
-                "email": data.email,
-                "role": role_response.data["name"],
-                "name": data.name
-            })
-            
-            return {
-                "access_token": token,
-                "token_type": "bearer",
-                "role": role_response.data["name"],
-                "user": {
-                    "id": user_id,
-                    "email": data.email,
-                    "name": data.name,
-                    "role": role_response.data["name"]
-                }
-            }
+            return issue_session(user_data, role_response.data["name"], name)
             
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error en Google login: {e}")
-        import traceback
-        print(f"❌ Traceback completo: {traceback.format_exc()}")
+        logger.exception("Error en Google login")
         raise HTTPException(status_code=500, detail=f"Error en Google login: {str(e)}")
 
 
+@router.post("/refresh", response_model=LoginResponse)
+@limiter.limit("30/minute")
+async def refresh(request: Request, data: RefreshRequest):
+    """
+    Renueva el access token. El refresh token es de un solo uso: se
+    devuelve uno nuevo y reutilizar el anterior cierra la sesión.
+    Ruta final: POST /api/auth/refresh
+    """
+    # Lecturas de usuario y del almacén TTL síncronas: fuera del event loop
+    return await run_in_threadpool(refresh_session, data.refresh_token)
+
+
+@router.post("/logout")
+async def logout(data: RefreshRequest):
+    """
+    Cierra la sesión del refresh token.
+    Ruta final: POST /api/auth/logout
+    """
+    return await run_in_threadpool(logout_session, data.refresh_token)
+
+
 @router.post("/forgot-password")
 @limiter.limit("3/minute")
 async def forgot_password(request: Request, data: ForgotPasswordRequest):
@@ -203,6 +213,77 @@ def get_users(user=Depends(require_role("admin"))):
     return list_users()
 
 
+@router.post("/users/import", summary="Importación masiva de usuarios")
+async def bulk_import_users(
+    request: Request,
+    format: Optional[str] = None,
+    user=Depends(require_role("admin"))
+):
+    """
+    Importa usuarios desde CSV (con cabecera) o NDJSON enviado en el cuerpo.
+    El formato sale de `?format=csv|ndjson` o del Content-Type.
+    Responde con un informe NDJSON en streaming: las líneas de cada bloque
+    se envían en cuanto se inserta y el resumen va en la última línea.
+    Ruta final: POST /api/auth/users/import
+    """
+    fmt = format or format_from_content_type(request.headers.get("content-type", ""))
+    if fmt not in FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Formato no soportado: usa text/csv o application/x-ndjson"
+        )
+
+    return RequestStreamingResponse(import_users(request.stream(), fmt), media_type="application/x-ndjson")
+
+
+@router.get("/users/export", summary="Exportación de usuarios en streaming")
+async def export_users_route(
+    format: str = "csv",
+    gzip: bool = False,
+    user=Depends(require_role("admin"))
+):
+    """
+    Exporta usuarios con su rol, perfil y estadísticas en CSV o NDJSON.
+    Se envía por páginas a medida que llegan de la BD; `?gzip=true` comprime.
+    Ruta final: GET /api/auth/users/export
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="Formato no soportado: usa csv o ndjson")
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"usuarios.{format}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        export_users(format, compress=gzip),
+        media_type="application/gzip" if gzip else media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/users/search", response_model=UserSearchPage, summary="Búsqueda de usuarios")
+def search_users_route(
+    q: Optional[str] = Query(None, max_length=100, description="Texto a buscar en email y nombre"),
+    match: Literal["substring", "prefix"] = "substring",
+    role: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    is_verified: Optional[bool] = None,
+    min_age: Optional[int] = Query(None, ge=0),
+    max_age: Optional[int] = Query(None, ge=0),
+    sort: Literal["id", "email", "full_name", "created_at"] = "id",
+    order: Literal["asc", "desc"] = "asc",
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor de la página anterior"),
+    user=Depends(require_role("admin"))
+):
+    """
+    Búsqueda, filtros, orden y paginación en la BD (no en el cliente).
+    Ruta final: GET /api/auth/users/search
+    """
+    return search_users(
+        q=q, match=match, role=role, is_active=is_active, is_verified=is_verified,
+        min_age=min_age, max_age=max_age, sort=sort, order=order, limit=limit, cursor=cursor,
+    )
+
+
 @router.get("/users/{user_id}", response_model=UserResponse)
 def get_user(user_id: int, user=Depends(require_role("admin"))):
     """Ruta final: GET /api/auth/users/{user_id}"""
@@ -226,9 +307,20 @@ def remove_user(user_id: int, user=Depends(require_role("admin"))):
 # ============================
 
 @router.get("/me", response_model=UserResponse)
-def profile(current=Depends(get_current_user)):
-    """Ruta final: GET /api/auth/me"""
-    return get_user_by_id(current.id)
+async def profile(claims: dict = Depends(get_token_claims)):
+    """
+    Datos del usuario desde los claims del token, sin consultar la BD.
+    Ruta final: GET /api/auth/me
+    """
+    if "is_active" not in claims:
+        # Token emitido antes de llevar los datos del perfil
+        return await get_cached_user(int(claims["sub"]))
+    return {
+        "id": int(claims["sub"]),
+        "email": claims["email"],
+        "role": claims["role"],
+        **{key: claims.get(key) for key in PROFILE_CLAIMS},
+    }
 
 
 # ============================
@@ -249,60 +341,14 @@ async def get_user_profile(
     current_user: TokenData = Depends(get_current_user)
 ):
     """
-    Obtiene el perfil completo del usuario desde Supabase
+    Obtiene el perfil completo del usuario (caché en memoria, luego Supabase)
     Ruta final: GET /api/auth/profile
     ⚠️ NOTA: El frontend debe llamar a /api/auth/profile
     """
     try:
-        user_id = int(current_user.id)
-        email = current_user.email
-        
-        print(f"🔍 get_user_profile - user_id: {user_id}, email: {email}")
-        
-        result = supabase.table("profiles")\
-            .select("*")\
-            .eq("id", user_id)\
-            .execute()
-        
-        if result.data and len(result.data) > 0:
-            print(f"✅ Perfil encontrado en Supabase: {result.data[0]}")
-            profile_data = result.data[0]
-            profile_data["email"] = email
-            return profile_data
-        else:
-            print(f"⚠️ Perfil no encontrado, creando uno básico")
-            
-            user_result = supabase.table("users")\
-                .select("full_name")\
-                .eq("id", user_id)\
-                .execute()
-            
-            default_name = user_result.data[0].get("full_name") if user_result.data else email.split("@")[0]
-            
-            new_profile = supabase.table("profiles").insert({
-                "id": user_id,
-                "name": default_name,
-                "age": None,
-                "phone": None,
-                "gender": None
-            }).execute()
-            
-            if new_profile.data:
-                profile_data = new_profile.data[0]
-                profile_data["email"] = email
-                return profile_data
-            
-            return {
-                "id": user_id,
-                "name": default_name,
-                "email": email,
-                "age": None,
-                "phone": None,
-                "gender": None
-            }
-            
+        return await get_cached_profile(int(current_user.id), current_user.email)
     except Exception as e:
-        print(f"❌ Error en get_user_profile: {str(e)}")
+        logger.exception("Error al obtener perfil")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al obtener perfil: {str(e)}"
@@ -324,49 +370,26 @@ async def update_user_profile(
         user_id = int(current_user.id)
         email = current_user.email
         
-        print(f"🔍 update_user_profile - user_id: {user_id}")
-        print(f"🔍 Datos recibidos: {profile_data}")
-        
         update_dict = profile_data.dict(exclude_unset=True, exclude_none=True)
         
-        print(f"🔍 Datos a actualizar (sin None): {update_dict}")
-        
         if not update_dict:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="No hay datos para actualizar"
             )
         
-        existing = supabase.table("profiles")\
-            .select("*")\
-            .eq("id", user_id)\
-            .execute()
-        
-        if existing.data and len(existing.data) > 0:
-            print(f"✅ Perfil existe, actualizando...")
-            result = supabase.table("profiles")\
-                .update(update_dict)\
-                .eq("id", user_id)\
-                .execute()
-        else:
-            print(f"⚠️ Perfil no existe, creando uno nuevo...")
-            update_dict["id"] = user_id
-            result = supabase.table("profiles")\
-                .insert(update_dict)\
-                .execute()
-        
-        if not result.data:
+        # Una sola llamada: sin carrera si el cliente envía dos veces
+        updated_profile = upsert_user_profile(user_id, update_dict)
+
+        if not updated_profile:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Error al actualizar perfil en la base de datos"
             )
         
-        updated_profile = result.data[0] if result.data else None
-        
-        if updated_profile:
-            updated_profile["email"] = email
+        updated_profile["email"] = email
         
-        print(f"✅ Perfil actualizado correctamente: {updated_profile}")
+        logger.debug("Perfil actualizado", extra={"user_id": user_id})
         
         # 🔧 CORRECCIÓN: Devolver en el formato esperado por el frontend
         return {
@@ -377,7 +400,7 @@ async def update_user_profile(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error al actualizar perfil: {str(e)}")
+        logger.exception("Error al actualizar perfil")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al actualizar perfil: {str(e)}"
@@ -1,17 +1,21 @@
-from fastapi import Depends, HTTPException, status
+import logging
+
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt, JWTError
-from app.core.security import SECRET_KEY, ALGORITHM
+from app.core.security import request_claims
 from app.schemas.auth import TokenData
 from app.db.supabase_client import supabase
 
+logger = logging.getLogger(__name__)
+
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
 
-def get_current_user(token: str = Depends(oauth2_scheme)) -> TokenData:
+def get_current_user(request: Request, token: str = Depends(oauth2_scheme)) -> TokenData:
     """
     Decodifica el JWT y devuelve información del usuario.
+    Si RBACMiddleware ya lo decodificó, se reutilizan sus claims.
     """
     credentials_error = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -20,32 +24,46 @@ def get_current_user(token: str = Depends(oauth2_scheme)) -> TokenData:
     )
 
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        
+        payload = request_claims(request, token)
+        if payload is None:
+            raise credentials_error
+
         # ✅ Obtener user_id desde "sub" (donde lo guardaste en services.py)
         user_id = payload.get("sub")
         email = payload.get("email")
         role = payload.get("role")
 
         if user_id is None or email is None or role is None:
-            print(f"❌ Faltan datos en token: user_id={user_id}, email={email}, role={role}")
+            logger.debug("Faltan datos en el token (sub, email o role)")
             raise credentials_error
 
         # ✅ CORRECCIÓN: Mantener user_id como string (UUID)
         # NO convertir a int porque es un UUID
-        
-        print(f"✅ Token decodificado correctamente: user_id={user_id}, email={email}, role={role}")
 
         return TokenData(id=user_id, email=email, role=role)
 
-    except JWTError as e:
-        print(f"❌ Error JWT: {str(e)}")
-        raise credentials_error
-    except Exception as e:
-        print(f"❌ Error inesperado: {str(e)}")
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception("Error inesperado al validar el token")
         raise credentials_error
 
 
+def get_token_claims(request: Request, token: str = Depends(oauth2_scheme)) -> dict:
+    """
+    Todos los claims del access token (rol y datos del perfil), sin
+    consultar la BD.
+    """
+    payload = request_claims(request, token)
+    if payload is None or payload.get("sub") is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token inválido o expirado",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    return payload
+
+
 def require_role(*roles: str):
     """
     Validar rol requerido.
@@ -59,6 +77,8 @@ def require_role(*roles: str):
             )
         return current
 
+    # RBACMiddleware lee los roles de la dependencia al construir su tabla
+    role_checker.allowed_roles = roles
     return role_checker
 
 
@@ -1,3 +1,5 @@
+import logging
+
 from fastapi import APIRouter, Depends, HTTPException, status
 from datetime import date, datetime, timedelta
 from typing import List, Dict, Any
@@ -5,6 +7,8 @@ from pydantic import BaseModel
 from app.core.database import supabase
 from app.core.security import get_current_user
 
+logger = logging.getLogger(__name__)
+
 # ✅ CAMBIADO: Quitamos /api del prefix
 router = APIRouter(prefix="/habits", tags=["habits"])
 
@@ -137,18 +141,12 @@ async def get_habit_stats(
 ):
     """Obtiene estadísticas de hábitos del usuario desde user_stats"""
     try:
-        print(f"🔍 get_habit_stats - current_user: {current_user}")
-        print(f"🔍 get_habit_stats - user_id: {current_user['id']} (tipo: {type(current_user['id'])})")
-        
         # Obtener stats de la tabla user_stats
-        print(f"🔍 Buscando en user_stats con user_id: {current_user['id']}")
         stats_result = supabase.table("user_stats")\
             .select("*")\
             .eq("user_id", current_user["id"])\
             .execute()
         
-        print(f"🔍 Resultado de user_stats: {stats_result.data}")
-        
         if stats_result.data and len(stats_result.data) > 0:
             stats = stats_result.data[0]
             return {
@@ -162,7 +160,7 @@ async def get_habit_stats(
         # Si no existe registro en user_stats, calcular manualmente
         today = date.today().isoformat()
         
-        print(f"🔍 No hay stats, calculando manualmente para user_id: {current_user['id']}")
+        logger.debug("Sin user_stats, se calculan las estadísticas", extra={"user_id": current_user["id"]})
         
         # Total de hábitos completados
         all_habits = supabase.table("habits_history")\
@@ -209,9 +207,7 @@ async def get_habit_stats(
         }
         
     except Exception as e:
-        print(f"❌ ERROR COMPLETO en get_habit_stats: {type(e).__name__}: {str(e)}")
-        import traceback
-        print(f"❌ TRACEBACK: {traceback.format_exc()}")
+        logger.exception("Error al obtener estadísticas de hábitos")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al obtener estadísticas: {str(e)}"
@@ -1,39 +1,328 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from google.generativeai import configure, GenerativeModel
+import asyncio
+import json
+import logging
+import math
+import time
+from typing import Callable, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from pydantic import BaseModel, Field
 from app.core.config import settings
+from app.core.metrics import registry
+from app.core.cache import TTLCache
+from app.core.utils import normalize_prompt
+from app.core.admission import TokenBucketLimiter
+from app.api.deps import get_current_user
+from app.chatbot.conversation import ConversationStore
+from app.chatbot.llm_provider import llm_provider, LLMUnavailableError
+from app.schemas.auth import TokenData
+from app.chatbot.llm_pool import (
+    ADMISSION_REJECTED,
+    LLMPool,
+    LLMStream,
+    LLMTimeoutError,
+    LLMOverloadedError,
+)
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 # -------------------------
-# 1. Validar API Key
+# 1. Cliente del LLM (se crea en el primer uso)
 # -------------------------
-if not settings.GEMINI_API_KEY:
-    raise RuntimeError("❌ No se encontró GEMINI_API_KEY en el archivo .env")
+def get_llm_pool() -> LLMPool:
+    """
+    Dependencia que devuelve el pool compartido del LLM.
+    Si falta la API key o el SDK falla, responde 503 en lugar de tumbar la app.
+    """
+    try:
+        return llm_provider.get_pool()
+    except LLMUnavailableError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"El chatbot no está disponible: {e}",
+            headers={"Retry-After": str(int(llm_provider.retry_seconds))},
+        )
+
+
+# Límite por usuario (sub del JWT)
+user_limiter = TokenBucketLimiter(
+    rate=settings.CHATBOT_RATE_PER_MINUTE / 60.0,
+    burst=settings.CHATBOT_BURST,
+)
 
-# Configurar la API
-configure(api_key=settings.GEMINI_API_KEY)
+# Caché de respuestas para preguntas casi idénticas
+response_cache = TTLCache(
+    "chatbot_responses",
+    max_entries=settings.CHATBOT_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.CHATBOT_CACHE_TTL_SECONDS,
+    max_bytes=settings.CHATBOT_CACHE_MAX_BYTES,
+)
 
-# Modelo Gemini a usar
-model = GenerativeModel("gemini-2.5-flash")
+# Historial de conversación por usuario/sesión
+memory = ConversationStore(
+    max_sessions=settings.CHATBOT_MEMORY_MAX_SESSIONS,
+    max_bytes=settings.CHATBOT_MEMORY_MAX_BYTES,
+    idle_seconds=settings.CHATBOT_MEMORY_IDLE_SECONDS,
+    context_tokens=settings.CHATBOT_CONTEXT_TOKENS,
+    summary_tokens=settings.CHATBOT_SUMMARY_TOKENS,
+)
+
+STREAM_TTFB = registry.histogram(
+    "chatbot_stream_ttfb_seconds",
+    "Tiempo desde la petición hasta el primer fragmento enviado por SSE",
+)
 
 # -------------------------
 # 2. Esquema de entrada
 # -------------------------
 class ChatbotRequest(BaseModel):
     prompt: str
+    use_cache: bool = True  # False fuerza una respuesta nueva del modelo (y la guarda)
+    # Con session_id el servidor recuerda la conversación: basta enviar la pregunta nueva
+    session_id: Optional[str] = Field(default=None, max_length=64)
+
+
+def cache_key(prompt: str) -> str:
+    return f"{settings.CHATBOT_MODEL}:{normalize_prompt(prompt)}"
+
 
 # -------------------------
-# 3. Endpoint del chatbot
+# 3. Control de admisión
+# -------------------------
+def admit_user(current_user: TokenData = Depends(get_current_user)) -> TokenData:
+    """
+    Exige autenticación y aplica el token-bucket por usuario antes de
+    hacer cualquier trabajo. Responde 429 con Retry-After si se excede.
+    """
+    allowed, retry_after = user_limiter.try_acquire(current_user.id)
+    if not allowed:
+        ADMISSION_REJECTED.inc(reason="rate_limited")
+        raise HTTPException(
+            status_code=429,
+            detail="Demasiadas preguntas al chatbot. Intenta de nuevo en unos segundos.",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+    return current_user
+
+
+def overloaded(e: LLMOverloadedError) -> HTTPException:
+    return HTTPException(
+        status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)}
+    )
+
+
+# -------------------------
+# 4. Cancelación si el cliente se desconecta
+# -------------------------
+async def run_until_disconnected(request: Request, coro, poll_interval: float):
+    """
+    Ejecuta `coro` y la cancela si el cliente cierra la conexión antes
+    de que termine, para no seguir gastando cuota del LLM.
+    """
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                raise HTTPException(status_code=499, detail="Cliente desconectado")
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+# -------------------------
+# 5. Server-Sent Events
+# -------------------------
+def sse_event(event: str, data: dict) -> str:
+    """Formatea un evento SSE; `data` va en JSON para admitir saltos de línea."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def sse_stream(
+    request: Request,
+    stream: LLMStream,
+    started: float,
+    heartbeat: float,
+    on_done: Optional[Callable[[str], None]] = None,
+):
+    """
+    Reenvía los fragmentos del modelo como eventos SSE.
+
+    - Solo se pide el siguiente fragmento cuando el anterior se ha enviado
+      (backpressure natural de StreamingResponse).
+    - Si el modelo tarda más de `heartbeat` segundos, se envía un comentario
+      `: ping` para mantener viva la conexión en proxies.
+    - Si el cliente se desconecta, se cierra el stream y se libera el pool.
+    - `on_done` recibe el texto completo si la respuesta termina bien.
+    """
+    first = True
+    next_chunk = None
+    parts = []
+    try:
+        while True:
+            if next_chunk is None:
+                next_chunk = asyncio.ensure_future(stream.__anext__())
+
+            done, _ = await asyncio.wait({next_chunk}, timeout=heartbeat)
+            if not done:
+                if await request.is_disconnected():
+                    return
+                yield ": ping\n\n"
+                continue
+
+            task, next_chunk = next_chunk, None
+            try:
+                text = task.result()
+            except StopAsyncIteration:
+                if on_done is not None:
+                    on_done("".join(parts))
+                yield sse_event("done", {})
+                return
+            except LLMTimeoutError as e:
+                yield sse_event("error", {"status": 504, "detail": str(e)})
+                return
+            except Exception:
+                logger.exception("Error en streaming del chatbot")
+                yield sse_event("error", {"status": 500, "detail": "Error al generar respuesta"})
+                return
+
+            if first:
+                first = False
+                STREAM_TTFB.observe(time.perf_counter() - started)
+            if on_done is not None:
+                parts.append(text)
+            yield sse_event("chunk", {"text": text})
+    finally:
+        if next_chunk is not None and not next_chunk.done():
+            next_chunk.cancel()
+        await stream.close()
+
+
+# -------------------------
+# 6. Endpoints del chatbot
 # -------------------------
 @router.post("/ask")  # ✅ Sin "/chatbot" porque ya está en el prefix
-async def ask_chatbot(data: ChatbotRequest):
+async def ask_chatbot(
+    request: Request,
+    data: ChatbotRequest,
+    current_user: TokenData = Depends(admit_user),
+    pool: LLMPool = Depends(get_llm_pool),
+):
     try:
-        response = model.generate_content(data.prompt)
-        return {"response": response.text}
+        session_id = data.session_id
+        # Con historial la respuesta depende del contexto: no se cachea
+        has_history = bool(session_id) and memory.has_history(current_user.id, session_id)
+        prompt = (
+            memory.build_prompt(current_user.id, session_id, data.prompt)
+            if has_history else data.prompt
+        )
+
+        cacheable = settings.CHATBOT_CACHE_ENABLED and not has_history
+        if cacheable and data.use_cache:
+            # Peticiones idénticas concurrentes comparten una sola llamada al
+            # modelo, pero cada una pasa por la cola justa con su propia clave
+            call = response_cache.get_or_load(
+                cache_key(data.prompt),
+                lambda: pool.generate(prompt, user_key=current_user.id),
+                admit=lambda: pool.admit(current_user.id),
+            )
+        else:
+            call = pool.generate(prompt, user_key=current_user.id)
+
+        text = await run_until_disconnected(
+            request, call, settings.CHATBOT_DISCONNECT_POLL_SECONDS
+        )
+        if cacheable and not data.use_cache:
+            # La respuesta nueva sustituye a la cacheada (p. ej. una mala)
+            response_cache.set(cache_key(data.prompt), text)
+
+        if session_id:
+            memory.record(current_user.id, session_id, data.prompt, text)
+            return {"response": text, "session_id": session_id}
+        return {"response": text}
+    except HTTPException:
+        raise
+    except LLMOverloadedError as e:
+        raise overloaded(e)
+    except LLMTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
-        print("❌ Error al generar respuesta:", e)
+        logger.exception("Error al generar respuesta")
         raise HTTPException(
             status_code=500,
             detail=f"Error: {str(e)}"
-        )# Buscar todas las instancias de GenerativeModel
+        )
+
+
+@router.post("/ask/stream")
+async def ask_chatbot_stream(
+    request: Request,
+    data: ChatbotRequest,
+    current_user: TokenData = Depends(admit_user),
+    pool: LLMPool = Depends(get_llm_pool),
+):
+    """
+    Variante en streaming de /ask: devuelve `text/event-stream` con eventos
+    `chunk` ({"text": ...}), `done` al terminar o `error` si algo falla.
+    """
+    started = time.perf_counter()
+    session_id = data.session_id
+    prompt = (
+        memory.build_prompt(current_user.id, session_id, data.prompt)
+        if session_id else data.prompt
+    )
+    on_done = (
+        (lambda text: memory.record(current_user.id, session_id, data.prompt, text))
+        if session_id else None
+    )
+    try:
+        stream = await pool.stream(prompt, user_key=current_user.id).start()
+    except LLMOverloadedError as e:
+        raise overloaded(e)
+    except LLMTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        logger.exception("Error al iniciar streaming")
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+
+    return StreamingResponse(
+        sse_stream(request, stream, started, settings.CHATBOT_SSE_HEARTBEAT_SECONDS, on_done),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Garantiza liberar el hueco del pool aunque el stream no llegue a iterarse
+        background=BackgroundTask(stream.close),
+    )
+
+
+@router.delete("/sessions/{session_id}")
+async def clear_chatbot_session(
+    session_id: str,
+    current_user: TokenData = Depends(get_current_user),
+):
+    """Olvida el historial de una conversación del usuario actual."""
+    if not memory.clear(current_user.id, session_id):
+        raise HTTPException(status_code=404, detail="Conversación no encontrada")
+    return {"message": "Conversación eliminada", "session_id": session_id}
+
+
+@router.get("/metrics")
+async def chatbot_metrics():
+    """Latencia, cola, rechazos y llamadas en curso del LLM, y uso de la caché."""
+    pool = llm_provider.get_pool() if llm_provider.ready else None
+    return {
+        **registry.snapshot(prefix="chatbot_"),
+        "llm_ready": pool is not None,
+        "queue": {
+            "in_flight": pool.in_flight if pool else 0,
+            "queued": pool.queued if pool else 0,
+        },
+        "cache": response_cache.stats(),
+        "memory": {"sessions": len(memory), "bytes": memory.bytes_used},
+    }
@@ -1,69 +1,160 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
 from fastapi import HTTPException, status
-from passlib.context import CryptContext
-from jose import jwt
-from datetime import datetime, timedelta
+from fastapi.concurrency import run_in_threadpool
+from postgrest.exceptions import APIError
+from typing import Optional
+import logging
 
 from app.db.supabase_client import supabase
 from app.core.config import settings
+from app.core import login_guard, passwords, security, tokens
 from app.schemas.users import UserCreate, UserUpdate
 from app.schemas.auth import LoginRequest
 
 import secrets
 from app.core.email_utils import send_password_reset_email
+from app.core.cache import TTLCache
+from app.core.ttl_store import lazy_store
 
+logger = logging.getLogger(__name__)
 
-# ============================
-# 📌 Configuración de bcrypt
-# ============================
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+UNIQUE_VIOLATION = "23505"
 
 
 # ============================
 # 📌 HASH & VERIFY PASSWORD
 # ============================
+# Todo pasa por app/core/passwords.py (bcrypt con coste calibrado).
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return passwords.hash_password(password)
 
 
 def verify_password(plain_password, hashed_password) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return passwords.verify_password(plain_password, hashed_password)
+
+
+# bcrypt es CPU pura: ejecutor propio del tamaño de la CPU. Así una ráfaga
+# de registros no ocupa el threadpool de las rutas síncronas ni reparte la
+# CPU entre decenas de hashes a la vez (cada alta tardaría lo de todas).
+_hash_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="bcrypt")
+
+
+async def hash_password_async(password: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(_hash_executor, hash_password, password)
 
 
 # ============================
 # 📌 GENERAR TOKEN JWT
 # ============================
 
-def create_access_token(data: dict, expires_minutes: int = 120):
-    to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(minutes=expires_minutes)
-    to_encode.update({"exp": expire})
+def create_access_token(data: dict, expires_minutes: Optional[int] = None):
+    """Access token corto (ACCESS_TOKEN_EXPIRE_MINUTES); se renueva con /refresh."""
+    return security.create_access_token(data, expires_minutes)
+
+
+# ============================
+# 📌 SESIONES (ACCESS + REFRESH)
+# ============================
+# El access token lleva el rol y los datos del perfil: los endpoints de
+# lectura (/me) no consultan la BD. Los cambios de rol llegan como mucho en
+# ACCESS_TOKEN_EXPIRE_MINUTES (o al instante si se revocan los tokens).
+
+PROFILE_CLAIMS = ("full_name", "is_active", "is_verified", "age", "phone", "gender")
+
+
+def user_claims(user_data: dict, role: str, name: Optional[str] = None) -> dict:
+    claims = {
+        "sub": str(user_data["id"]),
+        "email": user_data["email"],
+        "role": role,
+        "name": name or user_data.get("full_name") or user_data["email"].split("@")[0],
+    }
+    claims.update({key: user_data.get(key) for key in PROFILE_CLAIMS})
+    return claims
+
+
+def issue_session(user_data: dict, role: str, name: Optional[str] = None, family: Optional[str] = None) -> dict:
+    """Access token con claims + refresh token (nuevo o rotado en la misma familia)."""
+    claims = user_claims(user_data, role, name)
+    return {
+        "access_token": create_access_token(claims),
+        "refresh_token": tokens.issue_refresh_token(int(user_data["id"]), family),
+        "token_type": "bearer",
+        "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        "role": role,
+        "user": {
+            "id": int(user_data["id"]),
+            "email": user_data["email"],
+            "name": claims["name"],
+            "role": role
+        }
+    }
+
 
-    return jwt.encode(
-        to_encode,
-        settings.SECRET_KEY,
-        algorithm=settings.ALGORITHM
+def refresh_session(refresh_token: str) -> dict:
+    """
+    Rota el refresh token y emite un access token con datos frescos de la BD
+    (aquí es donde se recogen los cambios de rol o de perfil).
+    """
+    invalid = HTTPException(
+        status_code=401,
+        detail="Refresh token inválido o caducado",
+        headers={"WWW-Authenticate": "Bearer"}
     )
+    try:
+        user_id, family = tokens.consume_refresh_token(refresh_token)
+    except tokens.RefreshTokenError:
+        raise invalid
+
+    try:
+        user_data = get_user_by_id(user_id)
+    except Exception:
+        user_data = None
+    if not user_data or user_data.get("is_active") is False:
+        tokens.revoke_family(family)
+        raise invalid
+
+    return issue_session(user_data, user_data["role"], family=family)
+
+
+def logout_session(refresh_token: str) -> dict:
+    """Cierra la sesión del refresh token (su familia entera)."""
+    family = tokens.family_of(refresh_token)
+    if family:
+        tokens.revoke_family(family)
+    return {"message": "Sesión cerrada"}
 
 
 # ============================
 # 📌 AUTH SERVICES
 # ============================
 
-def authenticate_user(login: LoginRequest):
+def authenticate_user(login: LoginRequest, client_ip: Optional[str] = None):
     """
     Verifica email + contraseña y devuelve nombre del usuario.
+    Los fallos cuentan para el backoff de la cuenta y de `client_ip`.
     """
     user = supabase.table("users").select("*").eq("email", login.email).maybe_single().execute()
+    user_data = user.data if user else None
 
-    if not user or not user.data:
+    # Usuario inexistente o de Google (sin contraseña): mismo coste de bcrypt
+    # que una contraseña incorrecta, para no revelar qué emails existen
+    if not user_data or not user_data.get("hashed_password"):
+        passwords.dummy_verify(login.password)
+        login_guard.record_failure(login.email, client_ip, "unknown_user" if not user_data else "no_password")
         raise HTTPException(status_code=401, detail="Credenciales incorrectas")
 
-    user_data = user.data
-
-    if not verify_password(login.password, user_data["hashed_password"]):
+    valid, new_hash = passwords.verify_and_update(login.password, user_data["hashed_password"])
+    if not valid:
+        login_guard.record_failure(login.email, client_ip, "wrong_password")
         raise HTTPException(status_code=401, detail="Credenciales incorrectas")
+    login_guard.record_success(login.email)
+    if new_hash:
+        rehash_password(user_data["id"], user_data["hashed_password"], new_hash)
 
     # Obtener rol
     role = supabase.table("roles").select("name").eq("id", user_data["role_id"]).single().execute()
@@ -71,9 +162,6 @@ def authenticate_user(login: LoginRequest):
     # 🔧 CORRECCIÓN: Ahora user_id es INT4, mantenerlo como int
     user_id = int(user_data["id"])
     
-    print(f"🔍 authenticate_user - ID del usuario: {user_id}")
-    print(f"🔍 Tipo de user_id: {type(user_id)}")
-    
     # Obtener el nombre desde la tabla profiles
     try:
         profile = supabase.table("profiles")\
@@ -89,27 +177,25 @@ def authenticate_user(login: LoginRequest):
     if not name:
         name = user_data.get("full_name") or login.email.split("@")[0]
     
-    # 🔧 CORRECCIÓN: Pasar el ID como string en "sub" (JWT estándar)
-    token = create_access_token({
-        "sub": str(user_id),  # ✅ Convertir a string para JWT
-        "email": user_data["email"],
-        "role": role.data["name"],
-        "name": name
-    })
-    
-    print(f"✅ Token generado con ID: {user_id}")
+    logger.info("Login correcto", extra={"user_id": user_id})
 
-    return {
-        "access_token": token,
-        "token_type": "bearer",
-        "role": role.data["name"],
-        "user": {
-            "id": user_id,  # ✅ INT
-            "email": user_data["email"],
-            "name": name,
-            "role": role.data["name"]
-        }
-    }
+    return issue_session(user_data, role.data["name"], name)
+
+
+def rehash_password(user_id: int, old_hash: str, new_hash: str) -> None:
+    """
+    Guarda el hash rehecho con los parámetros actuales. Solo si el hash no
+    ha cambiado entretanto (p. ej. un reset de contraseña simultáneo); si
+    falla, el login sigue adelante y se reintenta en el siguiente.
+    """
+    try:
+        supabase.table("users").update({"hashed_password": new_hash})\
+            .eq("id", user_id)\
+            .eq("hashed_password", old_hash)\
+            .execute()
+        logger.info("Hash de contraseña actualizado", extra={"user_id": user_id, "bcrypt_cost": passwords.current_cost()})
+    except APIError:
+        logger.exception("No se pudo actualizar el hash de la contraseña")
 
 
 # ============================
@@ -148,67 +234,46 @@ def list_users():
     return users
 
 
-def create_user(data: UserCreate):
+def create_user(data: UserCreate, hashed_password: Optional[str] = None):
     """
-    Crea un nuevo usuario con role_id = 2 (usuario normal).
+    Crea un nuevo usuario con role_id = 2 (usuario normal) y su perfil.
+
+    Una sola llamada a la función register_user (ver supabase/migrations):
+    usuario, perfil y rol en la misma transacción, sin usuarios huérfanos.
+    El email repetido lo detecta la restricción UNIQUE, sin consulta previa.
     """
-    # Verificar si existe
-    try:
-        existing = supabase.table("users").select("*").eq("email", data.email).maybe_single().execute()
-        if existing and existing.data:
-            raise HTTPException(status_code=400, detail="El correo ya está registrado")
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"⚠️ Advertencia al verificar email existente: {e}")
-    
-    hashed = hash_password(data.password)
-    
+    hashed = hashed_password or hash_password(data.password)
+
     try:
-        result = supabase.table("users").insert({
-            "email": data.email,
-            "hashed_password": hashed,
-            "full_name": data.full_name,  # ✅ CORREGIDO: Usar data.full_name
-            "role_id": 2,
-            "age": data.age,
-            "phone": data.phone,
-            "gender": data.gender,
-            "is_active": True,
-            "is_verified": False
+        result = supabase.rpc("register_user", {
+            "p_email": data.email,
+            "p_hashed_password": hashed,
+            "p_full_name": data.full_name,
+            "p_age": data.age,
+            "p_phone": data.phone,
+            "p_gender": data.gender,
         }).execute()
-        
-        if not result.data:
-            raise HTTPException(status_code=500, detail="No se pudo crear el usuario en la base de datos.")
+    except APIError as e:
+        if e.code == UNIQUE_VIOLATION:
+            raise HTTPException(status_code=400, detail="El correo ya está registrado")
+        logger.exception("Error al crear usuario")
+        raise HTTPException(status_code=500, detail=f"Error al crear usuario: {e.message}")
 
-        user_data = result.data[0]
-        user_id = int(user_data["id"])  # ✅ Mantener como int
-        
-        print(f"✅ Usuario creado con ID: {user_id}")
-        
-        # Crear perfil en la tabla profiles
-        try:
-            supabase.table("profiles").insert({
-                "id": user_id,  # ✅ INT4
-                "name": data.full_name,  # ✅ CORREGIDO: Usar data.full_name
-                "age": data.age,
-                "phone": data.phone,
-                "gender": data.gender
-            }).execute()
-            print(f"✅ Perfil creado para user_id: {user_id}")
-        except Exception as profile_error:
-            print(f"⚠️ No se pudo crear perfil (no crítico): {profile_error}")
-        
-        # Obtener el nombre del rol
-        role = supabase.table("roles").select("name").eq("id", user_data["role_id"]).single().execute()
-        user_data["role"] = role.data["name"] if role and role.data else "user"
-        
-        return user_data
-    
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"❌ Error al crear usuario: {e}")
-        raise HTTPException(status_code=500, detail=f"Error al crear usuario: {str(e)}")
+    if not result.data:
+        raise HTTPException(status_code=500, detail="No se pudo crear el usuario en la base de datos.")
+
+    user_data = result.data
+    logger.info("Usuario creado", extra={"user_id": user_data["id"]})
+    return user_data
+
+
+async def register_user(data: UserCreate):
+    """
+    Registro desde una ruta async: el hash bcrypt (cientos de ms de CPU) y
+    la llamada a la BD salen del event loop.
+    """
+    hashed = await hash_password_async(data.password)
+    return await run_in_threadpool(create_user, data, hashed)
 
 
 def update_user(user_id: int, data: UserUpdate):  # ✅ Cambiado a int
@@ -222,6 +287,11 @@ def update_user(user_id: int, data: UserUpdate):  # ✅ Cambiado a int
 
     result = supabase.table("users").update(update_data).eq("id", user_id).execute()
     user_data = result.data[0]
+
+    # El rol y el estado viajan en el access token: invalidar los emitidos
+    if "role_id" in update_data or update_data.get("is_active") is False:
+        tokens.revoke_user_tokens(user_id)
+    invalidate_profile(user_id)
     
     # Obtener el nombre del rol
     role = supabase.table("roles").select("name").eq("id", user_data["role_id"]).single().execute()
@@ -237,14 +307,88 @@ def delete_user(user_id: int):  # ✅ Cambiado a int
     result = supabase.table("users").delete().eq("id", user_id).execute()
     if not result.data:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    tokens.revoke_user_tokens(user_id)
+    invalidate_profile(user_id)
     return {"message": "Usuario eliminado correctamente"}
 
 
+# ============================
+# 📌 CACHÉ DE PERFILES
+# ============================
+# /profile y /me son de las rutas más llamadas. Se guarda por usuario el
+# perfil y el usuario con su rol; las escrituras de este proceso invalidan
+# la entrada y el TTL acota lo que puede tardar en verse un cambio hecho
+# por otro worker. Tras un despliegue, las peticiones simultáneas de un
+# mismo usuario comparten una sola carga (single-flight).
+
+profile_cache = TTLCache(
+    "profiles",
+    max_entries=settings.PROFILE_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.PROFILE_CACHE_TTL_SECONDS,
+)
+
+
+def invalidate_profile(user_id: int) -> None:
+    profile_cache.invalidate(("profile", int(user_id)))
+    profile_cache.invalidate(("user", int(user_id)))
+
+
+def load_user_profile(user_id: int, email: str) -> dict:
+    """
+    Lee el perfil y, si no existe, crea uno básico con el full_name del
+    usuario (o la parte local del email). Una sola llamada: la función
+    get_or_create_profile (ver supabase/migrations) lo hace de forma atómica.
+    """
+    result = supabase.rpc("get_or_create_profile", {"p_user_id": user_id, "p_email": email}).execute()
+    if result.data:
+        return result.data[0]
+    # Usuario inexistente: no hay fila de la que colgar el perfil
+    return {"id": user_id, "name": email.split("@")[0], "age": None, "phone": None, "gender": None}
+
+
+def upsert_user_profile(user_id: int, changes: dict) -> Optional[dict]:
+    """
+    Actualiza (o crea) el perfil en un único INSERT ... ON CONFLICT y
+    devuelve la fila final. Solo se tocan las columnas de `changes`.
+    """
+    result = supabase.table("profiles")\
+        .upsert({**changes, "id": user_id}, on_conflict="id")\
+        .execute()
+    invalidate_profile(user_id)
+    return result.data[0] if result.data else None
+
+
+async def get_cached_profile(user_id: int, email: str) -> dict:
+    """Perfil del usuario (con su email) servido desde la caché."""
+    user_id = int(user_id)
+    profile = await profile_cache.get_or_load(
+        ("profile", user_id),
+        lambda: run_in_threadpool(load_user_profile, user_id, email),
+    )
+    return {**profile, "email": email}  # Copia: la entrada cacheada no se modifica
+
+
+async def get_cached_user(user_id: int) -> dict:
+    """Como `get_user_by_id`, pero servido desde la caché."""
+    user_id = int(user_id)
+    user = await profile_cache.get_or_load(
+        ("user", user_id),
+        lambda: run_in_threadpool(get_user_by_id, user_id),
+    )
+    return dict(user)
+
+
 # ============================
 # 📌 PASSWORD RECOVERY
 # ============================
 
-reset_codes = {}
+# Compartido entre workers: /forgot-password y /reset-password pueden
+# llegar a procesos distintos
+reset_codes = lazy_store("reset_codes")
+
+
+def _reset_ttl_seconds() -> float:
+    return settings.PASSWORD_RESET_TOKEN_EXPIRE_MINUTES * 60
 
 
 def request_password_reset(email: str):
@@ -261,10 +405,8 @@ def request_password_reset(email: str):
     
     reset_code = secrets.token_hex(3).upper()
     
-    reset_codes[email] = {
-        "code": reset_code,
-        "expires_at": datetime.utcnow() + timedelta(minutes=10)
-    }
+    reset_codes.set(email, {"code": reset_code}, _reset_ttl_seconds())
+    reset_codes.delete(f"attempts:{email}")
     
     email_sent = send_password_reset_email(email, reset_code)
     
@@ -284,33 +426,44 @@ def reset_password_with_code(email: str, code: str, new_password: str):
     """
     Verifica el código y cambia la contraseña.
     """
-    if email not in reset_codes:
+    stored_data = reset_codes.get(email)
+
+    # Los códigos expirados desaparecen del almacén
+    if stored_data is None:
         raise HTTPException(
             status_code=400,
-            detail="No hay ninguna solicitud de recuperación activa"
+            detail="No hay ninguna solicitud de recuperación activa o el código ha expirado"
         )
     
-    stored_data = reset_codes[email]
-    
-    if datetime.utcnow() > stored_data["expires_at"]:
-        del reset_codes[email]
+    if not secrets.compare_digest(stored_data["code"], code.upper()):
+        attempts = reset_codes.incr(f"attempts:{email}", _reset_ttl_seconds())
+        if attempts >= settings.PASSWORD_RESET_MAX_ATTEMPTS:
+            reset_codes.delete(email)
+            raise HTTPException(
+                status_code=400,
+                detail="Demasiados intentos. Solicita un código nuevo"
+            )
         raise HTTPException(
             status_code=400,
-            detail="El código ha expirado. Solicita uno nuevo"
+            detail="Código incorrecto"
         )
-    
-    if stored_data["code"] != code.upper():
+
+    # Uso único: si dos peticiones llegan a la vez solo una consume el código
+    if reset_codes.pop(email) is None:
         raise HTTPException(
             status_code=400,
-            detail="Código incorrecto"
+            detail="No hay ninguna solicitud de recuperación activa o el código ha expirado"
         )
+    reset_codes.delete(f"attempts:{email}")
     
     hashed = hash_password(new_password)
-    supabase.table("users").update({
+    updated = supabase.table("users").update({
         "hashed_password": hashed
     }).eq("email", email).execute()
-    
-    del reset_codes[email]
+    for row in updated.data or []:
+        invalidate_profile(row["id"])
+        # Como /logout, pero para todas las sesiones abiertas con la contraseña anterior
+        tokens.revoke_user_sessions(row["id"])
     
     return {
         "message": "Contraseña actualizada correctamente"
@@ -0,0 +1,95 @@
+import asyncio
+import csv
+import io
+import json
+import zlib
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.db.supabase_client import supabase
+
+FORMATS = ("csv", "ndjson")
+
+# Mismo orden que la función export_users (ver supabase/migrations)
+EXPORT_COLUMNS = (
+    "id", "email", "full_name", "role", "is_active", "is_verified",
+    "age", "phone", "gender", "created_at", "profile_name",
+    "total_habits_completed", "current_streak", "longest_streak", "average_sleep_hours",
+)
+
+
+# ================================
+# 📄 PÁGINAS CON CURSOR KEYSET
+# ================================
+# Cada página pide "id > último id visto": coste constante por página y
+# sin filas repetidas ni perdidas si se crean usuarios durante la exportación.
+
+def fetch_page(after: int, limit: int) -> List[Dict[str, Any]]:
+    result = supabase.rpc("export_users", {"p_after": after, "p_limit": limit}).execute()
+    return result.data or []
+
+
+async def iter_pages(page_size: Optional[int] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Recorre los usuarios página a página. La siguiente página se pide
+    mientras se envía la actual; nunca hay más de dos en memoria.
+    """
+    page_size = page_size or settings.USER_EXPORT_PAGE_SIZE
+    pending = asyncio.ensure_future(run_in_threadpool(fetch_page, 0, page_size))
+    try:
+        while True:
+            page = await pending
+            if len(page) < page_size:
+                pending = None
+                if page:
+                    yield page
+                return
+            pending = asyncio.ensure_future(run_in_threadpool(fetch_page, page[-1]["id"], page_size))
+            yield page
+    finally:
+        if pending is not None and not pending.done():
+            pending.cancel()  # Cliente desconectado a mitad de la exportación
+
+
+# ================================
+# 🧾 FORMATOS (CSV / NDJSON) Y GZIP
+# ================================
+
+def _csv_chunk(rows: List[Dict[str, Any]], header: bool = False) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    writer.writerows([row.get(column) for column in EXPORT_COLUMNS] for row in rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+def _ndjson_chunk(rows: List[Dict[str, Any]]) -> bytes:
+    return "".join(
+        json.dumps({column: row.get(column) for column in EXPORT_COLUMNS}, ensure_ascii=False, default=str) + "\n"
+        for row in rows
+    ).encode("utf-8")
+
+
+async def export_users(fmt: str, compress: bool = False, page_size: Optional[int] = None) -> AsyncIterator[bytes]:
+    """
+    Exportación en streaming: cada página se codifica y se envía en cuanto
+    llega. Con `compress` se envía en gzip, vaciando el compresor tras cada
+    página para que el cliente reciba datos desde el principio.
+    """
+    compressor = zlib.compressobj(wbits=31) if compress else None  # wbits=31: formato gzip
+
+    def encode(data: bytes) -> bytes:
+        if compressor is None:
+            return data
+        return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    if fmt == "csv":
+        yield encode(_csv_chunk([], header=True))
+    async for page in iter_pages(page_size):
+        yield encode(_csv_chunk(page) if fmt == "csv" else _ndjson_chunk(page))
+
+    if compressor is not None:
+        yield compressor.flush()
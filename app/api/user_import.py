@@ -0,0 +1,276 @@
+import asyncio
+import codecs
+import csv
+import io
+import json
+import logging
+import multiprocessing
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from postgrest.exceptions import APIError
+from pydantic import ValidationError
+
+from app.core.config import settings
+from app.core.passwords import current_cost, hash_password
+from app.db.supabase_client import supabase
+from app.schemas.users import UserImport
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("csv", "ndjson")
+
+
+# ================================
+# 🔐 HASH EN PARALELO (procesos)
+# ================================
+# bcrypt tarda cientos de ms por contraseña: con miles de filas, la única
+# forma de acortar la importación es repartir los hashes entre procesos.
+# Nunca con `fork`: copiar un proceso de uvicorn con hilos (threadpool,
+# logging, limpieza del almacén TTL) puede heredar locks tomados y colgarse.
+# El pool se cierra en el lifespan de la app (app/main.py).
+
+_hash_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _hash_workers() -> int:
+    return settings.USER_IMPORT_HASH_WORKERS or os.cpu_count() or 1
+
+
+def get_hash_pool() -> ProcessPoolExecutor:
+    global _hash_pool
+    if _hash_pool is None:
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        _hash_pool = ProcessPoolExecutor(max_workers=_hash_workers(), mp_context=multiprocessing.get_context(method))
+    return _hash_pool
+
+
+def shutdown_hash_pool() -> None:
+    global _hash_pool
+    if _hash_pool is not None:
+        _hash_pool.shutdown(cancel_futures=True)
+        _hash_pool = None
+
+
+def _hash_many(passwords: List[str], cost: int) -> List[str]:
+    return [hash_password(password, cost) for password in passwords]
+
+
+async def hash_passwords(passwords: List[str]) -> List[str]:
+    """Hashea un bloque repartiéndolo en un trozo por proceso."""
+    if not passwords:
+        return []
+    workers = _hash_workers()
+    size = -(-len(passwords) // workers)
+    cost = current_cost()  # Los procesos hijos no recalibran: todos con el coste de la app
+    loop = asyncio.get_running_loop()
+    parts = await asyncio.gather(*(
+        loop.run_in_executor(get_hash_pool(), _hash_many, passwords[i:i + size], cost)
+        for i in range(0, len(passwords), size)
+    ))
+    return [hashed for part in parts for hashed in part]
+
+
+# ================================
+# 📥 LECTURA EN STREAMING
+# ================================
+# El cuerpo se procesa línea a línea: nunca se carga el archivo entero.
+
+Record = Tuple[int, Optional[Dict[str, Any]], Optional[str]]  # (fila, datos, error)
+
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer.rstrip("\r")
+
+
+async def _csv_records(lines: AsyncIterator[str]) -> AsyncIterator[Record]:
+    header: Optional[List[str]] = None
+    pending: List[str] = []
+    number = 0
+    async for line in lines:
+        pending.append(line)
+        if sum(part.count('"') for part in pending) % 2:
+            continue  # Campo entre comillas con un salto de línea dentro
+        text = "\n".join(pending)
+        pending = []
+        if not text.strip():
+            continue
+        values = next(csv.reader(io.StringIO(text)))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        number += 1
+        if len(values) != len(header):
+            yield number, None, f"Se esperaban {len(header)} columnas y hay {len(values)}"
+            continue
+        yield number, {key: value if value != "" else None for key, value in zip(header, values)}, None
+    if pending:
+        yield number + 1, None, "Comillas sin cerrar"
+
+
+async def _ndjson_records(lines: AsyncIterator[str]) -> AsyncIterator[Record]:
+    number = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield number, None, f"JSON inválido: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield number, None, "Cada línea debe ser un objeto JSON"
+            continue
+        yield number, record, None
+
+
+def parse_records(chunks: AsyncIterator[bytes], fmt: str) -> AsyncIterator[Record]:
+    lines = _lines(chunks)
+    return _csv_records(lines) if fmt == "csv" else _ndjson_records(lines)
+
+
+# ================================
+# 👥 IMPORTACIÓN POR BLOQUES
+# ================================
+
+class ImportReport:
+    """
+    Informe fila a fila en NDJSON. Las líneas se acumulan solo hasta el
+    siguiente `drain()` (como mucho un bloque), así que la memoria no crece
+    con el archivo y el cliente las recibe a medida que se procesan.
+    """
+
+    def __init__(self):
+        self.counts: Counter = Counter()
+        self.pending: List[bytes] = []
+
+    def row(self, number: int, status: str, **fields: Any) -> None:
+        self.counts[status] += 1
+        self.write({"row": number, "status": status, **fields})
+
+    def write(self, entry: Dict[str, Any]) -> None:
+        self.pending.append(json.dumps(entry, ensure_ascii=False).encode("utf-8") + b"\n")
+
+    def drain(self) -> bytes:
+        data = b"".join(self.pending)
+        self.pending = []
+        return data
+
+    def finish(self) -> Dict[str, int]:
+        summary = {status: self.counts[status] for status in ("created", "duplicate", "invalid", "error")}
+        self.write({"summary": summary})
+        return summary
+
+
+def _validation_errors(error: ValidationError) -> List[Dict[str, str]]:
+    return [
+        {"field": ".".join(str(part) for part in item["loc"]), "message": item["msg"]}
+        for item in error.errors()
+    ]
+
+
+async def _insert_chunk(batch: List[Tuple[int, UserImport]], report: ImportReport) -> None:
+    hashes = await hash_passwords([user.password for _, user in batch])
+    rows = [
+        {
+            "email": user.email,
+            "hashed_password": hashed,
+            "full_name": user.full_name,
+            "age": user.age,
+            "phone": user.phone,
+            "gender": user.gender,
+        }
+        for (_, user), hashed in zip(batch, hashes)
+    ]
+
+    try:
+        result = await run_in_threadpool(lambda: supabase.rpc("import_users", {"p_users": rows}).execute())
+    except APIError as e:
+        logger.exception("Error al importar un bloque de usuarios")
+        for number, user in batch:
+            report.row(number, "error", email=user.email, message=e.message)
+        return
+
+    created = {row["email"]: row["id"] for row in result.data or []}
+    for number, user in batch:
+        user_id = created.pop(user.email, None)  # Un email repetido en el bloque solo se crea una vez
+        if user_id is None:
+            report.row(number, "duplicate", email=user.email)
+        else:
+            report.row(number, "created", email=user.email, id=user_id)
+
+
+async def import_users(chunks: AsyncIterator[bytes], fmt: str) -> AsyncIterator[bytes]:
+    """
+    Importa usuarios desde un flujo CSV (con cabecera) o NDJSON.
+
+    Cada fila se valida con las reglas de `UserCreate`; las válidas se
+    agrupan en bloques de USER_IMPORT_CHUNK_SIZE, se hashean en paralelo y
+    se insertan (usuarios y perfiles) con una llamada por bloque. Devuelve
+    el informe NDJSON por trozos: las filas de cada bloque en cuanto se
+    insertan y, como última línea, el resumen (`{"summary": {...}}`).
+    """
+    report = ImportReport()
+    batch: List[Tuple[int, UserImport]] = []
+
+    async for number, record, error in parse_records(chunks, fmt):
+        if error is not None:
+            report.row(number, "invalid", errors=[{"field": "", "message": error}])
+        else:
+            try:
+                batch.append((number, UserImport.model_validate(record)))
+            except ValidationError as e:
+                report.row(number, "invalid", email=record.get("email"), errors=_validation_errors(e))
+
+        if len(batch) >= settings.USER_IMPORT_CHUNK_SIZE:
+            await _insert_chunk(batch, report)
+            batch = []
+            yield report.drain()
+        elif len(report.pending) >= settings.USER_IMPORT_CHUNK_SIZE:
+            yield report.drain()  # Muchas filas inválidas seguidas
+
+    if batch:
+        await _insert_chunk(batch, report)
+
+    summary = report.finish()
+    logger.info("Importación de usuarios terminada", extra={"import_summary": summary})
+    yield report.drain()
+
+
+def format_from_content_type(content_type: str) -> Optional[str]:
+    media_type = content_type.split(";")[0].strip().lower()
+    if media_type == "text/csv":
+        return "csv"
+    if media_type in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+        return "ndjson"
+    return None
+
+
+class RequestStreamingResponse(StreamingResponse):
+    """
+    Respuesta en streaming que se genera mientras aún se lee el cuerpo de
+    la petición. StreamingResponse, con servidores ASGI < 2.4 (uvicorn),
+    escucha la desconexión con `receive()` a la vez que envía, y esos
+    mensajes se llevarían los trozos del cuerpo. Aquí la desconexión la
+    detecta la propia lectura del cuerpo (`request.stream()` lanza
+    ClientDisconnect).
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
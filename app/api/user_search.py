@@ -0,0 +1,91 @@
+import base64
+import binascii
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from app.db.supabase_client import supabase
+
+SORTS = ("id", "email", "full_name", "created_at")
+MATCHES = ("substring", "prefix")
+
+
+# ================================
+# 🔖 CURSOR (keyset)
+# ================================
+# El cursor guarda el orden pedido y la clave de la última fila vista
+# (valor de la columna de orden + id para desempatar). Es opaco para el
+# cliente: solo tiene que devolverlo tal cual para pedir la página siguiente.
+# created_at admite NULL: esas filas van al final (NULLS LAST) y el cursor
+# guarda el null tal cual, sin convertirlo a texto.
+
+def sort_value(row: Dict[str, Any], sort: str) -> Any:
+    if sort == "full_name":
+        return row.get("full_name") or ""  # Mismo criterio que coalesce(full_name, '')
+    return row[sort]
+
+
+def encode_cursor(sort: str, order: str, row: Dict[str, Any]) -> str:
+    payload = json.dumps([sort, order, sort_value(row, sort), row["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, order: str) -> Tuple[Any, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, cursor_order, value, last_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Cursor no válido")
+    if (cursor_sort, cursor_order) != (sort, order) or not isinstance(last_id, int):
+        raise HTTPException(status_code=400, detail="El cursor corresponde a otro orden")
+    return value, last_id
+
+
+# ================================
+# 🔎 BÚSQUEDA
+# ================================
+
+def search_users(
+    q: Optional[str] = None,
+    match: str = "substring",
+    role: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    is_verified: Optional[bool] = None,
+    min_age: Optional[int] = None,
+    max_age: Optional[int] = None,
+    sort: str = "id",
+    order: str = "asc",
+    limit: int = 20,
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Busca usuarios en la BD (función search_users, ver supabase/migrations):
+    texto en email y full_name (índices trigram), filtros, orden estable
+    (columna + id) y paginación keyset. Se pide una fila de más para saber
+    si hay página siguiente sin contar el total.
+    """
+    after_value, after_id = decode_cursor(cursor, sort, order) if cursor else (None, None)
+
+    result = supabase.rpc("search_users", {
+        "p_query": q or None,
+        "p_prefix": match == "prefix",
+        "p_role": role,
+        "p_is_active": is_active,
+        "p_is_verified": is_verified,
+        "p_min_age": min_age,
+        "p_max_age": max_age,
+        "p_sort": sort,
+        "p_desc": order == "desc",
+        "p_after_value": None if after_value is None else str(after_value),
+        "p_after_id": after_id,
+        "p_limit": limit + 1,
+    }).execute()
+
+    rows: List[Dict[str, Any]] = result.data or []
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "items": rows,
+        "next_cursor": encode_cursor(sort, order, rows[-1]) if has_more else None,
+    }
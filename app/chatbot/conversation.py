@@ -0,0 +1,240 @@
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Deque, Hashable, List, Optional, Tuple
+
+from app.core.metrics import registry
+
+
+# ================================
+# 📊 MÉTRICAS
+# ================================
+
+MEMORY_SESSIONS = registry.gauge(
+    "chatbot_memory_sessions",
+    "Conversaciones guardadas en memoria",
+)
+MEMORY_BYTES = registry.gauge(
+    "chatbot_memory_bytes",
+    "Tamaño aproximado de las conversaciones guardadas",
+)
+MEMORY_EVICTIONS = registry.counter(
+    "chatbot_memory_evictions_total",
+    "Conversaciones expulsadas de memoria",
+    labelnames=("reason",),
+)
+CONTEXT_TOKENS = registry.histogram(
+    "chatbot_context_tokens",
+    "Tokens estimados enviados al modelo por petición",
+    buckets=(50, 100, 250, 500, 1000, 2000, 4000, 8000),
+)
+
+
+# ================================
+# 🔧 UTILIDADES
+# ================================
+
+def estimate_tokens(text: str) -> int:
+    """Estimación barata: ~4 caracteres por token."""
+    return max(1, len(text) // 4)
+
+
+def first_sentence(text: str, max_chars: int = 160) -> str:
+    sentence = re.split(r"(?<=[.!?])\s", text.strip(), maxsplit=1)[0]
+    return sentence if len(sentence) <= max_chars else sentence[: max_chars - 1] + "…"
+
+
+def extractive_summary(previous: str, turns: List["Turn"]) -> str:
+    """
+    Resumen sin llamar al LLM: añade la primera frase de cada turno
+    antiguo al resumen previo.
+    """
+    lines = [previous] if previous else []
+    for turn in turns:
+        speaker = "Usuario" if turn.role == "user" else "Asistente"
+        lines.append(f"{speaker}: {first_sentence(turn.text)}")
+    return "\n".join(lines)
+
+
+class Turn:
+    __slots__ = ("role", "text", "tokens")
+
+    def __init__(self, role: str, text: str):
+        self.role = role
+        self.text = text
+        self.tokens = estimate_tokens(text)
+
+
+class Conversation:
+    __slots__ = ("summary", "turns", "tokens", "last_used")
+
+    def __init__(self):
+        self.summary = ""
+        self.turns: Deque[Turn] = deque()
+        self.tokens = 0
+        self.last_used = time.monotonic()
+
+    @property
+    def size(self) -> int:
+        return len(self.summary.encode("utf-8")) + sum(
+            len(turn.text.encode("utf-8")) for turn in self.turns
+        )
+
+
+# ================================
+# 💬 MEMORIA DE CONVERSACIONES
+# ================================
+
+class ConversationStore:
+    """
+    Historial de conversación por (usuario, sesión) guardado en el servidor.
+
+    - Solo los turnos recientes que caben en `context_tokens` se envían
+      literalmente; los más antiguos se condensan en un resumen acotado a
+      `summary_tokens`.
+    - Las sesiones inactivas más de `idle_seconds` se descartan y, si se
+      supera `max_sessions` o `max_bytes`, se expulsa la menos usada (LRU).
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 1000,
+        max_bytes: int = 8 * 1024 * 1024,
+        idle_seconds: float = 1800.0,
+        context_tokens: int = 1500,
+        summary_tokens: int = 300,
+        summarize: Callable[[str, List[Turn]], str] = extractive_summary,
+    ):
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.idle_seconds = idle_seconds
+        self.context_tokens = context_tokens
+        self.summary_tokens = summary_tokens
+        self.summarize = summarize
+        self._sessions: "OrderedDict[Hashable, Tuple[Conversation, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    @property
+    def bytes_used(self) -> int:
+        return self._bytes
+
+    def _get(self, key: Hashable) -> Optional[Conversation]:
+        entry = self._sessions.get(key)
+        if entry is None:
+            return None
+        conversation = entry[0]
+        if time.monotonic() - conversation.last_used > self.idle_seconds:
+            self._drop(key, "idle")
+            return None
+        self._sessions.move_to_end(key)
+        return conversation
+
+    def _drop(self, key: Hashable, reason: str) -> None:
+        _, size = self._sessions.pop(key)
+        self._bytes -= size
+        MEMORY_EVICTIONS.inc(reason=reason)
+
+    def has_history(self, user_id: str, session_id: str) -> bool:
+        with self._lock:
+            conversation = self._get((user_id, session_id))
+            return bool(conversation and (conversation.turns or conversation.summary))
+
+    def build_prompt(self, user_id: str, session_id: str, prompt: str) -> str:
+        """Prompt a enviar al modelo: resumen + turnos recientes + pregunta nueva."""
+        with self._lock:
+            conversation = self._get((user_id, session_id))
+            if conversation is None or not (conversation.turns or conversation.summary):
+                CONTEXT_TOKENS.observe(estimate_tokens(prompt))
+                return prompt
+            summary = conversation.summary
+            turns = list(conversation.turns)
+
+        parts = []
+        if summary:
+            parts.append(f"Resumen de la conversación anterior:\n{summary}\n")
+        if turns:
+            parts.append("Conversación reciente:")
+            for turn in turns:
+                speaker = "Usuario" if turn.role == "user" else "Asistente"
+                parts.append(f"{speaker}: {turn.text}")
+        parts.append(f"Usuario: {prompt}")
+        text = "\n".join(parts)
+        CONTEXT_TOKENS.observe(estimate_tokens(text))
+        return text
+
+    def record(self, user_id: str, session_id: str, prompt: str, answer: str) -> None:
+        """Guarda un intercambio y compacta la ventana si excede el presupuesto."""
+        key = (user_id, session_id)
+        with self._lock:
+            conversation = self._get(key)
+            if conversation is None:
+                conversation = Conversation()
+                self._sessions[key] = (conversation, 0)
+
+            for turn in (Turn("user", prompt), Turn("model", answer)):
+                conversation.turns.append(turn)
+                conversation.tokens += turn.tokens
+
+            self._compact(conversation)
+            conversation.last_used = time.monotonic()
+
+            size = conversation.size
+            self._bytes += size - self._sessions[key][1]
+            self._sessions[key] = (conversation, size)
+            self._enforce_limits(keep=key)
+            MEMORY_SESSIONS.set(len(self._sessions))
+            MEMORY_BYTES.set(self._bytes)
+
+    def _compact(self, conversation: Conversation) -> None:
+        folded: List[Turn] = []
+        while conversation.turns and conversation.tokens > self.context_tokens:
+            turn = conversation.turns.popleft()
+            conversation.tokens -= turn.tokens
+            folded.append(turn)
+        if not folded:
+            return
+
+        summary = self.summarize(conversation.summary, folded)
+        max_chars = self.summary_tokens * 4
+        if len(summary) > max_chars:
+            # Se conserva lo más reciente del resumen
+            summary = "…" + summary[-(max_chars - 1):]
+        conversation.summary = summary
+
+    def _enforce_limits(self, keep: Hashable) -> None:
+        while len(self._sessions) > self.max_sessions or self._bytes > self.max_bytes:
+            oldest = next(iter(self._sessions))
+            if oldest == keep:
+                if len(self._sessions) == 1:
+                    break
+                self._sessions.move_to_end(keep)
+                continue
+            self._drop(oldest, "capacity")
+
+    def clear(self, user_id: str, session_id: str) -> bool:
+        with self._lock:
+            if (user_id, session_id) not in self._sessions:
+                return False
+            self._drop((user_id, session_id), "cleared")
+            MEMORY_SESSIONS.set(len(self._sessions))
+            MEMORY_BYTES.set(self._bytes)
+            return True
+
+    def sweep(self) -> int:
+        """Elimina las sesiones inactivas; devuelve cuántas se borraron."""
+        now = time.monotonic()
+        with self._lock:
+            expired = [
+                key for key, (conversation, _) in self._sessions.items()
+                if now - conversation.last_used > self.idle_seconds
+            ]
+            for key in expired:
+                self._drop(key, "idle")
+            MEMORY_SESSIONS.set(len(self._sessions))
+            MEMORY_BYTES.set(self._bytes)
+        return len(expired)
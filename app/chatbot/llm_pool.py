@@ -0,0 +1,345 @@
+import asyncio
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Optional
+
+from app.core.metrics import registry
+from app.core.admission import FairLimiter, QueueFullError, QueueTimeoutError
+
+
+# ================================
+# 📊 MÉTRICAS DEL CHATBOT
+# ================================
+
+LLM_REQUESTS = registry.counter(
+    "chatbot_llm_requests_total",
+    "Llamadas al LLM por resultado",
+    labelnames=("outcome",),
+)
+LLM_IN_FLIGHT = registry.gauge(
+    "chatbot_llm_in_flight",
+    "Llamadas al LLM en curso",
+)
+LLM_QUEUED = registry.gauge(
+    "chatbot_llm_queued",
+    "Peticiones esperando un hueco en el pool del LLM",
+)
+LLM_QUEUE_WAIT = registry.histogram(
+    "chatbot_llm_queue_wait_seconds",
+    "Tiempo de espera hasta obtener un hueco en el pool",
+)
+LLM_LATENCY = registry.histogram(
+    "chatbot_llm_latency_seconds",
+    "Duración de la llamada al LLM (sin la espera en cola)",
+)
+ADMISSION_REJECTED = registry.counter(
+    "chatbot_admission_rejected_total",
+    "Peticiones rechazadas antes de llegar al LLM",
+    labelnames=("reason",),
+)
+LLM_FIRST_CHUNK = registry.histogram(
+    "chatbot_llm_first_chunk_seconds",
+    "Tiempo hasta el primer fragmento en respuestas en streaming",
+)
+
+
+# ================================
+# ❌ ERRORES
+# ================================
+
+class LLMTimeoutError(Exception):
+    """El LLM no respondió dentro del plazo configurado."""
+
+
+class LLMOverloadedError(Exception):
+    """No se obtuvo un hueco en el pool (cola llena o plazo de cola agotado)."""
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+# ================================
+# 🤖 POOL DE LLAMADAS AL LLM
+# ================================
+
+class LLMPool:
+    """
+    Ejecuta llamadas al modelo sin bloquear el event loop.
+
+    - Usa `generate_content_async` si el modelo lo ofrece; si no, ejecuta
+      `generate_content` en un executor dedicado (no el threadpool de FastAPI).
+    - Limita la concurrencia y reparte los huecos en round-robin entre
+      usuarios, con una cola global acotada (ver FairLimiter).
+    - Aplica un plazo por llamada y un plazo máximo de espera en cola.
+    - Al cancelarse la tarea (cliente desconectado) se libera el hueco.
+    """
+
+    def __init__(
+        self,
+        model: Any,
+        max_concurrency: int = 8,
+        timeout: float = 30.0,
+        queue_timeout: float = 5.0,
+        stream_buffer: int = 8,
+        max_queue: int = 32,
+    ):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency debe ser >= 1")
+
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.queue_timeout = queue_timeout
+        self.stream_buffer = stream_buffer
+        self._limiter = FairLimiter(max_concurrency, max_queue)
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrency,
+                thread_name_prefix="llm",
+            )
+        return self._executor
+
+    async def _call_model(self, prompt: str) -> Any:
+        if hasattr(self.model, "generate_content_async"):
+            return await self.model.generate_content_async(prompt)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_executor(), self.model.generate_content, prompt
+        )
+
+    @property
+    def in_flight(self) -> int:
+        return self._limiter.in_use
+
+    @property
+    def queued(self) -> int:
+        return self._limiter.queued
+
+    def retry_after(self) -> int:
+        """Segundos estimados hasta que la cola actual se vacíe."""
+        count = LLM_LATENCY.count()
+        average = LLM_LATENCY.sum() / count if count else 1.0
+        pending = self._limiter.queued + 1
+        return max(1, math.ceil(average * pending / self.max_concurrency))
+
+    async def _acquire(self, user_key: str) -> None:
+        started = time.perf_counter()
+        LLM_QUEUED.inc()
+        try:
+            await self._limiter.acquire(user_key, timeout=self.queue_timeout)
+        except QueueFullError:
+            ADMISSION_REJECTED.inc(reason="queue_full")
+            raise LLMOverloadedError(
+                "El chatbot está saturado, intenta de nuevo en unos segundos",
+                retry_after=self.retry_after(),
+            )
+        except QueueTimeoutError:
+            ADMISSION_REJECTED.inc(reason="queue_timeout")
+            raise LLMOverloadedError(
+                "El chatbot está saturado, intenta de nuevo en unos segundos",
+                retry_after=self.retry_after(),
+            )
+        finally:
+            LLM_QUEUED.dec()
+        LLM_QUEUE_WAIT.observe(time.perf_counter() - started)
+
+    async def admit(self, user_key: str = "anonymous") -> None:
+        """
+        Pasa por la cola justa con la clave del usuario y devuelve el hueco
+        al instante, sin llamar al modelo. Para peticiones que reutilizan
+        una llamada en curso: esperan su turno y se rechazan igual (503)
+        si el pool está saturado.
+        """
+        await self._acquire(user_key)
+        self._limiter.release()
+
+    async def generate(self, prompt: str, user_key: str = "anonymous") -> str:
+        """Genera la respuesta completa para `prompt` y devuelve su texto."""
+        await self._acquire(user_key)
+        LLM_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            response = await asyncio.wait_for(self._call_model(prompt), timeout=self.timeout)
+            outcome = "ok"
+            return response.text
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            raise LLMTimeoutError(f"El modelo no respondió en {self.timeout} segundos")
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        finally:
+            LLM_IN_FLIGHT.dec()
+            LLM_LATENCY.observe(time.perf_counter() - started)
+            LLM_REQUESTS.inc(outcome=outcome)
+            self._limiter.release()
+
+    def stream(self, prompt: str, user_key: str = "anonymous") -> "LLMStream":
+        """
+        Prepara una respuesta en streaming. Hay que llamar a `start()`
+        (que ocupa un hueco del pool) antes de iterar, y a `close()` al final.
+        """
+        return LLMStream(self, prompt, user_key)
+
+    def shutdown(self) -> None:
+        """Libera el executor dedicado (si se llegó a crear)."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# ================================
+# 📡 RESPUESTAS EN STREAMING
+# ================================
+
+_END = object()
+
+
+class LLMStream:
+    """
+    Iterador asíncrono de fragmentos de texto del modelo.
+
+    Con modelos síncronos, un hilo del executor produce los fragmentos en
+    una cola acotada: si el cliente lee despacio, el productor se bloquea
+    (backpressure) en lugar de acumular la respuesta en memoria.
+    """
+
+    def __init__(self, pool: LLMPool, prompt: str, user_key: str = "anonymous"):
+        self.pool = pool
+        self.prompt = prompt
+        self.user_key = user_key
+        self._iterator: Optional[AsyncIterator[Any]] = None
+        self._stop = threading.Event()
+        self._queue: Optional[asyncio.Queue] = None
+        self._started_at = 0.0
+        self._deadline = 0.0
+        self._first_chunk = True
+        self._acquired = False
+        self._closed = False
+        self._outcome: Optional[str] = None
+
+    async def start(self) -> "LLMStream":
+        await self.pool._acquire(self.user_key)
+        self._acquired = True
+        LLM_IN_FLIGHT.inc()
+        self._started_at = time.perf_counter()
+        self._deadline = self._started_at + self.pool.timeout
+
+        try:
+            self._iterator = await asyncio.wait_for(self._open(), timeout=self.pool.timeout)
+        except asyncio.TimeoutError:
+            self._outcome = "timeout"
+            await self.close()
+            raise LLMTimeoutError(f"El modelo no respondió en {self.pool.timeout} segundos")
+        except asyncio.CancelledError:
+            self._outcome = "cancelled"
+            await self.close()
+            raise
+        except Exception:
+            self._outcome = "error"
+            await self.close()
+            raise
+        return self
+
+    async def _open(self) -> AsyncIterator[Any]:
+        model = self.pool.model
+        if hasattr(model, "generate_content_async"):
+            response = await model.generate_content_async(self.prompt, stream=True)
+            return response.__aiter__()
+
+        loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.pool.stream_buffer)
+        loop.run_in_executor(self.pool._get_executor(), self._produce, loop)
+        return self._consume()
+
+    def _produce(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Se ejecuta en un hilo: recorre el iterador síncrono del SDK."""
+        def put(item):
+            asyncio.run_coroutine_threadsafe(self._queue.put(item), loop).result()
+
+        try:
+            for chunk in self.pool.model.generate_content(self.prompt, stream=True):
+                if self._stop.is_set():
+                    return
+                put(chunk)
+            put(_END)
+        except Exception as e:
+            if not self._stop.is_set():
+                put(e)
+
+    async def _consume(self) -> AsyncIterator[Any]:
+        while True:
+            item = await self._queue.get()
+            if item is _END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def __aiter__(self) -> "LLMStream":
+        return self
+
+    async def __anext__(self) -> str:
+        if self._closed or self._iterator is None:
+            raise StopAsyncIteration
+
+        remaining = self._deadline - time.perf_counter()
+        try:
+            if remaining <= 0:
+                raise asyncio.TimeoutError
+            chunk = await asyncio.wait_for(self._iterator.__anext__(), timeout=remaining)
+        except StopAsyncIteration:
+            self._outcome = "ok"
+            await self.close()
+            raise
+        except asyncio.TimeoutError:
+            self._outcome = "timeout"
+            await self.close()
+            raise LLMTimeoutError(f"El modelo no terminó en {self.pool.timeout} segundos")
+        except asyncio.CancelledError:
+            self._outcome = "cancelled"
+            await self.close()
+            raise
+        except Exception:
+            self._outcome = "error"
+            await self.close()
+            raise
+
+        if self._first_chunk:
+            self._first_chunk = False
+            LLM_FIRST_CHUNK.observe(time.perf_counter() - self._started_at)
+        return chunk.text
+
+    async def close(self) -> None:
+        """Detiene la generación y libera el hueco del pool (idempotente)."""
+        if self._closed:
+            return
+        self._closed = True
+        self._stop.set()
+
+        # Vaciar la cola desbloquea al productor si estaba esperando espacio
+        if self._queue is not None:
+            while not self._queue.empty():
+                self._queue.get_nowait()
+
+        aclose = getattr(self._iterator, "aclose", None)
+        if aclose is not None:
+            try:
+                await aclose()
+            except Exception:
+                pass
+
+        if self._acquired:
+            LLM_IN_FLIGHT.dec()
+            LLM_LATENCY.observe(time.perf_counter() - self._started_at)
+            # Sin resultado registrado = el consumidor cerró antes de terminar
+            LLM_REQUESTS.inc(outcome=self._outcome or "cancelled")
+            self.pool._limiter.release()
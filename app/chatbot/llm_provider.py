@@ -0,0 +1,104 @@
+import logging
+import threading
+import time
+from typing import Any, Optional
+
+from app.core.config import settings
+from app.chatbot.llm_pool import LLMPool
+
+logger = logging.getLogger(__name__)
+
+
+# ================================
+# ❌ ERRORES
+# ================================
+
+class LLMUnavailableError(Exception):
+    """No hay cliente del LLM disponible (falta la API key o falló el SDK)."""
+
+
+# ================================
+# 🤖 PROVEEDOR ÚNICO DEL LLM
+# ================================
+
+class LLMProvider:
+    """
+    Crea el modelo Gemini y su pool la primera vez que se necesitan.
+
+    - Importar este módulo no importa `google.generativeai` (es lento) ni
+      exige la API key: la app arranca aunque el chatbot no esté configurado.
+    - Si la creación falla, se recuerda el error durante `retry_seconds`
+      para no reintentar en cada petición.
+    - Lo comparten el router del chatbot y ChatBotService.
+    """
+
+    def __init__(self, retry_seconds: float = 30.0):
+        self.retry_seconds = retry_seconds
+        self._pool: Optional[LLMPool] = None
+        self._error: Optional[str] = None
+        self._failed_at = 0.0
+        self._lock = threading.Lock()
+
+    def _create_model(self) -> Any:
+        if not settings.GEMINI_API_KEY:
+            raise LLMUnavailableError("No se encontró GEMINI_API_KEY en el archivo .env")
+
+        import google.generativeai as genai  # Import diferido: tarda ~1 s
+
+        genai.configure(api_key=settings.GEMINI_API_KEY)
+        return genai.GenerativeModel(settings.CHATBOT_MODEL)
+
+    def get_pool(self) -> LLMPool:
+        """Devuelve el pool compartido; lanza LLMUnavailableError si no se puede crear."""
+        pool = self._pool
+        if pool is not None:
+            return pool
+
+        with self._lock:
+            if self._pool is not None:
+                return self._pool
+            if self._error and time.monotonic() - self._failed_at < self.retry_seconds:
+                raise LLMUnavailableError(self._error)
+
+            try:
+                model = self._create_model()
+            except Exception as e:
+                self._error = str(e)
+                self._failed_at = time.monotonic()
+                logger.warning("Chatbot no disponible: %s", e)
+                raise LLMUnavailableError(self._error) from e
+
+            self._error = None
+            self._pool = LLMPool(
+                model,
+                max_concurrency=settings.CHATBOT_MAX_CONCURRENCY,
+                timeout=settings.CHATBOT_TIMEOUT_SECONDS,
+                queue_timeout=settings.CHATBOT_QUEUE_TIMEOUT_SECONDS,
+                stream_buffer=settings.CHATBOT_STREAM_BUFFER_CHUNKS,
+                max_queue=settings.CHATBOT_MAX_QUEUE,
+            )
+            return self._pool
+
+    @property
+    def ready(self) -> bool:
+        return self._pool is not None
+
+    def warmup(self) -> bool:
+        """Intenta crear el cliente por adelantado; nunca lanza excepciones."""
+        try:
+            self.get_pool()
+            return True
+        except LLMUnavailableError:
+            return False
+
+    def set_pool(self, pool: Optional[LLMPool]) -> None:
+        """Sustituye el pool (p. ej. por uno con un modelo local en pruebas)."""
+        with self._lock:
+            if self._pool is not None and self._pool is not pool:
+                self._pool.shutdown()
+            self._pool = pool
+            self._error = None
+
+
+# ✅ Instancia global compartida
+llm_provider = LLMProvider()
@@ -0,0 +1,38 @@
+"""
+Comandos de depuración (opcionales, no se ejecutan al arrancar la API).
+
+Uso:
+    python -m app.cli routes          # Lista las rutas registradas
+"""
+import argparse
+import sys
+
+
+def list_routes() -> int:
+    from app.main import app
+
+    print("\n" + "=" * 60)
+    print("🚀 RUTAS REGISTRADAS EN LA API:")
+    print("=" * 60)
+    for route in app.routes:
+        if hasattr(route, "methods") and hasattr(route, "path"):
+            methods = ", ".join(sorted(route.methods))
+            print(f"  {methods:10} -> {route.path}")
+    print("=" * 60 + "\n")
+    return 0
+
+
+COMMANDS = {
+    "routes": list_routes,
+}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    args = parser.parse_args(argv)
+    return COMMANDS[args.command]()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
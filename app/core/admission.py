@@ -0,0 +1,135 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Hashable, Optional, Tuple
+
+
+# ================================
+# ❌ ERRORES
+# ================================
+
+class QueueFullError(Exception):
+    """La cola global está llena: se rechaza la petición sin esperar."""
+
+
+class QueueTimeoutError(Exception):
+    """La petición esperó en cola más del plazo permitido."""
+
+
+# ================================
+# 🪣 TOKEN BUCKET POR CLAVE
+# ================================
+
+class TokenBucketLimiter:
+    """
+    Limitador token-bucket por clave (ej. el `sub` del JWT).
+
+    Cada clave acumula hasta `burst` fichas y recupera `rate` fichas por
+    segundo. Los buckets llenos (clientes inactivos) se descartan cuando
+    se supera `max_keys`, para que la memoria no crezca sin límite.
+    """
+
+    def __init__(self, rate: float, burst: int, max_keys: int = 10000):
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate debe ser > 0 y burst >= 1")
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: Dict[Hashable, Tuple[float, float]] = {}  # key -> (tokens, updated_at)
+        self._lock = threading.Lock()
+
+    def try_acquire(self, key: Hashable, cost: float = 1.0) -> Tuple[bool, float]:
+        """Devuelve (permitido, segundos hasta poder reintentar)."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (float(self.burst), now))
+            tokens = min(float(self.burst), tokens + (now - updated_at) * self.rate)
+
+            if tokens >= cost:
+                self._buckets[key] = (tokens - cost, now)
+                allowed, retry_after = True, 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                allowed, retry_after = False, (cost - tokens) / self.rate
+
+            if len(self._buckets) > self.max_keys:
+                self._prune(now)
+        return allowed, retry_after
+
+    def _prune(self, now: float) -> None:
+        for key, (tokens, updated_at) in list(self._buckets.items()):
+            if tokens + (now - updated_at) * self.rate >= self.burst:
+                del self._buckets[key]
+
+
+# ================================
+# ⚖️ LIMITADOR CONCURRENTE CON COLA JUSTA
+# ================================
+
+class FairLimiter:
+    """
+    Limita la concurrencia a `capacity` y encola el exceso con una cola
+    global acotada (`max_queue`).
+
+    Los huecos libres se reparten en round-robin entre claves: un usuario
+    con muchas peticiones en cola no adelanta a otro que solo tiene una.
+    Si la cola está llena se rechaza de inmediato (QueueFullError).
+    """
+
+    def __init__(self, capacity: int, max_queue: int):
+        if capacity < 1:
+            raise ValueError("capacity debe ser >= 1")
+        self.capacity = capacity
+        self.max_queue = max_queue
+        self.in_use = 0
+        self.queued = 0
+        self._queues: "OrderedDict[Hashable, Deque[asyncio.Future]]" = OrderedDict()
+
+    async def acquire(self, key: Hashable, timeout: Optional[float] = None) -> None:
+        if self.in_use < self.capacity and not self.queued:
+            self.in_use += 1
+            return
+
+        if self.queued >= self.max_queue:
+            raise QueueFullError("La cola está llena")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(key, deque()).append(waiter)
+        self.queued += 1
+
+        try:
+            await asyncio.wait_for(waiter, timeout=timeout)
+        except asyncio.TimeoutError:
+            self._discard(key, waiter)
+            raise QueueTimeoutError("Tiempo de espera en cola agotado")
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Se concedió el hueco justo cuando se canceló: devolverlo
+                self.release()
+            else:
+                self._discard(key, waiter)
+            raise
+
+    def _discard(self, key: Hashable, waiter: asyncio.Future) -> None:
+        queue = self._queues.get(key)
+        if queue is None or waiter not in queue:
+            return
+        queue.remove(waiter)
+        self.queued -= 1
+        if not queue:
+            del self._queues[key]
+
+    def release(self) -> None:
+        self.in_use -= 1
+        while self._queues and self.in_use < self.capacity:
+            key, queue = next(iter(self._queues.items()))
+            waiter = queue.popleft()
+            self.queued -= 1
+            if queue:
+                self._queues.move_to_end(key)  # Turno para el siguiente usuario
+            else:
+                del self._queues[key]
+            if not waiter.done():
+                waiter.set_result(None)
+                self.in_use += 1
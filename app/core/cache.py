@@ -0,0 +1,249 @@
+import asyncio
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from app.core.metrics import registry
+
+
+# ================================
+# 📊 MÉTRICAS DE CACHÉ
+# ================================
+
+CACHE_REQUESTS = registry.counter(
+    "cache_requests_total",
+    "Consultas a cachés en memoria por resultado (hit, miss, coalesced)",
+    labelnames=("cache", "result"),
+)
+CACHE_EVICTIONS = registry.counter(
+    "cache_evictions_total",
+    "Entradas expulsadas por tamaño o por TTL",
+    labelnames=("cache", "reason"),
+)
+CACHE_ENTRIES = registry.gauge(
+    "cache_entries",
+    "Entradas actualmente almacenadas",
+    labelnames=("cache",),
+)
+CACHE_BYTES = registry.gauge(
+    "cache_bytes",
+    "Tamaño aproximado de las entradas almacenadas",
+    labelnames=("cache",),
+)
+
+MISSING = object()
+
+
+def approximate_size(key: Any, value: Any) -> int:
+    """Tamaño aproximado en bytes de una entrada (clave + valor)."""
+    if isinstance(value, str):
+        value_size = len(value.encode("utf-8"))
+    else:
+        value_size = sys.getsizeof(value)
+    return len(str(key)) + value_size
+
+
+class _Flight:
+    __slots__ = ("task", "waiters", "generation")
+
+    def __init__(self, task: "asyncio.Future", generation: int):
+        self.task = task
+        self.waiters = 0
+        self.generation = generation  # De la clave al empezar la carga
+
+
+# ================================
+# 🗃️ CACHÉ LRU CON TTL
+# ================================
+
+class TTLCache:
+    """
+    Caché en memoria con expiración (TTL), expulsión LRU y límites de
+    entradas y de bytes.
+
+    `get_or_load` agrupa las cargas concurrentes de una misma clave
+    (single-flight): solo se ejecuta un `loader` y el resto de peticiones
+    esperan su resultado. Si todas las peticiones se cancelan, la carga
+    también se cancela.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int = 1000,
+        ttl_seconds: float = 300.0,
+        max_bytes: Optional[int] = None,
+        sizeof: Callable[[Any, Any], int] = approximate_size,
+    ):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (expires_at, value, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, _Flight] = {}
+        # Generación por clave con carga en curso: invalidate() la sube y la
+        # carga que empezó antes no guarda su resultado (ya desfasado). Se
+        # olvida solo cuando terminan todas las cargas de la clave, también
+        # las ya desligadas: si no, una antigua volvería a parecer al día.
+        self._generations: Dict[Hashable, int] = {}
+        self._pending: Dict[Hashable, int] = {}  # Cargas sin terminar por clave
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    # ----------------------------
+    # Operaciones básicas
+    # ----------------------------
+
+    def _remove(self, key: Hashable) -> None:
+        _, _, size = self._data.pop(key)
+        self._bytes -= size
+
+    def _update_gauges(self) -> None:
+        CACHE_ENTRIES.set(len(self._data), cache=self.name)
+        CACHE_BYTES.set(self._bytes, cache=self.name)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                CACHE_REQUESTS.inc(cache=self.name, result="miss")
+                return default
+            if entry[0] <= now:
+                self._remove(key)
+                self._update_gauges()
+                CACHE_EVICTIONS.inc(cache=self.name, reason="expired")
+                CACHE_REQUESTS.inc(cache=self.name, result="miss")
+                return default
+            self._data.move_to_end(key)
+        CACHE_REQUESTS.inc(cache=self.name, result="hit")
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        size = self.sizeof(key, value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return  # No cabe nunca: no desalojar todo por una sola entrada
+
+        expires_at = time.monotonic() + (ttl_seconds if ttl_seconds is not None else self.ttl_seconds)
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (expires_at, value, size)
+            self._bytes += size
+
+            while len(self._data) > self.max_entries or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+            ):
+                oldest = next(iter(self._data))
+                self._remove(oldest)
+                CACHE_EVICTIONS.inc(cache=self.name, reason="capacity")
+            self._update_gauges()
+
+    def delete(self, key: Hashable) -> bool:
+        with self._lock:
+            if key not in self._data:
+                return False
+            self._remove(key)
+            self._update_gauges()
+            return True
+
+    def invalidate(self, key: Hashable) -> None:
+        """
+        Borra la entrada tras una escritura. Si hay una carga en curso de la
+        clave, leyó los datos anteriores: no se guardará y las peticiones
+        siguientes lanzan una carga nueva en vez de unirse a ella.
+        """
+        with self._lock:
+            if key in self._inflight:
+                self._generations[key] = self._generations.get(key, 0) + 1
+                del self._inflight[key]
+        self.delete(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+            self._update_gauges()
+
+    # ----------------------------
+    # Single-flight
+    # ----------------------------
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        admit: Optional[Callable[[], Awaitable[None]]] = None,
+    ) -> Any:
+        """
+        Devuelve el valor cacheado o lo carga una sola vez con `loader`.
+        `admit` se espera antes de unirse a una carga ajena: quien se une
+        pasa su propio control de admisión en vez de colarse gratis.
+        """
+        value = self.get(key, MISSING)
+        if value is not MISSING:
+            return value
+        if admit is not None and key in self._inflight:
+            await admit()
+            # Mientras tanto la carga pudo terminar, fallar o invalidarse
+            return await self.get_or_load(key, loader)
+
+        with self._lock:
+            flight = self._inflight.get(key)
+            if flight is None:
+                flight = _Flight(asyncio.ensure_future(loader()), self._generations.get(key, 0))
+                self._inflight[key] = flight
+                self._pending[key] = self._pending.get(key, 0) + 1
+                started = True
+            else:
+                started = False
+        if started:
+            flight.task.add_done_callback(lambda task: self._finish(key, flight, task))
+        else:
+            CACHE_REQUESTS.inc(cache=self.name, result="coalesced")
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+
+    def _finish(self, key: Hashable, flight: _Flight, task: "asyncio.Future") -> None:
+        with self._lock:
+            if self._inflight.get(key) is flight:
+                del self._inflight[key]
+            current = self._generations.get(key, 0)
+            self._pending[key] -= 1
+            if not self._pending[key]:
+                # Ninguna carga anterior puede terminar ya: la generación sobra
+                del self._pending[key]
+                self._generations.pop(key, None)
+        if current != flight.generation:
+            return  # Invalidada mientras se cargaba: el resultado es anterior a la escritura
+        if not task.cancelled() and task.exception() is None:
+            self.set(key, task.result())
+
+    # ----------------------------
+    # Estadísticas
+    # ----------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        hits = CACHE_REQUESTS.value(cache=self.name, result="hit")
+        misses = CACHE_REQUESTS.value(cache=self.name, result="miss")
+        lookups = hits + misses
+        return {
+            "entries": len(self._data),
+            "bytes": self._bytes,
+            "hits": hits,
+            "misses": misses,
+            "coalesced": CACHE_REQUESTS.value(cache=self.name, result="coalesced"),
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        }
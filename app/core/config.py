@@ -17,11 +17,39 @@ class Settings(BaseSettings):
     # JWT
     SECRET_KEY: str = Field(default="CAMBIA_ESTE_SECRET_SUPER_SEGURO")
     ALGORITHM: str = "HS256"
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15     # Corto: lleva rol y perfil, se renueva con /refresh
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    TOKEN_REVOCATION_CACHE_SECONDS: float = 5.0  # Retraso máximo de una revocación entre workers
     
     # Recovery Password
     PASSWORD_RESET_TOKEN_EXPIRE_MINUTES: int = 10
+    PASSWORD_RESET_MAX_ATTEMPTS: int = 5      # Códigos incorrectos antes de invalidar la solicitud
+
+    # Hash de contraseñas (ver app/core/passwords.py)
+    PASSWORD_HASH_BUDGET_MS: float = 250.0    # Tiempo objetivo por hash al calibrar el coste de bcrypt
+    PASSWORD_BCRYPT_COST: int = Field(default=0, ge=0, le=31)  # Fijo (4-31); 0 = calibrar al arrancar
+
+    # Backoff de logins fallidos (ver app/core/login_guard.py)
+    LOGIN_GUARD_ENABLED: bool = True
+    LOGIN_MAX_FAILURES_ACCOUNT: int = 5       # Fallos por cuenta antes del primer bloqueo
+    LOGIN_MAX_FAILURES_IP: int = 20           # Fallos por IP (varias cuentas) antes del primer bloqueo
+    LOGIN_FAILURE_WINDOW_SECONDS: float = 900.0
+    LOGIN_BACKOFF_BASE_SECONDS: float = 1.0   # Se duplica con cada fallo tras el umbral
+    LOGIN_BACKOFF_MAX_SECONDS: float = 900.0
+
+    # Estado de vida corta compartido entre workers (ver app/core/ttl_store.py)
+    TTL_STORE_URL: str = ""                   # memory://, sqlite:///ruta o redis://; vacío = SQLite en /tmp
+    TTL_STORE_MAX_ENTRIES: int = 100_000      # Por espacio de nombres
+    TTL_STORE_SWEEP_SECONDS: float = 60.0     # Limpieza periódica de entradas expiradas
+
+    # Caché de perfiles en memoria (por proceso)
+    PROFILE_CACHE_MAX_ENTRIES: int = 10_000
+    PROFILE_CACHE_TTL_SECONDS: float = 60.0   # Cota de desfase entre workers tras una escritura
+
+    # Importación masiva de usuarios (POST /api/auth/users/import)
+    USER_IMPORT_CHUNK_SIZE: int = 500         # Filas por llamada a import_users
+    USER_IMPORT_HASH_WORKERS: int = 0         # Procesos para bcrypt; 0 = uno por CPU
+    USER_EXPORT_PAGE_SIZE: int = 1000         # Filas por página (keyset) al exportar
 
     # Supabase
     SUPABASE_URL: str
@@ -44,6 +72,25 @@ class Settings(BaseSettings):
     SMTP_PORT: int = 587
     EMAIL_FROM_NAME: str = "Soporte - Mi API Backend"
 
+    # Logging (ver app/core/logging_config.py)
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"                  # "json" o "text"
+    LOG_LEVELS: str = ""                      # Por módulo: "app.api.habits=DEBUG,app.core=WARNING"
+    LOG_DEBUG_SAMPLE_RATE: float = 0.1        # Fracción de mensajes DEBUG que se conservan
+    LOG_DEBUG_MAX_PER_SECOND: float = 20.0    # Tope de mensajes DEBUG por logger
+    LOG_QUEUE_SIZE: int = 10000
+
+    # Trazas de llamadas a la BD por petición
+    SERVER_TIMING_ENABLED: bool = True        # Cabecera Server-Timing con las llamadas a Supabase
+    DB_ROUND_TRIP_BUDGET: int = 10            # Más viajes a la BD por petición se registran como aviso
+
+    # Rate limiting (slowapi)
+    RATE_LIMIT_ENABLED: bool = True
+
+    # Login con Google (verificación local del ID token)
+    GOOGLE_CLIENT_ID: str = ""                # Audiencia esperada; vacío = login con Google desactivado
+    GOOGLE_JWKS_URL: str = "https://www.googleapis.com/oauth2/v3/certs"
+
     # reCAPTCHA
     RECAPTCHA_SECRET_KEY: str = Field(default="")
 
@@ -52,6 +99,26 @@ class Settings(BaseSettings):
 
     # ⭐⭐⭐ ChatBot API Key – CORREGIDA ⭐⭐⭐
     GEMINI_API_KEY: str = Field(default="", env="GEMINI_API_KEY")
+    CHATBOT_MODEL: str = "gemini-2.5-flash"
+    CHATBOT_WARMUP_ON_STARTUP: bool = True    # Crear el cliente en segundo plano al arrancar
+    CHATBOT_MAX_CONCURRENCY: int = 8          # Llamadas simultáneas al LLM por worker
+    CHATBOT_TIMEOUT_SECONDS: float = 30.0     # Plazo máximo por llamada
+    CHATBOT_QUEUE_TIMEOUT_SECONDS: float = 5.0  # Espera máxima por un hueco libre
+    CHATBOT_DISCONNECT_POLL_SECONDS: float = 0.5
+    CHATBOT_MAX_QUEUE: int = 32               # Peticiones en espera antes de responder 503
+    CHATBOT_RATE_PER_MINUTE: float = 10.0     # Token-bucket por usuario
+    CHATBOT_BURST: int = 5
+    CHATBOT_SSE_HEARTBEAT_SECONDS: float = 15.0
+    CHATBOT_STREAM_BUFFER_CHUNKS: int = 8     # Fragmentos en cola antes de frenar al modelo
+    CHATBOT_CACHE_ENABLED: bool = True
+    CHATBOT_CACHE_MAX_ENTRIES: int = 1000
+    CHATBOT_CACHE_MAX_BYTES: int = 5 * 1024 * 1024
+    CHATBOT_CACHE_TTL_SECONDS: float = 3600.0
+    CHATBOT_MEMORY_MAX_SESSIONS: int = 1000
+    CHATBOT_MEMORY_MAX_BYTES: int = 8 * 1024 * 1024
+    CHATBOT_MEMORY_IDLE_SECONDS: float = 1800.0
+    CHATBOT_CONTEXT_TOKENS: int = 1500        # Turnos recientes enviados literalmente
+    CHATBOT_SUMMARY_TOKENS: int = 300         # Resumen de los turnos más antiguos
 
 
     class Config:
@@ -1,21 +1,68 @@
-from supabase import create_client, Client
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
 from app.core.config import settings
+from app.core.db_tracing import traced
+
+if TYPE_CHECKING:
+    from supabase import Client
 
 
-def get_supabase() -> Client:
+def get_supabase() -> "Client":
     """
-    Retorna una instancia global del cliente Supabase.
-    Se reutiliza para evitar múltiples conexiones.
+    Crea un cliente Supabase nuevo con la configuración de settings.
+    Normalmente se usa a través de la instancia global `supabase`.
     """
+    from supabase import create_client  # Import diferido: acelera el arranque
+
     url: str = settings.SUPABASE_URL
     key: str = settings.SUPABASE_KEY
 
     if not url or not key:
         raise ValueError("❌ SUPABASE_URL o SUPABASE_KEY no están configurados.")
 
-    client: Client = create_client(url, key)
+    client: "Client" = create_client(url, key)
     return client
 
 
-# Cliente global reutilizable
-supabase = get_supabase()
\ No newline at end of file
+class LazyClient:
+    """
+    Proxy que crea el cliente real la primera vez que se usa.
+
+    Permite seguir haciendo `from app.core.database import supabase` sin
+    pagar la importación y construcción del cliente al cargar la app.
+    `set_client()` permite sustituirlo (ej. por un cliente falso en pruebas).
+    `wrap` se aplica a todo cliente (creado o sustituido), p. ej. para trazarlo.
+    """
+
+    def __init__(self, factory: Callable[[], Any], wrap: Callable[[Any], Any] = lambda client: client):
+        self._factory = factory
+        self._wrap = wrap
+        self._client: Optional[Any] = None
+        self._lock = threading.Lock()
+
+    def get_client(self) -> Any:
+        client = self._client
+        if client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._wrap(self._factory())
+                client = self._client
+        return client
+
+    def set_client(self, client: Optional[Any]) -> None:
+        """Sustituye el cliente; con None se volverá a crear en el próximo uso."""
+        with self._lock:
+            self._client = self._wrap(client) if client is not None else None
+
+    @property
+    def initialized(self) -> bool:
+        return self._client is not None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.get_client(), name)
+
+
+# Cliente global reutilizable (se crea en el primer uso); cada llamada a
+# tablas/RPC se cuenta y cronometra por petición (ver app.core.db_tracing)
+supabase = LazyClient(get_supabase, wrap=traced)
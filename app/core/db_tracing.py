@@ -0,0 +1,183 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.core.metrics import registry
+
+
+# ================================
+# 📊 MÉTRICAS
+# ================================
+
+DB_CALLS = registry.counter(
+    "db_calls_total",
+    "Llamadas a Supabase por tabla y operación",
+    labelnames=("table", "operation"),
+)
+DB_CALL_LATENCY = registry.histogram(
+    "db_call_duration_seconds",
+    "Duración de cada llamada a Supabase",
+    labelnames=("table", "operation"),
+)
+DB_BUDGET_EXCEEDED = registry.counter(
+    "db_round_trip_budget_exceeded_total",
+    "Peticiones que superaron el presupuesto de viajes a la BD",
+    labelnames=("route",),
+)
+
+# Métodos del query builder que definen la operación de la llamada
+OPERATIONS = {"select", "insert", "update", "upsert", "delete"}
+
+
+# ================================
+# 🧾 TRAZA POR PETICIÓN
+# ================================
+
+class RequestTrace:
+    """Llamadas a la BD hechas durante una petición: (tabla, operación, segundos)."""
+
+    def __init__(self, method: str = "", route: str = ""):
+        self.method = method
+        self.route = route
+        self.calls: List[Tuple[str, str, float]] = []
+        self._lock = threading.Lock()
+
+    def add(self, table: str, operation: str, seconds: float) -> None:
+        with self._lock:
+            self.calls.append((table, operation, seconds))
+
+    @property
+    def count(self) -> int:
+        return len(self.calls)
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(seconds for _, _, seconds in self.calls)
+
+    def grouped(self) -> Dict[Tuple[str, str], Tuple[int, float]]:
+        """{(tabla, operación): (llamadas, segundos)} ordenado por tiempo total."""
+        groups: Dict[Tuple[str, str], Tuple[int, float]] = {}
+        for table, operation, seconds in list(self.calls):
+            count, total = groups.get((table, operation), (0, 0.0))
+            groups[(table, operation)] = (count + 1, total + seconds)
+        return dict(sorted(groups.items(), key=lambda item: item[1][1], reverse=True))
+
+    def summary(self) -> str:
+        parts = [
+            f"{table}.{operation} x{count} {total * 1000:.1f}ms"
+            for (table, operation), (count, total) in self.grouped().items()
+        ]
+        return (
+            f"{self.method} {self.route}: {self.count} llamadas a la BD "
+            f"({self.total_seconds * 1000:.1f} ms) " + ", ".join(parts)
+        )
+
+
+_current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("db_trace", default=None)
+_listeners: List[Callable[[RequestTrace], None]] = []
+
+
+def current_trace() -> Optional[RequestTrace]:
+    return _current_trace.get()
+
+
+def start_trace(trace: RequestTrace):
+    """Activa la traza en el contexto actual; devuelve el token para `end_trace`."""
+    return _current_trace.set(trace)
+
+
+def end_trace(token, trace: RequestTrace) -> None:
+    _current_trace.reset(token)
+    for listener in list(_listeners):
+        listener(trace)
+
+
+@contextmanager
+def capture_traces() -> Iterator[List[RequestTrace]]:
+    """
+    Recoge las trazas de las peticiones terminadas (útil en pruebas):
+
+        with capture_traces() as traces:
+            client.get("/api/habits/today")
+        assert traces[0].count == 1
+    """
+    traces: List[RequestTrace] = []
+    _listeners.append(traces.append)
+    try:
+        yield traces
+    finally:
+        _listeners.remove(traces.append)
+
+
+def record_call(table: str, operation: str, seconds: float) -> None:
+    DB_CALLS.inc(table=table, operation=operation)
+    DB_CALL_LATENCY.observe(seconds, table=table, operation=operation)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(table, operation, seconds)
+
+
+# ================================
+# 🔌 CLIENTE INSTRUMENTADO
+# ================================
+
+class TracedQuery:
+    """
+    Envuelve un query builder de supabase-py: los métodos encadenados
+    (`select`, `eq`, `order`...) devuelven otro TracedQuery y `execute()`
+    mide y registra la llamada.
+    """
+
+    __slots__ = ("_builder", "_table", "_operation")
+
+    def __init__(self, builder: Any, table: str, operation: Optional[str] = None):
+        self._builder = builder
+        self._table = table
+        self._operation = operation
+
+    def execute(self) -> Any:
+        started = time.perf_counter()
+        try:
+            return self._builder.execute()
+        finally:
+            record_call(self._table, self._operation or "query", time.perf_counter() - started)
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self._builder, name)
+        if not callable(attribute):
+            return attribute
+
+        def chained(*args, **kwargs):
+            result = attribute(*args, **kwargs)
+            if not hasattr(result, "execute"):
+                return result
+            operation = self._operation or (name if name in OPERATIONS else None)
+            return TracedQuery(result, self._table, operation)
+
+        return chained
+
+
+class TracedClient:
+    """Cliente Supabase que registra cada llamada a tablas y RPC."""
+
+    def __init__(self, client: Any):
+        self.client = client
+
+    def table(self, name: str) -> TracedQuery:
+        return TracedQuery(self.client.table(name), name)
+
+    from_ = table
+
+    def rpc(self, function: str, params: Optional[Dict[str, Any]] = None, **kwargs) -> TracedQuery:
+        return TracedQuery(self.client.rpc(function, params or {}, **kwargs), function, "rpc")
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.client, name)
+
+
+def traced(client: Any) -> Any:
+    if client is None or isinstance(client, TracedClient):
+        return client
+    return TracedClient(client)
@@ -1,3 +1,4 @@
+import logging
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
@@ -5,6 +6,8 @@ from typing import Optional
 
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
 
 # ------------------------------------------------
 # 📩 UTILIDAD PRINCIPAL: ENVIAR CORREOS
@@ -32,8 +35,8 @@ def send_email(to_email: str, subject: str, html_content: str) -> bool:
 
         return True
 
-    except Exception as e:
-        print(f"❌ Error enviando email: {e}")
+    except Exception:
+        logger.exception("Error enviando email")
         return False
 
 
@@ -0,0 +1,154 @@
+import asyncio
+import logging
+import re
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import httpx
+import jwt
+from fastapi import HTTPException
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+class GoogleTokenError(ValueError):
+    """El ID token de Google no es válido (firma, audiencia, emisor o caducidad)."""
+
+
+# ================================
+# 🔑 CLAVES PÚBLICAS (JWKS) EN CACHÉ
+# ================================
+
+class JWKSCache:
+    """
+    Claves públicas de Google en memoria.
+
+    - Caducan según el `Cache-Control: max-age` de la respuesta.
+    - Si muchas peticiones las necesitan a la vez, solo una las descarga
+      (el resto espera la misma tarea).
+    - Un `kid` desconocido (rotación de claves) fuerza una descarga, como
+      mucho una vez cada `min_refresh_seconds` para que tokens inventados
+      no provoquen una descarga por petición.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        client_factory: Callable[[], httpx.AsyncClient] = httpx.AsyncClient,
+        default_ttl_seconds: float = 300.0,
+        min_refresh_seconds: float = 30.0,
+    ):
+        self.url = url
+        self.client_factory = client_factory
+        self.default_ttl_seconds = default_ttl_seconds
+        self.min_refresh_seconds = min_refresh_seconds
+        self.fetches = 0
+        self._keys: Dict[str, jwt.PyJWK] = {}
+        self._expires_at = 0.0
+        self._fetched_at = 0.0
+        self._refresh: Optional[Tuple[asyncio.AbstractEventLoop, "asyncio.Task"]] = None
+
+    async def get_key(self, kid: str) -> jwt.PyJWK:
+        now = time.monotonic()
+        stale = now >= self._expires_at
+        unknown = kid not in self._keys and now - self._fetched_at >= self.min_refresh_seconds
+        if stale or unknown:
+            await self._refresh_keys()
+
+        key = self._keys.get(kid)
+        if key is None:
+            raise GoogleTokenError("Clave de firma desconocida")
+        return key
+
+    async def _refresh_keys(self) -> None:
+        # Single-flight: reutilizar la descarga en curso (del mismo event loop)
+        loop = asyncio.get_running_loop()
+        if self._refresh is None or self._refresh[0] is not loop or self._refresh[1].done():
+            self._refresh = (loop, loop.create_task(self._fetch()))
+        await asyncio.shield(self._refresh[1])
+
+    async def _fetch(self) -> None:
+        self.fetches += 1
+        try:
+            async with self.client_factory() as client:
+                response = await client.get(self.url, timeout=10.0)
+            response.raise_for_status()
+            keys = {
+                jwk["kid"]: jwt.PyJWK(jwk)
+                for jwk in response.json().get("keys", [])
+                if jwk.get("kid") and jwk.get("kty") == "RSA"
+            }
+        except (httpx.HTTPError, ValueError, jwt.PyJWKError):
+            logger.exception("No se pudieron descargar las claves de Google")
+            if self._keys:
+                # Seguir con las claves anteriores y reintentar más tarde
+                now = time.monotonic()
+                self._fetched_at = now
+                self._expires_at = now + self.min_refresh_seconds
+                return
+            raise
+
+        match = MAX_AGE.search(response.headers.get("cache-control", ""))
+        ttl = int(match.group(1)) if match else self.default_ttl_seconds
+        now = time.monotonic()
+        self._keys = keys
+        self._fetched_at = now
+        self._expires_at = now + ttl
+
+
+_jwks: Optional[JWKSCache] = None
+
+
+def get_jwks() -> JWKSCache:
+    global _jwks
+    if _jwks is None:
+        _jwks = JWKSCache(settings.GOOGLE_JWKS_URL)
+    return _jwks
+
+
+def set_jwks(cache: Optional[JWKSCache]) -> None:
+    """Sustituye la caché de claves (p. ej. por una contra un JWKS local en pruebas)."""
+    global _jwks
+    _jwks = cache
+
+
+# ================================
+# ✅ VERIFICACIÓN DEL ID TOKEN
+# ================================
+
+async def verify_google_id_token(token: str) -> Dict[str, Any]:
+    """
+    Verifica localmente un ID token de Google (RS256) y devuelve sus claims.
+    Comprueba firma, audiencia (GOOGLE_CLIENT_ID), emisor, caducidad y que
+    el email esté verificado.
+    """
+    if not settings.GOOGLE_CLIENT_ID:
+        raise HTTPException(status_code=503, detail="Login con Google no configurado")
+
+    try:
+        kid = jwt.get_unverified_header(token).get("kid")
+        if not kid:
+            raise GoogleTokenError("Token sin kid")
+        key = await get_jwks().get_key(kid)
+        claims = jwt.decode(
+            token,
+            key,
+            algorithms=["RS256"],
+            audience=settings.GOOGLE_CLIENT_ID,
+            issuer=GOOGLE_ISSUERS,
+            options={"require": ["exp", "iat", "iss", "aud", "sub"]},
+        )
+    except (jwt.InvalidTokenError, GoogleTokenError) as e:
+        logger.debug("ID token de Google rechazado: %s", e)
+        raise HTTPException(status_code=401, detail="Token de Google inválido")
+    except (httpx.HTTPError, ValueError, jwt.PyJWKError):
+        raise HTTPException(status_code=503, detail="No se pudo verificar el token de Google")
+
+    if not claims.get("email") or claims.get("email_verified") not in (True, "true"):
+        raise HTTPException(status_code=401, detail="El email de Google no está verificado")
+    return claims
@@ -0,0 +1,196 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+
+# ================================
+# 🪪 ID DE PETICIÓN
+# ================================
+
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+
+class RequestIdFilter(logging.Filter):
+    """Añade `record.request_id` con el id de la petición en curso."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+# ================================
+# 🎲 MUESTREO DE DEBUG
+# ================================
+
+class SamplingFilter(logging.Filter):
+    """
+    Limita los mensajes DEBUG en caliente: deja pasar una fracción
+    (`sample_rate`) y como mucho `max_per_second` por logger. Los niveles
+    INFO y superiores nunca se descartan.
+    """
+
+    def __init__(self, sample_rate: float = 1.0, max_per_second: float = 0.0):
+        super().__init__()
+        self.sample_rate = sample_rate
+        self.max_per_second = max_per_second
+        self._buckets: Dict[str, list] = {}
+        self._lock = threading.Lock()
+        self._random = random.Random()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG:
+            return True
+        if self.sample_rate < 1.0 and self._random.random() >= self.sample_rate:
+            return False
+        if self.max_per_second <= 0:
+            return True
+
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(record.name)
+            if bucket is None:
+                bucket = self._buckets[record.name] = [self.max_per_second, now]
+            tokens, updated = bucket
+            tokens = min(self.max_per_second, tokens + (now - updated) * self.max_per_second)
+            allowed = tokens >= 1
+            bucket[0], bucket[1] = (tokens - 1 if allowed else tokens), now
+        return allowed
+
+
+# ================================
+# 🧾 FORMATO
+# ================================
+
+# Atributos estándar de LogRecord: el resto se considera contexto (`extra=`)
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Una línea JSON por mensaje: fácil de indexar y de correlacionar por request_id."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+TEXT_FORMAT = "%(asctime)s %(levelname)-7s [%(request_id)s] %(name)s: %(message)s"
+
+
+# ================================
+# ⚙️ CONFIGURACIÓN
+# ================================
+
+LOG_DROPPED = registry.counter(
+    "log_records_dropped_total",
+    "Mensajes de log descartados por tener la cola llena",
+)
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Si la cola está llena se descarta el mensaje en vez de bloquear la petición."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Se resuelve el mensaje aquí (los args pueden cambiar después) pero el
+        # formato final lo aplica el hilo escritor. El registro no se copia: es
+        # el único handler del logger "app"
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_DROPPED.inc()
+
+
+class _QueueListener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # Con la cola llena, esperar a que el hilo escritor la vacíe
+        self.queue.put(self._sentinel)
+
+
+def parse_levels(spec: str) -> Dict[str, str]:
+    """'app=INFO,app.api.habits=DEBUG' -> {'app': 'INFO', 'app.api.habits': 'DEBUG'}"""
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, level = item.partition("=")
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging(stream=None, force: bool = False) -> None:
+    """
+    Configura el logging de la app una sola vez:
+
+    - Los handlers del hilo que atiende peticiones solo encolan el registro
+      (QueueHandler); un hilo aparte formatea y escribe (QueueListener), así
+      el event loop nunca se bloquea escribiendo en stderr.
+    - Formato JSON o texto (LOG_FORMAT), niveles por módulo (LOG_LEVELS) y
+      muestreo de DEBUG (LOG_DEBUG_SAMPLE_RATE, LOG_DEBUG_MAX_PER_SECOND).
+    """
+    global _listener
+    if _listener is not None and not force:
+        return
+    shutdown_logging()
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    if settings.LOG_FORMAT == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+    log_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    handler = NonBlockingQueueHandler(log_queue)
+    handler.addFilter(RequestIdFilter())
+    handler.addFilter(SamplingFilter(settings.LOG_DEBUG_SAMPLE_RATE, settings.LOG_DEBUG_MAX_PER_SECOND))
+
+    app_logger = logging.getLogger("app")
+    app_logger.handlers = [handler]
+    app_logger.propagate = False
+    app_logger.setLevel(settings.LOG_LEVEL.upper())
+    for name, level in parse_levels(settings.LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener = _QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Vacía la cola y detiene el hilo escritor."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,86 @@
+import math
+import time
+from typing import Optional
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.ttl_store import lazy_store
+
+# ================================
+# 🛡️ BACKOFF DE LOGINS FALLIDOS
+# ================================
+# Contadores de fallos por cuenta y por IP, compartidos entre workers
+# (almacén TTL). Superado el umbral, cada fallo bloquea la clave durante
+# un tiempo que se duplica (1 s, 2 s, 4 s... hasta el máximo). Los intentos
+# bloqueados se rechazan antes de consultar la BD o ejecutar bcrypt, así
+# que el CPU que un ataque consume en hashes queda acotado por clave.
+# Los emails inexistentes cuentan igual que los existentes.
+
+LOGIN_FAILURES = registry.counter(
+    "login_failures_total",
+    "Logins fallidos por motivo",
+    labelnames=("reason",),
+)
+LOGIN_REJECTED = registry.counter(
+    "login_rejected_total",
+    "Logins rechazados por backoff antes de consultar la BD",
+    labelnames=("scope",),
+)
+
+failures = lazy_store("login_failures")
+
+
+def _keys(email: str, ip: Optional[str]):
+    yield "account", email.strip().lower(), settings.LOGIN_MAX_FAILURES_ACCOUNT
+    if ip:
+        yield "ip", ip, settings.LOGIN_MAX_FAILURES_IP
+
+
+def backoff_seconds(failed: int, threshold: int) -> float:
+    """Bloqueo tras `failed` fallos: 0 hasta el umbral, luego base * 2^(exceso)."""
+    if failed < threshold:
+        return 0.0
+    exponent = min(failed - threshold, 30)  # Evita desbordar con contadores enormes
+    return min(settings.LOGIN_BACKOFF_MAX_SECONDS, settings.LOGIN_BACKOFF_BASE_SECONDS * 2 ** exponent)
+
+
+def check(email: str, ip: Optional[str]) -> None:
+    """Rechaza con 429 (y Retry-After) si la cuenta o la IP están bloqueadas."""
+    if not settings.LOGIN_GUARD_ENABLED:
+        return
+    now = time.time()
+    for scope, key, _ in _keys(email, ip):
+        blocked_until = failures.get(f"block:{scope}:{key}")
+        if blocked_until is not None and blocked_until > now:
+            LOGIN_REJECTED.inc(scope=scope)
+            retry_after = math.ceil(blocked_until - now)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"Demasiados intentos fallidos. Intenta de nuevo en {retry_after} segundos.",
+                headers={"Retry-After": str(retry_after)},
+            )
+
+
+def record_failure(email: str, ip: Optional[str], reason: str) -> None:
+    LOGIN_FAILURES.inc(reason=reason)
+    if not settings.LOGIN_GUARD_ENABLED:
+        return
+    for scope, key, threshold in _keys(email, ip):
+        failed = failures.incr(f"{scope}:{key}", settings.LOGIN_FAILURE_WINDOW_SECONDS)
+        delay = backoff_seconds(failed, threshold)
+        if delay:
+            failures.set(f"block:{scope}:{key}", time.time() + delay, delay)
+
+
+def record_success(email: str) -> None:
+    """
+    Un login correcto limpia el contador de la cuenta. El de la IP no: con
+    una cuenta propia válida se podría reiniciar entre intentos.
+    """
+    if not settings.LOGIN_GUARD_ENABLED:
+        return
+    key = email.strip().lower()
+    failures.delete(f"account:{key}")
+    failures.delete(f"block:account:{key}")
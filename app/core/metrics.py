@@ -0,0 +1,275 @@
+import threading
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+# ================================
+# 📊 MÉTRICAS EN MEMORIA
+# ================================
+# Primitivas mínimas (contador, gauge, histograma) con etiquetas.
+# Son seguras entre hilos y se registran en un registro global
+# para poder consultarlas desde cualquier endpoint.
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+
+LabelKey = Tuple[str, ...]
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, description: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.description = description
+        self.labelnames: Tuple[str, ...] = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelKey:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"La métrica {self.name} espera las etiquetas {self.labelnames}, recibió {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels_dict(self, key: LabelKey) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+
+class Counter(_Metric):
+    """Valor acumulado que solo puede crecer."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, description, labelnames)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[Tuple[Dict[str, str], float]]:
+        with self._lock:
+            return [(self._labels_dict(k), v) for k, v in self._values.items()]
+
+    def snapshot(self):
+        if not self.labelnames:
+            return self.value()
+        return {",".join(k): v for k, v in self._values.items()}
+
+
+class Gauge(_Metric):
+    """Valor instantáneo que puede subir o bajar."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, description: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, description, labelnames)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[Tuple[Dict[str, str], float]]:
+        with self._lock:
+            return [(self._labels_dict(k), v) for k, v in self._values.items()]
+
+    def snapshot(self):
+        if not self.labelnames:
+            return self.value()
+        return {",".join(k): v for k, v in self._values.items()}
+
+
+class _HistogramState:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.total = 0.0
+        self.count = 0
+
+
+class Histogram(_Metric):
+    """Distribución de observaciones en buckets fijos (memoria constante)."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, description, labelnames)
+        self.buckets: Tuple[float, ...] = tuple(sorted(buckets))
+        self._states: Dict[LabelKey, _HistogramState] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._states.get(key)
+            if state is None:
+                state = self._states[key] = _HistogramState(len(self.buckets) + 1)
+            state.counts[index] += 1
+            state.total += value
+            state.count += 1
+
+    def count(self, **labels: str) -> int:
+        state = self._states.get(self._key(labels))
+        return state.count if state else 0
+
+    def sum(self, **labels: str) -> float:
+        state = self._states.get(self._key(labels))
+        return state.total if state else 0.0
+
+    def quantile(self, q: float, **labels: str) -> Optional[float]:
+        """Estimación del cuantil q (0-1) usando el límite superior del bucket."""
+        state = self._states.get(self._key(labels))
+        if not state or not state.count:
+            return None
+        target = q * state.count
+        accumulated = 0
+        for index, bucket_count in enumerate(state.counts):
+            accumulated += bucket_count
+            if accumulated >= target:
+                return self.buckets[index] if index < len(self.buckets) else float("inf")
+        return float("inf")
+
+    def samples(self) -> List[Tuple[Dict[str, str], List[int], float, int]]:
+        with self._lock:
+            return [
+                (self._labels_dict(k), list(s.counts), s.total, s.count)
+                for k, s in self._states.items()
+            ]
+
+    def snapshot(self):
+        result = {}
+        for labels, _, total, count in self.samples():
+            key = ",".join(labels.values()) or "_"
+            result[key] = {
+                "count": count,
+                "sum": round(total, 6),
+                "avg": round(total / count, 6) if count else 0.0,
+                "p50": self.quantile(0.5, **labels),
+                "p95": self.quantile(0.95, **labels),
+                "p99": self.quantile(0.99, **labels),
+            }
+        return result if self.labelnames else result.get("_", {"count": 0})
+
+
+class MetricsRegistry:
+    """Registro de métricas; devuelve la existente si el nombre ya está registrado."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name: str, description: str, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, description, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"La métrica {name} ya existe con otro tipo")
+            return metric
+
+    def counter(self, name: str, description: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter, name, description, labelnames=labelnames)
+
+    def gauge(self, name: str, description: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge, name, description, labelnames=labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        description: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram, name, description, labelnames=labelnames, buckets=buckets)
+
+    def metrics(self) -> List[_Metric]:
+        with self._lock:
+            return list(self._metrics.values())
+
+    def snapshot(self, prefix: str = "") -> Dict[str, object]:
+        """Vista JSON de las métricas cuyo nombre empieza por `prefix`."""
+        return {m.name: m.snapshot() for m in self.metrics() if m.name.startswith(prefix)}
+
+
+# ================================
+# 📤 EXPOSICIÓN (formato texto de Prometheus)
+# ================================
+
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels.items()) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    value = float(value)
+    if value == float("inf"):
+        return "+Inf"
+    if value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def render_text(registry: MetricsRegistry) -> str:
+    """
+    Serializa todas las métricas en el formato de texto de Prometheus.
+    El coste depende solo del número de series (no del tráfico recibido).
+    """
+    lines: List[str] = []
+    for metric in sorted(registry.metrics(), key=lambda m: m.name):
+        lines.append(f"# HELP {metric.name} {_escape(metric.description)}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+
+        if isinstance(metric, Histogram):
+            for labels, counts, total, count in metric.samples():
+                accumulated = 0
+                for bound, bucket_count in zip(metric.buckets + (float("inf"),), counts):
+                    accumulated += bucket_count
+                    le = _format_labels(labels, ("le", _format_value(bound)))
+                    lines.append(f"{metric.name}_bucket{le} {accumulated}")
+                lines.append(f"{metric.name}_sum{_format_labels(labels)} {_format_value(total)}")
+                lines.append(f"{metric.name}_count{_format_labels(labels)} {count}")
+        else:
+            for labels, value in metric.samples():
+                lines.append(f"{metric.name}{_format_labels(labels)} {_format_value(value)}")
+
+    return "\n".join(lines) + "\n"
+
+
+# ✅ Registro global
+registry = MetricsRegistry()
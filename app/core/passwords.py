@@ -0,0 +1,162 @@
+import logging
+import math
+import re
+import secrets
+import threading
+import time
+from typing import Optional, Tuple
+
+import bcrypt
+
+from app.core.config import settings
+from app.core.ttl_store import lazy_store
+
+logger = logging.getLogger(__name__)
+
+# ================================
+# 🔐 HASHING DE CONTRASEÑAS (bcrypt)
+# ================================
+# Único punto de hash y verificación de la app. El coste de bcrypt es
+# PASSWORD_BCRYPT_COST si está fijado o, si no, el mayor que cabe en
+# PASSWORD_HASH_BUDGET_MS (cada +1 duplica el tiempo). La calibración la
+# hace un solo worker y el resultado se comparte por el almacén TTL, así
+# que todos los procesos usan el mismo coste. El algoritmo y el coste
+# quedan en el propio hash ("$2b$12$..."): al hacer login se rehacen los
+# hashes más baratos que el objetivo o de otro algoritmo, nunca al revés
+# (una discrepancia entre máquinas no reescribe hashes en bucle).
+
+ALGORITHM = "2b"
+MIN_COST = 10  # Mínimo recomendado (OWASP) aunque la máquina sea lenta
+MAX_COST = 16
+CALIBRATION_COST = 8  # Coste de la medición: ~20 ms en una CPU actual
+
+# bcrypt solo usa los primeros 72 bytes; bcrypt>=5 lanza error si son más
+BCRYPT_MAX_BYTES = 72
+
+HASH_FORMAT = re.compile(r"^\$(2[abxy])\$(\d{2})\$[./A-Za-z0-9]{53}$")
+
+# El coste calibrado se comparte entre workers; se recalibra al caducar
+CALIBRATION_TTL_SECONDS = 30 * 24 * 3600
+shared_params = lazy_store("password_params")
+
+_cost: Optional[int] = None
+_lock = threading.Lock()
+_dummy_hash: Optional[str] = None
+
+
+def _encode(password: str) -> bytes:
+    return password.encode("utf-8")[:BCRYPT_MAX_BYTES]
+
+
+def measure_hash_ms(cost: int, samples: int = 3) -> float:
+    """Tiempo de un hash con `cost` (el mejor de `samples`, sin ruido de arranque)."""
+    best = math.inf
+    for _ in range(samples):
+        started = time.perf_counter()
+        bcrypt.hashpw(b"calibration", bcrypt.gensalt(rounds=cost))
+        best = min(best, (time.perf_counter() - started) * 1000)
+    return best
+
+
+def calibrate(budget_ms: Optional[float] = None) -> int:
+    """
+    Mayor coste cuyo hash tarda como mucho `budget_ms`, entre MIN_COST y
+    MAX_COST. Mide a CALIBRATION_COST y extrapola (el tiempo se duplica con
+    cada punto de coste) para no pagar varios hashes caros al arrancar.
+    """
+    budget_ms = budget_ms or settings.PASSWORD_HASH_BUDGET_MS
+    measured = measure_hash_ms(CALIBRATION_COST)
+    cost = CALIBRATION_COST + math.floor(math.log2(budget_ms / measured))
+    return max(MIN_COST, min(MAX_COST, cost))
+
+
+def current_cost() -> int:
+    """
+    Coste con el que se generan los hashes: PASSWORD_BCRYPT_COST si está
+    fijado (recomendable con varias máquinas) o el calibrado. Este se lee
+    del almacén compartido y solo se mide si aún no hay ninguno, una vez
+    por proceso como mucho.
+    """
+    global _cost
+    if settings.PASSWORD_BCRYPT_COST:
+        return settings.PASSWORD_BCRYPT_COST
+    if _cost is None:
+        with _lock:
+            if _cost is None:
+                _cost = shared_params.get("bcrypt_cost")
+            if _cost is None:
+                _cost = calibrate()
+                shared_params.set("bcrypt_cost", _cost, CALIBRATION_TTL_SECONDS)
+                logger.info("Coste de bcrypt calibrado", extra={"bcrypt_cost": _cost})
+    return _cost
+
+
+def reset_calibration() -> None:
+    """Olvida el coste calibrado (también el compartido): se mide de nuevo."""
+    global _cost
+    with _lock:
+        _cost = None
+        shared_params.delete("bcrypt_cost")
+
+
+def warm_up() -> None:
+    """Calibra y prepara el hash señuelo al arrancar, fuera del primer login."""
+    _get_dummy_hash()
+
+
+def hash_password(password: str, cost: Optional[int] = None) -> str:
+    """Genera un hash bcrypt con el coste actual (o el indicado)."""
+    salt = bcrypt.gensalt(rounds=cost or current_cost())
+    return bcrypt.hashpw(_encode(password), salt).decode()
+
+
+def verify_password(password: str, hashed: str) -> bool:
+    """Verifica si la contraseña coincide con el hash."""
+    try:
+        return bcrypt.checkpw(_encode(password), hashed.encode("utf-8"))
+    except ValueError:
+        return False  # Hash con formato inválido
+
+
+def _get_dummy_hash() -> str:
+    global _dummy_hash
+    dummy = _dummy_hash
+    if dummy is None or hash_parameters(dummy) != (ALGORITHM, current_cost()):
+        dummy = _dummy_hash = hash_password(secrets.token_urlsafe(16))
+    return dummy
+
+
+def dummy_verify(password: str) -> bool:
+    """
+    Verificación contra un hash señuelo con el coste actual, para usuarios
+    inexistentes o sin contraseña: la respuesta tarda lo mismo que con una
+    contraseña incorrecta y no revela qué emails están registrados.
+    Siempre devuelve False.
+    """
+    verify_password(password, _get_dummy_hash())
+    return False
+
+
+def hash_parameters(hashed: str) -> Optional[Tuple[str, int]]:
+    """(algoritmo, coste) guardados en el hash, o None si no es bcrypt."""
+    match = HASH_FORMAT.match(hashed or "")
+    return (match.group(1), int(match.group(2))) if match else None
+
+
+def needs_rehash(hashed: str) -> bool:
+    """Solo hacia arriba: otro algoritmo o un coste menor que el objetivo."""
+    params = hash_parameters(hashed)
+    return params is None or params[0] != ALGORITHM or params[1] < current_cost()
+
+
+def verify_and_update(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verifica la contraseña y, si es correcta pero el hash es de otro
+    algoritmo o más barato que el coste actual, devuelve también el hash
+    nuevo para guardarlo.
+    """
+    if not verify_password(password, hashed):
+        return False, None
+    if needs_rehash(hashed):
+        return True, hash_password(password)
+    return True, None
@@ -1,10 +1,24 @@
+import logging
+
 import httpx
 from fastapi import HTTPException
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
 RECAPTCHA_VERIFY_URL = "https://www.google.com/recaptcha/api/siteverify"
 
 
+def warn_if_unconfigured() -> None:
+    """
+    Se llama una vez al arrancar: sin RECAPTCHA_SECRET_KEY no se verifica
+    ningún captcha, y en producción eso debe verse aunque el nivel de log
+    o el muestreo oculten los mensajes de depuración.
+    """
+    if not settings.RECAPTCHA_SECRET_KEY:
+        logger.warning("reCAPTCHA no configurado (RECAPTCHA_SECRET_KEY vacía): no se verificará ningún captcha")
+
+
 async def verify_recaptcha(token: str) -> bool:
     """
     Valida el token de reCAPTCHA v2 enviado desde el frontend.
@@ -19,12 +33,12 @@ async def verify_recaptcha(token: str) -> bool:
     
     # MODO TESTING: Si el token es "test_token_bypass", permitir acceso
     if token == "test_token_bypass":
-        print("⚠️ TESTING MODE: reCAPTCHA bypass activado")
+        logger.debug("reCAPTCHA omitido con el token de pruebas")
         return True
     
     # Si no hay secret key configurada (desarrollo), permitir el acceso con advertencia
     if not settings.RECAPTCHA_SECRET_KEY or settings.RECAPTCHA_SECRET_KEY == "":
-        print("⚠️ ADVERTENCIA: reCAPTCHA no configurado. Verificación omitida (solo desarrollo).")
+        logger.debug("reCAPTCHA no configurado: verificación omitida (avisado al arrancar)")
         return True
 
     try:
@@ -59,8 +73,8 @@ async def verify_recaptcha(token: str) -> bool:
             status_code=500,
             detail=f"Error de conexión con reCAPTCHA: {str(e)}"
         )
-    except Exception as e:
-        print(f"❌ Error validando reCAPTCHA: {e}")
+    except Exception:
+        logger.exception("Error validando reCAPTCHA")
         raise HTTPException(
             status_code=500,
             detail="Error interno al validar reCAPTCHA"
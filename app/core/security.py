@@ -1,11 +1,15 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Optional, Dict, Any
-import bcrypt
+import logging
 import jwt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 from app.core.config import settings
+from app.core.passwords import hash_password, verify_password  # noqa: F401 (compatibilidad)
+from app.core.tokens import is_revoked
+
+logger = logging.getLogger(__name__)
 
 # ================================
 # 🔐 VARIABLES QUE NECESITA EL SISTEMA
@@ -18,33 +22,20 @@ ALGORITHM = settings.ALGORITHM
 security = HTTPBearer()
 
 
-# ================================
-# 🔐 HASHING PASSWORDS (bcrypt)
-# ================================
-
-def hash_password(password: str) -> str:
-    """Genera un hash seguro usando bcrypt."""
-    salt = bcrypt.gensalt()
-    return bcrypt.hashpw(password.encode("utf-8"), salt).decode()
-
-
-def verify_password(password: str, hashed: str) -> bool:
-    """Verifica si la contraseña coincide con el hash."""
-    return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
-
-
 # ================================
 # 🔑 JWT TOKEN GENERATION
 # ================================
 
 def create_access_token(data: dict, expires_minutes: Optional[int] = None) -> str:
-    """Crea un JWT válido por X minutos."""
+    """Crea un JWT válido por X minutos (ACCESS_TOKEN_EXPIRE_MINUTES por defecto)."""
     to_encode = data.copy()
 
-    expire = datetime.utcnow() + timedelta(
+    now = datetime.now(timezone.utc)
+    expire = now + timedelta(
         minutes=expires_minutes or settings.ACCESS_TOKEN_EXPIRE_MINUTES
     )
-    to_encode.update({"exp": expire})
+    # iat (en milisegundos) permite invalidar los tokens emitidos antes de una revocación
+    to_encode.update({"exp": expire, "iat": round(now.timestamp(), 3)})
 
     encoded_jwt = jwt.encode(
         to_encode,
@@ -62,13 +53,45 @@ def decode_access_token(token: str) -> Optional[dict]:
             SECRET_KEY,
             algorithms=[ALGORITHM],
         )
-        return payload
     except jwt.ExpiredSignatureError:
-        print("❌ Token expirado")
+        logger.debug("Token expirado")
         return None
     except jwt.InvalidTokenError as e:
-        print(f"❌ Token inválido: {e}")
+        logger.debug("Token inválido: %s", e)
+        return None
+
+    if is_revoked(payload):
+        logger.debug("Token revocado")
         return None
+    return payload
+
+
+# ================================
+# 🪪 CLAIMS COMPARTIDOS POR PETICIÓN
+# ================================
+# RBACMiddleware decodifica el token una vez y deja (token, claims) en el
+# estado de la petición; las dependencias los reutilizan en vez de volver a
+# verificar la firma.
+
+TOKEN_CLAIMS_STATE = "token_claims"
+
+
+def bearer_token(authorization: Optional[str]) -> Optional[str]:
+    """Token de una cabecera `Authorization: Bearer <token>`."""
+    if not authorization:
+        return None
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    return token.strip()
+
+
+def request_claims(request: Request, token: str) -> Optional[dict]:
+    """Claims del token (los ya decodificados en la petición, si coinciden)."""
+    cached = request.scope.get("state", {}).get(TOKEN_CLAIMS_STATE)
+    if cached is not None and cached[0] == token:
+        return cached[1]
+    return decode_access_token(token)
 
 
 # ================================
@@ -76,6 +99,7 @@ def decode_access_token(token: str) -> Optional[dict]:
 # ================================
 
 async def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> Dict[str, Any]:
     """
@@ -84,15 +108,10 @@ async def get_current_user(
     """
     token = credentials.credentials
     
-    print(f"🔍 Token recibido: {token[:30]}...")
-    
-    # Decodificar el token
-    payload = decode_access_token(token)
-    
-    print(f"🔍 Payload decodificado: {payload}")
+    # Decodificar el token (o reutilizar los claims del middleware)
+    payload = request_claims(request, token)
     
     if payload is None:
-        print("❌ Token inválido o expirado")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token inválido o expirado",
@@ -106,11 +125,8 @@ async def get_current_user(
     # 🔧 FIX: Mantener el tipo original del user_id
     # No convertir a string - dejar como viene del token
     
-    print(f"🔍 User ID extraído: {user_id} (tipo: {type(user_id)})")
-    print(f"🔍 Email extraído: {email}")
-    
     if not user_id and not email:
-        print("❌ Token no contiene información de usuario válida")
+        logger.debug("Token sin información de usuario")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token no contiene información de usuario válida",
@@ -141,4 +157,7 @@ def require_role(required_role: str):
                 detail=f"Se requiere rol de {required_role}"
             )
         return current_user
+
+    # RBACMiddleware lee los roles de la dependencia al construir su tabla
+    role_checker.allowed_roles = (required_role,)
     return role_checker
\ No newline at end of file
@@ -0,0 +1,130 @@
+import hashlib
+import logging
+import secrets
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.cache import MISSING, TTLCache
+from app.core.config import settings
+from app.core.ttl_store import lazy_store
+
+logger = logging.getLogger(__name__)
+
+
+# ================================
+# 🔄 REFRESH TOKENS CON ROTACIÓN
+# ================================
+# Cada login abre una "familia" de refresh tokens. Cada uso entrega uno
+# nuevo y el anterior queda marcado como usado: si alguien vuelve a
+# presentarlo (token robado), se revoca la familia entera y los access
+# tokens del usuario. Solo se guardan hashes, nunca los tokens.
+
+refresh_store = lazy_store("refresh_tokens")
+revocation_store = lazy_store("token_revocations")
+
+
+class RefreshTokenError(Exception):
+    """Refresh token desconocido, caducado, revocado o reutilizado."""
+
+
+def _refresh_ttl_seconds() -> float:
+    return settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400
+
+
+def _digest(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def issue_refresh_token(user_id: Any, family: Optional[str] = None) -> str:
+    """Crea un refresh token (en una familia nueva si no se indica)."""
+    family = family or secrets.token_hex(16)
+    token = secrets.token_urlsafe(32)
+    ttl = _refresh_ttl_seconds()
+    refresh_store.set(f"family:{family}", {"user_id": user_id}, ttl)
+    refresh_store.set(
+        f"token:{_digest(token)}",
+        {"user_id": user_id, "family": family, "issued_at": round(time.time(), 3)},
+        ttl,
+    )
+    return token
+
+
+def consume_refresh_token(token: str) -> Tuple[Any, str]:
+    """
+    Consume un refresh token (uso único) y devuelve (user_id, familia).
+    Si el token ya se había usado, revoca la familia y las sesiones del usuario.
+    """
+    digest = _digest(token)
+    entry = refresh_store.pop(f"token:{digest}")
+
+    if entry is None:
+        reused = refresh_store.get(f"used:{digest}")
+        if reused is not None:
+            logger.warning("Reutilización de refresh token: se revoca la sesión", extra={"user_id": reused["user_id"]})
+            revoke_family(reused["family"])
+            revoke_user_tokens(reused["user_id"])
+        raise RefreshTokenError("Refresh token inválido o caducado")
+
+    if refresh_store.get(f"family:{entry['family']}") is None:
+        raise RefreshTokenError("Sesión revocada")
+    revoked_at = refresh_store.get(f"revoked:{entry['user_id']}")
+    if revoked_at is not None and entry.get("issued_at", 0) <= revoked_at:
+        raise RefreshTokenError("Sesión revocada")
+
+    refresh_store.set(f"used:{digest}", entry, _refresh_ttl_seconds())
+    return entry["user_id"], entry["family"]
+
+
+def revoke_family(family: str) -> None:
+    """Cierra una sesión: ningún refresh token de la familia vuelve a servir."""
+    refresh_store.delete(f"family:{family}")
+
+
+def revoke_user_sessions(user_id: Any) -> None:
+    """
+    Cierra todas las sesiones del usuario (cambio de contraseña...): los
+    refresh tokens emitidos hasta ahora, de cualquier familia, dejan de
+    servir y los access tokens quedan revocados.
+    """
+    refresh_store.set(f"revoked:{user_id}", round(time.time(), 3), _refresh_ttl_seconds())
+    revoke_user_tokens(user_id)
+
+
+def family_of(token: str) -> Optional[str]:
+    entry = refresh_store.get(f"token:{_digest(token)}")
+    return entry["family"] if entry else None
+
+
+# ================================
+# ⛔ REVOCACIÓN DE ACCESS TOKENS
+# ================================
+# Una sola entrada por usuario: "tokens emitidos antes de T no valen".
+# Caduca a la vez que el access token más largo posible, así que el
+# almacén solo contiene revocaciones recientes. Se consulta en cada petición
+# autenticada (también desde el middleware, en el event loop), así que cada
+# proceso guarda las marcas, o su ausencia, unos segundos en memoria: una
+# revocación hecha en otro worker tarda como mucho
+# TOKEN_REVOCATION_CACHE_SECONDS en aplicarse allí; en este, al instante.
+
+revocation_cache = TTLCache(
+    "token_revocations",
+    max_entries=10_000,
+    ttl_seconds=settings.TOKEN_REVOCATION_CACHE_SECONDS,
+)
+
+
+def revoke_user_tokens(user_id: Any) -> None:
+    """Invalida los access tokens ya emitidos al usuario (cambio de rol, baja...)."""
+    revoked_at = round(time.time(), 3)  # Milisegundos, igual que el iat de los access tokens
+    revocation_store.set(str(user_id), revoked_at, settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+    revocation_cache.set(str(user_id), revoked_at)
+
+
+def is_revoked(claims: Dict[str, Any]) -> bool:
+    key = str(claims.get("sub"))
+    revoked_at = revocation_cache.get(key, MISSING)
+    if revoked_at is MISSING:
+        revoked_at = revocation_store.get(key, 0)  # 0: sin revocación
+        revocation_cache.set(key, revoked_at)
+    # <=: un token emitido en el mismo instante que la revocación tampoco vale
+    return bool(revoked_at) and claims.get("iat", 0) <= revoked_at
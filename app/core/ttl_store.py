@@ -0,0 +1,388 @@
+import itertools
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from app.core.config import settings
+from app.core.database import LazyClient
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+
+# ================================
+# ⏳ ALMACÉN CLAVE-VALOR CON TTL
+# ================================
+# Estado de vida corta (códigos de recuperación, contadores de intentos...)
+# que debe verse igual desde todos los workers. Los valores se guardan como
+# JSON, así que deben ser serializables.
+
+TTL_STORE_EVICTIONS = registry.counter(
+    "ttl_store_evictions_total",
+    "Entradas eliminadas del almacén TTL por expiración o por tamaño",
+    labelnames=("store", "reason"),
+)
+
+
+class TTLStore:
+    """
+    Interfaz común de los backends. Todas las operaciones son atómicas
+    respecto a otros hilos y, en los backends compartidos, a otros procesos.
+    """
+
+    namespace: str = ""
+
+    def get(self, key: str, default: Any = None) -> Any:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        raise NotImplementedError
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        """Lee y borra la clave en una sola operación (uso único)."""
+        raise NotImplementedError
+
+    def delete(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def incr(self, key: str, ttl_seconds: float, amount: int = 1) -> int:
+        """
+        Suma `amount` al contador y devuelve el nuevo valor. El TTL solo se
+        fija al crearlo: la ventana no se alarga con cada intento.
+        """
+        raise NotImplementedError
+
+    def sweep(self) -> int:
+        """Elimina las entradas expiradas y devuelve cuántas se borraron."""
+        return 0
+
+    def close(self) -> None:
+        self.stop_sweeper()
+
+    # ----------------------------
+    # Limpieza en segundo plano
+    # ----------------------------
+
+    _sweeper: Optional[threading.Thread] = None
+    _stop: Optional[threading.Event] = None
+
+    def start_sweeper(self, interval_seconds: float) -> None:
+        if self._sweeper is not None or interval_seconds <= 0:
+            return
+        self._stop = threading.Event()
+        self._sweeper = threading.Thread(
+            target=self._sweep_loop,
+            args=(interval_seconds, self._stop),
+            name=f"ttl-sweeper-{self.namespace}",
+            daemon=True,
+        )
+        self._sweeper.start()
+
+    def stop_sweeper(self) -> None:
+        if self._sweeper is not None:
+            self._stop.set()
+            self._sweeper.join(timeout=5)
+            self._sweeper = None
+
+    def _sweep_loop(self, interval_seconds: float, stop: threading.Event) -> None:
+        while not stop.wait(interval_seconds):
+            try:
+                self.sweep()
+            except Exception:  # Un fallo puntual no debe matar el hilo
+                logger.exception("Error limpiando el almacén TTL %s", self.namespace)
+
+
+# ================================
+# 🧠 BACKEND EN MEMORIA
+# ================================
+
+class MemoryTTLStore(TTLStore):
+    """
+    Almacén por proceso: útil en desarrollo y pruebas, o con un solo worker.
+    Al superar `max_entries` se descartan las entradas más antiguas.
+    """
+
+    def __init__(self, namespace: str = "default", max_entries: int = 100_000):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _live(self, key: str, now: float) -> Optional[tuple]:
+        entry = self._data.get(key)
+        if entry is not None and entry[0] <= now:
+            del self._data[key]
+            TTL_STORE_EVICTIONS.inc(store=self.namespace, reason="expired")
+            return None
+        return entry
+
+    def _insert(self, key: str, entry: tuple) -> None:
+        self._data.pop(key, None)
+        self._data[key] = entry
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            TTL_STORE_EVICTIONS.inc(store=self.namespace, reason="capacity")
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._live(key, time.monotonic())
+        return default if entry is None else entry[1]
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        with self._lock:
+            self._insert(key, (time.monotonic() + ttl_seconds, value))
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._live(key, time.monotonic())
+            if entry is None:
+                return default
+            del self._data[key]
+        return entry[1]
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            return self._data.pop(key, None) is not None
+
+    def incr(self, key: str, ttl_seconds: float, amount: int = 1) -> int:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._live(key, now)
+            if entry is None:
+                entry = (now + ttl_seconds, amount)
+                self._insert(key, entry)
+            else:
+                entry = (entry[0], entry[1] + amount)
+                self._data[key] = entry
+        return entry[1]
+
+    def sweep(self) -> int:
+        now = time.monotonic()
+        with self._lock:
+            expired = [key for key, (expires_at, _) in self._data.items() if expires_at <= now]
+            for key in expired:
+                del self._data[key]
+        if expired:
+            TTL_STORE_EVICTIONS.inc(len(expired), store=self.namespace, reason="expired")
+        return len(expired)
+
+
+# ================================
+# 🗄️ BACKEND SQLITE (COMPARTIDO)
+# ================================
+
+class SQLiteTTLStore(TTLStore):
+    """
+    Almacén compartido por todos los workers de una misma máquina a través
+    de un fichero SQLite (modo WAL). Cada operación es una única sentencia
+    o transacción, así que `pop` e `incr` son atómicos entre procesos.
+    Al superar `max_entries` se descartan las entradas que antes expiran.
+    El límite se comprueba cada `cap_check_every` escrituras y en cada
+    limpieza (contar el espacio de nombres es O(n)), así que puede
+    superarse temporalmente en esas escrituras por proceso.
+    """
+
+    def __init__(self, path: str, namespace: str = "default", max_entries: int = 100_000, cap_check_every: int = 256):
+        self.path = path
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.cap_check_every = max(1, cap_check_every)
+        self._writes = itertools.count(1)  # next() es atómico entre hilos
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ttl_store ("
+                " namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+                " expires_at REAL NOT NULL, PRIMARY KEY (namespace, key))"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ttl_store_expires ON ttl_store (namespace, expires_at)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        # Una conexión por hilo: sqlite3 no permite compartirlas
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str, default: Any = None) -> Any:
+        row = self._connection().execute(
+            "SELECT value FROM ttl_store WHERE namespace = ? AND key = ? AND expires_at > ?",
+            (self.namespace, key, time.time()),
+        ).fetchone()
+        return default if row is None else json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        conn = self._connection()
+        conn.execute(
+            "INSERT INTO ttl_store (namespace, key, value, expires_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (namespace, key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at",
+            (self.namespace, key, json.dumps(value), time.time() + ttl_seconds),
+        )
+        self._after_write(conn)
+
+    def _after_write(self, conn: sqlite3.Connection) -> None:
+        if next(self._writes) % self.cap_check_every == 0:
+            self._enforce_cap(conn)
+
+    def _enforce_cap(self, conn: sqlite3.Connection) -> None:
+        removed = conn.execute(
+            "DELETE FROM ttl_store WHERE namespace = ?1 AND key IN ("
+            " SELECT key FROM ttl_store WHERE namespace = ?1 ORDER BY expires_at"
+            " LIMIT max(0, (SELECT count(*) FROM ttl_store WHERE namespace = ?1) - ?2))",
+            (self.namespace, self.max_entries),
+        ).rowcount
+        if removed > 0:
+            TTL_STORE_EVICTIONS.inc(removed, store=self.namespace, reason="capacity")
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        row = self._connection().execute(
+            "DELETE FROM ttl_store WHERE namespace = ? AND key = ? RETURNING value, expires_at",
+            (self.namespace, key),
+        ).fetchone()
+        if row is None or row[1] <= time.time():
+            return default
+        return json.loads(row[0])
+
+    def delete(self, key: str) -> bool:
+        return self._connection().execute(
+            "DELETE FROM ttl_store WHERE namespace = ? AND key = ?",
+            (self.namespace, key),
+        ).rowcount > 0
+
+    def incr(self, key: str, ttl_seconds: float, amount: int = 1) -> int:
+        now = time.time()
+        conn = self._connection()
+        row = conn.execute(
+            "INSERT INTO ttl_store (namespace, key, value, expires_at) VALUES (?1, ?2, ?3, ?4) "
+            "ON CONFLICT (namespace, key) DO UPDATE SET "
+            " value = CASE WHEN expires_at > ?5 THEN CAST(value AS INTEGER) + ?3 ELSE ?3 END,"
+            " expires_at = CASE WHEN expires_at > ?5 THEN expires_at ELSE ?4 END "
+            "RETURNING value",
+            (self.namespace, key, amount, now + ttl_seconds, now),
+        ).fetchone()
+        self._after_write(conn)
+        return int(row[0])
+
+    def sweep(self) -> int:
+        conn = self._connection()
+        removed = conn.execute(
+            "DELETE FROM ttl_store WHERE namespace = ? AND expires_at <= ?",
+            (self.namespace, time.time()),
+        ).rowcount
+        if removed > 0:
+            TTL_STORE_EVICTIONS.inc(removed, store=self.namespace, reason="expired")
+        self._enforce_cap(conn)
+        return removed
+
+    def close(self) -> None:
+        super().close()
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+# ================================
+# 🟥 BACKEND REDIS (OPCIONAL)
+# ================================
+
+# INCRBY + PEXPIRE solo al crear el contador, en una sola operación
+_INCR_SCRIPT = """
+local value = redis.call('INCRBY', KEYS[1], ARGV[1])
+if value == tonumber(ARGV[1]) then redis.call('PEXPIRE', KEYS[1], ARGV[2]) end
+return value
+"""
+
+
+class RedisTTLStore(TTLStore):
+    """
+    Almacén compartido entre máquinas. La expiración la hace Redis y el
+    límite de tamaño se delega en su política `maxmemory`.
+    Requiere el paquete `redis` (no se instala por defecto).
+    """
+
+    def __init__(self, url: str, namespace: str = "default"):
+        try:
+            import redis  # Dependencia opcional
+        except ImportError as exc:
+            raise RuntimeError("❌ TTL_STORE_URL usa redis:// pero el paquete 'redis' no está instalado.") from exc
+
+        self.namespace = namespace
+        self._redis = redis.Redis.from_url(url)
+        self._incr = self._redis.register_script(_INCR_SCRIPT)
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def get(self, key: str, default: Any = None) -> Any:
+        raw = self._redis.get(self._key(key))
+        return default if raw is None else json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        self._redis.set(self._key(key), json.dumps(value), px=max(1, int(ttl_seconds * 1000)))
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        raw = self._redis.getdel(self._key(key))
+        return default if raw is None else json.loads(raw)
+
+    def delete(self, key: str) -> bool:
+        return self._redis.delete(self._key(key)) > 0
+
+    def incr(self, key: str, ttl_seconds: float, amount: int = 1) -> int:
+        return int(self._incr(keys=[self._key(key)], args=[amount, max(1, int(ttl_seconds * 1000))]))
+
+    def close(self) -> None:
+        super().close()
+        self._redis.close()
+
+
+# ================================
+# 🏭 CONFIGURACIÓN
+# ================================
+
+def default_sqlite_path() -> str:
+    return os.path.join(tempfile.gettempdir(), "api_sueno_ttl_store.sqlite3")
+
+
+def open_store(namespace: str, url: Optional[str] = None, max_entries: Optional[int] = None) -> TTLStore:
+    """
+    Crea el backend indicado por `url` (por defecto TTL_STORE_URL):
+
+    - `memory://`: por proceso.
+    - `sqlite:///ruta/al/fichero` (o vacío): compartido en la máquina.
+    - `redis://host:6379/0`: compartido entre máquinas.
+    """
+    url = settings.TTL_STORE_URL if url is None else url
+    max_entries = settings.TTL_STORE_MAX_ENTRIES if max_entries is None else max_entries
+
+    if url.startswith("memory://"):
+        store: TTLStore = MemoryTTLStore(namespace, max_entries=max_entries)
+    elif url.startswith(("redis://", "rediss://")):
+        return RedisTTLStore(url, namespace)
+    elif not url or url.startswith("sqlite://"):
+        path = url[len("sqlite:///"):] if url else default_sqlite_path()
+        store = SQLiteTTLStore(path or default_sqlite_path(), namespace, max_entries=max_entries)
+    else:
+        raise ValueError(f"❌ TTL_STORE_URL no soportada: {url}")
+
+    store.start_sweeper(settings.TTL_STORE_SWEEP_SECONDS)
+    return store
+
+
+def lazy_store(namespace: str, **kwargs: Any) -> LazyClient:
+    """Almacén que se abre en el primer uso; `set_client()` lo sustituye en pruebas."""
+    return LazyClient(lambda: open_store(namespace, **kwargs))
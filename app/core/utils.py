@@ -1,4 +1,5 @@
 import re
+import unicodedata
 import uuid
 from datetime import datetime
 from typing import Optional
@@ -30,6 +31,21 @@ def sanitize_text(value: str) -> str:
     return re.sub(r"[<>\"']", "", value)
 
 
+def normalize_prompt(value: str) -> str:
+    """
+    Forma canónica de un texto libre para usarlo como clave de caché:
+    sin mayúsculas, tildes, signos de puntuación ni espacios repetidos.
+    Ej: "¿Cuántas  horas debo dormir?" -> "cuantas horas debo dormir"
+    """
+    decomposed = unicodedata.normalize("NFKD", value.casefold())
+    without_accents = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    without_punctuation = "".join(
+        " " if unicodedata.category(ch).startswith(("P", "S")) else ch
+        for ch in without_accents
+    )
+    return " ".join(without_punctuation.split())
+
+
 # -----------------------------------------
 # 📧 EMAIL VALIDATION
 # -----------------------------------------
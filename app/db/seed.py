@@ -1,5 +1,20 @@
+import argparse
+import csv
+import json
+import logging
+import os
+import random
+from datetime import date, datetime, time, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional, TextIO, Tuple
+
+import bcrypt
+
 from app.db.supabase_client import supabase
 from app.api.services import hash_password
+from app.core import passwords
+from app.core.logging_config import setup_logging
+
+logger = logging.getLogger(__name__)
 
 
 def seed_roles():
@@ -16,9 +31,9 @@ def seed_roles():
         
         if count == 0:
             supabase.table("roles").insert(role_data).execute()
-            print(f"✔ Rol '{role_data['name']}' creado")
+            logger.info("Rol '%s' creado", role_data["name"])
         else:
-            print(f"✔ Rol '{role_data['name']}' ya existe")
+            logger.info("Rol '%s' ya existe", role_data["name"])
 
 
 def seed_admin_user():
@@ -31,7 +46,7 @@ def seed_admin_user():
     existing, count = supabase.table("users").select("id", count='exact').eq("email", email).execute()
 
     if count > 0:
-        print(f"✔ Usuario {email} ya existe")
+        logger.info("Usuario %s ya existe", email)
         return
 
     # Crear usuario admin
@@ -45,7 +60,7 @@ def seed_admin_user():
     }
 
     supabase.table("users").insert(data).execute()
-    print(f"🚀 Usuario admin creado: {email} / admin123")
+    logger.info("Usuario admin creado: %s", email)
 
 
 def seed_test_users():
@@ -72,7 +87,7 @@ def seed_test_users():
         existing, count = supabase.table("users").select("id", count='exact').eq("email", user["email"]).execute()
         
         if count > 0:
-            print(f"✔ Usuario de prueba {user['email']} ya existe")
+            logger.info("Usuario de prueba %s ya existe", user["email"])
             continue
         
         # Crear usuario
@@ -86,34 +101,283 @@ def seed_test_users():
         }
         
         supabase.table("users").insert(data).execute()
-        print(f"🚀 Usuario de prueba creado: {user['email']} / {user['password']}")
+        logger.info("Usuario de prueba creado: %s", user["email"])
 
 
 def run_seed():
     """
     Ejecuta todas las seeds en orden.
     """
-    print("=" * 50)
-    print("Iniciando seed...")
-    print("=" * 50)
-    
+    logger.info("Iniciando seed...")
     seed_roles()
-    print()
-    
     seed_admin_user()
-    print()
-    
     seed_test_users()
-    print()
-    
-    print("=" * 50)
-    print("✅ Seed completado exitosamente")
-    print("=" * 50)
-    print("\nUsuarios creados:")
-    print("  Admin demo: admin@demo.com / admin123")
-    print("  Admin test: admin@test.com / admin123")
-    print("  User test:  user@test.com / user123")
+    logger.info("Seed completado")
+
+
+# ================================
+# 🧪 DATOS SINTÉTICOS (pruebas de carga)
+# ================================
+# Genera N usuarios con perfil, años de historial de hábitos y los logros
+# que ese historial desbloquea. Cada usuario usa su propio generador
+# aleatorio (semilla + índice), así que el resultado es el mismo en cada
+# ejecución con la misma semilla y fecha final, sin depender del tamaño
+# de lote ni del primer id. Todas las cuentas comparten un único hash de
+# contraseña. En la BD los ids también son fijos (`first_id`): si alguno
+# está ocupado la carga falla en vez de desplazarlos.
+
+SYNTHETIC_PASSWORD = "synthetic123"
+SYNTHETIC_HABITS = ["agua", "lectura", "sin_pantallas", "meditacion"]
+SYNTHETIC_ACHIEVEMENTS = ["first_habit", "streak_3", "streak_7", "early_bird", "night_owl"]
+SYNTHETIC_GENDERS = ["Masculino", "Femenino", "Otro"]
+FIRST_NAMES = ["Lucía", "Mateo", "Sofía", "Hugo", "Martina", "Pablo", "Valeria", "Daniel", "Julia", "Álvaro"]
+LAST_NAMES = ["García", "Martínez", "López", "Sánchez", "Pérez", "Gómez", "Fernández", "Ruiz", "Díaz", "Moreno"]
+
+BCRYPT_SALT_CHARS = b"./ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789"
+
+# Orden de inserción: las tablas hijas nunca se escriben antes que sus usuarios
+TABLES = ("users", "profiles", "habits_history", "user_achievements")
+
+Row = Dict[str, Any]
+Sink = Callable[[str, List[Row]], None]
+
+
+def synthetic_password_hash(seed: int) -> str:
+    """
+    Hash bcrypt de SYNTHETIC_PASSWORD (mismo coste que la app) con una sal
+    derivada de la semilla, para que también la tabla users sea idéntica
+    entre ejecuciones. Se calcula una vez por carga.
+    """
+    rng = random.Random(f"{seed}:salt")
+    # 22 caracteres; el último solo codifica 2 bits
+    salt = bytes(rng.choice(BCRYPT_SALT_CHARS) for _ in range(21)) + bytes([rng.choice(b".Oeu")])
+    prefix = f"${passwords.ALGORITHM}${passwords.current_cost():02d}$".encode()  # Sin rehash al primer login
+    return bcrypt.hashpw(SYNTHETIC_PASSWORD.encode("utf-8"), prefix + salt).decode()
+
+
+def _user_history(rng: random.Random, user_id: int, start: date, end: date) -> Tuple[List[Row], List[Row]]:
+    """
+    Historial de un usuario como cadena de Markov de dos estados (activo /
+    inactivo): la duración de las rachas es geométrica y cada usuario tiene
+    su propia constancia, de rachas de un par de días a meses seguidos.
+    """
+    keep_streak = rng.uniform(0.6, 0.97)  # Probabilidad de seguir mañana
+    restart = rng.uniform(0.05, 0.5)  # Probabilidad de retomar tras un día sin hábitos
+    usual_hour = rng.choice([6, 7, 8, 21, 22, 23])
+    habits = rng.sample(SYNTHETIC_HABITS, rng.randint(1, len(SYNTHETIC_HABITS)))
+
+    history: List[Row] = []
+    unlocked: Dict[str, datetime] = {}
+    active, streak = True, 0
+    day = start
+    while day <= end:
+        if active:
+            streak += 1
+            done = [habit for habit in habits if rng.random() < 0.8] or [rng.choice(habits)]
+            for habit in done:
+                done_at = datetime.combine(day, time(usual_hour)) + timedelta(minutes=rng.randint(-50, 50))
+                history.append({
+                    "user_id": user_id,
+                    "habit_id": habit,
+                    "date": day.isoformat(),
+                    "completed_at": done_at.isoformat(),
+                })
+                unlocked.setdefault("first_habit", done_at)
+                if done_at.hour < 7:
+                    unlocked.setdefault("early_bird", done_at)
+                if done_at.hour >= 23:
+                    unlocked.setdefault("night_owl", done_at)
+            if streak >= 3:
+                unlocked.setdefault("streak_3", datetime.combine(day, time(23, 59)))
+            if streak >= 7:
+                unlocked.setdefault("streak_7", datetime.combine(day, time(23, 59)))
+            active = rng.random() < keep_streak
+        else:
+            streak = 0
+            active = rng.random() < restart
+        day += timedelta(days=1)
+
+    achievements = [
+        {"user_id": user_id, "achievement_id": code, "unlocked_at": unlocked[code].isoformat()}
+        for code in SYNTHETIC_ACHIEVEMENTS
+        if code in unlocked
+    ]
+    return history, achievements
+
+
+def generate_synthetic(
+    users: int,
+    years: float = 2,
+    seed: int = 42,
+    end: Optional[date] = None,
+    first_id: int = 1000,
+    hashed_password: Optional[str] = None,
+) -> Iterator[Tuple[str, Row]]:
+    """
+    Genera (tabla, fila) usuario a usuario. Los ids empiezan en `first_id`
+    para no chocar con los usuarios de demostración; `user_id` es entero,
+    como users.id.
+    """
+    end = end or date.today()
+    span_days = int(years * 365)
+    hashed_password = hashed_password or synthetic_password_hash(seed)  # Un solo bcrypt
+
+    for i in range(users):
+        user_id = first_id + i
+        rng = random.Random(f"{seed}:{i}")
+        signup = end - timedelta(days=rng.randrange(span_days + 1))
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        age = rng.randint(16, 75)
+        gender = rng.choice(SYNTHETIC_GENDERS)
+        phone = f"6{rng.randrange(10 ** 8):08d}"
+
+        yield "users", {
+            "id": user_id,
+            "email": f"synthetic{user_id}@example.com",
+            "hashed_password": hashed_password,
+            "full_name": name,
+            "role_id": 2,
+            "age": age,
+            "phone": phone,
+            "gender": gender,
+            "is_active": rng.random() < 0.95,
+            "is_verified": rng.random() < 0.8,
+            "created_at": datetime.combine(signup, time(12)).isoformat(),
+        }
+        yield "profiles", {"id": user_id, "name": name, "age": age, "phone": phone, "gender": gender}
+
+        history, achievements = _user_history(rng, user_id, signup, end)
+        for row in history:
+            yield "habits_history", row
+        for row in achievements:
+            yield "user_achievements", row
+
+
+def write_batches(rows: Iterator[Tuple[str, Row]], sink: Sink, batch_size: int = 5000) -> Dict[str, int]:
+    """
+    Agrupa las filas por tabla y las envía a `sink` en lotes de
+    `batch_size`. Antes de vaciar una tabla se vacían las anteriores en
+    TABLES, así ninguna fila llega antes que el usuario al que apunta.
+    """
+    buffers: Dict[str, List[Row]] = {table: [] for table in TABLES}
+    counts = {table: 0 for table in TABLES}
+
+    def flush(upto: str) -> None:
+        for table in TABLES[: TABLES.index(upto) + 1]:
+            if buffers[table]:
+                sink(table, buffers[table])
+                counts[table] += len(buffers[table])
+                buffers[table] = []
+
+    for table, row in rows:
+        buffers[table].append(row)
+        if len(buffers[table]) >= batch_size:
+            flush(table)
+    flush(TABLES[-1])
+    return counts
+
+
+def check_ids_free(first_id: int, users: int) -> None:
+    """Falla si algún id de [first_id, first_id + users) ya existe en la BD."""
+    last_id = first_id + users - 1
+    result = supabase.table("users").select("id").gte("id", first_id).lte("id", last_id).limit(1).execute()
+    if result.data:
+        raise ValueError(
+            f"Los ids {first_id}-{last_id} no están libres (existe el {result.data[0]['id']}): "
+            "elige otro --first-id"
+        )
+
+
+def supabase_sink(table: str, rows: List[Row]) -> None:
+    """Inserta el lote con una sola petición (BD real o el sustituto local de PostgREST)."""
+    supabase.table(table).insert(rows).execute()
+
+
+class FileSink:
+    """Un archivo CSV o NDJSON por tabla en `directory`, escritos en streaming."""
+
+    def __init__(self, directory: str, fmt: str = "csv"):
+        self.directory = directory
+        self.fmt = fmt
+        self.files: Dict[str, TextIO] = {}
+        self.writers: Dict[str, Any] = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def __call__(self, table: str, rows: List[Row]) -> None:
+        if table not in self.files:
+            self.files[table] = open(
+                os.path.join(self.directory, f"{table}.{self.fmt}"), "w", encoding="utf-8", newline=""
+            )
+            if self.fmt == "csv":
+                self.writers[table] = csv.DictWriter(self.files[table], fieldnames=list(rows[0]))
+                self.writers[table].writeheader()
+        if self.fmt == "csv":
+            self.writers[table].writerows(rows)
+        else:
+            self.files[table].writelines(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+
+    def close(self) -> None:
+        for f in self.files.values():
+            f.close()
+
+
+def run_synthetic_seed(
+    users: int,
+    years: float = 2,
+    seed: int = 42,
+    out: Optional[str] = None,
+    fmt: str = "csv",
+    batch_size: int = 5000,
+    end: Optional[date] = None,
+    first_id: int = 1000,
+) -> Dict[str, int]:
+    """
+    Carga datos sintéticos en la BD configurada (SUPABASE_URL, que puede
+    ser el sustituto local de PostgREST) o, con `out`, en archivos.
+    """
+    logger.info("Generando %s usuarios sintéticos (semilla %s)...", users, seed)
+    if out is None:
+        check_ids_free(first_id, users)
+        seed_roles()
+        rows = generate_synthetic(users, years=years, seed=seed, end=end, first_id=first_id)
+        counts = write_batches(rows, supabase_sink, batch_size)
+        # Los ids explícitos no avanzan la secuencia: sin esto el próximo registro chocaría
+        supabase.rpc("sync_users_id_sequence", {}).execute()
+    else:
+        rows = generate_synthetic(users, years=years, seed=seed, end=end, first_id=first_id)
+        sink = FileSink(out, fmt)
+        try:
+            counts = write_batches(rows, sink, batch_size)
+        finally:
+            sink.close()
+    logger.info("Datos sintéticos generados", extra={"seed_counts": counts})
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Seed de la base de datos")
+    parser.add_argument("--synthetic", type=int, metavar="N", help="Generar N usuarios sintéticos con historial")
+    parser.add_argument("--years", type=float, default=2, help="Años de historial de hábitos")
+    parser.add_argument("--seed", type=int, default=42, help="Semilla (misma semilla, mismos datos)")
+    parser.add_argument("--end-date", type=date.fromisoformat, help="Último día del historial (hoy por defecto)")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Filas por inserción")
+    parser.add_argument("--first-id", type=int, default=1000, help="Id del primer usuario (deben estar libres)")
+    parser.add_argument("--out", help="Escribir en archivos en este directorio en lugar de en la BD")
+    parser.add_argument("--format", choices=("csv", "ndjson"), default="csv", help="Formato de los archivos")
+    args = parser.parse_args()
+
+    if args.synthetic is None:
+        run_seed()
+    else:
+        try:
+            run_synthetic_seed(
+                args.synthetic, years=args.years, seed=args.seed, out=args.out,
+                fmt=args.format, batch_size=args.batch_size, end=args.end_date, first_id=args.first_id,
+            )
+        except ValueError as e:
+            parser.error(str(e))
 
 
 if __name__ == "__main__":
-    run_seed()
\ No newline at end of file
+    setup_logging()
+    main()
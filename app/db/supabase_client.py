@@ -1,16 +1,11 @@
-from supabase import create_client, Client
-from app.core.config import settings
+from app.core.database import get_supabase, supabase
 
-def get_supabase_client() -> Client:
+
+def get_supabase_client():
     """
-    Crea y retorna un cliente global de Supabase.
+    Retorna el cliente global de Supabase (compartido con app.core.database).
     """
-    url = settings.SUPABASE_URL
-    key = settings.SUPABASE_KEY
-
-    if not url or not key:
-        raise ValueError("❌ No se encontró SUPABASE_URL o SUPABASE_KEY en el .env")
+    return supabase.get_client()
 
-    return create_client(url, key)
 
-supabase = get_supabase_client()
+__all__ = ["get_supabase", "get_supabase_client", "supabase"]
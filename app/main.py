@@ -1,44 +1,87 @@
+from contextlib import asynccontextmanager
+import asyncio
+
 from fastapi import FastAPI
-from dotenv import load_dotenv
+from fastapi.responses import Response
 from slowapi.errors import RateLimitExceeded
 from slowapi import _rate_limit_exceeded_handler
-import os
 
-# Cargar variables de entorno primero
-load_dotenv()
+# Settings ya lee el .env: no hace falta load_dotenv ni os.getenv aquí
+from app.core import passwords
+from app.core.config import settings
+from app.core.logging_config import setup_logging
+from app.core.recaptcha import warn_if_unconfigured
+from app.chatbot.llm_provider import llm_provider
+from app.api.user_import import shutdown_hash_pool
+
+setup_logging()
+
+APP_NAME = settings.APP_NAME
+APP_VERSION = settings.APP_VERSION
+
+
+# ================================
+# 🚀 ARRANQUE
+# ================================
+# El arranque no escribe en stdout ni crea clientes pesados: Supabase y
+# Gemini se construyen en su primer uso. Para ver las rutas registradas:
+#     python -m app.cli routes
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warn_if_unconfigured()
+    # Preparar el cliente del LLM en segundo plano, sin retrasar el arranque
+    if settings.CHATBOT_WARMUP_ON_STARTUP:
+        asyncio.get_running_loop().run_in_executor(None, llm_provider.warmup)
+    # Calibrar el coste de bcrypt (y el hash señuelo) sin retrasar el arranque (el primer login espera si hace falta)
+    asyncio.get_running_loop().run_in_executor(None, passwords.warm_up)
+    yield
+    shutdown_hash_pool()
 
-APP_NAME = os.getenv("APP_NAME", "Backend API")
-APP_VERSION = os.getenv("APP_VERSION", "1.0.0")
 
 # ✅ CREAR LA INSTANCIA DE FASTAPI UNA SOLA VEZ
 app = FastAPI(
     title=APP_NAME,
-    version=APP_VERSION
+    version=APP_VERSION,
+    lifespan=lifespan,
 )
 
-# ✅ CONFIGURAR SWAGGER, CORS Y RATE LIMITING
+# ✅ CONFIGURAR SWAGGER, CORS, MÉTRICAS Y RATE LIMITING
 from app.docs.swagger_config import setup_swagger
 from app.middleware.cors import setup_cors
+from app.middleware.metrics import setup_metrics
+from app.middleware.server_timing import setup_server_timing
+from app.middleware.request_id import setup_request_id
+from app.middleware.rbac import setup_rbac
 from app.core.limiter import limiter
+from app.core.metrics import CONTENT_TYPE_LATEST, registry, render_text
 
 setup_swagger(app)
+setup_rbac(app)  # Dentro de CORS: los 401/403 también llevan cabeceras CORS
 setup_cors(app)
+setup_server_timing(app)
+setup_request_id(app)
+setup_metrics(app)  # El último: envuelve a los demás middlewares
 
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
 # ✅ IMPORTAR ROUTERS
 from app.api.auth_routes import router as auth_router
-# from app.api.habits_routes import router as habits_router  # Si tienes otros routers
-# from app.api.achievements_routes import router as achievements_router
+from app.api.routes.chatbot import router as chatbot_router
+from app.api.habits.routes import router as habits_router
+from app.api.achievements.routes import router as achievements_router
 
 # ✅ REGISTRAR ROUTERS DIRECTAMENTE (SIN ROUTER INTERMEDIO)
 # Esto hace que las rutas sean: /api/auth/login, /api/auth/register, etc.
 app.include_router(auth_router, prefix="/api/auth", tags=["Authentication"])
 
-# ✅ Si tienes otros routers, regístralos aquí también
-# app.include_router(habits_router, prefix="/api/habits", tags=["Habits"])
-# app.include_router(achievements_router, prefix="/api/achievements", tags=["Achievements"])
+# ✅ ChatBot: el cliente Gemini se crea en el primer uso (503 si no está configurado)
+app.include_router(chatbot_router, prefix="/api/chatbot", tags=["ChatBot"])
+
+# ✅ Hábitos y logros: los routers ya traen sus rutas (/habits/..., /user/achievements, ...)
+app.include_router(habits_router, prefix="/api", tags=["Habits"])
+app.include_router(achievements_router, prefix="/api", tags=["Achievements"])
 
 # ✅ RUTA RAÍZ
 @app.get("/", tags=["Sistema"])
@@ -58,14 +101,7 @@ def health_check():
     }
 
 
-# 🔍 DEBUG: Imprimir todas las rutas registradas (puedes comentar esto después)
-@app.on_event("startup")
-async def startup_event():
-    print("\n" + "="*60)
-    print("🚀 RUTAS REGISTRADAS EN LA API:")
-    print("="*60)
-    for route in app.routes:
-        if hasattr(route, 'methods') and hasattr(route, 'path'):
-            methods = ', '.join(route.methods)
-            print(f"  {methods:10} -> {route.path}")
-    print("="*60 + "\n")
\ No newline at end of file
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Métricas en formato Prometheus (peticiones, latencias, chatbot, caché...)."""
+    return Response(render_text(registry), media_type=CONTENT_TYPE_LATEST)
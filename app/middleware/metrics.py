@@ -0,0 +1,129 @@
+import time
+from typing import Dict, Optional
+
+from fastapi import FastAPI
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import registry
+
+
+# ================================
+# 📊 MÉTRICAS HTTP
+# ================================
+# Las rutas se etiquetan por su plantilla (/api/auth/users/{user_id}), nunca
+# por la URL real: el número de series no depende de los ids ni de las URLs
+# inexistentes que lleguen (todas van a "unmatched").
+
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+KNOWN_METHODS = {"GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"}
+UNMATCHED = "unmatched"
+
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total",
+    "Peticiones HTTP por ruta, método y código de estado",
+    labelnames=("method", "route", "status"),
+)
+HTTP_LATENCY = registry.histogram(
+    "http_request_duration_seconds",
+    "Duración de las peticiones HTTP",
+    labelnames=("method", "route"),
+)
+HTTP_IN_FLIGHT = registry.gauge(
+    "http_requests_in_flight",
+    "Peticiones HTTP en curso",
+    labelnames=("method",),
+)
+HTTP_REQUEST_SIZE = registry.histogram(
+    "http_request_size_bytes",
+    "Tamaño del cuerpo de las peticiones",
+    labelnames=("method", "route"),
+    buckets=SIZE_BUCKETS,
+)
+HTTP_RESPONSE_SIZE = registry.histogram(
+    "http_response_size_bytes",
+    "Tamaño del cuerpo de las respuestas",
+    labelnames=("method", "route"),
+    buckets=SIZE_BUCKETS,
+)
+
+
+_endpoint_paths: Dict[object, str] = {}
+
+
+def route_template(scope: Scope) -> str:
+    """Plantilla de la ruta resuelta para la petición, o "unmatched"."""
+    # Las rutas de FastAPI dejan la ruta resuelta en el scope
+    route = scope.get("route")
+    if route is not None:
+        return getattr(route, "path", UNMATCHED)
+
+    # Rutas de Starlette (/docs, /openapi.json): buscar por endpoint
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return UNMATCHED
+    path: Optional[str] = _endpoint_paths.get(endpoint)
+    if path is None:
+        routes = getattr(scope.get("app"), "routes", [])
+        path = next(
+            (r.path for r in routes if getattr(r, "endpoint", None) is endpoint),
+            UNMATCHED,
+        )
+        _endpoint_paths[endpoint] = path
+    return path
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI puro (sin BaseHTTPMiddleware): no copia ni almacena el
+    cuerpo, solo cuenta bytes al pasar, así que funciona con streaming (SSE).
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"] if scope["method"] in KNOWN_METHODS else "OTHER"
+        status = 500  # Si la app falla sin responder
+        request_bytes = 0
+        response_bytes = 0
+
+        async def receive_wrapper() -> Message:
+            nonlocal request_bytes
+            message = await receive()
+            if message["type"] == "http.request":
+                request_bytes += len(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, response_bytes
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc(method=method)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            HTTP_IN_FLIGHT.dec(method=method)
+            route = route_template(scope)
+            HTTP_REQUESTS.inc(method=method, route=route, status=str(status))
+            HTTP_LATENCY.observe(elapsed, method=method, route=route)
+            HTTP_REQUEST_SIZE.observe(request_bytes, method=method, route=route)
+            HTTP_RESPONSE_SIZE.observe(response_bytes, method=method, route=route)
+
+
+def setup_metrics(app: FastAPI):
+    """
+    Registra el middleware de métricas. Debe añadirse el último para
+    envolver a los demás y medir la petición completa.
+    """
+    app.add_middleware(MetricsMiddleware)
+    return app
@@ -1,45 +1,129 @@
-from fastapi import Request, HTTPException
-from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from starlette.middleware.base import BaseHTTPMiddleware
-from typing import List
+from typing import FrozenSet, List, Optional, Tuple
 
-from app.core.security import decode_access_token
+from fastapi import FastAPI
+from fastapi.dependencies.models import Dependant
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from starlette.routing import Match
+from starlette.types import ASGIApp, Receive, Scope, Send
 
-bearer_scheme = HTTPBearer()
+from app.core.security import TOKEN_CLAIMS_STATE, bearer_token, decode_access_token
 
 
-class RBACMiddleware(BaseHTTPMiddleware):
+# ================================
+# 🗺️ TABLA RUTA → ROLES
+# ================================
+# Los roles permitidos se leen de las dependencias `require_role(...)`
+# (atributo `allowed_roles`), así que no hay que declararlos dos veces.
+
+RouteRoles = Tuple[APIRoute, Optional[FrozenSet[str]]]
+
+
+def _dependency_roles(dependant: Dependant) -> Optional[FrozenSet[str]]:
+    """Roles exigidos por el árbol de dependencias (intersección si hay varios)."""
+    roles: Optional[FrozenSet[str]] = None
+    for dependency in dependant.dependencies:
+        required = getattr(dependency.call, "allowed_roles", None)
+        if required is not None:
+            required = frozenset(required)
+            roles = required if roles is None else roles & required
+        nested = _dependency_roles(dependency)
+        if nested is not None:
+            roles = nested if roles is None else roles & nested
+    return roles
+
+
+def build_route_roles(routes) -> List[RouteRoles]:
     """
-    Middleware para validar roles en rutas protegidas.
-    Las rutas podrán definir los roles permitidos usando:
-        request.state.allowed_roles = ["admin", "user"]
+    Todas las rutas de la API con sus roles (None si no exigen rol), en el
+    orden en que las resuelve el router.
     """
+    return [
+        (route, _dependency_roles(route.dependant))
+        for route in routes
+        if isinstance(route, APIRoute)
+    ]
 
-    async def dispatch(self, request: Request, call_next):
-        allowed_roles: List[str] = getattr(request.state, "allowed_roles", None)
 
-        # Si la ruta no requiere roles → continuar
-        if not allowed_roles:
-            return await call_next(request)
+def _header(scope: Scope, name: bytes) -> Optional[str]:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
 
-        # Intentar obtener token
-        try:
-            credentials: HTTPAuthorizationCredentials = await bearer_scheme(request)
-            token = credentials.credentials
-        except Exception:
-            raise HTTPException(status_code=401, detail="Token no proporcionado")
 
-        # Decodificar y validar token
-        payload = decode_access_token(token)
-        if not payload:
-            raise HTTPException(status_code=401, detail="Token inválido o expirado")
+def _error(status_code: int, detail: str) -> JSONResponse:
+    headers = {"WWW-Authenticate": "Bearer"} if status_code == 401 else None
+    return JSONResponse({"detail": detail}, status_code=status_code, headers=headers)
 
-        user_role = payload.get("role")
 
-        if user_role not in allowed_roles:
-            raise HTTPException(
-                status_code=403,
-                detail="No tienes permisos para acceder a esta ruta"
-            )
+# ================================
+# 🛡️ MIDDLEWARE
+# ================================
+
+class RBACMiddleware:
+    """
+    Autorización por rol como middleware ASGI puro (sin BaseHTTPMiddleware).
+
+    - La tabla ruta → roles se construye una vez, en la primera petición
+      (cuando ya están registrados todos los routers).
+    - El token Bearer se decodifica una sola vez por petición y los claims
+      quedan en `request.state` para `get_current_user`.
+    - Las rutas protegidas se rechazan (401/403) antes de llegar al router;
+      las dependencias `require_role` siguen comprobándolo igualmente.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._table: Optional[List[RouteRoles]] = None
+        self._protected: List[RouteRoles] = []
 
-        return await call_next(request)
+    def _build(self, scope: Scope) -> None:
+        self._table = build_route_roles(getattr(scope.get("app"), "routes", []))
+        self._protected = [(route, roles) for route, roles in self._table if roles is not None]
+
+    def _required_roles(self, scope: Scope) -> Optional[FrozenSet[str]]:
+        if self._table is None:
+            self._build(scope)
+        # Camino rápido: la mayoría de peticiones no encajan en ninguna ruta protegida
+        if not any(route.matches(scope)[0] == Match.FULL for route, _ in self._protected):
+            return None
+        # Confirmar que el router no resolvería antes otra ruta sin rol
+        for route, roles in self._table:
+            if route.matches(scope)[0] == Match.FULL:
+                return roles
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = bearer_token(_header(scope, b"authorization"))
+        claims = None
+        if token is not None:
+            claims = decode_access_token(token)
+            scope.setdefault("state", {})[TOKEN_CLAIMS_STATE] = (token, claims)
+
+        roles = self._required_roles(scope)
+        if roles is not None:
+            if token is None:
+                await _error(401, "Token no proporcionado")(scope, receive, send)
+                return
+            if claims is None:
+                await _error(401, "Token inválido o expirado")(scope, receive, send)
+                return
+            if claims.get("role") not in roles:
+                await _error(403, "No tienes permisos para acceder a este recurso")(scope, receive, send)
+                return
+
+        await self.app(scope, receive, send)
+
+
+def setup_rbac(app: FastAPI):
+    """
+    Registra el middleware de roles. Debe añadirse antes que CORS para que
+    las respuestas 401/403 lleven también las cabeceras CORS.
+    """
+    app.add_middleware(RBACMiddleware)
+    return app
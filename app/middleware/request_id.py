@@ -0,0 +1,51 @@
+import re
+import uuid
+
+from fastapi import FastAPI
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.logging_config import request_id_var
+
+REQUEST_ID_HEADER = "x-request-id"
+# Solo se reutiliza el id del cliente/proxy si es corto y seguro para los logs
+VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+
+class RequestIdMiddleware:
+    """
+    Asigna un id a cada petición (o reutiliza `X-Request-ID` si viene del
+    proxy), lo deja en una variable de contexto para los logs y lo devuelve
+    en la respuesta.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = ""
+        for name, value in scope["headers"]:
+            if name == REQUEST_ID_HEADER.encode():
+                incoming = value.decode("latin-1")
+                break
+        request_id = incoming if VALID_REQUEST_ID.match(incoming) else uuid.uuid4().hex
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)["X-Request-ID"] = request_id
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(token)
+
+
+def setup_request_id(app: FastAPI):
+    app.add_middleware(RequestIdMiddleware)
+    return app
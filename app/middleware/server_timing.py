@@ -0,0 +1,83 @@
+import logging
+import time
+
+from fastapi import FastAPI
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.db_tracing import DB_BUDGET_EXCEEDED, RequestTrace, end_trace, start_trace
+from app.middleware.metrics import route_template
+
+logger = logging.getLogger(__name__)
+
+# Entradas por tabla/operación en la cabecera (las de más tiempo)
+MAX_TIMING_ENTRIES = 8
+
+
+def server_timing_header(trace: RequestTrace, app_seconds: float, budget: int) -> str:
+    """
+    Ejemplo:
+        app;dur=48.2, db;dur=31.0;desc="4 llamadas", db-users-select;dur=12.1;desc="x2"
+    """
+    entries = [
+        f"app;dur={app_seconds * 1000:.1f}",
+        f'db;dur={trace.total_seconds * 1000:.1f};desc="{trace.count} llamadas"',
+    ]
+    for (table, operation), (count, total) in list(trace.grouped().items())[:MAX_TIMING_ENTRIES]:
+        entries.append(f'db-{table}-{operation};dur={total * 1000:.1f};desc="x{count}"')
+    if trace.count > budget:
+        entries.append(f'db-budget;desc="excedido ({trace.count}/{budget})"')
+    return ", ".join(entries)
+
+
+class ServerTimingMiddleware:
+    """
+    Abre una traza de llamadas a la BD por petición (variable de contexto)
+    y la publica en la cabecera `Server-Timing`. Las peticiones que superan
+    `budget` viajes a la BD se registran como aviso y en métricas.
+    """
+
+    def __init__(self, app: ASGIApp, budget: int = 10, emit_header: bool = True):
+        self.app = app
+        self.budget = budget
+        self.emit_header = emit_header
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = RequestTrace(method=scope["method"])
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and self.emit_header:
+                # Las llamadas hechas durante un streaming ya no entran en la cabecera
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    server_timing_header(trace, time.perf_counter() - started, self.budget),
+                )
+            await send(message)
+
+        token = start_trace(trace)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            trace.route = route_template(scope)
+            end_trace(token, trace)
+            if trace.count > self.budget:
+                DB_BUDGET_EXCEEDED.inc(route=trace.route)
+                logger.warning("Presupuesto de viajes a la BD superado: %s", trace.summary())
+            elif trace.count:
+                logger.debug(trace.summary())
+
+
+def setup_server_timing(app: FastAPI):
+    app.add_middleware(
+        ServerTimingMiddleware,
+        budget=settings.DB_ROUND_TRIP_BUDGET,
+        emit_header=settings.SERVER_TIMING_ENABLED,
+    )
+    return app
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic import BaseModel, EmailStr, Field
 
 
@@ -13,10 +15,16 @@ class LoginRequest(BaseModel):
 
 class LoginResponse(BaseModel):
     access_token: str
+    refresh_token: Optional[str] = None
     token_type: str = "bearer"
+    expires_in: Optional[int] = None  # Segundos de vida del access token
     role: str
 
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
 # ============================
 # 📌 AUTH: REGISTRO
 # ============================
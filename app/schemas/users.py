@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -31,6 +31,15 @@ class UserCreate(BaseModel):
     recaptcha_token: str = Field(..., description="Token de reCAPTCHA para validación")
 
 
+# ============================
+# 📌 IMPORTACIÓN MASIVA (admin)
+# ============================
+
+class UserImport(UserCreate):
+    """Fila de una importación: mismas reglas que el registro, sin reCAPTCHA."""
+    recaptcha_token: Optional[str] = None
+
+
 # ============================
 # 📌 ACTUALIZAR USUARIO
 # ============================
@@ -65,6 +74,15 @@ class UserResponse(BaseModel):
         from_attributes = True
 
 
+# ============================
+# 📌 BÚSQUEDA (admin)
+# ============================
+
+class UserSearchPage(BaseModel):
+    items: List[UserResponse]
+    next_cursor: Optional[str] = None  # None: no hay más resultados
+
+
 # ============================
 # 📌 USUARIO PÚBLICO (sin datos sensibles)
 # ============================
@@ -0,0 +1,222 @@
+"""
+Benchmark de carga de la API contra un PostgREST local con latencia inyectada.
+
+Arranca el sustituto de PostgREST (fakes/postgrest_stub.py) con datos
+sintéticos deterministas, lanza la app real con uvicorn apuntando a él y
+ejecuta cada escenario con N clientes concurrentes. Para cada escenario
+informa throughput, latencias p50/p95/p99 y viajes a la base de datos por
+petición.
+
+Uso:
+    python -m benchmarks.bench_api                           # todos los escenarios
+    python -m benchmarks.bench_api --db-latency-ms 10 --concurrency 20
+    python -m benchmarks.bench_api --scenarios login habits_stats --requests 100
+    python -m benchmarks.bench_api --out resultados.json
+    python -m benchmarks.bench_api --compare base.json --max-regression 0.25
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from app.core.passwords import current_cost
+from benchmarks.common import compare, environment, run_app, summarize, write_report
+from fakes.data import PASSWORD, RECAPTCHA_BYPASS, seed
+from fakes.postgrest_stub import PostgrestStub
+
+# ================================
+# 🎯 ESCENARIOS
+# ================================
+
+# nombre -> (método, ruta, cuerpo(i) o None, requiere token)
+Scenario = Tuple[str, str, Optional[Callable[[int], Dict[str, Any]]], bool]
+
+SCENARIOS: Dict[str, Scenario] = {
+    "login": ("POST", "/api/auth/login", None, False),
+    "register": ("POST", "/api/auth/register", None, False),
+    "habits_today": ("GET", "/api/habits/today", None, True),
+    "habits_stats": ("GET", "/api/habits/stats", None, True),
+    "habits_history": ("GET", "/api/habits/history?days=7", None, True),
+    "achievements": ("GET", "/api/user/achievements", None, True),
+    "profile": ("GET", "/api/auth/profile", None, True),
+    "me": ("GET", "/api/auth/me", None, True),
+}
+
+
+def login_body(users: int) -> Callable[[int], Dict[str, Any]]:
+    return lambda i: {
+        "email": f"bench{i % users}@example.com",
+        "password": PASSWORD,
+        "recaptcha_token": RECAPTCHA_BYPASS,
+    }
+
+
+def register_body(run_id: str) -> Callable[[int], Dict[str, Any]]:
+    sequence = itertools.count()  # Correo distinto en cada llamada, también al calentar
+    return lambda i: {
+        "email": f"nuevo-{run_id}-{next(sequence)}@example.com",
+        "password": PASSWORD,
+        "full_name": f"Nuevo {i}",
+        "age": 25,
+        "phone": "123456789",
+        "gender": "Otro",
+        "recaptcha_token": RECAPTCHA_BYPASS,
+    }
+
+
+# ================================
+# 🏃 GENERADOR DE CARGA
+# ================================
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    method: str,
+    path: str,
+    body: Optional[Callable[[int], Dict[str, Any]]],
+    tokens: List[str],
+    requests: int,
+    concurrency: int,
+) -> Tuple[List[float], int, float]:
+    """Devuelve (latencias en ms, errores, segundos totales)."""
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker() -> None:
+        nonlocal errors
+        for i in counter:
+            headers = {"Authorization": f"Bearer {tokens[i % len(tokens)]}"} if tokens else {}
+            started = time.perf_counter()
+            response = await client.request(
+                method, path, json=body(i) if body else None, headers=headers,
+            )
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+async def login_all(client: httpx.AsyncClient, users: int) -> List[str]:
+    body = login_body(users)
+    tokens = []
+    for i in range(users):
+        response = await client.post("/api/auth/login", json=body(i))
+        response.raise_for_status()
+        tokens.append(response.json()["access_token"])
+    return tokens
+
+
+async def run_benchmark(
+    base_url: str,
+    stub: PostgrestStub,
+    scenarios: List[str],
+    users: int,
+    requests: int,
+    concurrency: int,
+) -> Dict[str, Dict[str, float]]:
+    results: Dict[str, Dict[str, float]] = {}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        tokens = await login_all(client, users)
+
+        for name in scenarios:
+            method, path, body, needs_token = SCENARIOS[name]
+            if name == "login":
+                body = login_body(users)
+            elif name == "register":
+                body = register_body(str(int(time.time() * 1000)))
+
+            # Calentamiento fuera de la medición
+            await run_scenario(client, method, path, body, tokens if needs_token else [], concurrency, concurrency)
+
+            stub.reset_counters()
+            latencies, errors, elapsed = await run_scenario(
+                client, method, path, body, tokens if needs_token else [], requests, concurrency,
+            )
+            results[name] = summarize(latencies, elapsed, errors, stub.total_round_trips)
+    return results
+
+
+def print_table(results: Dict[str, Dict[str, float]]) -> None:
+    print(f"{'escenario':18} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'viajes BD':>10} {'errores':>8}")
+    for name, r in results.items():
+        print(f"{name:18} {r['throughput_rps']:>8} {r['p50_ms']:>9} {r['p95_ms']:>9} "
+              f"{r['p99_ms']:>9} {r['db_round_trips_per_request']:>10} {r['errors']:>8}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="*", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--users", type=int, default=20, help="Usuarios sintéticos con sesión")
+    parser.add_argument("--history-days", type=int, default=14)
+    parser.add_argument("--requests", type=int, default=200, help="Peticiones medidas por escenario")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--db-latency-ms", type=float, default=2.0, help="Latencia inyectada por viaje a la BD")
+    parser.add_argument("--db-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--workers", type=int, default=1, help="Workers de uvicorn")
+    parser.add_argument("--out", help="Guardar resultados en JSON")
+    parser.add_argument("--compare", help="JSON de referencia (de --out) con el que comparar")
+    parser.add_argument("--max-regression", type=float, default=0.25,
+                        help="Empeoramiento máximo admitido (fracción) al comparar")
+    parser.add_argument("--json", action="store_true", help="Salida en JSON")
+    args = parser.parse_args()
+
+    stub = PostgrestStub(latency_ms=args.db_latency_ms, jitter_ms=args.db_jitter_ms)
+    seed(stub, args.users, args.history_days)
+
+    with stub.serve() as supabase_url:
+        env = {
+            "SUPABASE_URL": supabase_url,
+            "RATE_LIMIT_ENABLED": "false",
+            "RECAPTCHA_SECRET_KEY": "",
+            "CHATBOT_WARMUP_ON_STARTUP": "false",
+            "PASSWORD_BCRYPT_COST": str(current_cost()),  # El mismo coste que los hashes sembrados
+        }
+        with run_app(env, workers=args.workers) as base_url:
+            results = asyncio.run(run_benchmark(
+                base_url, stub, args.scenarios, args.users, args.requests, args.concurrency,
+            ))
+
+    report = {
+        "environment": environment(),
+        "config": {
+            "users": args.users,
+            "history_days": args.history_days,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "db_latency_ms": args.db_latency_ms,
+            "db_jitter_ms": args.db_jitter_ms,
+            "workers": args.workers,
+        },
+        "results": results,
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print_table(results)
+    if args.out:
+        write_report(report, args.out)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("config") != report["config"]:
+            print("⚠️ La configuración de la referencia es distinta; la comparación no es fiable")
+        lines, regressed = compare(results, baseline["results"], args.max_regression)
+        print(f"\nComparación con {baseline['environment']['commit']}:")
+        print("\n".join(lines))
+        return 1 if regressed else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+Benchmark de tiempo de importación (arranque en frío).
+
+Ejecuta `python -X importtime -c "import <módulo>"` en un proceso limpio,
+varias veces, y muestra el tiempo total y los módulos más costosos.
+
+Uso:
+    python -m benchmarks.bench_import app.main app.api.routes.chatbot --runs 5
+    python -m benchmarks.bench_import app.main --max-ms 1500   # falla si se supera
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# Variables mínimas para importar la app sin un .env real
+DEFAULT_ENV = {
+    "SUPABASE_URL": "http://localhost:54321",
+    "SUPABASE_KEY": "bench-service-key",
+    "SUPABASE_ANON_KEY": "bench-anon-key",
+    "EMAIL_FROM": "bench@example.com",
+    "EMAIL_PASSWORD": "bench-password",
+}
+
+
+def run_importtime(module: str) -> Tuple[float, Dict[str, int], List[str]]:
+    """Devuelve (ms totales, {módulo: µs acumulados}, módulos importados)."""
+    env = {**DEFAULT_ENV, **os.environ}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"No se pudo importar {module}:\n{result.stderr[-2000:]}")
+
+    cumulative: Dict[str, int] = {}
+    total_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self_us, cumulative_us, raw_name = line[len("import time:"):].split("|")
+        name = raw_name.strip()
+        cumulative[name] = int(cumulative_us)
+        if len(raw_name) - len(raw_name.lstrip()) == 1:
+            total_us += int(cumulative_us)  # Solo imports de primer nivel
+
+    return total_us / 1000, cumulative, list(cumulative)
+
+
+def benchmark(module: str, runs: int) -> Dict[str, object]:
+    totals = []
+    cumulative: Dict[str, int] = {}
+    modules: List[str] = []
+    for _ in range(runs):
+        total_ms, cumulative, modules = run_importtime(module)
+        totals.append(total_ms)
+
+    top = sorted(
+        ((name, us) for name, us in cumulative.items() if name != module),
+        key=lambda item: item[1],
+        reverse=True,
+    )[:10]
+    return {
+        "module": module,
+        "runs": runs,
+        "median_ms": round(statistics.median(totals), 1),
+        "min_ms": round(min(totals), 1),
+        "max_ms": round(max(totals), 1),
+        "modules_imported": len(modules),
+        "top_cumulative_ms": {name: round(us / 1000, 1) for name, us in top},
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("modules", nargs="*", default=["app.main"])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, default=None, help="Umbral de regresión (mediana)")
+    parser.add_argument("--json", action="store_true", help="Salida en JSON")
+    args = parser.parse_args()
+
+    results = [benchmark(module, args.runs) for module in args.modules]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for result in results:
+            print(f"{result['module']}: mediana {result['median_ms']} ms "
+                  f"(min {result['min_ms']}, max {result['max_ms']}, {result['modules_imported']} módulos)")
+            for name, ms in result["top_cumulative_ms"].items():
+                print(f"    {ms:8.1f} ms  {name}")
+
+    if args.max_ms is not None:
+        slow = [r for r in results if r["median_ms"] > args.max_ms]
+        for result in slow:
+            print(f"❌ {result['module']} supera el umbral: {result['median_ms']} ms > {args.max_ms} ms")
+        return 1 if slow else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""
+Benchmark del coste del logging en el camino caliente.
+
+Mide el coste por petición de 5 mensajes de depuración (lo que imprimía
+`get_current_user` en cada petición autenticada) en cuatro variantes:
+
+- `print`: el patrón anterior, escritura síncrona con `flush`.
+- `logging`: el logger de la app con la configuración de producción
+  (LOG_LEVEL=INFO): los DEBUG se descartan antes de crear el registro.
+- `logging_debug`: LOG_LEVEL=DEBUG con el muestreo por defecto
+  (LOG_DEBUG_SAMPLE_RATE, LOG_DEBUG_MAX_PER_SECOND).
+- `logging_info`: peor caso, los 5 mensajes a INFO (todos se encolan).
+
+La salida va a un fichero temporal real (no a /dev/null) para que el coste
+de escritura sea comparable al de un stdout redirigido a disco. Con stdout
+conectado a un pipe lento (contenedores) `print` además puede bloquear la
+petición; el logger no, porque descarta si la cola se llena.
+
+Uso:
+    python -m benchmarks.bench_logging --requests 20000
+    python -m benchmarks.bench_logging --json
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, Dict
+
+from app.core.config import settings
+from app.core.logging_config import LOG_DROPPED, request_id_var, setup_logging, shutdown_logging
+
+MESSAGES_PER_REQUEST = 5
+USER = {"id": 1, "email": "bench0@example.com", "role": "user"}
+
+
+def run_print(requests: int, stream) -> None:
+    for _ in range(requests):
+        print("🔐 get_current_user - token recibido", file=stream, flush=True)
+        print(f"🔍 payload: {USER}", file=stream, flush=True)
+        print(f"🔍 user_id: {USER['id']} (tipo: {type(USER['id'])})", file=stream, flush=True)
+        print(f"🔍 email: {USER['email']}", file=stream, flush=True)
+        print("✅ usuario autenticado", file=stream, flush=True)
+
+
+def run_logging(requests: int, level: int) -> None:
+    logger = logging.getLogger("app.bench")
+    for i in range(requests):
+        token = request_id_var.set(f"bench-{i}")
+        for _ in range(MESSAGES_PER_REQUEST):
+            logger.log(level, "Usuario autenticado", extra={"user_id": USER["id"]})
+        request_id_var.reset(token)
+
+
+def measure(fn: Callable[[], None], requests: int) -> Dict[str, float]:
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    return {
+        "seconds": round(elapsed, 4),
+        "requests_per_second": round(requests / elapsed, 1),
+        "us_per_request": round(elapsed / requests * 1e6, 2),
+    }
+
+
+# (nombre, LOG_LEVEL configurado, nivel de los mensajes)
+LOGGING_MODES = (
+    ("logging", "INFO", logging.DEBUG),
+    ("logging_debug", "DEBUG", logging.DEBUG),
+    ("logging_info", "INFO", logging.INFO),
+)
+
+
+def benchmark(requests: int) -> Dict[str, object]:
+    report: Dict[str, object] = {"requests": requests, "messages_per_request": MESSAGES_PER_REQUEST}
+    original_level = settings.LOG_LEVEL
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, "print.log"), "w", encoding="utf-8") as stream:
+            report["print"] = measure(lambda: run_print(requests, stream), requests)
+
+        for name, configured, level in LOGGING_MODES:
+            path = os.path.join(tmp, f"{name}.log")
+            with open(path, "w", encoding="utf-8") as stream:
+                settings.LOG_LEVEL = configured
+                setup_logging(stream=stream, force=True)
+                dropped = LOG_DROPPED.value()
+                result = measure(lambda: run_logging(requests, level), requests)
+                # El vaciado de la cola no cuenta: ocurre fuera de la petición
+                shutdown_logging()
+            report[name] = {
+                **result,
+                "bytes_written": os.path.getsize(path),
+                "dropped": int(LOG_DROPPED.value() - dropped),
+            }
+    settings.LOG_LEVEL = original_level
+
+    report["speedup"] = round(report["print"]["seconds"] / report["logging"]["seconds"], 1)
+    return report
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--json", action="store_true", help="Salida en JSON")
+    args = parser.parse_args()
+
+    report = benchmark(args.requests)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{report['requests']} peticiones x {report['messages_per_request']} mensajes")
+        for name in ("print",) + tuple(mode[0] for mode in LOGGING_MODES):
+            result = report[name]
+            print(f"  {name:14} {result['requests_per_second']:>12} req/s  {result['us_per_request']:>8} µs/petición"
+                  + (f"  ({result['dropped']} descartados)" if result.get("dropped") else ""))
+        print(f"  Mejora (print -> logging en producción): x{report['speedup']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
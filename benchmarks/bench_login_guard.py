@@ -0,0 +1,107 @@
+"""
+Benchmark del CPU que un ataque de credenciales consume en bcrypt.
+
+Simula, en el mismo proceso y sobre la BD falsa en memoria, un ataque
+desde una IP: contraseñas incorrectas contra una cuenta real y contra
+emails inexistentes (credential stuffing). Lo repite con el backoff de
+app/core/login_guard.py activado y desactivado, y cuenta verificaciones
+bcrypt, CPU del proceso, respuestas 429 y latencia.
+
+Con el backoff activado las verificaciones quedan acotadas por los
+umbrales (LOGIN_MAX_FAILURES_*) aunque crezca el número de intentos;
+sin él crecen con cada intento.
+
+Uso:
+    python -m benchmarks.bench_login_guard                      # 200 intentos, coste 10
+    python -m benchmarks.bench_login_guard --attempts 1000 --cost 12 --json
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Any, Dict, List
+
+import httpx
+
+from app.core import login_guard, passwords
+from app.core.config import settings
+from app.core.database import supabase
+from app.core.limiter import limiter
+from app.core.ttl_store import MemoryTTLStore
+from app.main import app
+from benchmarks.common import summarize
+from fakes.data import seed
+from fakes.fake_supabase import FakeSupabase
+
+
+async def attack(attempts: int) -> Dict[str, Any]:
+    verifications = []
+    checkpw = passwords.bcrypt.checkpw
+    passwords.bcrypt.checkpw = lambda *args: verifications.append(1) or checkpw(*args)  # Solo cuenta
+
+    latencies: List[float] = []
+    rejected = 0
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            cpu_started, started = time.process_time(), time.perf_counter()
+            for i in range(attempts):
+                # Mitad contra la cuenta real, mitad contra emails que no existen
+                email = "bench0@example.com" if i % 2 == 0 else f"stuffing{i}@example.com"
+                sent = time.perf_counter()
+                response = await client.post("/api/auth/login", json={
+                    "email": email, "password": f"incorrecta-{i}", "recaptcha_token": "test_token_bypass",
+                })
+                latencies.append((time.perf_counter() - sent) * 1000)
+                rejected += response.status_code == 429
+            elapsed, cpu = time.perf_counter() - started, time.process_time() - cpu_started
+    finally:
+        passwords.bcrypt.checkpw = checkpw
+
+    return {
+        **summarize(latencies, elapsed),
+        "bcrypt_verifications": len(verifications),
+        "rejected_429": rejected,
+        "cpu_seconds": round(cpu, 3),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--attempts", type=int, default=200, help="Intentos fallidos del ataque")
+    parser.add_argument("--cost", type=int, default=10, help="Coste de bcrypt (el de producción se calibra)")
+    parser.add_argument("--json", action="store_true", help="Salida en JSON")
+    args = parser.parse_args()
+
+    settings.PASSWORD_BCRYPT_COST = args.cost
+    limiter.enabled = False  # Se mide el backoff, no el límite por minuto de slowapi
+    db = FakeSupabase()
+    seed(db, users=1, history_days=1)
+    supabase.set_client(db)
+    passwords.warm_up()
+
+    results: Dict[str, Dict[str, Any]] = {}
+    try:
+        for enabled in (False, True):
+            settings.LOGIN_GUARD_ENABLED = enabled
+            login_guard.failures.set_client(MemoryTTLStore("login_failures"))
+            results["backoff" if enabled else "sin_backoff"] = asyncio.run(attack(args.attempts))
+    finally:
+        supabase.set_client(None)
+        login_guard.failures.set_client(None)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    print(f"{args.attempts} intentos fallidos, bcrypt coste {args.cost}")
+    print(f"{'variante':<12} {'bcrypt':>7} {'429':>5} {'CPU s':>7} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, row in results.items():
+        print(f"{name:<12} {row['bcrypt_verifications']:>7} {row['rejected_429']:>5} "
+              f"{row['cpu_seconds']:>7} {row['p50_ms']:>8} {row['p99_ms']:>8}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""
+Micro-benchmark de la app en el mismo proceso, sobre la BD falsa en memoria.
+
+Sin red, sin uvicorn y sin latencia de base de datos: mide solo el coste
+de la app por petición (routing, dependencias, validación, serialización
+y lógica de servicios) para los escenarios de bench_api, con los mismos
+datos sintéticos (`bench_api.seed` sobre FakeSupabase). Sirve para ver
+regresiones de CPU que la latencia de red taparía.
+
+Uso:
+    python -m benchmarks.bench_micro                         # todos los escenarios
+    python -m benchmarks.bench_micro --scenarios me profile --requests 2000 --json
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Any, Dict, List
+
+import httpx
+
+from app.core.database import supabase
+from app.core.limiter import limiter
+from app.main import app
+from benchmarks.bench_api import SCENARIOS, login_body, print_table, register_body
+from benchmarks.common import summarize
+from fakes.data import seed
+from fakes.fake_supabase import FakeSupabase
+
+
+async def run(db: FakeSupabase, scenarios: List[str], users: int, requests: int) -> Dict[str, Dict[str, Any]]:
+    results: Dict[str, Dict[str, Any]] = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        tokens = []
+        for i in range(users):
+            response = await client.post("/api/auth/login", json=login_body(users)(i))
+            response.raise_for_status()
+            tokens.append(response.json()["access_token"])
+
+        for name in scenarios:
+            method, path, body, needs_token = SCENARIOS[name]
+            if name == "login":
+                body = login_body(users)
+            elif name == "register":
+                body = register_body(str(int(time.time() * 1000)))
+
+            async def call(i: int) -> httpx.Response:
+                headers = {"Authorization": f"Bearer {tokens[i % users]}"} if needs_token else {}
+                return await client.request(method, path, json=body(i) if body else None, headers=headers)
+
+            for i in range(min(requests, 20)):  # Calentamiento
+                await call(i)
+
+            db.reset_counters()
+            latencies: List[float] = []
+            errors = 0
+            started = time.perf_counter()
+            for i in range(requests):
+                sent = time.perf_counter()
+                response = await call(i)
+                latencies.append((time.perf_counter() - sent) * 1000)
+                errors += response.status_code >= 400
+            results[name] = summarize(latencies, time.perf_counter() - started, errors, db.total_round_trips)
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="*", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--users", type=int, default=20, help="Usuarios sintéticos con sesión")
+    parser.add_argument("--history-days", type=int, default=14)
+    parser.add_argument("--requests", type=int, default=500, help="Peticiones medidas por escenario")
+    parser.add_argument("--json", action="store_true", help="Salida en JSON")
+    args = parser.parse_args()
+
+    db = FakeSupabase()
+    seed(db, args.users, args.history_days)
+    limiter.enabled = False
+    supabase.set_client(db)
+    try:
+        results = asyncio.run(run(db, args.scenarios, args.users, args.requests))
+    finally:
+        supabase.set_client(None)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""
+Benchmark del hash de contraseñas (bcrypt) por coste.
+
+Para cada coste mide los ms por hash y los hashes/s por núcleo (un solo
+proceso), y con `--processes` también el total con varios procesos en
+paralelo: es el techo de logins/registros por segundo de la máquina.
+Al final muestra el coste que elegiría la calibración con el presupuesto
+dado (PASSWORD_HASH_BUDGET_MS por defecto).
+
+Uso:
+    python -m benchmarks.bench_passwords                          # costes 10-14
+    python -m benchmarks.bench_passwords --costs 10 12 --processes 4 --json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List
+
+from app.core.config import settings
+from app.core.passwords import calibrate, hash_password, measure_hash_ms
+
+
+def _hash_batch(cost: int, count: int) -> int:
+    for _ in range(count):
+        hash_password("benchmark-password", cost)
+    return count
+
+
+def parallel_rate(cost: int, processes: int, hashes: int) -> float:
+    """Hashes/s con `processes` procesos repartiéndose `hashes` hashes."""
+    per_process = max(1, hashes // processes)
+    with ProcessPoolExecutor(processes) as pool:
+        list(pool.map(_hash_batch, [cost] * processes, [1] * processes))  # Arranque de los procesos
+        started = time.perf_counter()
+        done = sum(pool.map(_hash_batch, [cost] * processes, [per_process] * processes))
+        return done / (time.perf_counter() - started)
+
+
+def benchmark(costs: List[int], samples: int, processes: int) -> List[Dict[str, Any]]:
+    results = []
+    for cost in costs:
+        ms = measure_hash_ms(cost, samples)
+        row: Dict[str, Any] = {
+            "cost": cost,
+            "ms_per_hash": round(ms, 1),
+            "hashes_per_sec_per_core": round(1000 / ms, 2),
+        }
+        if processes > 1:
+            row["processes"] = processes
+            row["hashes_per_sec"] = round(parallel_rate(cost, processes, processes * samples), 2)
+        results.append(row)
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--costs", nargs="*", type=int, default=[10, 11, 12, 13, 14])
+    parser.add_argument("--samples", type=int, default=3, help="Hashes medidos por coste (se toma el mejor)")
+    parser.add_argument("--processes", type=int, default=1, help="Procesos en paralelo (0 = todos los núcleos)")
+    parser.add_argument("--budget-ms", type=float, default=settings.PASSWORD_HASH_BUDGET_MS)
+    parser.add_argument("--json", action="store_true", help="Salida en JSON")
+    args = parser.parse_args()
+
+    processes = args.processes or os.cpu_count() or 1
+    results = benchmark(args.costs, args.samples, processes)
+    calibrated = calibrate(args.budget_ms)
+
+    if args.json:
+        print(json.dumps({"results": results, "budget_ms": args.budget_ms, "calibrated_cost": calibrated}, indent=2))
+        return 0
+
+    print(f"{'coste':>5} {'ms/hash':>9} {'hash/s/núcleo':>14}" + (f" {f'hash/s x{processes}':>13}" if processes > 1 else ""))
+    for row in results:
+        line = f"{row['cost']:>5} {row['ms_per_hash']:>9} {row['hashes_per_sec_per_core']:>14}"
+        if processes > 1:
+            line += f" {row['hashes_per_sec']:>13}"
+        print(line)
+    print(f"\nCoste calibrado para {args.budget_ms:g} ms por hash: {calibrated}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+"""
+Benchmark del coste por petición de la capa de autorización por rol.
+
+Compara tres variantes, llamando a la app directamente por ASGI (sin red):
+
+- `none`: sin middleware.
+- `base_http`: el patrón anterior, `BaseHTTPMiddleware` que decodifica el
+  token y busca los roles de la ruta en cada petición.
+- `asgi`: `RBACMiddleware` (ASGI puro, tabla precompilada, token
+  decodificado una vez y compartido con `get_current_user`).
+
+Modos:
+
+- `isolated` (por defecto): el middleware envuelve una app mínima que
+  responde 200; mide solo el coste del propio middleware.
+- `full`: app FastAPI completa con las dependencias de la API
+  (`get_current_user`, `require_role("admin")`). Incluye el ahorro de no
+  decodificar el token dos veces, pero también el ruido del threadpool.
+
+Cada variante se mide en varias rondas intercaladas y se informa la mediana.
+
+Uso:
+    python -m benchmarks.bench_rbac --requests 5000
+    python -m benchmarks.bench_rbac --mode full --routes 80 --json
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from typing import Dict, List
+
+from fastapi import Depends, FastAPI, Request
+from fastapi.responses import JSONResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.api.deps import get_current_user, require_role
+from app.core.security import bearer_token, create_access_token, decode_access_token
+from app.middleware.rbac import RBACMiddleware
+
+
+class LegacyRBACMiddleware(BaseHTTPMiddleware):
+    """
+    El middleware anterior (BaseHTTPMiddleware que decodifica el token por su
+    cuenta) con la misma tabla precompilada: la diferencia con `asgi` es el
+    coste de BaseHTTPMiddleware y la segunda decodificación en las dependencias.
+    """
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.roles = RBACMiddleware(app)
+
+    async def dispatch(self, request: Request, call_next):
+        roles = self.roles._required_roles(request.scope)
+        if roles is not None:
+            payload = decode_access_token(bearer_token(request.headers.get("authorization")) or "")
+            if not payload or payload.get("role") not in roles:
+                return JSONResponse({"detail": "No tienes permisos para acceder a este recurso"}, status_code=403)
+        return await call_next(request)
+
+
+VARIANTS = ("none", "base_http", "asgi")
+
+
+def build_app(routes: int) -> FastAPI:
+    app = FastAPI()
+    for i in range(routes):
+        if i % 4 == 0:
+            @app.get(f"/api/admin/resource{i}/{{item_id}}")
+            def admin_route(item_id: int, user=Depends(require_role("admin"))):
+                return {"id": item_id}
+        else:
+            @app.get(f"/api/resource{i}/{{item_id}}")
+            def user_route(item_id: int, user=Depends(get_current_user)):
+                return {"id": item_id, "user": user.id}
+    return app
+
+
+async def ok_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+def wrap(inner, variant: str):
+    if variant == "base_http":
+        return LegacyRBACMiddleware(inner)
+    if variant == "asgi":
+        return RBACMiddleware(inner)
+    return inner
+
+
+def make_scope(app: FastAPI, path: str, token: str) -> Dict[str, object]:
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench"), (b"authorization", f"Bearer {token}".encode())],
+        "client": ("127.0.0.1", 1234),
+        "server": ("bench", 80),
+        # El middleware lee la tabla de rutas de la app (como hace Starlette)
+        "app": app,
+    }
+
+
+async def call(target, scope: Dict[str, object]) -> int:
+    status = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await target(dict(scope), receive, send)
+    return status
+
+
+async def measure(target, scopes: List[Dict[str, object]], requests: int) -> float:
+    """Microsegundos por petición."""
+    for scope in scopes[:50]:  # Calentamiento (incluye construir la tabla)
+        await call(target, scope)
+
+    started = time.perf_counter()
+    for i in range(requests):
+        status = await call(target, scopes[i % len(scopes)])
+        if status != 200:
+            raise RuntimeError(f"Respuesta inesperada {status} en {scopes[i % len(scopes)]['path']}")
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+def benchmark(requests: int, routes: int, mode: str = "isolated", rounds: int = 5) -> Dict[str, object]:
+    token = create_access_token({"sub": "1", "email": "bench0@example.com", "role": "admin"})
+    app = build_app(routes)
+    # Mezcla de rutas de usuario y de admin, repartidas por toda la tabla
+    scopes = [
+        make_scope(app, f"/api/admin/resource{i}/7" if i % 4 == 0 else f"/api/resource{i}/7", token)
+        for i in range(routes)
+    ]
+
+    targets: Dict[str, object] = {}
+    for variant in VARIANTS:
+        if mode == "full":
+            full = build_app(routes)
+            if variant == "base_http":
+                full.add_middleware(LegacyRBACMiddleware)
+            elif variant == "asgi":
+                full.add_middleware(RBACMiddleware)
+            targets[variant] = full
+        else:
+            targets[variant] = wrap(ok_app, variant)
+
+    samples: Dict[str, List[float]] = {variant: [] for variant in VARIANTS}
+    for _ in range(rounds):
+        for variant in VARIANTS:
+            samples[variant].append(asyncio.run(measure(targets[variant], scopes, requests)))
+
+    report: Dict[str, object] = {"requests": requests, "routes": routes, "mode": mode, "rounds": rounds}
+    for variant in VARIANTS:
+        us = statistics.median(samples[variant])
+        report[variant] = {"us_per_request": round(us, 2), "requests_per_second": round(1e6 / us, 1)}
+    baseline = report["none"]["us_per_request"]
+    for variant in ("base_http", "asgi"):
+        report[variant]["overhead_us"] = round(report[variant]["us_per_request"] - baseline, 2)
+    return report
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--routes", type=int, default=40, help="Rutas registradas (1 de cada 4 solo admin)")
+    parser.add_argument("--mode", choices=["isolated", "full"], default="isolated")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Salida en JSON")
+    args = parser.parse_args()
+
+    report = benchmark(args.requests, args.routes, args.mode, args.rounds)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{report['requests']} peticiones sobre {report['routes']} rutas "
+              f"(modo {report['mode']}, mediana de {report['rounds']} rondas)")
+        for variant in VARIANTS:
+            result = report[variant]
+            overhead = f"  ({result['overhead_us']:+} µs)" if "overhead_us" in result else ""
+            print(f"  {variant:10} {result['requests_per_second']:>10} req/s  "
+                  f"{result['us_per_request']:>8} µs/petición{overhead}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+"""
+Benchmark del registro de usuarios con N altas simultáneas.
+
+Compara dos variantes en el mismo proceso, contra el sustituto de PostgREST
+con latencia inyectada:
+
+- `legacy`: el flujo anterior de `create_user`: SELECT del email, INSERT en
+  users, INSERT en profiles y consulta del rol (4 viajes), con bcrypt y las
+  llamadas a la BD dentro del event loop.
+- `rpc`: `register_user`: bcrypt en el threadpool y una sola llamada a la
+  función register_user.
+
+Todas las altas llegan a la vez, así que su latencia se cuenta desde el
+inicio de la ráfaga. Mientras dura, una sonda pide /health cada 10 ms; su
+latencia (desde el momento en que tocaba enviarla) mide cuánto tiempo queda
+bloqueado el event loop para el resto de peticiones.
+
+Uso:
+    python -m benchmarks.bench_register                      # 100 altas simultáneas
+    python -m benchmarks.bench_register --signups 200 --db-latency-ms 10 --json
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Any, Dict, List
+
+import httpx
+from fastapi import FastAPI, HTTPException
+from supabase import create_client
+
+from app.api.services import hash_password, register_user
+from app.core.database import supabase
+from app.schemas.users import UserCreate
+from benchmarks.common import summarize
+from fakes.data import PASSWORD, RECAPTCHA_BYPASS, seed
+from fakes.postgrest_stub import PostgrestStub
+
+VARIANTS = ("legacy", "rpc")
+
+
+def legacy_create_user(data: UserCreate) -> Dict[str, Any]:
+    """El `create_user` anterior, resumido: cuatro viajes secuenciales."""
+    existing = supabase.table("users").select("*").eq("email", data.email).maybe_single().execute()
+    if existing and existing.data:
+        raise HTTPException(status_code=400, detail="El correo ya está registrado")
+
+    user = supabase.table("users").insert({
+        "email": data.email,
+        "hashed_password": hash_password(data.password),
+        "full_name": data.full_name,
+        "role_id": 2,
+        "age": data.age,
+        "phone": data.phone,
+        "gender": data.gender,
+        "is_active": True,
+        "is_verified": False,
+    }).execute().data[0]
+    supabase.table("profiles").insert({
+        "id": user["id"], "name": data.full_name, "age": data.age, "phone": data.phone, "gender": data.gender,
+    }).execute()
+    role = supabase.table("roles").select("name").eq("id", user["role_id"]).single().execute()
+    return {**user, "role": role.data["name"]}
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/legacy")
+    async def legacy(data: UserCreate):
+        return legacy_create_user(data)
+
+    @app.post("/rpc")
+    async def rpc(data: UserCreate):
+        return await register_user(data)
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    return app
+
+
+def signup_body(variant: str, i: int) -> Dict[str, Any]:
+    return {
+        "email": f"{variant}-{i}@example.com",
+        "password": PASSWORD,
+        "full_name": f"Nuevo {i}",
+        "age": 25,
+        "phone": "123456789",
+        "gender": "Otro",
+        "recaptcha_token": RECAPTCHA_BYPASS,
+    }
+
+
+async def burst(app: FastAPI, variant: str, signups: int) -> Dict[str, Any]:
+    transport = httpx.ASGITransport(app=app)
+    latencies: List[float] = []
+    probes: List[float] = []
+    errors = 0
+    done = asyncio.Event()
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as client:
+        async def signup(i: int) -> None:
+            nonlocal errors
+            response = await client.post(f"/{variant}", json=signup_body(variant, i))
+            latencies.append((time.perf_counter() - started) * 1000)
+            errors += response.status_code != 200
+
+        async def probe() -> None:
+            while not done.is_set():
+                due = time.perf_counter() + 0.01
+                await asyncio.sleep(0.01)
+                await client.get("/health")
+                probes.append((time.perf_counter() - due) * 1000)
+
+        started = time.perf_counter()
+        prober = asyncio.create_task(probe())
+        await asyncio.gather(*(signup(i) for i in range(signups)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await prober
+
+    return {"latencies": latencies, "elapsed": elapsed, "errors": errors, "probes": probes}
+
+
+def benchmark(signups: int, db_latency_ms: float) -> Dict[str, Any]:
+    report: Dict[str, Any] = {"signups": signups, "db_latency_ms": db_latency_ms}
+    app = build_app()
+    for variant in VARIANTS:
+        stub = PostgrestStub(latency_ms=db_latency_ms)
+        seed(stub, users=1, history_days=1)
+        with stub.serve() as url:
+            supabase.set_client(create_client(url, "bench-service-key"))
+            try:
+                result = asyncio.run(burst(app, variant, signups))
+            finally:
+                supabase.set_client(None)
+
+        summary = summarize(result["latencies"], result["elapsed"], result["errors"], stub.total_round_trips)
+        probes = sorted(result["probes"])
+        summary["probe_p99_ms"] = summarize(probes, 1.0)["p99_ms"]
+        summary["probe_max_ms"] = round(probes[-1], 2) if probes else 0.0
+        report[variant] = summary
+    return report
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--signups", type=int, default=100, help="Altas simultáneas")
+    parser.add_argument("--db-latency-ms", type=float, default=5.0, help="Latencia inyectada por viaje a la BD")
+    parser.add_argument("--json", action="store_true", help="Salida en JSON")
+    args = parser.parse_args()
+
+    report = benchmark(args.signups, args.db_latency_ms)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{report['signups']} altas simultáneas, {report['db_latency_ms']} ms por viaje a la BD")
+        print(f"{'variante':10} {'total s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+              f"{'viajes BD':>10} {'sonda p99':>10} {'sonda máx':>10} {'errores':>8}")
+        for variant in VARIANTS:
+            r = report[variant]
+            total = round(r["requests"] / r["throughput_rps"], 2) if r["throughput_rps"] else 0.0
+            print(f"{variant:10} {total:>8} {r['p50_ms']:>9} {r['p95_ms']:>9} {r['p99_ms']:>9} "
+                  f"{r['db_round_trips_per_request']:>10} {r['probe_p99_ms']:>10} {r['probe_max_ms']:>10} "
+                  f"{r['errors']:>8}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
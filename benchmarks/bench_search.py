@@ -0,0 +1,304 @@
+"""
+Benchmark de la búsqueda de usuarios (GET /api/auth/users/search) sobre 1M filas.
+
+No hay Postgres en el entorno de benchmarks, así que la tabla users se
+carga en SQLite con los mismos índices que la migración search_users:
+B-tree (columna de orden, id) y un índice trigram (FTS5 `trigram`, el
+equivalente en SQLite de los GIN de pg_trgm) sobre email y full_name.
+Compara dos variantes con las mismas consultas:
+
+- `indexed`: índices + paginación keyset, como la función search_users.
+- `scan`: LIKE '%texto%' recorriendo la tabla entera y paginación OFFSET.
+
+Después recorre varias páginas a través del endpoint real (en proceso,
+contra el sustituto de PostgREST con la variante `indexed` registrada)
+para medir la latencia completa y los viajes a la BD por página.
+
+Uso:
+    python -m benchmarks.bench_search                        # 1M usuarios
+    python -m benchmarks.bench_search --users 200000 --runs 10 --json
+"""
+import argparse
+import asyncio
+import json
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+from supabase import create_client
+
+from app.core.database import supabase
+from app.core.security import create_access_token
+from app.main import app
+from benchmarks.common import summarize
+from fakes.postgrest_stub import PostgrestStub
+
+VARIANTS = ("indexed", "scan")
+FIRST_NAMES = ["lucia", "mateo", "sofia", "hugo", "martina", "pablo", "valeria", "daniel", "julia", "alvaro"]
+LAST_NAMES = ["garcia", "martinez", "lopez", "sanchez", "perez", "gomez", "fernandez", "ruiz", "diaz", "moreno"]
+SORT_EXPRESSIONS = {"id": "u.id", "email": "u.email", "full_name": "coalesce(u.full_name, '')", "created_at": "u.created_at"}
+NULLABLE_SORTS = ("created_at",)  # Van al final (NULLS LAST), como en la función search_users
+COLUMNS = "u.id, u.email, u.full_name, u.is_active, u.is_verified, u.age, u.phone, u.gender, u.created_at, r.name AS role"
+
+# (nombre, parámetros de la búsqueda, página a la que se salta)
+SCENARIOS: List[Tuple[str, Dict[str, Any], int]] = [
+    ("texto_frecuente", {"p_query": "martinez", "p_sort": "email"}, 0),
+    ("texto_raro", {"p_query": ".4242@"}, 0),
+    ("prefijo", {"p_query": "lucia.ga", "p_prefix": True, "p_sort": "full_name"}, 0),
+    ("filtros", {"p_role": "admin", "p_is_active": True, "p_min_age": 30, "p_max_age": 35,
+                 "p_sort": "created_at", "p_desc": True}, 0),
+    ("pagina_500", {"p_sort": "email"}, 500),
+]
+
+
+# ================================
+# 🗄️ DATOS (SQLite, 1M usuarios)
+# ================================
+
+def _rows(users: int) -> Iterator[Tuple[Any, ...]]:
+    rng = random.Random(42)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for i in range(1, users + 1):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        created = start + timedelta(seconds=rng.randrange(0, 2 * 365 * 86400))
+        yield (
+            i,
+            f"{first}.{last}.{i}@example.com",
+            f"{first.title()} {last.title()}" if i % 50 else None,  # Algunos sin nombre
+            1 if i % 100 == 0 else 2,
+            i % 7 != 0,
+            i % 3 != 0,
+            rng.randint(16, 80),
+            "123456789",
+            "Otro",
+            created.isoformat(),
+        )
+
+
+def build_database(users: int) -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    conn.executescript("""
+        CREATE TABLE roles (id INTEGER PRIMARY KEY, name TEXT);
+        INSERT INTO roles VALUES (1, 'admin'), (2, 'user');
+        CREATE TABLE users (
+            id INTEGER PRIMARY KEY, email TEXT, full_name TEXT, role_id INTEGER,
+            is_active BOOLEAN, is_verified BOOLEAN, age INTEGER, phone TEXT, gender TEXT, created_at TEXT
+        );
+    """)
+    conn.executemany("INSERT INTO users VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", _rows(users))
+    # Mismos índices que supabase/migrations (search_users), salvo el de
+    # created_at DESC NULLS LAST: en SQLite NULL ya es el menor valor
+    conn.executescript("""
+        CREATE INDEX users_email_id_idx ON users (email, id);
+        CREATE INDEX users_full_name_id_idx ON users ((coalesce(full_name, '')), id);
+        CREATE INDEX users_created_at_id_idx ON users (created_at, id);
+        CREATE INDEX users_role_id_idx ON users (role_id);
+        CREATE VIRTUAL TABLE users_trgm USING fts5(
+            email, full_name, content='users', content_rowid='id', tokenize='trigram'
+        );
+        INSERT INTO users_trgm (users_trgm) VALUES ('rebuild');
+        ANALYZE;
+    """)
+    return conn
+
+
+# ================================
+# 🔎 LAS DOS VARIANTES
+# ================================
+
+def _escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _filters(params: Dict[str, Any]) -> Tuple[List[str], List[Any]]:
+    where, args = [], []
+    for column, key in (("u.is_active", "p_is_active"), ("u.is_verified", "p_is_verified")):
+        if params.get(key) is not None:
+            where.append(f"{column} = ?")
+            args.append(params[key])
+    if params.get("p_role") is not None:
+        where.append("u.role_id IN (SELECT r2.id FROM roles r2 WHERE r2.name = ?)")
+        args.append(params["p_role"])
+    if params.get("p_min_age") is not None:
+        where.append("u.age >= ?")
+        args.append(params["p_min_age"])
+    if params.get("p_max_age") is not None:
+        where.append("u.age <= ?")
+        args.append(params["p_max_age"])
+    return where, args
+
+
+def _text_condition(params: Dict[str, Any], table: str = "users") -> Tuple[Optional[str], List[Any]]:
+    query = params.get("p_query")
+    if not query:
+        return None, []
+    pattern = _escape_like(query) + "%" if params.get("p_prefix") else "%" + _escape_like(query) + "%"
+    like = "(u.email LIKE ? ESCAPE '\\' OR coalesce(u.full_name, '') LIKE ? ESCAPE '\\')"
+    if table == "users_trgm" and len(query) >= 3:
+        # Como pg_trgm: el índice da los candidatos y el LIKE los confirma
+        phrase = '"' + query.replace('"', '""') + '"'
+        return f"u.id IN (SELECT rowid FROM users_trgm WHERE users_trgm MATCH ?) AND {like}", [phrase, pattern, pattern]
+    return like, [pattern, pattern]
+
+
+def _run(conn: sqlite3.Connection, sql: str, args: List[Any]) -> List[Dict[str, Any]]:
+    cursor = conn.execute(sql, args)
+    names = [column[0] for column in cursor.description]
+    return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+
+def indexed_search(conn: sqlite3.Connection, **params: Any) -> List[Dict[str, Any]]:
+    """La función search_users: índices y keyset sobre (columna de orden, id)."""
+    where, args = _filters(params)
+    text, text_args = _text_condition(params, table="users_trgm")
+    if text:
+        where.insert(0, text)
+        args[:0] = text_args
+    sort = SORT_EXPRESSIONS[params.get("p_sort", "id")]
+    direction = "DESC" if params.get("p_desc") else "ASC"
+    if params.get("p_after_id") is not None:
+        after, comparison = params["p_after_value"], "<" if params.get("p_desc") else ">"
+        if after is None:
+            # La última fila vista no tenía valor: solo quedan filas NULL
+            where.append(f"{sort} IS NULL AND u.id {comparison} ?")
+            args.append(params["p_after_id"])
+        else:
+            keyset = f"({sort}, u.id) {comparison} (?, ?)"
+            where.append(f"({keyset} OR {sort} IS NULL)" if params.get("p_sort") in NULLABLE_SORTS else keyset)
+            args += [int(after) if params.get("p_sort", "id") == "id" else after, params["p_after_id"]]
+    sql = (
+        f"SELECT {COLUMNS} FROM users u LEFT JOIN roles r ON r.id = u.role_id "
+        f"{'WHERE ' + ' AND '.join(where) if where else ''} "
+        f"ORDER BY {sort} {direction} NULLS LAST, u.id {direction} LIMIT ?"
+    )
+    return _run(conn, sql, args + [params.get("p_limit", 20)])
+
+
+def scan_search(conn: sqlite3.Connection, offset: int = 0, **params: Any) -> List[Dict[str, Any]]:
+    """Sin índices (NOT INDEXED obliga a recorrer la tabla) y con OFFSET."""
+    where, args = _filters(params)
+    text, text_args = _text_condition(params)
+    if text:
+        where.insert(0, text)
+        args[:0] = text_args
+    sort = SORT_EXPRESSIONS[params.get("p_sort", "id")]
+    direction = "DESC" if params.get("p_desc") else "ASC"
+    sql = (
+        f"SELECT {COLUMNS} FROM users u NOT INDEXED LEFT JOIN roles r ON r.id = u.role_id "
+        f"{'WHERE ' + ' AND '.join(where) if where else ''} "
+        f"ORDER BY +{sort} {direction} NULLS LAST, +u.id {direction} LIMIT ? OFFSET ?"
+    )
+    return _run(conn, sql, args + [params.get("p_limit", 20), offset])
+
+
+# ================================
+# ⏱️ MEDICIÓN
+# ================================
+
+def _timed(function, runs: int) -> Tuple[List[float], List[Dict[str, Any]]]:
+    latencies, rows = [], []
+    for _ in range(runs):
+        started = time.perf_counter()
+        rows = function()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies, rows
+
+
+def compare_queries(conn: sqlite3.Connection, runs: int, limit: int = 20) -> Dict[str, Any]:
+    report: Dict[str, Any] = {}
+    for name, params, page in SCENARIOS:
+        params = {**params, "p_limit": limit}
+        keyset = dict(params)
+        if page:
+            # Cursor de la última fila de la página anterior (fuera de la medición)
+            last = scan_search(conn, offset=page * limit - 1, **{**params, "p_limit": 1})[0]
+            value = last[params["p_sort"]]
+            keyset.update(p_after_value=None if value is None else str(value), p_after_id=last["id"])
+
+        indexed, indexed_rows = _timed(lambda: indexed_search(conn, **keyset), runs)
+        scan, scan_rows = _timed(lambda: scan_search(conn, offset=page * limit, **params), max(1, runs // 5))
+        if [row["id"] for row in indexed_rows] != [row["id"] for row in scan_rows]:
+            raise AssertionError(f"{name}: las dos variantes devuelven filas distintas")
+
+        report[name] = {
+            "indexed": summarize(indexed, sum(indexed) / 1000),
+            "scan": summarize(scan, sum(scan) / 1000),
+            "rows": len(indexed_rows),
+        }
+    return report
+
+
+async def walk_endpoint(pages: int, limit: int) -> Tuple[List[float], float, int]:
+    token = create_access_token({"sub": "1", "email": "admin@example.com", "role": "admin"})
+    headers = {"Authorization": f"Bearer {token}"}
+    transport = httpx.ASGITransport(app=app)
+    latencies: List[float] = []
+    errors = 0
+    cursor: Optional[str] = None
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        started = time.perf_counter()
+        for _ in range(pages):
+            params = {"q": "martinez", "sort": "email", "limit": limit, **({"cursor": cursor} if cursor else {})}
+            sent = time.perf_counter()
+            response = await client.get("/api/auth/users/search", params=params, headers=headers)
+            latencies.append((time.perf_counter() - sent) * 1000)
+            if response.status_code != 200:
+                errors += 1
+                break
+            cursor = response.json()["next_cursor"]
+            if cursor is None:
+                break
+        elapsed = time.perf_counter() - started
+    return latencies, elapsed, errors
+
+
+def benchmark(users: int, runs: int, pages: int, limit: int) -> Dict[str, Any]:
+    started = time.perf_counter()
+    conn = build_database(users)
+    report: Dict[str, Any] = {"users": users, "load_s": round(time.perf_counter() - started, 1)}
+    report["queries"] = compare_queries(conn, runs, limit)
+
+    stub = PostgrestStub()
+    stub.register_function("search_users", lambda _stub, **params: indexed_search(conn, **params))
+    with stub.serve() as url:
+        supabase.set_client(create_client(url, "bench-service-key"))
+        try:
+            latencies, elapsed, errors = asyncio.run(walk_endpoint(pages, limit))
+        finally:
+            supabase.set_client(None)
+    report["endpoint"] = summarize(latencies, elapsed, errors, stub.total_round_trips)
+    return report
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1_000_000, help="Usuarios sintéticos")
+    parser.add_argument("--runs", type=int, default=20, help="Repeticiones por consulta (la variante scan hace 1/5)")
+    parser.add_argument("--pages", type=int, default=50, help="Páginas recorridas a través del endpoint")
+    parser.add_argument("--limit", type=int, default=20, help="Filas por página")
+    parser.add_argument("--json", action="store_true", help="Salida en JSON")
+    args = parser.parse_args()
+
+    report = benchmark(args.users, args.runs, args.pages, args.limit)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{report['users']} usuarios (carga e índices: {report['load_s']} s), {args.limit} filas por página")
+        print(f"{'consulta':18} {'filas':>6} {'indexed p50':>12} {'indexed p95':>12} {'scan p50':>10} {'scan p95':>10}")
+        for name, r in report["queries"].items():
+            print(f"{name:18} {r['rows']:>6} {r['indexed']['p50_ms']:>12} {r['indexed']['p95_ms']:>12} "
+                  f"{r['scan']['p50_ms']:>10} {r['scan']['p95_ms']:>10}")
+        e = report["endpoint"]
+        print(f"endpoint: {e['requests']} páginas, p50 {e['p50_ms']} ms, p95 {e['p95_ms']} ms, "
+              f"{e['db_round_trips_per_request']} viajes a la BD por página, {e['errors']} errores")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""
+Benchmark de arranque en frío de la API.
+
+Para cada ejecución lanza `uvicorn app.main:app` en un proceso nuevo y mide
+el tiempo hasta la primera respuesta 200 de `/health`. También verifica que
+el arranque no escriba en stdout e incluye el informe de importación
+(`python -X importtime`) de `app.main`.
+
+Uso:
+    python -m benchmarks.bench_startup --runs 5
+    python -m benchmarks.bench_startup --max-ms 2500   # falla si se supera
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, Optional
+
+from benchmarks.bench_import import DEFAULT_ENV, benchmark as import_benchmark
+from benchmarks.common import ROOT, free_port
+
+
+def time_to_first_200(path: str = "/health", timeout: float = 30.0) -> Dict[str, object]:
+    """
+    Arranca uvicorn y devuelve {"ms": tiempo hasta el primer 200, "stdout": salida}.
+    """
+    port = free_port()
+    env = {**DEFAULT_ENV, **os.environ}
+    env.setdefault("CHATBOT_WARMUP_ON_STARTUP", "false")
+    url = f"http://127.0.0.1:{port}{path}"
+
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app",
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        env=env,
+        cwd=ROOT,
+    )
+    elapsed_ms: Optional[float] = None
+    try:
+        while time.perf_counter() - started < timeout:
+            if process.poll() is not None:
+                break
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        elapsed_ms = (time.perf_counter() - started) * 1000
+                        break
+            except (urllib.error.URLError, ConnectionError, OSError):
+                time.sleep(0.01)
+    finally:
+        process.terminate()
+        try:
+            stdout, stderr = process.communicate(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            stdout, stderr = process.communicate()
+
+    if elapsed_ms is None:
+        raise RuntimeError(f"La API no respondió 200 en {path}:\n{stderr.decode(errors='replace')[-2000:]}")
+    return {"ms": elapsed_ms, "stdout": stdout.decode(errors="replace")}
+
+
+def benchmark(runs: int, path: str = "/health") -> Dict[str, object]:
+    results = [time_to_first_200(path) for _ in range(runs)]
+    totals = [r["ms"] for r in results]
+    return {
+        "path": path,
+        "runs": runs,
+        "median_ms": round(statistics.median(totals), 1),
+        "min_ms": round(min(totals), 1),
+        "max_ms": round(max(totals), 1),
+        "stdout_bytes": max(len(r["stdout"]) for r in results),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--path", default="/health")
+    parser.add_argument("--max-ms", type=float, default=None, help="Umbral de regresión (mediana hasta el primer 200)")
+    parser.add_argument("--json", action="store_true", help="Salida en JSON")
+    args = parser.parse_args()
+
+    report = {
+        "startup": benchmark(args.runs, args.path),
+        "import": import_benchmark("app.main", args.runs),
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        startup, imports = report["startup"], report["import"]
+        print(f"Primer 200 en {startup['path']}: mediana {startup['median_ms']} ms "
+              f"(min {startup['min_ms']}, max {startup['max_ms']})")
+        print(f"Salida en stdout durante el arranque: {startup['stdout_bytes']} bytes")
+        print(f"Importación de app.main: mediana {imports['median_ms']} ms "
+              f"({imports['modules_imported']} módulos)")
+        for name, ms in imports["top_cumulative_ms"].items():
+            print(f"    {ms:8.1f} ms  {name}")
+
+    failed = False
+    if report["startup"]["stdout_bytes"]:
+        print("❌ El arranque escribió en stdout")
+        failed = True
+    if args.max_ms is not None and report["startup"]["median_ms"] > args.max_ms:
+        print(f"❌ El arranque supera el umbral: {report['startup']['median_ms']} ms > {args.max_ms} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
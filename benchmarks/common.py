@@ -0,0 +1,168 @@
+"""
+Utilidades compartidas por los benchmarks: estadísticas de latencia,
+arranque de la app con uvicorn y comparación de resultados entre commits.
+"""
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from benchmarks.bench_import import DEFAULT_ENV
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Métricas en las que un valor mayor es peor (se usan al comparar)
+LOWER_IS_BETTER = ("p50_ms", "p95_ms", "p99_ms", "db_round_trips_per_request")
+
+
+# ================================
+# 📊 ESTADÍSTICAS
+# ================================
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Percentil con interpolación lineal sobre valores ya ordenados."""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def summarize(
+    latencies_ms: List[float],
+    elapsed_s: float,
+    errors: int = 0,
+    round_trips: Optional[int] = None,
+) -> Dict[str, float]:
+    ordered = sorted(latencies_ms)
+    requests = len(ordered)
+    result = {
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": round(requests / elapsed_s, 1) if elapsed_s else 0.0,
+        "mean_ms": round(sum(ordered) / requests, 2) if requests else 0.0,
+        "p50_ms": round(percentile(ordered, 0.50), 2),
+        "p95_ms": round(percentile(ordered, 0.95), 2),
+        "p99_ms": round(percentile(ordered, 0.99), 2),
+    }
+    if round_trips is not None:
+        result["db_round_trips_per_request"] = round(round_trips / requests, 2) if requests else 0.0
+    return result
+
+
+# ================================
+# 🧾 RESULTADOS COMPARABLES
+# ================================
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, cwd=ROOT, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconocido"
+
+
+def environment() -> Dict[str, str]:
+    return {
+        "commit": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def write_report(report: Dict[str, object], path: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+def compare(
+    current: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    max_regression: float,
+) -> Tuple[List[str], bool]:
+    """
+    Compara escenario a escenario; una métrica empeora si crece más de
+    `max_regression` (fracción) respecto a la referencia.
+    """
+    lines: List[str] = []
+    regressed = False
+    for name, result in current.items():
+        previous = baseline.get(name)
+        if not previous:
+            lines.append(f"  {name}: sin referencia")
+            continue
+        for metric in LOWER_IS_BETTER:
+            if metric not in result or not previous.get(metric):
+                continue
+            change = (result[metric] - previous[metric]) / previous[metric]
+            mark = ""
+            if change > max_regression:
+                mark = "  ❌"
+                regressed = True
+            lines.append(
+                f"  {name:18} {metric:28} {previous[metric]:>9} -> {result[metric]:>9} ({change:+.0%}){mark}"
+            )
+    return lines, regressed
+
+
+# ================================
+# 🚀 APP BAJO PRUEBA
+# ================================
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def run_app(env: Dict[str, str], workers: int = 1, timeout: float = 30.0) -> Iterator[str]:
+    """Arranca `uvicorn app.main:app` en otro proceso y devuelve su URL base."""
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    # stderr a un archivo: una tubería llena bloquearía a la app bajo carga
+    log = tempfile.TemporaryFile()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers), "--log-level", "warning", "--no-access-log",
+         # Conexiones keep-alive largas: evita cierres del servidor a mitad de la carga
+         "--timeout-keep-alive", "120"],
+        stdout=subprocess.DEVNULL,
+        stderr=log,
+        env={**DEFAULT_ENV, **os.environ, **env},
+        cwd=ROOT,
+    )
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            if process.poll() is not None:
+                log.seek(0)
+                raise RuntimeError(f"La app no arrancó:\n{log.read().decode(errors='replace')[-2000:]}")
+            try:
+                with urllib.request.urlopen(f"{url}/health", timeout=1) as response:
+                    if response.status == 200:
+                        break
+            except (urllib.error.URLError, ConnectionError, OSError):
+                if time.monotonic() > deadline:
+                    raise RuntimeError("La app no respondió a /health a tiempo")
+                time.sleep(0.05)
+        yield url
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        log.close()
@@ -0,0 +1,233 @@
+"""
+Datos compartidos por las pruebas y los benchmarks.
+
+- Funciones RPC: equivalentes en Python de las de supabase/migrations,
+  para registrarlas en el cliente falso y en el sustituto de PostgREST.
+- `seed`: datos sintéticos deterministas (usuarios bench<i>@example.com
+  con la contraseña PASSWORD, historial y logros).
+
+Sirve para ambos backends: los dos tienen `insert`, `unique`,
+`register_function`, `tables` y `_insert_row`.
+"""
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.passwords import hash_password
+from fakes.postgrest_stub import PostgrestStub
+
+PASSWORD = "bench-password"
+RECAPTCHA_BYPASS = "test_token_bypass"
+ACHIEVEMENTS = ["first_habit", "streak_3", "streak_7", "early_bird", "night_owl"]
+HABITS = ["agua", "lectura", "sin_pantallas", "meditacion"]
+
+
+# ================================
+# 🧩 FUNCIONES RPC
+# ================================
+# Equivalentes en Python de las funciones de supabase/migrations, para
+# registrarlas en el cliente falso y en el sustituto de PostgREST.
+
+def get_or_create_profile(stub: PostgrestStub, p_user_id: int, p_email: Optional[str] = None) -> List[Dict[str, Any]]:
+    profiles = [row for row in stub.tables.get("profiles", []) if row["id"] == p_user_id]
+    if profiles:
+        return profiles
+    user = next((row for row in stub.tables.get("users", []) if row["id"] == p_user_id), None)
+    if user is None:
+        return []
+    name = user.get("full_name") or (p_email or user["email"]).split("@")[0]
+    return [stub._insert_row("profiles", {"id": p_user_id, "name": name})]
+
+
+def register_user(
+    stub: PostgrestStub,
+    p_email: str,
+    p_hashed_password: str,
+    p_full_name: Optional[str] = None,
+    p_age: Optional[int] = None,
+    p_phone: Optional[str] = None,
+    p_gender: Optional[str] = None,
+) -> Dict[str, Any]:
+    # El stub ejecuta cada RPC bajo su lock: equivale a una transacción
+    user = stub._insert_row("users", {
+        "email": p_email,
+        "hashed_password": p_hashed_password,
+        "full_name": p_full_name,
+        "role_id": 2,
+        "age": p_age,
+        "phone": p_phone,
+        "gender": p_gender,
+        "is_active": True,
+        "is_verified": False,
+    })
+    if not any(row["id"] == user["id"] for row in stub.tables.get("profiles", [])):
+        stub._insert_row("profiles", {
+            "id": user["id"], "name": p_full_name, "age": p_age, "phone": p_phone, "gender": p_gender,
+        })
+    role = next((row["name"] for row in stub.tables.get("roles", []) if row["id"] == 2), "user")
+    return {**{k: v for k, v in user.items() if k != "hashed_password"}, "role": role}
+
+
+def import_users(stub: PostgrestStub, p_users: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    existing = {row["email"] for row in stub.tables.get("users", [])}
+    created = []
+    for item in p_users:
+        if item["email"] in existing:
+            continue  # on conflict (email) do nothing
+        existing.add(item["email"])
+        user = stub._insert_row("users", {**item, "role_id": 2, "is_active": True, "is_verified": False})
+        stub._insert_row("profiles", {
+            "id": user["id"], "name": item.get("full_name"), "age": item.get("age"),
+            "phone": item.get("phone"), "gender": item.get("gender"),
+        })
+        created.append({"id": user["id"], "email": user["email"]})
+    return created
+
+
+def export_users(stub: PostgrestStub, p_after: int = 0, p_limit: int = 1000) -> List[Dict[str, Any]]:
+    roles = {row["id"]: row["name"] for row in stub.tables.get("roles", [])}
+    profiles = {row["id"]: row for row in stub.tables.get("profiles", [])}
+    stats = {row["user_id"]: row for row in stub.tables.get("user_stats", [])}  # Join por tipo nativo (entero)
+    users = sorted((u for u in stub.tables.get("users", []) if u["id"] > p_after), key=lambda u: u["id"])
+    rows = []
+    for user in users[:p_limit]:
+        profile = profiles.get(user["id"], {})
+        stat = stats.get(user["id"], {})
+        rows.append({
+            "id": user["id"], "email": user["email"], "full_name": user.get("full_name"),
+            "role": roles.get(user.get("role_id")), "is_active": user.get("is_active"),
+            "is_verified": user.get("is_verified"),
+            "age": profile.get("age", user.get("age")), "phone": profile.get("phone", user.get("phone")),
+            "gender": profile.get("gender", user.get("gender")), "created_at": user.get("created_at"),
+            "profile_name": profile.get("name"),
+            "total_habits_completed": stat.get("total_habits_completed"),
+            "current_streak": stat.get("current_streak"), "longest_streak": stat.get("longest_streak"),
+            "average_sleep_hours": stat.get("average_sleep_hours"),
+        })
+    return rows
+
+
+def search_users(
+    stub: PostgrestStub,
+    p_query: Optional[str] = None,
+    p_prefix: bool = False,
+    p_role: Optional[str] = None,
+    p_is_active: Optional[bool] = None,
+    p_is_verified: Optional[bool] = None,
+    p_min_age: Optional[int] = None,
+    p_max_age: Optional[int] = None,
+    p_sort: str = "id",
+    p_desc: bool = False,
+    p_after_value: Optional[str] = None,
+    p_after_id: Optional[int] = None,
+    p_limit: int = 20,
+) -> List[Dict[str, Any]]:
+    roles = {row["id"]: row["name"] for row in stub.tables.get("roles", [])}
+    needle = (p_query or "").lower()
+
+    def text_matches(value: Optional[str]) -> bool:
+        value = (value or "").lower()
+        return value.startswith(needle) if p_prefix else needle in value
+
+    def key(row: Dict[str, Any]) -> Tuple[Any, int]:
+        value = row.get("full_name") or "" if p_sort == "full_name" else row.get(p_sort)
+        return value, row["id"]
+
+    def after_cursor(row: Dict[str, Any]) -> bool:
+        # Como la función SQL: NULLS LAST y un cursor en NULL solo deja filas NULL
+        value, row_id = key(row)
+        if after[0] is None:
+            return value is None and (row_id < after[1] if p_desc else row_id > after[1])
+        if value is None:
+            return True
+        return (value, row_id) < after if p_desc else (value, row_id) > after
+
+    after = None
+    if p_after_id is not None:
+        after = (int(p_after_value) if p_sort == "id" and p_after_value is not None else p_after_value, p_after_id)
+
+    rows = [
+        row for row in stub.tables.get("users", [])
+        if (not needle or text_matches(row.get("email")) or text_matches(row.get("full_name")))
+        and (p_role is None or roles.get(row.get("role_id")) == p_role)
+        and (p_is_active is None or row.get("is_active") == p_is_active)
+        and (p_is_verified is None or row.get("is_verified") == p_is_verified)
+        and (p_min_age is None or (row.get("age") is not None and row["age"] >= p_min_age))
+        and (p_max_age is None or (row.get("age") is not None and row["age"] <= p_max_age))
+        and (after is None or after_cursor(row))
+    ]
+    rows = (
+        sorted((row for row in rows if key(row)[0] is not None), key=key, reverse=p_desc)
+        + sorted((row for row in rows if key(row)[0] is None), key=lambda row: row["id"], reverse=p_desc)
+    )
+    return [
+        {**{column: row.get(column) for column in (
+            "id", "email", "full_name", "is_active", "is_verified", "age", "phone", "gender", "created_at",
+        )}, "role": roles.get(row.get("role_id"))}
+        for row in rows[:p_limit]
+    ]
+
+
+def sync_users_id_sequence(stub: PostgrestStub) -> int:
+    """El sustituto ya avanza su contador con los ids explícitos: solo devuelve el valor."""
+    return max((row["id"] for row in stub.tables.get("users", [])), default=1)
+
+
+def register_functions(stub: PostgrestStub) -> None:
+    stub.register_function("get_or_create_profile", get_or_create_profile)
+    stub.register_function("register_user", register_user)
+    stub.register_function("import_users", import_users)
+    stub.register_function("export_users", export_users)
+    stub.register_function("search_users", search_users)
+    stub.register_function("sync_users_id_sequence", sync_users_id_sequence)
+
+
+# ================================
+# 🌱 DATOS SINTÉTICOS
+# ================================
+
+def seed(stub: PostgrestStub, users: int, history_days: int) -> None:
+    """Datos deterministas: mismas filas en cada ejecución para poder comparar."""
+    # Un único hash (con el coste de la app: el login no lo rehace) para no tardar minutos
+    hashed = hash_password(PASSWORD)
+    today = date.today()
+
+    stub.unique("users", "email")
+    stub.unique("profiles", "id")
+    register_functions(stub)
+    stub.insert("roles", [{"id": 1, "name": "admin"}, {"id": 2, "name": "user"}])
+    stub.insert("achievements", [{"id": i + 1, "code": code} for i, code in enumerate(ACHIEVEMENTS)])
+    stub.insert("users", [
+        {
+            "id": i + 1,
+            "email": f"bench{i}@example.com",
+            "hashed_password": hashed,
+            "full_name": f"Usuario {i}",
+            "role_id": 2,
+            "age": 30,
+            "phone": "123456789",
+            "gender": "Otro",
+            "is_active": True,
+            "is_verified": True,
+        }
+        for i in range(users)
+    ])
+    stub.insert("profiles", [
+        {"id": i + 1, "name": f"Usuario {i}", "age": 30, "phone": "123456789", "gender": "Otro"}
+        for i in range(users)
+    ])
+    stub.insert("habits_history", [
+        {
+            "user_id": str(i + 1),
+            "habit_id": habit,
+            "date": (today - timedelta(days=day)).isoformat(),
+            "completed_at": f"{(today - timedelta(days=day)).isoformat()}T22:00:00",
+        }
+        for i in range(users)
+        for day in range(history_days)
+        for habit in HABITS[: 1 + (i + day) % len(HABITS)]
+    ])
+    stub.insert("user_achievements", [
+        {"user_id": str(i + 1), "achievement_id": code, "unlocked_at": f"{today.isoformat()}T08:00:00"}
+        for i in range(users)
+        for code in ACHIEVEMENTS[: 1 + i % len(ACHIEVEMENTS)]
+    ])
@@ -0,0 +1,430 @@
+"""
+Cliente Supabase falso en memoria, en el mismo proceso, para pruebas
+herméticas y micro-benchmarks.
+
+Implementa el subconjunto del query builder de `supabase-py` que usa la
+app, sin HTTP ni JSON de por medio:
+
+- `table(...)` / `from_(...)` con `select` (también `count="exact"`),
+  `insert`, `update`, `delete` y `upsert` (`on_conflict`, `ignore_duplicates`)
+- Filtros `eq`, `neq`, `gt`, `gte`, `lt`, `lte`, `in_`, `is_`, `like`,
+  `ilike`, `match`; `order`, `limit`, `range`, `single`, `maybe_single`
+- `rpc(...)` con funciones registradas (`register_functions` de fakes/data.py)
+
+Los filtros, el orden y la proyección son los del sustituto de PostgREST
+(fakes/postgrest_stub.py), así que ambos dan los mismos resultados;
+las respuestas y errores son los objetos reales de postgrest (`APIResponse`,
+`APIError` con el mismo `code`). Cada tabla indexa por hash `id`, sus
+columnas UNIQUE y las de DEFAULT_INDEXES: un `eq` sobre ellas no recorre
+la tabla. Cuenta los viajes como el sustituto (`round_trips`).
+
+Uso:
+    db = FakeSupabase()
+    register_functions(db)
+    db.insert("roles", [{"id": 1, "name": "admin"}])
+    supabase.set_client(db)         # app.core.database
+    ...
+    supabase.set_client(None)
+"""
+import json
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from postgrest import APIResponse
+from postgrest.base_request_builder import SingleAPIResponse
+from postgrest.exceptions import APIError
+
+from fakes.postgrest_stub import DuplicateKeyError, as_text, matches, project, sort_key
+
+# Columnas por las que la app filtra con eq (además de id y las UNIQUE)
+DEFAULT_INDEXES: Dict[str, Tuple[str, ...]] = {
+    "users": ("email",),
+    "roles": ("name",),
+    "habits_history": ("user_id",),
+    "user_achievements": ("user_id",),
+    "user_stats": ("user_id",),
+}
+
+Row = Dict[str, Any]
+
+
+def _api_error(code: str, message: str, details: str = "") -> APIError:
+    return APIError({"code": code, "message": message, "details": details, "hint": None})
+
+
+# ================================
+# 🗂️ TABLA CON ÍNDICES HASH
+# ================================
+
+class FakeTable:
+    """
+    Filas por orden de inserción e índices {valor como texto: filas} por
+    columna (la misma comparación que `eq` en PostgREST).
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.rows: Dict[int, Row] = {}  # rowid interno -> fila
+        self.indexes: Dict[str, Dict[str, Set[int]]] = {}
+        self.unique_columns: List[str] = []
+        self._next_rowid = 0
+        self._next_id = 1
+        self.index("id", *DEFAULT_INDEXES.get(name, ()))
+
+    def __iter__(self) -> Iterator[Row]:
+        return iter(list(self.rows.values()))
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __getitem__(self, position: int) -> Row:
+        return list(self.rows.values())[position]
+
+    def index(self, *columns: str) -> None:
+        for column in columns:
+            if column not in self.indexes:
+                index: Dict[str, Set[int]] = {}
+                for rowid, row in self.rows.items():
+                    index.setdefault(as_text(row.get(column)), set()).add(rowid)
+                self.indexes[column] = index
+
+    def unique(self, *columns: str) -> None:
+        self.unique_columns.extend(columns)
+        self.index(*columns)
+
+    def _check_unique(self, row: Row, rowid: Optional[int] = None) -> None:
+        for column in self.unique_columns:
+            if self.indexes[column].get(as_text(row.get(column)), set()) - {rowid}:
+                raise DuplicateKeyError(f"Key ({column})=({row.get(column)}) already exists.")
+
+    def _add_to_indexes(self, rowid: int, row: Row) -> None:
+        for column, index in self.indexes.items():
+            index.setdefault(as_text(row.get(column)), set()).add(rowid)
+
+    def _remove_from_indexes(self, rowid: int, row: Row) -> None:
+        for column, index in self.indexes.items():
+            bucket = index.get(as_text(row.get(column)))
+            if bucket is not None:
+                bucket.discard(rowid)
+                if not bucket:
+                    del index[as_text(row.get(column))]
+
+    def insert(self, row: Row) -> Row:
+        row = dict(row)
+        if row.get("id") is None:
+            row["id"] = self._next_id
+        if isinstance(row["id"], int):
+            self._next_id = max(self._next_id, row["id"] + 1)
+        row.setdefault("created_at", datetime.utcnow().isoformat())
+        self._check_unique(row)
+        rowid = self._next_rowid
+        self._next_rowid += 1
+        self.rows[rowid] = row
+        self._add_to_indexes(rowid, row)
+        return row
+
+    def update(self, rowid: int, changes: Row) -> Row:
+        row = self.rows[rowid]
+        updated = {**row, **changes}
+        self._check_unique(updated, rowid)
+        self._remove_from_indexes(rowid, row)
+        row.update(changes)
+        self._add_to_indexes(rowid, row)
+        return row
+
+    def delete(self, rowid: int) -> Row:
+        row = self.rows.pop(rowid)
+        self._remove_from_indexes(rowid, row)
+        return row
+
+    def find(self, filters: List[Tuple[str, str]]) -> List[Tuple[int, Row]]:
+        """
+        Filas que cumplen todos los filtros (columna, "op.valor"). Los `eq`
+        sobre columnas indexadas acotan los candidatos; el resto se comprueba
+        fila a fila con las reglas de PostgREST.
+        """
+        candidates: Optional[Set[int]] = None
+        for column, expression in filters:
+            if column in self.indexes and expression.startswith("eq."):
+                bucket = self.indexes[column].get(expression[len("eq."):], set())
+                candidates = bucket if candidates is None or len(bucket) < len(candidates) else candidates
+        rowids: Iterable[int] = self.rows if candidates is None else sorted(candidates)
+        return [
+            (rowid, self.rows[rowid]) for rowid in rowids
+            if all(matches(self.rows[rowid], column, expression) for column, expression in filters)
+        ]
+
+
+# ================================
+# 🔎 QUERY BUILDER
+# ================================
+
+class FakeQuery:
+    """Encadena filtros y modificadores como el builder de postgrest; `execute()` los aplica."""
+
+    def __init__(self, db: "FakeSupabase", table: str):
+        self._db = db
+        self._table = table
+        self._operation = "select"
+        self._columns = "*"
+        self._count: Optional[str] = None
+        self._payload: Any = None
+        self._on_conflict: Optional[str] = None
+        self._ignore_duplicates = False
+        self._filters: List[Tuple[str, str]] = []
+        self._order: List[Tuple[str, bool]] = []
+        self._offset = 0
+        self._limit: Optional[int] = None
+        self._single: Optional[str] = None  # "single" | "maybe"
+
+    # ---------- operaciones ----------
+
+    def select(self, *columns: str, count: Optional[str] = None) -> "FakeQuery":
+        self._columns = ",".join(columns) or "*"
+        self._count = count
+        return self
+
+    def insert(self, json: Any, count: Optional[str] = None, **_: Any) -> "FakeQuery":
+        self._operation, self._payload, self._count = "insert", json, count
+        return self
+
+    def upsert(
+        self, json: Any, count: Optional[str] = None, on_conflict: str = "",
+        ignore_duplicates: bool = False, **_: Any,
+    ) -> "FakeQuery":
+        self._operation, self._payload, self._count = "upsert", json, count
+        self._on_conflict = on_conflict or "id"
+        self._ignore_duplicates = ignore_duplicates
+        return self
+
+    def update(self, json: Row, count: Optional[str] = None, **_: Any) -> "FakeQuery":
+        self._operation, self._payload, self._count = "update", json, count
+        return self
+
+    def delete(self, count: Optional[str] = None, **_: Any) -> "FakeQuery":
+        self._operation, self._count = "delete", count
+        return self
+
+    # ---------- filtros ----------
+
+    def _filter(self, column: str, operator: str, value: Any) -> "FakeQuery":
+        self._filters.append((column, f"{operator}.{as_text(value)}"))
+        return self
+
+    def eq(self, column: str, value: Any) -> "FakeQuery":
+        return self._filter(column, "eq", value)
+
+    def neq(self, column: str, value: Any) -> "FakeQuery":
+        return self._filter(column, "neq", value)
+
+    def gt(self, column: str, value: Any) -> "FakeQuery":
+        return self._filter(column, "gt", value)
+
+    def gte(self, column: str, value: Any) -> "FakeQuery":
+        return self._filter(column, "gte", value)
+
+    def lt(self, column: str, value: Any) -> "FakeQuery":
+        return self._filter(column, "lt", value)
+
+    def lte(self, column: str, value: Any) -> "FakeQuery":
+        return self._filter(column, "lte", value)
+
+    def like(self, column: str, pattern: str) -> "FakeQuery":
+        return self._filter(column, "like", pattern)
+
+    def ilike(self, column: str, pattern: str) -> "FakeQuery":
+        return self._filter(column, "ilike", pattern)
+
+    def is_(self, column: str, value: Any) -> "FakeQuery":
+        return self._filter(column, "is", value)
+
+    def in_(self, column: str, values: Iterable[Any]) -> "FakeQuery":
+        return self._filter(column, "in", "(" + ",".join(as_text(v) for v in values) + ")")
+
+    def match(self, query: Dict[str, Any]) -> "FakeQuery":
+        for column, value in query.items():
+            self.eq(column, value)
+        return self
+
+    # ---------- modificadores ----------
+
+    def order(self, column: str, desc: bool = False, **_: Any) -> "FakeQuery":
+        self._order.append((column, desc))
+        return self
+
+    def limit(self, size: int, **_: Any) -> "FakeQuery":
+        self._limit = size
+        return self
+
+    def range(self, start: int, end: int, **_: Any) -> "FakeQuery":
+        self._offset, self._limit = start, end - start + 1
+        return self
+
+    def single(self) -> "FakeQuery":
+        self._single = "single"
+        return self
+
+    def maybe_single(self) -> "FakeQuery":
+        self._single = "maybe"
+        return self
+
+    # ---------- ejecución ----------
+
+    def execute(self) -> Optional[APIResponse]:
+        method = {"select": "GET", "insert": "POST", "upsert": "POST", "update": "PATCH", "delete": "DELETE"}
+        self._db.round_trips[(method[self._operation], self._table)] += 1
+
+        with self._db.lock:
+            table = self._db.table_for(self._table)
+            try:
+                rows = getattr(self, f"_run_{self._operation}")(table)
+            except DuplicateKeyError as e:
+                raise _api_error("23505", "duplicate key value violates unique constraint", str(e))
+
+            total = len(rows)
+            if self._operation == "select":
+                rows = rows[self._offset:]
+                if self._limit is not None:
+                    rows = rows[: self._limit]
+            data = [project(row, self._columns) for row in rows]
+
+        count = total if self._count else None
+        if self._single is None:
+            return APIResponse(data=data, count=count)
+        if self._single == "maybe" and not data:
+            return None
+        if len(data) != 1:
+            raise _api_error(
+                "PGRST116", "JSON object requested, multiple (or no) rows returned",
+                f"The result contains {len(data)} rows",
+            )
+        return SingleAPIResponse(data=data[0], count=count)
+
+    def _run_select(self, table: FakeTable) -> List[Row]:
+        rows = [row for _, row in table.find(self._filters)]
+        for column, desc in reversed(self._order):
+            rows.sort(key=lambda row: sort_key(row.get(column)), reverse=desc)
+        return rows
+
+    def _items(self) -> List[Row]:
+        return self._payload if isinstance(self._payload, list) else [self._payload or {}]
+
+    def _run_insert(self, table: FakeTable) -> List[Row]:
+        return [table.insert(item) for item in self._items()]
+
+    def _run_upsert(self, table: FakeTable) -> List[Row]:
+        keys = [key.strip() for key in self._on_conflict.split(",")]
+        written = []
+        for item in self._items():
+            existing = table.find([(key, f"eq.{as_text(item.get(key))}") for key in keys])
+            if not existing:
+                written.append(table.insert(item))
+            elif not self._ignore_duplicates:
+                written.append(table.update(existing[0][0], item))
+        return written
+
+    def _run_update(self, table: FakeTable) -> List[Row]:
+        return [table.update(rowid, self._payload or {}) for rowid, _ in table.find(self._filters)]
+
+    def _run_delete(self, table: FakeTable) -> List[Row]:
+        return [table.delete(rowid) for rowid, _ in table.find(self._filters)]
+
+
+class FakeRPC:
+    def __init__(self, db: "FakeSupabase", function: str, params: Dict[str, Any]):
+        self._db = db
+        self._function = function
+        self._params = params
+
+    def execute(self) -> APIResponse:
+        self._db.round_trips[("RPC", self._function)] += 1
+        function = self._db.functions.get(self._function)
+        if function is None:
+            raise _api_error("PGRST202", f"Could not find the function public.{self._function}")
+        with self._db.lock:
+            try:
+                result = function(self._db, **self._params)
+            except DuplicateKeyError as e:
+                raise _api_error("23505", "duplicate key value violates unique constraint", str(e))
+            except ValueError as e:
+                raise _api_error("P0001", str(e))
+            # Como en la respuesta HTTP: copia en tipos JSON, sin referencias a las tablas
+            result = json.loads(json.dumps(result, default=str))
+        if isinstance(result, list):
+            return APIResponse(data=result)
+        return SingleAPIResponse(data=result)
+
+
+# ================================
+# 🗄️ CLIENTE FALSO
+# ================================
+
+class FakeSupabase:
+    """
+    Cliente en memoria. Para cargar datos tiene la misma interfaz que
+    PostgrestStub (`insert`, `unique`, `register_function`, `tables`,
+    `round_trips`), así que `bench_api.seed()` sirve para los dos.
+    """
+
+    def __init__(self):
+        self.tables: Dict[str, FakeTable] = {}
+        self.functions: Dict[str, Callable[..., Any]] = {}
+        self.round_trips: Counter = Counter()
+        self.lock = threading.RLock()  # La app consulta desde el threadpool
+
+    def table_for(self, name: str) -> FakeTable:
+        table = self.tables.get(name)
+        if table is None:
+            table = self.tables[name] = FakeTable(name)
+        return table
+
+    # ---------- API de supabase-py ----------
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    from_ = table
+
+    def rpc(self, function: str, params: Optional[Dict[str, Any]] = None, **_: Any) -> FakeRPC:
+        return FakeRPC(self, function, params or {})
+
+    # ---------- datos ----------
+
+    def insert(self, table: str, rows: List[Row]) -> List[Row]:
+        with self.lock:
+            return [self._insert_row(table, row) for row in rows]
+
+    def _insert_row(self, table: str, row: Row) -> Row:
+        return self.table_for(table).insert(row)
+
+    def unique(self, table: str, *columns: str) -> None:
+        """Declara columnas UNIQUE (como `users.email`)."""
+        with self.lock:
+            self.table_for(table).unique(*columns)
+
+    def index(self, table: str, *columns: str) -> None:
+        """Añade índices hash para filtros `eq` frecuentes."""
+        with self.lock:
+            self.table_for(table).index(*columns)
+
+    def update(self, table: str, match: Row, changes: Row) -> List[Row]:
+        """Modifica filas manteniendo los índices (no cambies las filas de `tables` a mano)."""
+        with self.lock:
+            fake_table = self.table_for(table)
+            filters = [(column, f"eq.{as_text(value)}") for column, value in match.items()]
+            return [fake_table.update(rowid, changes) for rowid, _ in fake_table.find(filters)]
+
+    def register_function(self, name: str, function: Callable[..., Any]) -> None:
+        """Registra una función RPC: recibe el cliente falso y los argumentos."""
+        self.functions[name] = function
+
+    # ---------- contadores ----------
+
+    @property
+    def total_round_trips(self) -> int:
+        return sum(self.round_trips.values())
+
+    def reset_counters(self) -> None:
+        self.round_trips.clear()
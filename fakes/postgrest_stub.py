@@ -0,0 +1,342 @@
+"""
+Sustituto local de PostgREST (la API REST de Supabase) para pruebas y benchmarks.
+
+Guarda las tablas en memoria y entiende el subconjunto de PostgREST que usa
+la app a través de `supabase-py`:
+
+- GET/POST/PATCH/DELETE en /rest/v1/<tabla>
+- Filtros `col=eq.x`, `neq`, `gt`, `gte`, `lt`, `lte`, `in.(a,b)`, `is.null`,
+  `like`/`ilike`; `select`, `order`, `limit`, `offset`
+- `Prefer: count=exact` (cabecera Content-Range) y `return=representation`
+- `Accept: application/vnd.pgrst.object+json` (`.single()` / `.maybe_single()`)
+- Upsert con `on_conflict` y POST /rest/v1/rpc/<función> (funciones registradas)
+
+Cada petición puede esperar una latencia inyectada (`latency_ms` ± `jitter_ms`)
+para simular la red hasta la base de datos, y se cuentan los viajes de ida y
+vuelta por método y tabla.
+
+Uso:
+    stub = PostgrestStub(latency_ms=5)
+    stub.insert("roles", [{"id": 1, "name": "admin"}])
+    with stub.serve() as url:       # http://127.0.0.1:<puerto>
+        ...                         # SUPABASE_URL=url
+"""
+import asyncio
+import fnmatch
+import json
+import random
+import socket
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+OBJECT_MEDIA_TYPE = "application/vnd.pgrst.object+json"
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "columns", "on_conflict"}
+
+
+# ================================
+# 🔧 UTILIDADES
+# ================================
+# Filtros, orden y proyección de filas: los comparte el cliente falso
+# (fakes/fake_supabase.py) para que ambos devuelvan las mismas filas.
+
+def as_text(value: Any) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def _comparable(value: Any, other: str) -> Tuple[Any, Any]:
+    """Compara como número si ambos lo son; si no, como texto."""
+    if not isinstance(value, bool):
+        try:
+            return float(value), float(other)
+        except (TypeError, ValueError):
+            pass
+    return as_text(value), other
+
+
+def matches(row: Dict[str, Any], column: str, expression: str) -> bool:
+    negate = expression.startswith("not.")
+    if negate:
+        expression = expression[len("not."):]
+    operator, _, operand = expression.partition(".")
+    value = row.get(column)
+
+    if operator == "eq":
+        result = as_text(value) == operand
+    elif operator == "neq":
+        result = as_text(value) != operand
+    elif operator in ("gt", "gte", "lt", "lte"):
+        if value is None:
+            result = False
+        else:
+            left, right = _comparable(value, operand)
+            result = {
+                "gt": left > right, "gte": left >= right,
+                "lt": left < right, "lte": left <= right,
+            }[operator]
+    elif operator == "in":
+        options = [item.strip().strip('"') for item in operand.strip("()").split(",")]
+        result = as_text(value) in options
+    elif operator == "is":
+        result = as_text(value) == operand
+    elif operator in ("like", "ilike"):
+        pattern = operand.replace("%", "*")
+        text = as_text(value)
+        if operator == "ilike":
+            text, pattern = text.lower(), pattern.lower()
+        result = value is not None and fnmatch.fnmatchcase(text, pattern)
+    else:
+        raise ValueError(f"Operador no soportado: {operator}")
+
+    return not result if negate else result
+
+
+def sort_key(value: Any) -> Tuple[bool, Any]:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value is None, value
+    return value is None, as_text(value)
+
+
+def project(row: Dict[str, Any], select: str) -> Dict[str, Any]:
+    columns = [c.strip().strip('"') for c in select.split(",") if c.strip()]
+    if not columns or "*" in columns:
+        return dict(row)
+    return {column: row.get(column) for column in columns if "(" not in column}
+
+
+def _error(status: int, code: str, message: str, details: str = "") -> JSONResponse:
+    return JSONResponse(
+        {"code": code, "message": message, "details": details, "hint": None},
+        status_code=status,
+    )
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class DuplicateKeyError(Exception):
+    """Se viola una restricción UNIQUE declarada con `unique()`."""
+
+
+# ================================
+# 🗄️ SUSTITUTO DE POSTGREST
+# ================================
+
+class PostgrestStub:
+    """
+    Servidor PostgREST mínimo en memoria con latencia inyectada.
+    """
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.tables: Dict[str, List[Dict[str, Any]]] = {}
+        self.functions: Dict[str, Callable[..., Any]] = {}
+        self.unique_columns: Dict[str, List[str]] = {}
+        self.round_trips: Counter = Counter()
+        self._next_id: Dict[str, int] = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.app = Starlette(routes=[
+            Route("/rest/v1/rpc/{function}", self._handle_rpc, methods=["POST"]),
+            Route("/rest/v1/{table}", self._handle_table, methods=["GET", "POST", "PATCH", "DELETE"]),
+        ])
+
+    # ---------- datos ----------
+
+    def insert(self, table: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [self._insert_row(table, row) for row in rows]
+
+    def unique(self, table: str, *columns: str) -> None:
+        """Declara columnas UNIQUE (como `users.email`)."""
+        self.unique_columns.setdefault(table, []).extend(columns)
+
+    def _insert_row(self, table: str, row: Dict[str, Any]) -> Dict[str, Any]:
+        rows = self.tables.setdefault(table, [])
+        row = dict(row)
+        for column in self.unique_columns.get(table, []):
+            if any(existing.get(column) == row.get(column) for existing in rows):
+                raise DuplicateKeyError(f"Key ({column})=({row.get(column)}) already exists.")
+        if row.get("id") is None:
+            row["id"] = self._next_id.get(table, 1)
+        if isinstance(row["id"], int):
+            self._next_id[table] = max(self._next_id.get(table, 1), row["id"] + 1)
+        row.setdefault("created_at", datetime.utcnow().isoformat())
+        rows.append(row)
+        return row
+
+    def register_function(self, name: str, function: Callable[..., Any]) -> None:
+        """Registra una función RPC: recibe el stub y los argumentos JSON."""
+        self.functions[name] = function
+
+    # ---------- contadores ----------
+
+    @property
+    def total_round_trips(self) -> int:
+        return sum(self.round_trips.values())
+
+    def reset_counters(self) -> None:
+        self.round_trips.clear()
+
+    # ---------- HTTP ----------
+
+    async def _delay(self) -> None:
+        delay = self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+
+    def _filtered(self, table: str, request: Request) -> List[Dict[str, Any]]:
+        rows = self.tables.get(table, [])
+        for column, expression in request.query_params.multi_items():
+            if column in RESERVED_PARAMS:
+                continue
+            rows = [row for row in rows if matches(row, column, expression)]
+        return rows
+
+    async def _handle_table(self, request: Request) -> Response:
+        table = request.path_params["table"]
+        self.round_trips[(request.method, table)] += 1
+        await self._delay()
+
+        body = await request.body()
+        payload = json.loads(body) if body else None
+        prefer = request.headers.get("prefer", "")
+
+        with self._lock:
+            try:
+                if request.method == "GET":
+                    rows = self._select(table, request)
+                elif request.method == "POST":
+                    rows = self._write(table, payload, request, prefer)
+                elif request.method == "PATCH":
+                    rows = self._filtered(table, request)
+                    for row in rows:
+                        row.update(payload or {})
+                else:
+                    rows = self._filtered(table, request)
+                    doomed = {id(row) for row in rows}
+                    self.tables[table] = [r for r in self.tables.get(table, []) if id(r) not in doomed]
+            except ValueError as e:
+                return _error(400, "PGRST100", str(e))
+            except DuplicateKeyError as e:
+                return _error(409, "23505", "duplicate key value violates unique constraint", str(e))
+
+            total = len(rows)
+            select = request.query_params.get("select", "*")
+            data = [project(row, select) for row in rows]
+
+        if request.method != "GET" and "return=representation" not in prefer:
+            return Response(status_code=201 if request.method == "POST" else 204)
+
+        headers = {}
+        if "count=" in prefer:
+            headers["Content-Range"] = f"0-{max(total - 1, 0)}/{total}"
+
+        if OBJECT_MEDIA_TYPE in request.headers.get("accept", ""):
+            if len(data) != 1:
+                return _error(
+                    406, "PGRST116", "JSON object requested, multiple (or no) rows returned",
+                    f"The result contains {len(data)} rows",
+                )
+            return JSONResponse(data[0], headers=headers)
+
+        status = 201 if request.method == "POST" else 200
+        return JSONResponse(data, status_code=status, headers=headers)
+
+    def _select(self, table: str, request: Request) -> List[Dict[str, Any]]:
+        rows = self._filtered(table, request)
+        order = request.query_params.get("order")
+        if order:
+            for term in reversed(order.split(",")):
+                column, _, direction = term.partition(".")
+                rows = sorted(
+                    rows,
+                    key=lambda row: sort_key(row.get(column)),
+                    reverse=direction.startswith("desc"),
+                )
+        offset = int(request.query_params.get("offset", 0))
+        limit = request.query_params.get("limit")
+        rows = rows[offset:]
+        if limit is not None:
+            rows = rows[: int(limit)]
+        return rows
+
+    def _write(self, table: str, payload: Any, request: Request, prefer: str) -> List[Dict[str, Any]]:
+        items = payload if isinstance(payload, list) else [payload or {}]
+        on_conflict = request.query_params.get("on_conflict")
+        merge = "resolution=merge-duplicates" in prefer
+        written = []
+        for item in items:
+            if on_conflict:
+                keys = [key.strip() for key in on_conflict.split(",")]
+                existing = next(
+                    (row for row in self.tables.get(table, [])
+                     if all(as_text(row.get(k)) == as_text(item.get(k)) for k in keys)),
+                    None,
+                )
+                if existing is not None:
+                    if merge:
+                        existing.update(item)
+                    written.append(existing)
+                    continue
+            written.append(self._insert_row(table, item))
+        return written
+
+    async def _handle_rpc(self, request: Request) -> Response:
+        name = request.path_params["function"]
+        self.round_trips[("RPC", name)] += 1
+        await self._delay()
+
+        function = self.functions.get(name)
+        if function is None:
+            return _error(404, "PGRST202", f"Could not find the function public.{name}")
+
+        body = await request.body()
+        with self._lock:
+            try:
+                result = function(self, **(json.loads(body) if body else {}))
+            except DuplicateKeyError as e:
+                return _error(409, "23505", "duplicate key value violates unique constraint", str(e))
+            except ValueError as e:
+                return _error(400, "P0001", str(e))
+        return JSONResponse(result)
+
+    # ---------- servidor ----------
+
+    @contextmanager
+    def serve(self, port: Optional[int] = None) -> Iterator[str]:
+        """Arranca uvicorn en un hilo y devuelve la URL base (estilo SUPABASE_URL)."""
+        import uvicorn
+
+        port = port or _free_port()
+        server = uvicorn.Server(uvicorn.Config(
+            self.app, host="127.0.0.1", port=port, log_level="warning", access_log=False,
+        ))
+        thread = threading.Thread(target=server.run, name="postgrest-stub", daemon=True)
+        thread.start()
+        deadline = time.monotonic() + 10
+        while not server.started:
+            if time.monotonic() > deadline or not thread.is_alive():
+                raise RuntimeError("No se pudo arrancar el sustituto de PostgREST")
+            time.sleep(0.01)
+        try:
+            yield f"http://127.0.0.1:{port}"
+        finally:
+            server.should_exit = True
+            thread.join(timeout=10)
@@ -0,0 +1,13 @@
+-- Usuarios de Google sin contraseña: ya no se guarda un bcrypt del google_id
+-- como contraseña falsa. El ID token se verifica en la API.
+
+alter table public.users
+    alter column hashed_password drop not null;
+
+alter table public.users
+    add column if not exists google_id text,
+    add column if not exists auth_provider text not null default 'password';
+
+create unique index if not exists users_google_id_key
+    on public.users (google_id)
+    where google_id is not null;
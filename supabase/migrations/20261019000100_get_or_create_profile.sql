@@ -0,0 +1,25 @@
+-- Perfil del usuario en una sola llamada: lo devuelve si existe y, si no,
+-- lo crea con el full_name del usuario (o la parte local del email).
+-- ON CONFLICT DO NOTHING hace que dos peticiones simultáneas no choquen:
+-- la segunda espera a la primera y devuelve la fila ya creada.
+
+create or replace function public.get_or_create_profile(p_user_id int, p_email text default null)
+returns setof public.profiles
+language plpgsql
+as $$
+begin
+    return query select * from public.profiles where id = p_user_id;
+    if found then
+        return;
+    end if;
+
+    insert into public.profiles (id, name)
+    select u.id, coalesce(nullif(u.full_name, ''), split_part(coalesce(p_email, u.email), '@', 1))
+    from public.users u
+    where u.id = p_user_id
+    on conflict (id) do nothing;
+
+    -- Nueva instantánea: incluye la fila si la insertó otra transacción
+    return query select * from public.profiles where id = p_user_id;
+end;
+$$;
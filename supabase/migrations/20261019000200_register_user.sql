@@ -0,0 +1,38 @@
+-- Registro en una sola llamada: usuario, perfil y nombre del rol en la
+-- misma transacción. Si algo falla no queda un usuario sin perfil.
+-- El email repetido lo rechaza el índice único (23505), sin SELECT previo.
+
+create unique index if not exists users_email_key on public.users (email);
+
+create or replace function public.register_user(
+    p_email text,
+    p_hashed_password text,
+    p_full_name text default null,
+    p_age int default null,
+    p_phone text default null,
+    p_gender text default null
+)
+returns jsonb
+language plpgsql
+as $$
+declare
+    new_user public.users;
+    role_name text;
+begin
+    insert into public.users (email, hashed_password, full_name, role_id, age, phone, gender, is_active, is_verified)
+    values (p_email, p_hashed_password, p_full_name, 2, p_age, p_phone, p_gender, true, false)
+    returning * into new_user;
+
+    insert into public.profiles (id, name, age, phone, gender)
+    values (new_user.id, p_full_name, p_age, p_phone, p_gender)
+    on conflict (id) do nothing;
+
+    select name into role_name from public.roles where id = new_user.role_id;
+
+    return (to_jsonb(new_user) - 'hashed_password') || jsonb_build_object('role', coalesce(role_name, 'user'));
+end;
+$$;
+
+-- Solo la API (service role) registra usuarios
+revoke execute on function public.register_user(text, text, text, int, text, text) from public, anon, authenticated;
+grant execute on function public.register_user(text, text, text, int, text, text) to service_role;
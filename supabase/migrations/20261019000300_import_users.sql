@@ -0,0 +1,30 @@
+-- Importación masiva: un bloque de usuarios y sus perfiles en una sola
+-- sentencia por tabla y en la misma transacción. Los emails ya existentes
+-- (o repetidos dentro del bloque) se omiten; la función devuelve solo los
+-- creados, con su id, para que la API informe fila a fila.
+
+create or replace function public.import_users(p_users jsonb)
+returns table (id int, email text)
+language plpgsql
+as $$
+#variable_conflict use_column
+begin
+    return query
+    with created as (
+        insert into public.users (email, hashed_password, full_name, role_id, age, phone, gender, is_active, is_verified)
+        select u.email, u.hashed_password, u.full_name, 2, u.age, u.phone, u.gender, true, false
+        from jsonb_to_recordset(p_users)
+            as u(email text, hashed_password text, full_name text, age int, phone text, gender text)
+        on conflict (email) do nothing
+        returning users.id, users.email, users.full_name, users.age, users.phone, users.gender
+    ), profiles as (
+        insert into public.profiles (id, name, age, phone, gender)
+        select c.id, c.full_name, c.age, c.phone, c.gender from created c
+        on conflict (id) do nothing
+    )
+    select c.id, c.email from created c;
+end;
+$$;
+
+revoke execute on function public.import_users(jsonb) from public, anon, authenticated;
+grant execute on function public.import_users(jsonb) to service_role;
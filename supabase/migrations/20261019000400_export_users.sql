@@ -0,0 +1,41 @@
+-- Exportación de usuarios por páginas con cursor keyset (id > p_after):
+-- cada página es un recorrido corto del índice de la clave primaria, da
+-- igual lo lejos que esté del principio (OFFSET iría releyendo todo).
+
+create or replace function public.export_users(p_after int default 0, p_limit int default 1000)
+returns table (
+    id int,
+    email text,
+    full_name text,
+    role text,
+    is_active boolean,
+    is_verified boolean,
+    age int,
+    phone text,
+    gender text,
+    created_at timestamptz,
+    profile_name text,
+    total_habits_completed int,
+    current_streak int,
+    longest_streak int,
+    average_sleep_hours numeric
+)
+language sql
+stable
+as $$
+    select
+        u.id, u.email, u.full_name, r.name, u.is_active, u.is_verified,
+        coalesce(p.age, u.age)::int, coalesce(p.phone, u.phone), coalesce(p.gender, u.gender), u.created_at::timestamptz,
+        p.name, s.total_habits_completed::int, s.current_streak::int, s.longest_streak::int,
+        s.average_sleep_hours::numeric
+    from public.users u
+    left join public.roles r on r.id = u.role_id
+    left join public.profiles p on p.id = u.id
+    left join public.user_stats s on s.user_id::text = u.id::text
+    where u.id > p_after
+    order by u.id
+    limit p_limit;
+$$;
+
+revoke execute on function public.export_users(int, int) from public, anon, authenticated;
+grant execute on function public.export_users(int, int) to service_role;
@@ -0,0 +1,19 @@
+-- El seed sintético inserta usuarios con id explícito, y eso no avanza la
+-- secuencia de users.id: el siguiente registro real acabaría chocando con
+-- esos ids. Esta función adelanta la secuencia hasta el mayor id existente
+-- y devuelve el valor que queda fijado.
+
+create or replace function public.sync_users_id_sequence()
+returns bigint
+language sql
+security definer
+set search_path = public
+as $$
+    select setval(
+        pg_get_serial_sequence('public.users', 'id'),
+        coalesce((select max(id) from public.users), 1)
+    );
+$$;
+
+revoke execute on function public.sync_users_id_sequence() from public, anon, authenticated;
+grant execute on function public.sync_users_id_sequence() to service_role;
@@ -0,0 +1,114 @@
+-- search_users: created_at admite NULL y rompía la paginación keyset.
+--
+-- `(created_at, id) > (cursor)` es NULL para las filas sin fecha, así que
+-- nunca aparecían, y un cursor que terminaba en una de ellas comparaba
+-- contra NULL y devolvía una página vacía. Ahora las filas con NULL van siempre al final
+-- (NULLS LAST, en ambos sentidos) y el cursor guarda el NULL tal cual:
+-- - cursor con valor: filas posteriores en el orden, más todas las NULL;
+-- - cursor con NULL: solo quedan filas NULL, ordenadas por id.
+
+create index if not exists users_created_at_desc_id on public.users (created_at desc nulls last, id desc);
+
+create or replace function public.search_users(
+    p_query text default null,
+    p_prefix boolean default false,
+    p_role text default null,
+    p_is_active boolean default null,
+    p_is_verified boolean default null,
+    p_min_age int default null,
+    p_max_age int default null,
+    p_sort text default 'id',
+    p_desc boolean default false,
+    p_after_value text default null,
+    p_after_id int default null,
+    p_limit int default 20
+)
+returns table (
+    id int,
+    email text,
+    full_name text,
+    role text,
+    is_active boolean,
+    is_verified boolean,
+    age int,
+    phone text,
+    gender text,
+    created_at timestamptz
+)
+language plpgsql
+stable
+as $$
+declare
+    sort_expr text;
+    sort_type text;
+    nullable boolean := false;
+    direction text := case when p_desc then 'desc' else 'asc' end;
+    comparison text := case when p_desc then '<' else '>' end;
+    conditions text[] := array['true'];
+    pattern text;
+begin
+    case p_sort
+        when 'id' then sort_expr := 'u.id'; sort_type := 'int';
+        when 'email' then sort_expr := 'u.email'; sort_type := 'text';
+        when 'full_name' then sort_expr := 'coalesce(u.full_name, '''')'; sort_type := 'text';
+        when 'created_at' then sort_expr := 'u.created_at'; sort_type := 'timestamptz'; nullable := true;
+        else raise exception 'Orden no soportado: %', p_sort;
+    end case;
+
+    if p_query is not null then
+        -- Escapar los comodines de LIKE del texto del usuario
+        pattern := replace(replace(replace(p_query, '\', '\\'), '%', '\%'), '_', '\_') || '%';
+        if not p_prefix then
+            pattern := '%' || pattern;
+        end if;
+        conditions := conditions || format('(u.email ilike %1$L or u.full_name ilike %1$L)', pattern);
+    end if;
+    if p_role is not null then
+        conditions := conditions || format('u.role_id in (select r2.id from public.roles r2 where r2.name = %L)', p_role);
+    end if;
+    if p_is_active is not null then
+        conditions := conditions || format('u.is_active = %L', p_is_active);
+    end if;
+    if p_is_verified is not null then
+        conditions := conditions || format('u.is_verified = %L', p_is_verified);
+    end if;
+    if p_min_age is not null then
+        conditions := conditions || format('u.age >= %L', p_min_age);
+    end if;
+    if p_max_age is not null then
+        conditions := conditions || format('u.age <= %L', p_max_age);
+    end if;
+    if p_after_id is not null then
+        if p_after_value is null then
+            -- La última fila vista no tenía valor: solo quedan filas NULL
+            conditions := conditions || format('%s is null and u.id %s %L', sort_expr, comparison, p_after_id);
+        elsif nullable then
+            conditions := conditions || format(
+                '((%s, u.id) %s (%L::%s, %L) or %s is null)',
+                sort_expr, comparison, p_after_value, sort_type, p_after_id, sort_expr
+            );
+        else
+            conditions := conditions || format(
+                '(%s, u.id) %s (%L::%s, %L)',
+                sort_expr, comparison, p_after_value, sort_type, p_after_id
+            );
+        end if;
+    end if;
+
+    return query execute format(
+        'select u.id, u.email, u.full_name, r.name, u.is_active, u.is_verified, u.age::int, u.phone, u.gender,
+                u.created_at::timestamptz
+         from public.users u
+         left join public.roles r on r.id = u.role_id
+         where %s
+         order by %s %s nulls last, u.id %s
+         limit %s',
+        array_to_string(conditions, ' and '), sort_expr, direction, direction, p_limit
+    );
+end;
+$$;
+
+revoke execute on function public.search_users(text, boolean, text, boolean, boolean, int, int, text, boolean, text, int, int)
+    from public, anon, authenticated;
+grant execute on function public.search_users(text, boolean, text, boolean, boolean, int, int, text, boolean, text, int, int)
+    to service_role;
@@ -0,0 +1,47 @@
+-- export_users: join con user_stats por el tipo nativo de la columna.
+--
+-- `s.user_id::text = u.id::text` no podía usar ningún índice de
+-- user_stats.user_id: cada página keyset volvía a recorrer user_stats
+-- entero (O(páginas × filas de user_stats) en una exportación grande).
+-- user_id es entero, como users.id: con la igualdad directa y el índice,
+-- cada fila de la página es una búsqueda en el índice.
+
+create index if not exists user_stats_user_id on public.user_stats (user_id);
+
+create or replace function public.export_users(p_after int default 0, p_limit int default 1000)
+returns table (
+    id int,
+    email text,
+    full_name text,
+    role text,
+    is_active boolean,
+    is_verified boolean,
+    age int,
+    phone text,
+    gender text,
+    created_at timestamptz,
+    profile_name text,
+    total_habits_completed int,
+    current_streak int,
+    longest_streak int,
+    average_sleep_hours numeric
+)
+language sql
+stable
+as $$
+    select
+        u.id, u.email, u.full_name, r.name, u.is_active, u.is_verified,
+        coalesce(p.age, u.age)::int, coalesce(p.phone, u.phone), coalesce(p.gender, u.gender), u.created_at::timestamptz,
+        p.name, s.total_habits_completed::int, s.current_streak::int, s.longest_streak::int,
+        s.average_sleep_hours::numeric
+    from public.users u
+    left join public.roles r on r.id = u.role_id
+    left join public.profiles p on p.id = u.id
+    left join public.user_stats s on s.user_id = u.id
+    where u.id > p_after
+    order by u.id
+    limit p_limit;
+$$;
+
+revoke execute on function public.export_users(int, int) from public, anon, authenticated;
+grant execute on function public.export_users(int, int) to service_role;
@@ -1,10 +1,107 @@
+import os
+
 import pytest
 from fastapi.testclient import TestClient
+
+# Valores mínimos para poder importar la app sin un .env real
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "test-service-key")
+os.environ.setdefault("SUPABASE_ANON_KEY", "test-anon-key")
+os.environ.setdefault("EMAIL_FROM", "test@example.com")
+os.environ.setdefault("EMAIL_PASSWORD", "test-password")
+os.environ.setdefault("GEMINI_API_KEY", "test-gemini-key")
+# Estado de vida corta (códigos, refresh tokens...) en memoria del proceso
+os.environ.setdefault("TTL_STORE_URL", "memory://")
+# bcrypt con el coste mínimo: los tests no miden seguridad y así no tardan
+os.environ.setdefault("PASSWORD_BCRYPT_COST", "4")
+
 from app.main import app
+from app.api import services
+from app.api.services import hash_password, profile_cache
+from app.core.database import supabase
+from app.core import login_guard
+from app.core.limiter import limiter
+from app.core.ttl_store import MemoryTTLStore
+from fakes.data import register_functions
+from fakes.fake_supabase import FakeSupabase
+
+# Usuarios de demostración de app/db/seed.py
+DEMO_USERS = [
+    {"id": 1, "email": "admin@test.com", "password": "admin123", "full_name": "Admin Test", "role_id": 1},
+    {"id": 2, "email": "user@test.com", "password": "user123", "full_name": "User Test", "role_id": 2},
+]
+
+
+@pytest.fixture(scope="session")
+def demo_password_hashes():
+    """bcrypt es lento: un hash por usuario de demostración para toda la sesión."""
+    return {user["email"]: hash_password(user["password"]) for user in DEMO_USERS}
+
+
+@pytest.fixture(scope="module")
+def fake_db(demo_password_hashes):
+    """
+    Base de datos en memoria (fakes/fake_supabase.py) con los usuarios
+    de demostración; una nueva por módulo, sin red ni Supabase real.
+    """
+    db = FakeSupabase()
+    db.unique("users", "email")
+    db.unique("profiles", "id")
+    register_functions(db)
+    db.insert("roles", [{"id": 1, "name": "admin"}, {"id": 2, "name": "user"}])
+    for user in DEMO_USERS:
+        db.insert("users", [{
+            "id": user["id"],
+            "email": user["email"],
+            "hashed_password": demo_password_hashes[user["email"]],
+            "full_name": user["full_name"],
+            "role_id": user["role_id"],
+            "is_active": True,
+            "is_verified": True,
+        }])
+        db.insert("profiles", [{"id": user["id"], "name": user["full_name"]}])
+    limiter.reset()  # /login admite 5 por minuto: cada módulo empieza de cero
+    login_guard.failures.set_client(MemoryTTLStore("login_failures"))  # Y sin bloqueos heredados
+    supabase.set_client(db)
+    yield db
+    supabase.set_client(None)
+    login_guard.failures.set_client(None)
+
+
+@pytest.fixture(autouse=True)
+def use_fake_db(fake_db):
+    """
+    Las pruebas que montan su propio sustituto lo quitan al acabar
+    (`set_client(None)`): las siguientes vuelven a la BD falsa.
+    """
+    if not supabase.initialized:
+        supabase.set_client(fake_db)
+    yield
+
+
+@pytest.fixture(autouse=True)
+def empty_profile_cache():
+    """
+    Los stubs de cada prueba reutilizan ids de usuario: sin perfiles
+    cacheados de pruebas anteriores.
+    """
+    profile_cache.clear()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def sent_emails(monkeypatch):
+    """
+    Sin SMTP real: los correos de recuperación se guardan en una lista
+    (email, código) que las pruebas pueden consultar.
+    """
+    sent = []
+    monkeypatch.setattr(services, "send_password_reset_email", lambda email, code: sent.append((email, code)) or True)
+    return sent
 
 
 @pytest.fixture(scope="module")
-def client():
+def client(fake_db):
     """
     Cliente de pruebas para hacer requests a la API.
     """
@@ -15,7 +112,7 @@ def client():
 def admin_token(client):
     """
     Obtiene un token de administrador para pruebas.
-    NOTA: Asegúrate de tener un usuario admin en tu base de datos.
+    El usuario está en la BD falsa (ver DEMO_USERS).
     Email: admin@test.com
     Password: admin123
     """
@@ -46,7 +143,7 @@ def admin_headers(admin_token):
 def user_token(client):
     """
     Obtiene un token de usuario regular para pruebas.
-    NOTA: Asegúrate de tener un usuario regular en tu base de datos.
+    El usuario está en la BD falsa (ver DEMO_USERS).
     Email: user@test.com
     Password: user123
     """
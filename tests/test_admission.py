@@ -0,0 +1,95 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.admission import FairLimiter, QueueFullError, QueueTimeoutError, TokenBucketLimiter
+
+
+class TestTokenBucketLimiter:
+    """
+    Pruebas del limitador token-bucket por usuario.
+    """
+
+    def test_allows_burst_then_rejects(self):
+        limiter = TokenBucketLimiter(rate=1, burst=3)
+
+        results = [limiter.try_acquire("u1")[0] for _ in range(4)]
+
+        assert results == [True, True, True, False]
+
+    def test_retry_after_and_isolation_between_users(self):
+        limiter = TokenBucketLimiter(rate=0.5, burst=1)
+        limiter.try_acquire("u1")
+
+        allowed, retry_after = limiter.try_acquire("u1")
+
+        assert not allowed
+        assert 1.5 < retry_after <= 2.0
+        assert limiter.try_acquire("u2")[0]
+
+    def test_idle_buckets_are_pruned(self):
+        limiter = TokenBucketLimiter(rate=1000, burst=1, max_keys=10)
+
+        for i in range(50):
+            limiter.try_acquire(f"u{i}")
+            time.sleep(0.002)  # Los buckets anteriores vuelven a llenarse
+
+        assert len(limiter._buckets) <= 11
+
+
+class TestFairLimiter:
+    """
+    Pruebas del limitador concurrente con cola justa.
+    """
+
+    def test_round_robin_between_users(self):
+        limiter = FairLimiter(capacity=1, max_queue=10)
+        order = []
+
+        async def job(user, n):
+            await limiter.acquire(user)
+            order.append(f"{user}{n}")
+            await asyncio.sleep(0.001)
+            limiter.release()
+
+        async def run():
+            await limiter.acquire("ocupado")
+            tasks = [asyncio.ensure_future(job("a", n)) for n in range(3)]
+            tasks.append(asyncio.ensure_future(job("b", 0)))
+            await asyncio.sleep(0)
+            limiter.release()
+            await asyncio.gather(*tasks)
+
+        asyncio.run(run())
+
+        # "b" no espera a que terminen todas las peticiones de "a"
+        assert order.index("b0") == 1
+
+    def test_full_queue_rejects_immediately(self):
+        limiter = FairLimiter(capacity=1, max_queue=1)
+
+        async def run():
+            await limiter.acquire("a")
+            waiting = asyncio.ensure_future(limiter.acquire("b"))
+            await asyncio.sleep(0)
+            with pytest.raises(QueueFullError):
+                await limiter.acquire("c")
+            limiter.release()
+            await waiting
+            assert limiter.in_use == 1 and limiter.queued == 0
+
+        asyncio.run(run())
+
+    def test_queue_timeout_leaves_no_waiter(self):
+        limiter = FairLimiter(capacity=1, max_queue=5)
+
+        async def run():
+            await limiter.acquire("a")
+            with pytest.raises(QueueTimeoutError):
+                await limiter.acquire("b", timeout=0.01)
+            assert limiter.queued == 0
+            limiter.release()
+            assert limiter.in_use == 0
+
+        asyncio.run(run())
@@ -12,7 +12,7 @@ class TestAuthentication:
         """
         response = client.get("/")
         assert response.status_code == 200
-        assert "message" in response.json()
+        assert response.json()["status"] == "running"
 
     def test_login_success(self, client):
         """
@@ -73,21 +73,24 @@ class TestAuthentication:
 
     def test_register_without_admin_token(self, client):
         """
-        Prueba de registro sin ser admin (debería fallar).
+        El registro es público: no necesita token y siempre crea un usuario
+        normal, aunque el cuerpo pida otro rol.
         """
         response = client.post("/api/auth/register", json={
             "email": "nuevo@test.com",
             "password": "123456",
             "full_name": "Test User",
-            "role_id": 2,
+            "role_id": 1,
+            "age": 30,
+            "phone": "123456789",
+            "gender": "Otro",
             "recaptcha_token": "test_token_bypass"
         })
-        
-        # Sin token de admin, debería retornar 401 o 403
-        # 💡 SUGERENCIA: Sin token, FastAPI devuelve 401 (Unauthorized).
-        assert response.status_code == 401
 
-    def test_forgot_password(self, client):
+        assert response.status_code == 200
+        assert response.json()["role"] == "user"
+
+    def test_forgot_password(self, client, sent_emails):
         """
         Prueba de solicitud de recuperación de contraseña.
         """
@@ -98,6 +101,7 @@ class TestAuthentication:
         
         # 💡 SUGERENCIA: Para un email existente, esperamos 200.
         assert response.status_code == 200
+        assert [email for email, _ in sent_emails] == ["admin@test.com"]
 
     def test_reset_password_invalid_code(self, client):
         """
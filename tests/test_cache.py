@@ -0,0 +1,167 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.cache import TTLCache
+
+
+class TestTTLCache:
+    """
+    Pruebas de la caché en memoria (LRU + TTL + single-flight).
+    """
+
+    def test_lru_eviction(self):
+        cache = TTLCache("test_lru", max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")  # "a" pasa a ser la más reciente
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+    def test_ttl_expiration(self):
+        cache = TTLCache("test_ttl", ttl_seconds=0.05)
+        cache.set("a", "valor")
+
+        assert cache.get("a") == "valor"
+        time.sleep(0.06)
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_max_bytes(self):
+        cache = TTLCache("test_bytes", max_entries=100, max_bytes=30)
+        cache.set("a", "x" * 10)
+        cache.set("b", "x" * 10)
+        cache.set("c", "x" * 10)
+
+        assert cache.stats()["bytes"] <= 30
+        assert cache.get("a") is None
+        # Una entrada más grande que el límite no vacía la caché
+        cache.set("d", "x" * 100)
+        assert cache.get("c") is not None
+
+    def test_hit_rate(self):
+        cache = TTLCache("test_stats")
+        cache.set("a", 1)
+        cache.get("a")
+        cache.get("b")
+
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    def test_concurrent_loads_are_coalesced(self):
+        cache = TTLCache("test_single_flight")
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return "respuesta"
+
+        async def run():
+            return await asyncio.gather(*(cache.get_or_load("k", loader) for _ in range(10)))
+
+        results = asyncio.run(run())
+
+        assert results == ["respuesta"] * 10
+        assert calls == 1
+        assert cache.get("k") == "respuesta"
+
+    def test_joiners_pass_admission(self):
+        cache = TTLCache("test_admit_joiners")
+        admitted = []
+
+        async def loader():
+            await asyncio.sleep(0.05)
+            return "respuesta"
+
+        def admit(name):
+            async def check():
+                admitted.append(name)
+                if name == "rechazado":
+                    raise RuntimeError("sin hueco")
+            return check
+
+        async def run():
+            first = asyncio.ensure_future(cache.get_or_load("k", loader, admit=admit("primero")))
+            await asyncio.sleep(0.01)
+            joiners = [cache.get_or_load("k", loader, admit=admit(name)) for name in ("b", "rechazado")]
+            return await asyncio.gather(first, *joiners, return_exceptions=True)
+
+        first, joined, rejected = asyncio.run(run())
+
+        assert first == joined == "respuesta"
+        assert isinstance(rejected, RuntimeError)
+        assert admitted == ["b", "rechazado"]  # Quien inicia la carga se admite al llamar al loader
+
+    def test_failed_load_is_not_cached(self):
+        cache = TTLCache("test_failure")
+
+        async def loader():
+            raise RuntimeError("fallo")
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(cache.get_or_load("k", loader))
+        assert cache.get("k") is None
+
+    def test_load_cancelled_when_all_waiters_leave(self):
+        cache = TTLCache("test_cancel")
+        cancelled = False
+
+        async def loader():
+            nonlocal cancelled
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled = True
+                raise
+
+        async def run():
+            task = asyncio.ensure_future(cache.get_or_load("k", loader))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            await asyncio.sleep(0)
+
+        asyncio.run(run())
+
+        assert cancelled
+        assert cache.get("k") is None
+
+    @pytest.mark.parametrize("stale_delay, fresh_delay", [
+        (0.02, 0.05),  # La carga nueva termina la última
+        (0.08, 0.01),  # La desfasada termina después de la nueva
+    ])
+    def test_invalidate_during_inflight_load(self, stale_delay, fresh_delay):
+        cache = TTLCache("test_invalidate_inflight")
+        row = {"name": "antes"}
+        loads = []
+
+        def loader(delay):
+            async def load():
+                loads.append(1)
+                snapshot = dict(row)  # Lee la BD...
+                await asyncio.sleep(delay)  # ...y tarda en volver
+                return snapshot
+            return load
+
+        async def run():
+            stale = asyncio.ensure_future(cache.get_or_load("k", loader(stale_delay)))
+            await asyncio.sleep(0.01)
+            row["name"] = "después"  # Actualización con la carga en curso
+            cache.invalidate("k")
+            fresh = await cache.get_or_load("k", loader(fresh_delay))  # No se une a la carga desfasada
+            return await stale, fresh
+
+        stale, fresh = asyncio.run(run())
+
+        assert stale == {"name": "antes"} and fresh == {"name": "después"}
+        assert len(loads) == 2
+        assert cache.get("k") == {"name": "después"}
+        assert not cache._generations and not cache._pending  # Nada queda colgado
@@ -0,0 +1,365 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.deps import get_current_user
+from app.api.routes import chatbot
+from app.chatbot.llm_pool import LLMPool, LLMTimeoutError, LLMOverloadedError
+from app.chatbot.llm_provider import LLMProvider, LLMUnavailableError, llm_provider
+from app.core.admission import TokenBucketLimiter
+from app.schemas.auth import TokenData
+
+
+class _Response:
+    def __init__(self, text):
+        self.text = text
+
+
+class _AsyncChunks:
+    def __init__(self, words, delay):
+        self.words = words
+        self.delay = delay
+
+    async def __aiter__(self):
+        for word in self.words:
+            await asyncio.sleep(self.delay)
+            yield _Response(word)
+
+
+class AsyncStubModel:
+    """Modelo local que imita `generate_content_async` con una latencia fija."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+        self.prompts = []
+
+    async def generate_content_async(self, prompt, stream=False):
+        self.prompts.append(prompt)
+        if stream:
+            return _AsyncChunks(["eco", ": ", prompt], self.delay)
+        self.calls += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            return _Response(f"eco: {prompt}")
+        finally:
+            self.active -= 1
+
+
+class SyncStubModel:
+    """Modelo local solo síncrono (como el SDK sin API asíncrona)."""
+
+    def __init__(self, delay=0.2):
+        self.delay = delay
+        self.produced = 0
+
+    def generate_content(self, prompt, stream=False):
+        if stream:
+            return self._chunks(prompt)
+        time.sleep(self.delay)
+        return _Response(f"eco: {prompt}")
+
+    def _chunks(self, prompt):
+        for i in range(100):
+            self.produced += 1
+            yield _Response(f"{prompt}-{i}")
+
+
+class TestLLMPool:
+    """
+    Pruebas del pool de llamadas al LLM contra modelos locales.
+    """
+
+    def test_respects_concurrency_limit(self):
+        model = AsyncStubModel(delay=0.05)
+        pool = LLMPool(model, max_concurrency=2, timeout=1, queue_timeout=1)
+
+        async def run():
+            return await asyncio.gather(*(pool.generate(f"p{i}") for i in range(6)))
+
+        results = asyncio.run(run())
+
+        assert results == [f"eco: p{i}" for i in range(6)]
+        assert model.max_active == 2
+
+    def test_timeout_raises(self):
+        pool = LLMPool(AsyncStubModel(delay=0.5), max_concurrency=1, timeout=0.05)
+
+        with pytest.raises(LLMTimeoutError):
+            asyncio.run(pool.generate("hola"))
+
+    def test_queue_timeout_sheds_load(self):
+        pool = LLMPool(AsyncStubModel(delay=0.3), max_concurrency=1, timeout=1, queue_timeout=0.05)
+
+        async def run():
+            return await asyncio.gather(
+                pool.generate("a"), pool.generate("b"), return_exceptions=True
+            )
+
+        results = asyncio.run(run())
+
+        assert results[0] == "eco: a"
+        assert isinstance(results[1], LLMOverloadedError)
+
+    def test_admit_uses_the_fair_queue(self):
+        pool = LLMPool(AsyncStubModel(delay=0.2), max_concurrency=1, timeout=1, queue_timeout=0.05)
+
+        async def run():
+            busy = asyncio.ensure_future(pool.generate("larga"))
+            await asyncio.sleep(0.01)
+            with pytest.raises(LLMOverloadedError):
+                await pool.admit("7")  # Pool ocupado: se rechaza como cualquier petición
+            await busy
+            await pool.admit("7")
+            return pool.in_flight
+
+        assert asyncio.run(run()) == 0  # Admitir no retiene el hueco
+
+    def test_sync_model_does_not_block_event_loop(self):
+        pool = LLMPool(SyncStubModel(delay=0.2), max_concurrency=2, timeout=1)
+        ticks = []
+
+        async def heartbeat():
+            for _ in range(10):
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.01)
+
+        async def run():
+            await asyncio.gather(pool.generate("hola"), heartbeat())
+
+        asyncio.run(run())
+        pool.shutdown()
+
+        gaps = [b - a for a, b in zip(ticks, ticks[1:])]
+        assert max(gaps) < 0.1
+
+    def test_cancellation_releases_slot(self):
+        model = AsyncStubModel(delay=0.5)
+        pool = LLMPool(model, max_concurrency=1, timeout=1, queue_timeout=0.2)
+
+        async def run():
+            task = asyncio.ensure_future(pool.generate("lento"))
+            await asyncio.sleep(0.02)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            model.delay = 0.01
+            return await pool.generate("rápido")
+
+        assert asyncio.run(run()) == "eco: rápido"
+
+
+class TestLLMStream:
+    """
+    Pruebas de las respuestas en streaming del pool.
+    """
+
+    def test_stream_yields_chunks_and_releases_slot(self):
+        pool = LLMPool(AsyncStubModel(delay=0.01), max_concurrency=1, timeout=1, queue_timeout=0.1)
+
+        async def run():
+            stream = await pool.stream("hola").start()
+            chunks = [chunk async for chunk in stream]
+            # El hueco quedó libre: una segunda llamada no espera
+            return chunks, await pool.generate("otra")
+
+        chunks, second = asyncio.run(run())
+
+        assert "".join(chunks) == "eco: hola"
+        assert second == "eco: otra"
+
+    def test_sync_stream_applies_backpressure(self):
+        model = SyncStubModel()
+        pool = LLMPool(model, max_concurrency=1, timeout=1, stream_buffer=2)
+
+        async def run():
+            stream = await pool.stream("p").start()
+            first = await stream.__anext__()
+            await asyncio.sleep(0.1)  # Consumidor lento: el productor debe frenar
+            produced = model.produced
+            await stream.close()
+            return first, produced
+
+        first, produced = asyncio.run(run())
+        pool.shutdown()
+
+        assert first == "p-0"
+        assert produced <= 5
+
+
+class TestLLMProvider:
+    """
+    Pruebas de la inicialización diferida del cliente del LLM.
+    """
+
+    def test_missing_key_fails_soft_and_is_remembered(self, monkeypatch):
+        provider = LLMProvider(retry_seconds=60)
+        monkeypatch.setattr("app.chatbot.llm_provider.settings.GEMINI_API_KEY", "")
+
+        assert provider.warmup() is False
+        with pytest.raises(LLMUnavailableError):
+            provider.get_pool()
+        assert not provider.ready
+
+    def test_pool_is_created_once(self, monkeypatch):
+        provider = LLMProvider()
+        created = []
+        monkeypatch.setattr(provider, "_create_model", lambda: created.append(1) or AsyncStubModel())
+
+        assert provider.get_pool() is provider.get_pool()
+        assert created == [1]
+
+
+class TestChatbotEndpoint:
+    """
+    Pruebas del endpoint /chatbot/ask con un modelo local.
+    """
+
+    @pytest.fixture
+    def chat_app(self, monkeypatch):
+        llm_provider.set_pool(LLMPool(AsyncStubModel(delay=0.01), timeout=1))
+        yield self._build_app(monkeypatch)
+        llm_provider.set_pool(None)
+
+    def _build_app(self, monkeypatch):
+        monkeypatch.setattr(chatbot, "user_limiter", TokenBucketLimiter(rate=1, burst=100))
+        chatbot.response_cache.clear()
+        app = FastAPI()
+        app.include_router(chatbot.router, prefix="/chatbot")
+        return app
+
+    @pytest.fixture
+    def chat_client(self, chat_app):
+        chat_app.dependency_overrides[get_current_user] = lambda: TokenData(
+            id="7", email="user@test.com", role="usuario"
+        )
+        return TestClient(chat_app)
+
+    def test_ask_requires_authentication(self, chat_app):
+        response = TestClient(chat_app).post("/chatbot/ask", json={"prompt": "hola"})
+
+        assert response.status_code == 401
+
+    def test_rate_limited_user_gets_429(self, chat_client, monkeypatch):
+        monkeypatch.setattr(chatbot, "user_limiter", TokenBucketLimiter(rate=0.1, burst=1))
+
+        first = chat_client.post("/chatbot/ask", json={"prompt": "hola"})
+        second = chat_client.post("/chatbot/ask", json={"prompt": "hola"})
+
+        assert first.status_code == 200
+        assert second.status_code == 429
+        assert int(second.headers["Retry-After"]) >= 1
+
+    def test_ask_returns_response(self, chat_client):
+        response = chat_client.post("/chatbot/ask", json={"prompt": "¿cuántas horas debo dormir?"})
+
+        assert response.status_code == 200
+        assert response.json() == {"response": "eco: ¿cuántas horas debo dormir?"}
+
+    def test_ask_timeout_returns_504(self, chat_client, monkeypatch):
+        llm_provider.set_pool(LLMPool(AsyncStubModel(delay=0.5), timeout=0.05))
+
+        response = chat_client.post("/chatbot/ask", json={"prompt": "hola"})
+
+        assert response.status_code == 504
+
+    def test_similar_prompts_hit_cache(self, chat_client):
+        model = llm_provider.get_pool().model
+
+        first = chat_client.post("/chatbot/ask", json={"prompt": "¿Cuántas horas debo dormir?"})
+        second = chat_client.post("/chatbot/ask", json={"prompt": "cuantas  horas debo dormir"})
+
+        assert second.json() == first.json()
+        assert model.calls == 1
+
+    def test_use_cache_false_refreshes_cache(self, chat_client):
+        model = llm_provider.get_pool().model
+        chatbot.response_cache.set(chatbot.cache_key("hola"), "respuesta mala")
+
+        fresh = chat_client.post("/chatbot/ask", json={"prompt": "hola", "use_cache": False})
+        cached = chat_client.post("/chatbot/ask", json={"prompt": "hola"})
+
+        assert fresh.json() == cached.json() == {"response": "eco: hola"}
+        assert model.calls == 1
+
+    def test_coalesced_prompt_charged_to_each_user(self, chat_app, monkeypatch):
+        pool = LLMPool(AsyncStubModel(delay=0.1), timeout=1)
+        llm_provider.set_pool(pool)
+        admitted = []
+        admit = pool.admit
+        monkeypatch.setattr(pool, "admit", lambda user_key: admitted.append(user_key) or admit(user_key))
+        users = iter(["7", "8"])
+        chat_app.dependency_overrides[get_current_user] = lambda: TokenData(
+            id=next(users), email="user@test.com", role="usuario"
+        )
+
+        async def run():
+            transport = httpx.ASGITransport(app=chat_app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                first = asyncio.ensure_future(client.post("/chatbot/ask", json={"prompt": "hola"}))
+                await asyncio.sleep(0.03)
+                second = await client.post("/chatbot/ask", json={"prompt": "hola"})
+                return await first, second
+
+        first, second = asyncio.run(run())
+
+        assert first.json() == second.json()
+        assert pool.model.calls == 1
+        assert admitted == ["8"]  # El segundo usuario pasó la cola con su propia clave
+
+    def test_session_keeps_context_server_side(self, chat_client, monkeypatch):
+        monkeypatch.setattr(chatbot, "memory", chatbot.ConversationStore())
+        model = llm_provider.get_pool().model
+
+        chat_client.post("/chatbot/ask", json={"prompt": "Duermo 5 horas", "session_id": "s1"})
+        response = chat_client.post("/chatbot/ask", json={"prompt": "¿Es poco?", "session_id": "s1"})
+
+        assert response.json()["session_id"] == "s1"
+        assert "Usuario: Duermo 5 horas" in model.prompts[-1]
+        assert model.prompts[-1].endswith("Usuario: ¿Es poco?")
+
+        cleared = chat_client.delete("/chatbot/sessions/s1")
+        assert cleared.status_code == 200
+        assert chat_client.delete("/chatbot/sessions/s1").status_code == 404
+
+    def test_stream_sends_sse_events(self, chat_client):
+        response = chat_client.post("/chatbot/ask/stream", json={"prompt": "hola"})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = [block for block in response.text.split("\n\n") if block]
+        assert events[0] == 'event: chunk\ndata: {"text": "eco"}'
+        assert events[-1] == "event: done\ndata: {}"
+
+    def test_stream_sends_heartbeats(self, chat_client, monkeypatch):
+        llm_provider.set_pool(LLMPool(AsyncStubModel(delay=0.1), timeout=2))
+        monkeypatch.setattr(chatbot.settings, "CHATBOT_SSE_HEARTBEAT_SECONDS", 0.02)
+
+        response = chat_client.post("/chatbot/ask/stream", json={"prompt": "hola"})
+
+        assert ": ping" in response.text
+        assert response.text.rstrip().endswith("event: done\ndata: {}")
+
+    def test_unavailable_llm_returns_503(self, chat_client, monkeypatch):
+        llm_provider.set_pool(None)
+        monkeypatch.setattr(chatbot.settings, "GEMINI_API_KEY", "")
+
+        response = chat_client.post("/chatbot/ask", json={"prompt": "hola"})
+
+        assert response.status_code == 503
+        assert "Retry-After" in response.headers
+
+    def test_metrics_exposed(self, chat_client):
+        chat_client.post("/chatbot/ask", json={"prompt": "hola"})
+
+        data = chat_client.get("/chatbot/metrics").json()
+
+        assert data["chatbot_llm_requests_total"]["ok"] >= 1
+        assert data["chatbot_llm_latency_seconds"]["count"] >= 1
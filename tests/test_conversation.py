@@ -0,0 +1,72 @@
+import time
+
+from app.chatbot.conversation import ConversationStore, estimate_tokens
+
+
+class TestConversationStore:
+    """
+    Pruebas de la memoria de conversaciones del chatbot.
+    """
+
+    def test_without_history_prompt_is_unchanged(self):
+        store = ConversationStore()
+
+        assert store.build_prompt("u1", "s1", "hola") == "hola"
+        assert not store.has_history("u1", "s1")
+
+    def test_recent_turns_are_included(self):
+        store = ConversationStore()
+        store.record("u1", "s1", "Duermo 5 horas", "Es poco, lo ideal son 7-9.")
+
+        prompt = store.build_prompt("u1", "s1", "¿Y la siesta?")
+
+        assert "Usuario: Duermo 5 horas" in prompt
+        assert "Asistente: Es poco, lo ideal son 7-9." in prompt
+        assert prompt.endswith("Usuario: ¿Y la siesta?")
+
+    def test_sessions_are_isolated_per_user(self):
+        store = ConversationStore()
+        store.record("u1", "s1", "secreto", "ok")
+
+        assert store.build_prompt("u2", "s1", "hola") == "hola"
+
+    def test_old_turns_are_summarized_within_budget(self):
+        store = ConversationStore(context_tokens=100, summary_tokens=50)
+        for i in range(20):
+            store.record("u1", "s1", f"Pregunta {i}. " + "x" * 80, f"Respuesta {i}. " + "y" * 80)
+
+        prompt = store.build_prompt("u1", "s1", "nueva")
+
+        assert "Resumen de la conversación anterior" in prompt
+        assert "Pregunta 19" in prompt
+        # Turnos recientes + resumen + pregunta nunca superan el presupuesto (con margen)
+        assert estimate_tokens(prompt) <= 100 + 50 + 60
+
+    def test_lru_eviction_by_session_count(self):
+        store = ConversationStore(max_sessions=2)
+        store.record("u1", "a", "p", "r")
+        store.record("u1", "b", "p", "r")
+        store.build_prompt("u1", "a", "x")  # "a" se usa de nuevo
+        store.has_history("u1", "a")
+        store.record("u1", "c", "p", "r")
+
+        assert len(store) == 2
+        assert store.has_history("u1", "a")
+        assert not store.has_history("u1", "b")
+
+    def test_hard_memory_cap(self):
+        store = ConversationStore(max_bytes=2000)
+        for i in range(50):
+            store.record("u1", f"s{i}", "p" * 100, "r" * 100)
+
+        assert store.bytes_used <= 2000
+        assert len(store) < 50
+
+    def test_idle_sessions_expire(self):
+        store = ConversationStore(idle_seconds=0.01)
+        store.record("u1", "s1", "p", "r")
+        time.sleep(0.02)
+
+        assert store.sweep() == 1
+        assert len(store) == 0
+        assert store.bytes_used == 0
@@ -0,0 +1,131 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from supabase import create_client
+
+from app.api.services import create_access_token
+from app.core.database import supabase
+from app.core.db_tracing import (
+    DB_BUDGET_EXCEEDED,
+    RequestTrace,
+    TracedQuery,
+    capture_traces,
+    end_trace,
+    record_call,
+    start_trace,
+)
+from app.middleware.server_timing import ServerTimingMiddleware
+from fakes.data import seed
+from fakes.postgrest_stub import PostgrestStub
+
+
+class FakeBuilder:
+    """Query builder mínimo: cada método devuelve otro builder."""
+
+    def __init__(self, calls):
+        self.calls = calls
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: FakeBuilder(self.calls + [name])
+
+    def execute(self):
+        return self.calls
+
+
+class TestTracedQuery:
+    """
+    Pruebas del envoltorio que registra las llamadas a la BD.
+    """
+
+    def test_records_table_operation_and_duration(self):
+        trace = RequestTrace()
+        token = start_trace(trace)
+        try:
+            result = TracedQuery(FakeBuilder([]), "users").select("*").eq("id", 1).execute()
+            TracedQuery(FakeBuilder([]), "profiles").update({}).eq("id", 1).execute()
+        finally:
+            end_trace(token, trace)
+
+        assert result == ["select", "eq"]
+        assert [(table, op) for table, op, _ in trace.calls] == [("users", "select"), ("profiles", "update")]
+        assert all(seconds >= 0 for _, _, seconds in trace.calls)
+
+    def test_no_trace_outside_requests(self):
+        assert TracedQuery(FakeBuilder([]), "users").select("*").execute() == ["select"]
+
+
+@pytest.fixture(scope="module")
+def traced_api(client):
+    stub = PostgrestStub()
+    seed(stub, users=2, history_days=3)
+    with stub.serve() as url:
+        supabase.set_client(create_client(url, "test-service-key"))
+        token = create_access_token({"sub": "1", "email": "bench0@example.com", "role": "user"})
+        try:
+            yield client, stub, {"Authorization": f"Bearer {token}"}
+        finally:
+            supabase.set_client(None)
+
+
+class TestRoundTrips:
+    """
+    Viajes a la BD por endpoint, medidos con la traza de cada petición.
+    """
+
+    @pytest.mark.parametrize("path, expected", [
+        ("/api/habits/today", 1),
+        ("/api/habits/history?days=7", 1),
+        ("/api/user/achievements", 1),
+        ("/api/auth/profile", 1),
+    ])
+    def test_round_trips_per_endpoint(self, traced_api, path, expected):
+        client, stub, headers = traced_api
+        stub.reset_counters()
+
+        with capture_traces() as traces:
+            response = client.get(path, headers=headers)
+
+        assert response.status_code == 200
+        assert traces[-1].count == expected == stub.total_round_trips
+
+    def test_server_timing_header(self, traced_api):
+        client, _, headers = traced_api
+
+        response = client.get("/api/habits/today", headers=headers)
+
+        timing = response.headers["server-timing"]
+        assert 'db;dur=' in timing and 'desc="1 llamadas"' in timing
+        assert "db-habits_history-select;dur=" in timing
+
+    def test_habit_stats_round_trips_grow_with_streak(self, traced_api):
+        client, _, headers = traced_api
+
+        with capture_traces() as traces:
+            client.get("/api/habits/stats", headers=headers)
+
+        # 1 (user_stats) + 2 (totales) + 1 por día de racha + 1 día sin hábitos
+        assert traces[-1].count == 3 + 3 + 1
+        assert traces[-1].route == "/api/habits/stats"
+
+
+class TestRoundTripBudget:
+    """
+    Las peticiones que superan el presupuesto se marcan.
+    """
+
+    def test_flags_requests_over_budget(self):
+        app = FastAPI()
+        app.add_middleware(ServerTimingMiddleware, budget=2)
+
+        @app.get("/chatty")
+        def chatty():
+            for _ in range(3):
+                record_call("users", "select", 0.001)
+            return {}
+
+        before = DB_BUDGET_EXCEEDED.value(route="/chatty")
+
+        response = TestClient(app).get("/chatty")
+
+        assert 'db-budget;desc="excedido (3/2)"' in response.headers["server-timing"]
+        assert DB_BUDGET_EXCEEDED.value(route="/chatty") == before + 1
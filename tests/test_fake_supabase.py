@@ -0,0 +1,116 @@
+import pytest
+from postgrest.exceptions import APIError
+from supabase import create_client
+
+from app.core.database import supabase
+from fakes.data import seed
+from fakes.fake_supabase import FakeSupabase
+from fakes.postgrest_stub import PostgrestStub
+
+
+def fill(db):
+    db.unique("users", "email")
+    db.insert("roles", [{"id": 1, "name": "admin"}, {"id": 2, "name": "user"}])
+    db.insert("users", [{"email": f"u{i}@b.com", "age": 20 + i % 5, "created_at": "2025-01-01"} for i in range(12)])
+    db.insert("habits_history", [
+        {"user_id": str(1 + i % 3), "habit_id": habit, "date": f"2025-01-{day:02d}", "created_at": "2025-01-01"}
+        for i, (day, habit) in enumerate((d, h) for d in range(1, 8) for h in ("agua", "lectura"))
+    ])
+
+
+QUERIES = [
+    lambda c: c.table("habits_history").select("*", count="exact").eq("user_id", 1)
+        .gte("date", "2025-01-03").order("date", desc=True).execute(),
+    lambda c: c.table("users").select("email").gt("id", 2).lt("age", 23).order("age").limit(3).execute(),
+    lambda c: c.table("users").select("id").in_("age", [20, 24]).neq("email", "u0@b.com").range(1, 2).execute(),
+    lambda c: c.table("users").select("email").ilike("email", "U1%").order("email", desc=True).execute(),
+    lambda c: c.table("roles").select("name").eq("id", 2).single().execute(),
+    lambda c: c.table("roles").select("*").eq("id", 99).maybe_single().execute(),
+]
+
+
+class TestFakeSupabase:
+    """
+    El cliente falso devuelve lo mismo que el cliente real contra el sustituto de PostgREST.
+    """
+
+    @pytest.fixture(scope="class")
+    def both(self):
+        stub, fake = PostgrestStub(), FakeSupabase()
+        fill(stub)
+        fill(fake)
+        with stub.serve() as url:
+            yield create_client(url, "test-service-key"), fake
+
+    @pytest.mark.parametrize("query", QUERIES)
+    def test_same_results_as_stub(self, both, query):
+        real, fake = both
+
+        expected, actual = query(real), query(fake)
+
+        if expected is None:
+            assert actual is None
+        else:
+            assert (actual.data, actual.count) == (expected.data, expected.count)
+
+    def test_errors_match_postgrest(self):
+        db = FakeSupabase()
+        fill(db)
+
+        with pytest.raises(APIError) as duplicate:
+            db.table("users").insert({"email": "u1@b.com"}).execute()
+        with pytest.raises(APIError) as many:
+            db.table("users").select("*").eq("age", 20).single().execute()
+
+        assert duplicate.value.code == "23505"
+        assert many.value.code == "PGRST116"
+
+    def test_indexes_follow_writes(self):
+        db = FakeSupabase()
+        fill(db)
+
+        db.table("users").update({"email": "nuevo@b.com"}).eq("email", "u3@b.com").execute()
+        db.table("users").delete().eq("email", "u4@b.com").execute()
+        db.table("users").upsert({"id": 1, "email": "u0@b.com", "age": 99}, on_conflict="id").execute()
+
+        assert db.table("users").select("id").eq("email", "u3@b.com").execute().data == []
+        assert db.table("users").select("id").eq("email", "nuevo@b.com").execute().data == [{"id": 4}]
+        assert db.table("users").select("id").eq("email", "u4@b.com").execute().data == []
+        assert db.table("users").select("age").eq("id", 1).single().execute().data == {"age": 99}
+        assert set(db.tables["users"].indexes["email"]) == {row["email"] for row in db.tables["users"]}
+
+    def test_results_are_copies(self):
+        db = FakeSupabase()
+        fill(db)
+
+        row = db.table("users").select("*").eq("id", 1).single().execute().data
+        row["email"] = "cambiado@b.com"
+
+        assert db.table("users").select("email").eq("id", 1).single().execute().data == {"email": "u0@b.com"}
+
+
+class TestFakeSupabaseWithApp:
+    """
+    Enchufado en app.core.database: la app entera funciona sin red.
+    """
+
+    def test_login_and_rpc_without_network(self, client, monkeypatch):
+        from app.core.limiter import limiter
+
+        db = FakeSupabase()
+        seed(db, users=1, history_days=2)
+        monkeypatch.setattr(limiter, "enabled", False)
+        supabase.set_client(db)
+        try:
+            session = client.post("/api/auth/login", json={
+                "email": "bench0@example.com", "password": "bench-password", "recaptcha_token": "test_token_bypass",
+            }).json()
+            headers = {"Authorization": f"Bearer {session['access_token']}"}
+            profile = client.get("/api/auth/profile", headers=headers)
+            today = client.get("/api/habits/today", headers=headers)
+        finally:
+            supabase.set_client(None)
+
+        assert profile.status_code == 200 and profile.json()["name"] == "Usuario 0"
+        assert today.status_code == 200 and len(today.json()) >= 1
+        assert db.round_trips[("RPC", "get_or_create_profile")] == 1
@@ -0,0 +1,195 @@
+import asyncio
+import time
+
+import httpx
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import HTTPException
+from supabase import create_client
+
+from app.core import google_auth
+from app.core.database import supabase
+from app.core.google_auth import JWKSCache, set_jwks, verify_google_id_token
+from fakes.postgrest_stub import PostgrestStub
+
+CLIENT_ID = "test-client.apps.googleusercontent.com"
+PRIVATE_KEY = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+class LocalJWKS:
+    """Sustituto local del endpoint de claves de Google."""
+
+    def __init__(self, max_age=3600):
+        self.max_age = max_age
+        self.requests = 0
+        jwk = jwt.algorithms.RSAAlgorithm.to_jwk(PRIVATE_KEY.public_key(), as_dict=True)
+        self.keys = [{**jwk, "kid": "key-1", "alg": "RS256", "use": "sig"}]
+
+    async def handler(self, request):
+        self.requests += 1
+        await asyncio.sleep(0.01)  # Para que las peticiones concurrentes coincidan
+        return httpx.Response(
+            200,
+            json={"keys": self.keys},
+            headers={"Cache-Control": f"public, max-age={self.max_age}"},
+        )
+
+    def cache(self, **kwargs):
+        transport = httpx.MockTransport(self.handler)
+        return JWKSCache("https://jwks.local/certs", lambda: httpx.AsyncClient(transport=transport), **kwargs)
+
+
+def google_token(kid="key-1", **overrides):
+    now = int(time.time())
+    claims = {
+        "iss": "https://accounts.google.com",
+        "aud": CLIENT_ID,
+        "sub": "1234567890",
+        "email": "ana@gmail.com",
+        "email_verified": True,
+        "name": "Ana",
+        "iat": now,
+        "exp": now + 600,
+        **overrides,
+    }
+    return jwt.encode(claims, PRIVATE_KEY, algorithm="RS256", headers={"kid": kid})
+
+
+@pytest.fixture()
+def jwks(monkeypatch):
+    monkeypatch.setattr(google_auth.settings, "GOOGLE_CLIENT_ID", CLIENT_ID)
+    local = LocalJWKS()
+    set_jwks(local.cache())
+    yield local
+    set_jwks(None)
+
+
+class TestVerifyGoogleIdToken:
+    """
+    Verificación local del ID token contra un JWKS local.
+    """
+
+    def test_valid_token(self, jwks):
+        claims = asyncio.run(verify_google_id_token(google_token()))
+
+        assert claims["email"] == "ana@gmail.com"
+        assert claims["sub"] == "1234567890"
+
+    @pytest.mark.parametrize("overrides", [
+        {"aud": "otra-app"},
+        {"iss": "https://evil.example.com"},
+        {"exp": int(time.time()) - 10},
+    ])
+    def test_rejects_invalid_claims(self, jwks, overrides):
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(verify_google_id_token(google_token(**overrides)))
+
+        assert exc.value.status_code == 401
+
+    def test_rejects_unverified_email(self, jwks):
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(verify_google_id_token(google_token(email_verified=False)))
+
+        assert exc.value.status_code == 401
+
+    def test_rejects_forged_signature(self, jwks):
+        other_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        forged = jwt.encode(
+            {"iss": "accounts.google.com", "aud": CLIENT_ID, "sub": "1", "email": "x@gmail.com",
+             "email_verified": True, "iat": int(time.time()), "exp": int(time.time()) + 60},
+            other_key, algorithm="RS256", headers={"kid": "key-1"},
+        )
+
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(verify_google_id_token(forged))
+
+        assert exc.value.status_code == 401
+
+    def test_not_configured(self, jwks, monkeypatch):
+        monkeypatch.setattr(google_auth.settings, "GOOGLE_CLIENT_ID", "")
+
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(verify_google_id_token(google_token()))
+
+        assert exc.value.status_code == 503
+
+
+class TestJWKSCache:
+    """
+    Caché de claves: una sola descarga y caducidad según Cache-Control.
+    """
+
+    def test_concurrent_requests_fetch_once(self, jwks):
+        async def many():
+            return await asyncio.gather(*(verify_google_id_token(google_token()) for _ in range(20)))
+
+        assert len(asyncio.run(many())) == 20
+        assert jwks.requests == 1
+
+    def test_cached_between_requests(self, jwks):
+        for _ in range(3):
+            asyncio.run(verify_google_id_token(google_token()))
+
+        assert jwks.requests == 1
+
+    def test_refreshes_after_max_age(self, monkeypatch):
+        monkeypatch.setattr(google_auth.settings, "GOOGLE_CLIENT_ID", CLIENT_ID)
+        local = LocalJWKS(max_age=0)
+        set_jwks(local.cache())
+        try:
+            asyncio.run(verify_google_id_token(google_token()))
+            asyncio.run(verify_google_id_token(google_token()))
+        finally:
+            set_jwks(None)
+
+        assert local.requests == 2
+
+    def test_unknown_kid_refetch_is_rate_limited(self, jwks):
+        asyncio.run(verify_google_id_token(google_token()))
+
+        for _ in range(5):
+            with pytest.raises(HTTPException):
+                asyncio.run(verify_google_id_token(google_token(kid="inventada")))
+
+        # El kid desconocido no fuerza descargas dentro de min_refresh_seconds
+        assert jwks.requests == 1
+
+
+class TestGoogleLoginRoute:
+    """
+    El login con Google usa los datos del token y crea usuarios sin contraseña.
+    """
+
+    @pytest.fixture()
+    def stub(self, jwks):
+        stub = PostgrestStub()
+        stub.insert("roles", [{"id": 1, "name": "admin"}, {"id": 2, "name": "user"}])
+        with stub.serve() as url:
+            supabase.set_client(create_client(url, "test-service-key"))
+            try:
+                yield stub
+            finally:
+                supabase.set_client(None)
+
+    def test_creates_passwordless_user(self, client, stub, monkeypatch):
+        monkeypatch.setattr("app.core.passwords.bcrypt.hashpw", lambda *args: pytest.fail("bcrypt no debe usarse"))
+
+        response = client.post("/api/auth/google-login", json={
+            "google_token": google_token(),
+            "email": "suplantado@example.com",  # Ignorado: manda el token
+            "name": "Otro",
+            "google_id": "999",
+        })
+
+        assert response.status_code == 200
+        assert response.json()["user"]["email"] == "ana@gmail.com"
+        [user] = stub.tables["users"]
+        assert user["hashed_password"] is None
+        assert user["google_id"] == "1234567890"
+
+    def test_rejects_invalid_token(self, client, stub):
+        response = client.post("/api/auth/google-login", json={"google_token": "no-es-un-jwt"})
+
+        assert response.status_code == 401
+        assert "users" not in stub.tables
@@ -0,0 +1,155 @@
+import io
+import json
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.logging_config import (
+    JsonFormatter,
+    SamplingFilter,
+    parse_levels,
+    request_id_var,
+    setup_logging,
+    shutdown_logging,
+)
+from app.middleware.request_id import setup_request_id
+
+
+def make_record(level=logging.INFO, name="app.test", msg="hola", **extra):
+    record = logging.LogRecord(name, level, __file__, 1, msg, (), None)
+    record.__dict__.update(extra)
+    return record
+
+
+class TestFormatAndSampling:
+    """
+    Pruebas del formato JSON y del muestreo de DEBUG.
+    """
+
+    def test_json_includes_request_id_and_extras(self):
+        entry = json.loads(JsonFormatter().format(make_record(request_id="abc", user_id=7)))
+
+        assert entry["level"] == "INFO"
+        assert entry["request_id"] == "abc"
+        assert entry["user_id"] == 7
+        assert entry["msg"] == "hola"
+
+    def test_sampling_only_drops_debug(self):
+        sampler = SamplingFilter(sample_rate=0.0)
+
+        assert sampler.filter(make_record(logging.DEBUG)) is False
+        assert sampler.filter(make_record(logging.INFO)) is True
+
+    def test_debug_rate_limit_per_logger(self):
+        sampler = SamplingFilter(max_per_second=3)
+
+        allowed = [sampler.filter(make_record(logging.DEBUG)) for _ in range(10)]
+
+        assert allowed.count(True) == 3
+        assert sampler.filter(make_record(logging.DEBUG, name="app.other")) is True
+
+    def test_parse_levels(self):
+        assert parse_levels("app=INFO, app.api.habits=debug,") == {
+            "app": "INFO",
+            "app.api.habits": "DEBUG",
+        }
+
+
+@pytest.fixture()
+def captured_logs(monkeypatch):
+    monkeypatch.setattr(settings, "LOG_FORMAT", "json")
+    monkeypatch.setattr(settings, "LOG_LEVEL", "INFO")
+    monkeypatch.setattr(settings, "LOG_LEVELS", "app.test.verbose=DEBUG")
+    monkeypatch.setattr(settings, "LOG_DEBUG_SAMPLE_RATE", 1.0)
+    stream = io.StringIO()
+    setup_logging(stream=stream, force=True)
+
+    def read():
+        # Vaciar la cola para leer lo que escribió el hilo escritor
+        shutdown_logging()
+        return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+    yield read
+    monkeypatch.undo()
+    setup_logging(force=True)
+
+
+class TestSetupLogging:
+    """
+    Pruebas del logger de la app (cola + hilo escritor).
+    """
+
+    def test_writes_json_with_request_id(self, captured_logs):
+        token = request_id_var.set("req-1")
+        try:
+            logging.getLogger("app.test").info("Login correcto", extra={"user_id": 3})
+        finally:
+            request_id_var.reset(token)
+
+        [entry] = captured_logs()
+
+        assert entry["request_id"] == "req-1"
+        assert entry["user_id"] == 3
+        assert entry["logger"] == "app.test"
+
+    def test_missing_recaptcha_warned_at_startup(self, captured_logs, monkeypatch):
+        from app.core import recaptcha
+
+        monkeypatch.setattr(settings, "RECAPTCHA_SECRET_KEY", "")
+        recaptcha.warn_if_unconfigured()
+
+        [entry] = captured_logs()
+        assert entry["level"] == "WARNING" and "reCAPTCHA no configurado" in entry["msg"]
+
+    def test_per_module_levels(self, captured_logs):
+        logging.getLogger("app.test").debug("oculto")
+        logging.getLogger("app.test.verbose").debug("visible")
+
+        assert [entry["msg"] for entry in captured_logs()] == ["visible"]
+
+    def test_exceptions_are_serialized(self, captured_logs):
+        try:
+            raise ValueError("fallo")
+        except ValueError:
+            logging.getLogger("app.test").exception("Error inesperado")
+
+        [entry] = captured_logs()
+
+        assert "ValueError: fallo" in entry["exc"]
+
+
+class TestRequestIdMiddleware:
+    """
+    Pruebas de la correlación por X-Request-ID.
+    """
+
+    @pytest.fixture()
+    def request_id_client(self):
+        app = FastAPI()
+        setup_request_id(app)
+
+        @app.get("/ping")
+        def ping():
+            return {"request_id": request_id_var.get()}
+
+        return TestClient(app)
+
+    def test_generates_request_id(self, request_id_client):
+        response = request_id_client.get("/ping")
+
+        assert len(response.headers["x-request-id"]) == 32
+        assert response.json()["request_id"] == response.headers["x-request-id"]
+
+    def test_reuses_valid_incoming_id(self, request_id_client):
+        response = request_id_client.get("/ping", headers={"X-Request-ID": "proxy-123"})
+
+        assert response.headers["x-request-id"] == "proxy-123"
+        assert response.json()["request_id"] == "proxy-123"
+
+    def test_rejects_unsafe_incoming_id(self, request_id_client):
+        response = request_id_client.get("/ping", headers={"X-Request-ID": "a b\"c"})
+
+        assert response.headers["x-request-id"] != "a b\"c"
@@ -0,0 +1,102 @@
+import pytest
+
+from app.core import login_guard, passwords
+from app.core.config import settings
+from app.core.limiter import limiter
+from app.core.ttl_store import MemoryTTLStore
+
+
+def login(client, email, password):
+    return client.post("/api/auth/login", json={
+        "email": email, "password": password, "recaptcha_token": "test_token_bypass",
+    })
+
+
+@pytest.fixture
+def guard(monkeypatch):
+    """Almacén limpio y umbrales bajos para no tener que fallar decenas de veces."""
+    monkeypatch.setattr(limiter, "enabled", False)
+    monkeypatch.setattr(settings, "LOGIN_MAX_FAILURES_ACCOUNT", 3)
+    monkeypatch.setattr(settings, "LOGIN_MAX_FAILURES_IP", 5)
+    store = MemoryTTLStore("login_failures")
+    login_guard.failures.set_client(store)
+    yield store
+    login_guard.failures.set_client(None)
+
+
+@pytest.fixture
+def bcrypt_calls(monkeypatch):
+    calls = []
+    checkpw = passwords.bcrypt.checkpw
+    monkeypatch.setattr(passwords.bcrypt, "checkpw", lambda *args: calls.append(1) or checkpw(*args))
+    return calls
+
+
+class TestBackoff:
+    """
+    Tiempo de bloqueo según los fallos acumulados.
+    """
+
+    def test_doubles_after_threshold(self, monkeypatch):
+        monkeypatch.setattr(settings, "LOGIN_BACKOFF_BASE_SECONDS", 1.0)
+        monkeypatch.setattr(settings, "LOGIN_BACKOFF_MAX_SECONDS", 60.0)
+
+        delays = [login_guard.backoff_seconds(failed, threshold=3) for failed in range(1, 9)]
+
+        assert delays == [0, 0, 1, 2, 4, 8, 16, 32]
+        assert login_guard.backoff_seconds(10_000, threshold=3) == 60.0
+
+
+class TestLoginGuard:
+    """
+    Los intentos bloqueados se rechazan antes de la BD y de bcrypt.
+    """
+
+    def test_account_blocked_before_db_and_bcrypt(self, client, fake_db, guard, bcrypt_calls):
+        for _ in range(3):
+            assert login(client, "user@test.com", "incorrecta").status_code == 401
+        fake_db.reset_counters()
+        bcrypt_calls.clear()
+        rejected = login_guard.LOGIN_REJECTED.value(scope="account")
+
+        response = login(client, "user@test.com", "user123")  # Ni la correcta pasa
+
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+        assert fake_db.total_round_trips == 0 and bcrypt_calls == []
+        assert login_guard.LOGIN_REJECTED.value(scope="account") == rejected + 1
+
+    def test_unknown_email_costs_like_a_real_user(self, client, guard, bcrypt_calls):
+        failures = login_guard.LOGIN_FAILURES.value(reason="unknown_user")
+
+        for _ in range(3):
+            assert login(client, "nadie@test.com", "incorrecta").status_code == 401
+
+        assert len(bcrypt_calls) == 3  # Verificación señuelo en cada intento
+        assert login_guard.LOGIN_FAILURES.value(reason="unknown_user") == failures + 3
+        assert login(client, "nadie@test.com", "incorrecta").status_code == 429
+
+    def test_ip_blocked_across_accounts(self, client, guard):
+        rejected = login_guard.LOGIN_REJECTED.value(scope="ip")
+        for i in range(5):
+            assert login(client, f"spray{i}@test.com", "incorrecta").status_code == 401
+
+        # Cuenta sin fallos propios, pero misma IP (la del TestClient)
+        assert login(client, "admin@test.com", "admin123").status_code == 429
+        assert login_guard.LOGIN_REJECTED.value(scope="ip") == rejected + 1
+
+    def test_success_resets_account_counter(self, client, guard):
+        for _ in range(2):
+            login(client, "admin@test.com", "incorrecta")
+        assert login(client, "admin@test.com", "admin123").status_code == 200
+
+        for _ in range(2):
+            assert login(client, "admin@test.com", "incorrecta").status_code == 401
+        assert guard.get("account:admin@test.com") == 2
+
+    def test_disabled(self, client, guard, monkeypatch):
+        monkeypatch.setattr(settings, "LOGIN_GUARD_ENABLED", False)
+
+        for _ in range(5):
+            assert login(client, "user@test.com", "incorrecta").status_code == 401
+        assert len(guard) == 0
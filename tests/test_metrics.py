@@ -0,0 +1,98 @@
+import re
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core.metrics import MetricsRegistry, render_text
+from app.middleware.metrics import HTTP_IN_FLIGHT, HTTP_REQUESTS, HTTP_RESPONSE_SIZE, setup_metrics
+
+
+class TestRenderText:
+    """
+    Pruebas del formato de exposición de Prometheus.
+    """
+
+    def test_counter_and_histogram_format(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("demo_total", "Contador", labelnames=("kind",))
+        histogram = registry.histogram("demo_seconds", "Latencia", buckets=(0.1, 1.0))
+        counter.inc(kind='a"b')
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(5)
+
+        text = render_text(registry)
+
+        assert "# TYPE demo_total counter" in text
+        assert 'demo_total{kind="a\\"b"} 1' in text
+        assert 'demo_seconds_bucket{le="0.1"} 1' in text
+        assert 'demo_seconds_bucket{le="1"} 2' in text
+        assert 'demo_seconds_bucket{le="+Inf"} 3' in text
+        assert "demo_seconds_count 3" in text
+        assert "demo_seconds_sum 5.55" in text
+
+
+@pytest.fixture()
+def metrics_client():
+    app = FastAPI()
+    setup_metrics(app)
+
+    @app.get("/users/{user_id}")
+    def get_user(user_id: int):
+        return {"id": user_id}
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(iter([b"a" * 10, b"b" * 5]))
+
+    return TestClient(app)
+
+
+class TestMetricsMiddleware:
+    """
+    Pruebas del middleware de métricas HTTP.
+    """
+
+    def test_routes_are_labeled_by_template(self, metrics_client):
+        before = HTTP_REQUESTS.value(method="GET", route="/users/{user_id}", status="200")
+
+        for user_id in range(50):
+            metrics_client.get(f"/users/{user_id}")
+
+        assert HTTP_REQUESTS.value(method="GET", route="/users/{user_id}", status="200") == before + 50
+        routes = {labels["route"] for labels, _ in HTTP_REQUESTS.samples()}
+        assert not any(re.search(r"/users/\d+", route) for route in routes)
+
+    def test_unknown_urls_share_one_series(self, metrics_client):
+        before = HTTP_REQUESTS.value(method="GET", route="unmatched", status="404")
+
+        for i in range(20):
+            metrics_client.get(f"/no-existe/{i}")
+
+        assert HTTP_REQUESTS.value(method="GET", route="unmatched", status="404") == before + 20
+
+    def test_streaming_response_size_and_in_flight(self, metrics_client):
+        before = HTTP_RESPONSE_SIZE.sum(method="GET", route="/stream")
+
+        response = metrics_client.get("/stream")
+
+        assert response.content == b"a" * 10 + b"b" * 5
+        assert HTTP_RESPONSE_SIZE.sum(method="GET", route="/stream") == before + 15
+        assert HTTP_IN_FLIGHT.value(method="GET") == 0
+
+
+class TestMetricsEndpoint:
+    """
+    Pruebas del endpoint /metrics de la app.
+    """
+
+    def test_exposes_prometheus_text(self, client):
+        client.get("/health")
+
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert 'http_requests_total{method="GET",route="/health",status="200"}' in response.text
@@ -0,0 +1,135 @@
+import bcrypt
+import pytest
+
+from app.api import user_import
+from app.core import passwords
+from app.core.config import settings
+from app.core.limiter import limiter
+from app.core.ttl_store import MemoryTTLStore
+
+
+def stored_hash(db, email):
+    return db.table("users").select("hashed_password").eq("email", email).single().execute().data["hashed_password"]
+
+
+def login(client, email, password):
+    return client.post("/api/auth/login", json={
+        "email": email, "password": password, "recaptcha_token": "test_token_bypass",
+    })
+
+
+class TestHashing:
+    """
+    Formato de los hashes y elección del coste.
+    """
+
+    def test_hash_records_algorithm_and_cost(self):
+        hashed = passwords.hash_password("secreto", cost=5)
+
+        assert passwords.hash_parameters(hashed) == ("2b", 5)
+        assert passwords.verify_password("secreto", hashed)
+        assert not passwords.verify_password("otro", hashed)
+
+    def test_unknown_hash_format(self):
+        assert passwords.hash_parameters("pbkdf2:sha256$abc") is None
+        assert passwords.needs_rehash("pbkdf2:sha256$abc")
+        assert not passwords.verify_password("secreto", "no-es-un-hash")
+
+    def test_pinned_cost_skips_calibration(self, monkeypatch):
+        monkeypatch.setattr(settings, "PASSWORD_BCRYPT_COST", 6)
+        monkeypatch.setattr(passwords, "calibrate", lambda *args: pytest.fail("no debería calibrar"))
+
+        assert passwords.current_cost() == 6
+
+    @pytest.mark.parametrize("measured_ms, expected", [
+        (20.0, 11),   # 250 / 20 → 12.5x → +3
+        (0.5, 16),    # Máquina muy rápida: tope MAX_COST
+        (500.0, 10),  # Máquina muy lenta: nunca por debajo de MIN_COST
+    ])
+    def test_calibrate_within_budget(self, monkeypatch, measured_ms, expected):
+        monkeypatch.setattr(passwords, "measure_hash_ms", lambda cost, samples=3: measured_ms)
+
+        assert passwords.calibrate(250) == expected
+
+    def test_calibrated_once_and_shared(self, monkeypatch):
+        calls = []
+        monkeypatch.setattr(settings, "PASSWORD_BCRYPT_COST", 0)
+        monkeypatch.setattr(passwords, "calibrate", lambda *args: calls.append(1) or 11)
+        passwords.shared_params.set_client(MemoryTTLStore("password_params"))
+        passwords.reset_calibration()
+        try:
+            assert passwords.current_cost() == passwords.current_cost() == 11
+            # Otro worker (sin coste en memoria) reutiliza el compartido
+            monkeypatch.setattr(passwords, "_cost", None)
+            assert passwords.current_cost() == 11
+        finally:
+            passwords.reset_calibration()
+            passwords.shared_params.set_client(None)
+
+        assert len(calls) == 1
+
+
+class TestRehashOnLogin:
+    """
+    Al iniciar sesión, los hashes más baratos se rehacen con el coste actual.
+    """
+
+    @pytest.fixture
+    def user(self, fake_db, monkeypatch):
+        monkeypatch.setattr(limiter, "enabled", False)
+
+        def create(email, hashed):
+            return fake_db._insert_row("users", {
+                "email": email, "hashed_password": hashed, "full_name": "Rehash",
+                "role_id": 2, "is_active": True, "is_verified": True,
+            })
+        return create
+
+    def test_upgrade(self, client, fake_db, user, monkeypatch):
+        user("upgrade@test.com", passwords.hash_password("clave123", cost=4))
+        monkeypatch.setattr(settings, "PASSWORD_BCRYPT_COST", 5)
+
+        assert login(client, "upgrade@test.com", "clave123").status_code == 200
+
+        stored = stored_hash(fake_db, "upgrade@test.com")
+        assert passwords.hash_parameters(stored) == ("2b", 5)
+        assert passwords.verify_password("clave123", stored)
+        # El siguiente login ya no reescribe nada
+        assert login(client, "upgrade@test.com", "clave123").status_code == 200
+        assert stored_hash(fake_db, "upgrade@test.com") == stored
+
+    def test_never_downgrade(self, client, fake_db, user, monkeypatch):
+        # Otra máquina con un coste mayor: sus hashes se respetan
+        stronger = passwords.hash_password("clave123", cost=5)
+        user("stronger@test.com", stronger)
+        monkeypatch.setattr(settings, "PASSWORD_BCRYPT_COST", 4)
+
+        assert login(client, "stronger@test.com", "clave123").status_code == 200
+        assert stored_hash(fake_db, "stronger@test.com") == stronger
+
+    def test_other_algorithm_is_rehashed(self, client, fake_db, user):
+        legacy = bcrypt.hashpw(b"clave123", bcrypt.gensalt(rounds=4, prefix=b"2a")).decode()
+        user("legacy@test.com", legacy)
+
+        assert login(client, "legacy@test.com", "clave123").status_code == 200
+        assert passwords.hash_parameters(stored_hash(fake_db, "legacy@test.com"))[0] == "2b"
+
+    def test_no_rehash_on_wrong_password(self, client, fake_db, user):
+        old_hash = passwords.hash_password("clave123", cost=5)
+        user("wrong@test.com", old_hash)
+
+        assert login(client, "wrong@test.com", "incorrecta").status_code == 401
+        assert stored_hash(fake_db, "wrong@test.com") == old_hash
+
+
+class TestImportCost:
+    """
+    La importación masiva hashea en procesos hijos con el coste de la app.
+    """
+
+    def test_children_use_app_cost(self, monkeypatch):
+        monkeypatch.setattr(settings, "PASSWORD_BCRYPT_COST", 5)
+
+        hashed = user_import._hash_many(["a", "b"], passwords.current_cost())
+
+        assert [passwords.hash_parameters(h) for h in hashed] == [("2b", 5), ("2b", 5)]
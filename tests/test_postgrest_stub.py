@@ -0,0 +1,64 @@
+import pytest
+from supabase import create_client
+
+from fakes.postgrest_stub import PostgrestStub
+
+
+@pytest.fixture(scope="module")
+def stub_client():
+    stub = PostgrestStub()
+    stub.unique("users", "email")
+    stub.insert("roles", [{"id": 1, "name": "admin"}, {"id": 2, "name": "user"}])
+    stub.insert("habits_history", [
+        {"user_id": 1, "habit_id": "agua", "date": "2025-01-0%d" % day} for day in range(1, 6)
+    ])
+    with stub.serve() as url:
+        yield stub, create_client(url, "bench-service-key")
+
+
+class TestPostgrestStub:
+    """
+    El sustituto local debe comportarse como PostgREST con el cliente real.
+    """
+
+    def test_select_with_filters_order_and_count(self, stub_client):
+        _, client = stub_client
+
+        result = client.table("habits_history").select("*", count="exact")\
+            .eq("user_id", 1).gte("date", "2025-01-03").order("date", desc=True).execute()
+
+        assert [row["date"] for row in result.data] == ["2025-01-05", "2025-01-04", "2025-01-03"]
+        assert result.count == 3
+
+    def test_single_and_maybe_single(self, stub_client):
+        _, client = stub_client
+
+        role = client.table("roles").select("name").eq("id", 2).single().execute()
+        missing = client.table("roles").select("*").eq("id", 99).maybe_single().execute()
+
+        assert role.data == {"name": "user"}
+        assert missing is None
+
+    def test_insert_update_delete_and_unique(self, stub_client):
+        _, client = stub_client
+
+        created = client.table("users").insert({"email": "a@b.com"}).execute()
+        client.table("users").update({"full_name": "Ana"}).eq("id", created.data[0]["id"]).execute()
+        fetched = client.table("users").select("*").eq("email", "a@b.com").execute()
+
+        assert fetched.data[0]["full_name"] == "Ana"
+        with pytest.raises(Exception):
+            client.table("users").insert({"email": "a@b.com"}).execute()
+
+        deleted = client.table("users").delete().eq("email", "a@b.com").execute()
+        assert len(deleted.data) == 1
+
+    def test_counts_round_trips(self, stub_client):
+        stub, client = stub_client
+        stub.reset_counters()
+
+        client.table("roles").select("*").execute()
+        client.table("roles").select("*").eq("id", 1).execute()
+
+        assert stub.total_round_trips == 2
+        assert stub.round_trips[("GET", "roles")] == 2
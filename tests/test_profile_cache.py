@@ -0,0 +1,131 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from supabase import create_client
+
+from app.api import services
+from app.api.services import get_cached_profile, get_cached_user, upsert_user_profile
+from app.core.database import supabase
+from app.core.db_tracing import capture_traces
+from app.core.security import create_access_token
+from fakes.data import seed
+from fakes.postgrest_stub import PostgrestStub
+
+
+@pytest.fixture()
+def profile_api(client):
+    stub = PostgrestStub(latency_ms=20)
+    seed(stub, users=2, history_days=1)
+    with stub.serve() as url:
+        supabase.set_client(create_client(url, "test-service-key"))
+        token = create_access_token({"sub": "1", "email": "bench0@example.com", "role": "user"})
+        try:
+            yield client, stub, {"Authorization": f"Bearer {token}"}
+        finally:
+            supabase.set_client(None)
+
+
+class TestProfileCache:
+    """
+    Caché de perfiles: lectura única, invalidación y single-flight.
+    """
+
+    def test_second_request_served_from_cache(self, profile_api):
+        client, stub, headers = profile_api
+
+        first = client.get("/api/auth/profile", headers=headers)
+        stub.reset_counters()
+        with capture_traces() as traces:
+            second = client.get("/api/auth/profile", headers=headers)
+
+        assert second.json() == first.json()
+        assert second.json()["email"] == "bench0@example.com"
+        assert traces[-1].count == 0 and stub.total_round_trips == 0
+
+    def test_update_invalidates(self, profile_api):
+        client, _, headers = profile_api
+        client.get("/api/auth/profile", headers=headers)
+
+        client.put("/api/auth/profile", json={"name": "Nuevo nombre"}, headers=headers)
+        response = client.get("/api/auth/profile", headers=headers)
+
+        assert response.json()["name"] == "Nuevo nombre"
+
+    def test_admin_update_invalidates_user(self, profile_api):
+        asyncio.run(get_cached_user(2))
+
+        services.update_user(2, services.UserUpdate(full_name="Renombrado"))
+
+        assert asyncio.run(get_cached_user(2))["full_name"] == "Renombrado"
+
+    def test_stampede_loads_once(self, profile_api):
+        _, stub, _ = profile_api
+        stub.reset_counters()
+
+        async def stampede():
+            return await asyncio.gather(*(get_cached_profile(1, "bench0@example.com") for _ in range(30)))
+
+        profiles = asyncio.run(stampede())
+
+        assert len({p["name"] for p in profiles}) == 1
+        assert stub.round_trips[("RPC", "get_or_create_profile")] == 1
+
+    def test_cached_entry_not_mutated_by_callers(self, profile_api):
+        profile = asyncio.run(get_cached_profile(1, "bench0@example.com"))
+        profile["name"] = "modificado"
+
+        assert asyncio.run(get_cached_profile(1, "otro@example.com"))["name"] != "modificado"
+
+
+def drop_profile(stub, user_id):
+    stub.tables["profiles"] = [row for row in stub.tables["profiles"] if row["id"] != user_id]
+
+
+class TestProfileUpsert:
+    """
+    Lectura/creación y actualización del perfil en una sola llamada atómica.
+    """
+
+    def test_update_is_one_round_trip(self, profile_api):
+        client, stub, headers = profile_api
+        stub.reset_counters()
+
+        with capture_traces() as traces:
+            response = client.put("/api/auth/profile", json={"age": 41}, headers=headers)
+
+        assert response.status_code == 200
+        assert response.json()["data"]["age"] == 41
+        assert response.json()["data"]["name"] == "Usuario 0"  # Columnas no enviadas intactas
+        assert traces[-1].count == 1 == stub.total_round_trips
+
+    def test_missing_profile_created_in_one_round_trip(self, profile_api):
+        client, stub, headers = profile_api
+        drop_profile(stub, 1)
+        stub.reset_counters()
+
+        with capture_traces() as traces:
+            response = client.get("/api/auth/profile", headers=headers)
+
+        assert response.json()["name"] == "Usuario 0"
+        assert traces[-1].count == 1 == stub.total_round_trips
+
+    def test_concurrent_updates_without_duplicates(self, profile_api):
+        _, stub, _ = profile_api
+        drop_profile(stub, 2)
+
+        with ThreadPoolExecutor(max_workers=10) as pool:
+            rows = list(pool.map(lambda age: upsert_user_profile(2, {"age": age}), range(10)))
+
+        assert all(row is not None for row in rows)  # Ningún 23505
+        assert len([row for row in stub.tables["profiles"] if row["id"] == 2]) == 1
+
+    def test_concurrent_creation_without_duplicates(self, profile_api):
+        _, stub, _ = profile_api
+        drop_profile(stub, 2)
+
+        with ThreadPoolExecutor(max_workers=10) as pool:
+            rows = list(pool.map(lambda _: services.load_user_profile(2, "bench1@example.com"), range(10)))
+
+        assert {row["name"] for row in rows} == {"Usuario 1"}
+        assert len([row for row in stub.tables["profiles"] if row["id"] == 2]) == 1
@@ -0,0 +1,99 @@
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.deps import get_current_user, require_role
+from app.core import security
+from app.middleware import rbac
+from app.middleware.rbac import build_route_roles, setup_rbac
+
+
+def token_for(role):
+    return security.create_access_token({"sub": "1", "email": "ana@example.com", "role": role})
+
+
+@pytest.fixture()
+def rbac_app():
+    app = FastAPI()
+    setup_rbac(app)
+
+    @app.get("/users/me")
+    def me(current=Depends(get_current_user)):
+        return {"role": current.role}
+
+    @app.get("/users/{user_id}")
+    def get_user(user_id: int, current=Depends(require_role("admin"))):
+        return {"id": user_id}
+
+    @app.get("/public")
+    def public():
+        return {"ok": True}
+
+    return app
+
+
+class TestRouteRoles:
+    """
+    La tabla de roles se obtiene de las dependencias `require_role`.
+    """
+
+    def test_table_from_dependencies(self, rbac_app):
+        table = {route.path: roles for route, roles in build_route_roles(rbac_app.routes)}
+
+        assert table["/users/{user_id}"] == frozenset({"admin"})
+        assert table["/users/me"] is None
+        assert table["/public"] is None
+
+
+class TestRBACMiddleware:
+    """
+    Pruebas del middleware ASGI de roles.
+    """
+
+    def test_rejects_before_reaching_route(self, rbac_app):
+        client = TestClient(rbac_app)
+
+        missing = client.get("/users/5")
+        forbidden = client.get("/users/5", headers={"Authorization": f"Bearer {token_for('user')}"})
+        invalid = client.get("/users/5", headers={"Authorization": "Bearer basura"})
+
+        assert missing.status_code == 401 and missing.headers["www-authenticate"] == "Bearer"
+        assert forbidden.status_code == 403
+        assert invalid.status_code == 401
+
+    def test_allows_matching_role(self, rbac_app):
+        response = TestClient(rbac_app).get(
+            "/users/5", headers={"Authorization": f"Bearer {token_for('admin')}"}
+        )
+
+        assert response.status_code == 200
+
+    def test_earlier_unprotected_route_wins(self, rbac_app):
+        # /users/me se declara antes que /users/{user_id}: el router la elige a ella
+        response = TestClient(rbac_app).get(
+            "/users/me", headers={"Authorization": f"Bearer {token_for('user')}"}
+        )
+
+        assert response.status_code == 200
+        assert response.json() == {"role": "user"}
+
+    def test_public_routes_pass_through(self, rbac_app):
+        assert TestClient(rbac_app).get("/public").status_code == 200
+
+    def test_token_decoded_once_per_request(self, rbac_app, monkeypatch):
+        calls = []
+        original = security.decode_access_token
+
+        def counting(token):
+            calls.append(token)
+            return original(token)
+
+        monkeypatch.setattr(rbac, "decode_access_token", counting)
+        monkeypatch.setattr(security, "decode_access_token", counting)
+
+        response = TestClient(rbac_app).get(
+            "/users/5", headers={"Authorization": f"Bearer {token_for('admin')}"}
+        )
+
+        assert response.status_code == 200
+        assert len(calls) == 1
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+from supabase import create_client
+
+from app.api import services
+from app.core.database import supabase
+from app.core.db_tracing import capture_traces
+from app.core.limiter import limiter
+from fakes.data import PASSWORD, RECAPTCHA_BYPASS, seed
+from fakes.postgrest_stub import PostgrestStub
+
+
+def signup(email, **overrides):
+    return {
+        "email": email,
+        "password": PASSWORD,
+        "full_name": "Nueva Persona",
+        "age": 28,
+        "phone": "600000000",
+        "gender": "Otro",
+        "recaptcha_token": RECAPTCHA_BYPASS,
+        **overrides,
+    }
+
+
+@pytest.fixture()
+def register_api(client, monkeypatch):
+    monkeypatch.setattr(limiter, "enabled", False)
+    stub = PostgrestStub()
+    seed(stub, users=1, history_days=1)
+    with stub.serve() as url:
+        supabase.set_client(create_client(url, "test-service-key"))
+        try:
+            yield client, stub
+        finally:
+            supabase.set_client(None)
+
+
+class TestRegistration:
+    """
+    Registro en una sola llamada transaccional.
+    """
+
+    def test_one_round_trip(self, register_api):
+        client, stub = register_api
+        stub.reset_counters()
+
+        with capture_traces() as traces:
+            response = client.post("/api/auth/register", json=signup("nueva@example.com"))
+
+        assert response.status_code == 200
+        assert response.json()["role"] == "user"
+        assert traces[-1].count == 1 == stub.round_trips[("RPC", "register_user")]
+        [profile] = [row for row in stub.tables["profiles"] if row["id"] == response.json()["id"]]
+        assert profile["name"] == "Nueva Persona"
+
+    def test_duplicate_email_uses_unique_constraint(self, register_api):
+        client, stub = register_api
+        users_before = len(stub.tables["users"])
+
+        response = client.post("/api/auth/register", json=signup("bench0@example.com"))
+
+        assert response.status_code == 400
+        assert response.json()["detail"] == "El correo ya está registrado"
+        assert len(stub.tables["users"]) == users_before
+
+    def test_concurrent_duplicates_create_one_user(self, register_api):
+        _, stub = register_api
+        data = services.UserCreate(**signup("doble@example.com"))
+
+        async def both():
+            return await asyncio.gather(
+                *(services.register_user(data) for _ in range(5)), return_exceptions=True,
+            )
+
+        results = asyncio.run(both())
+
+        assert sum(isinstance(r, dict) for r in results) == 1
+        assert all(r.status_code == 400 for r in results if not isinstance(r, dict))
+        assert len([u for u in stub.tables["users"] if u["email"] == "doble@example.com"]) == 1
+
+    def test_hashing_off_the_event_loop(self, register_api, monkeypatch):
+        client, _ = register_api
+        original = services.hash_password
+
+        def hash_outside_loop(password):
+            with pytest.raises(RuntimeError):
+                asyncio.get_running_loop()  # En un hilo del threadpool no hay loop
+            return original(password)
+
+        monkeypatch.setattr(services, "hash_password", hash_outside_loop)
+
+        response = client.post("/api/auth/register", json=signup("hilo@example.com"))
+
+        assert response.status_code == 200
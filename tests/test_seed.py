@@ -0,0 +1,142 @@
+import json
+from datetime import date, timedelta
+
+import pytest
+
+from supabase import create_client
+
+from app.core import passwords
+from app.core.database import supabase
+from app.db import seed
+from fakes.data import register_functions
+from fakes.postgrest_stub import PostgrestStub
+
+END = date(2026, 6, 30)
+
+
+def generate(users=40, **kwargs):
+    kwargs = {"years": 1, "seed": 7, "end": END, "hashed_password": "hash", **kwargs}
+    return list(seed.generate_synthetic(users, **kwargs))
+
+
+def longest_streak(dates):
+    days = sorted({date.fromisoformat(d) for d in dates})
+    best = current = 0
+    for i, day in enumerate(days):
+        current = current + 1 if i and day - days[i - 1] == timedelta(days=1) else 1
+        best = max(best, current)
+    return best
+
+
+class TestSyntheticSeed:
+    """
+    Generador de datos sintéticos: determinista, coherente y por lotes.
+    """
+
+    def test_same_seed_same_data(self):
+        assert generate() == generate()
+        assert generate() != generate(seed=8)
+        # El usuario i no depende de cuántos se generen
+        assert generate(users=5) == generate(users=10)[:len(generate(users=5))]
+
+    def test_first_id_only_shifts_ids(self):
+        def without_ids(rows):
+            return [(table, {k: v for k, v in row.items() if k not in ("id", "user_id", "email")}) for table, row in rows]
+
+        shifted = generate(first_id=5000)
+
+        assert without_ids(shifted) == without_ids(generate())
+        assert shifted[0][1]["id"] == 5000
+
+    def test_achievements_match_history(self):
+        rows = generate(users=60)
+        history, achievements = {}, {}
+        for table, row in rows:
+            if table == "habits_history":
+                history.setdefault(row["user_id"], []).append(row["date"])
+            elif table == "user_achievements":
+                achievements.setdefault(row["user_id"], set()).add(row["achievement_id"])
+
+        streaks = [longest_streak(dates) for dates in history.values()]
+        assert max(streaks) > 30 and min(streaks) < 7  # Rachas largas y cortas
+        for user_id, dates in history.items():
+            unlocked = achievements.get(user_id, set())
+            assert "first_habit" in unlocked
+            assert ("streak_7" in unlocked) == (longest_streak(dates) >= 7)
+
+    def test_password_hashed_once(self, monkeypatch, tmp_path):
+        calls = []
+        hashpw = seed.bcrypt.hashpw
+        monkeypatch.setattr(seed.bcrypt, "hashpw", lambda *args: calls.append(args) or hashpw(*args))
+
+        counts = seed.run_synthetic_seed(20, years=1, out=str(tmp_path), fmt="ndjson", end=END)
+
+        assert len(calls) == 1
+        users = [json.loads(line) for line in (tmp_path / "users.ndjson").read_text(encoding="utf-8").splitlines()]
+        assert {user["hashed_password"] for user in users} == {seed.synthetic_password_hash(42)}
+        assert seed.bcrypt.checkpw(seed.SYNTHETIC_PASSWORD.encode(), users[0]["hashed_password"].encode())
+        assert not passwords.needs_rehash(users[0]["hashed_password"])  # Mismo coste que la app
+        for table, count in counts.items():
+            lines = (tmp_path / f"{table}.ndjson").read_text(encoding="utf-8").splitlines()
+            assert len(lines) == count
+        assert json.loads(lines[0])["achievement_id"] == "first_habit"
+
+    def test_batches_keep_parents_first(self):
+        seen_users, batches = set(), []
+
+        def sink(table, rows):
+            batches.append((table, len(rows)))
+            if table == "users":
+                seen_users.update(row["id"] for row in rows)
+            elif table != "profiles":
+                assert {row["user_id"] for row in rows} <= seen_users
+
+        counts = seed.write_batches(iter(generate(users=30)), sink, batch_size=200)
+
+        assert sum(size for _, size in batches) == sum(counts.values())
+        assert all(size <= 200 for _, size in batches)
+
+    def load(self, stub, users=25, **kwargs):
+        with stub.serve() as url:
+            supabase.set_client(create_client(url, "test-service-key"))
+            try:
+                return seed.run_synthetic_seed(users, years=1, batch_size=1000, end=END, **kwargs)
+            finally:
+                supabase.set_client(None)
+
+    def test_load_into_stub(self, monkeypatch):
+        stub = PostgrestStub()
+        register_functions(stub)
+        stub.insert("users", [{"id": 4000, "email": "real@example.com"}])  # Usuario real con id alto
+        monkeypatch.setattr(seed, "synthetic_password_hash", lambda _seed: "hash")
+
+        counts = self.load(stub)
+
+        assert len(stub.tables["users"]) == counts["users"] + 1
+        for table in ("profiles", "habits_history", "user_achievements"):
+            assert len(stub.tables[table]) == counts[table]
+        synthetic_ids = {row["id"] for row in stub.tables["users"]} - {4000}
+        assert synthetic_ids == set(range(1000, 1025))  # Ids fijos: no dependen de lo que haya en la BD
+        assert all(isinstance(row["user_id"], int) for row in stub.tables["habits_history"])
+        assert stub.round_trips[("RPC", "sync_users_id_sequence")] == 1  # Secuencia al día tras la carga
+        posts = sum(n for (method, _), n in stub.round_trips.items() if method == "POST")
+        assert posts < sum(counts.values()) / 100  # Una petición por lote, no por fila
+
+    def test_load_is_deterministic_and_refuses_taken_ids(self, monkeypatch):
+        monkeypatch.setattr(seed, "synthetic_password_hash", lambda _seed: "hash")
+        loaded = []
+        for existing in ([], [{"id": 1, "email": "admin@example.com"}]):
+            stub = PostgrestStub()
+            register_functions(stub)
+            stub.insert("users", existing)
+            self.load(stub, users=10)
+            loaded.append([row for row in stub.tables["users"] if row["id"] >= 1000])
+
+        taken = PostgrestStub()
+        register_functions(taken)
+        taken.insert("users", [{"id": 1005, "email": "real@example.com"}])
+        with pytest.raises(ValueError, match="1005"):
+            self.load(taken, users=10)
+
+        assert loaded[0] == loaded[1]  # Misma semilla, mismos usuarios aunque la BD sea otra
+        assert [row["id"] for row in taken.tables["users"]] == [1005]  # Nada insertado
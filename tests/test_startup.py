@@ -0,0 +1,71 @@
+import os
+import subprocess
+import sys
+
+from benchmarks.bench_import import DEFAULT_ENV, run_importtime
+from benchmarks.bench_startup import time_to_first_200
+
+# Umbral generoso para detectar regresiones grandes (ej. volver a importar
+# el SDK de Gemini al cargar los routers); ajustable en CI.
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "3000"))
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestStartupBudget:
+    """
+    Pruebas de tiempo de arranque en frío (importación de la app).
+    """
+
+    def test_chatbot_router_does_not_import_llm_sdk(self):
+        _, _, modules = run_importtime("app.api.routes.chatbot")
+
+        assert "google.generativeai" not in modules
+
+    def test_app_imports_without_gemini_key(self):
+        env = {**os.environ, **DEFAULT_ENV, "GEMINI_API_KEY": ""}
+        result = subprocess.run(
+            [sys.executable, "-c", "import app.main"],
+            capture_output=True, text=True, env=env, cwd=ROOT,
+        )
+
+        assert result.returncode == 0, result.stderr[-2000:]
+
+    def test_app_import_time_within_budget(self):
+        total_ms, _, _ = min(
+            (run_importtime("app.main") for _ in range(3)), key=lambda r: r[0]
+        )
+
+        assert total_ms < IMPORT_BUDGET_MS
+
+
+# Presupuesto hasta el primer 200 de /health con uvicorn (proceso nuevo)
+STARTUP_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "5000"))
+
+
+class TestColdStart:
+    """
+    Pruebas de arranque real con uvicorn.
+    """
+
+    def test_boot_is_silent_and_within_budget(self):
+        result = time_to_first_200("/health")
+
+        assert result["stdout"] == ""
+        assert result["ms"] < STARTUP_BUDGET_MS
+
+    def test_app_import_does_not_create_supabase_client(self):
+        code = (
+            "import sys, app.main\n"
+            "from app.core.database import supabase\n"
+            "assert not supabase.initialized\n"
+            "assert 'supabase' not in sys.modules\n"
+        )
+        env = {**os.environ, **DEFAULT_ENV}
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True, text=True, env=env, cwd=ROOT,
+        )
+
+        assert result.returncode == 0, result.stderr[-2000:]
+        assert result.stdout == ""
@@ -0,0 +1,210 @@
+import asyncio
+import time
+
+import pytest
+from supabase import create_client
+
+from app.api import auth_routes, services
+from app.core import security, tokens
+from app.core.database import supabase
+from app.core.db_tracing import capture_traces
+from app.core.limiter import limiter
+from app.core.tokens import RefreshTokenError, consume_refresh_token, issue_refresh_token
+from app.core.ttl_store import MemoryTTLStore
+from fakes.data import PASSWORD, RECAPTCHA_BYPASS, seed
+from fakes.postgrest_stub import PostgrestStub
+
+
+@pytest.fixture(autouse=True)
+def token_stores():
+    tokens.refresh_store.set_client(MemoryTTLStore("refresh_tokens"))
+    tokens.revocation_store.set_client(MemoryTTLStore("token_revocations"))
+    tokens.revocation_cache.clear()
+    yield
+    tokens.refresh_store.set_client(None)
+    tokens.revocation_store.set_client(None)
+
+
+class TestRefreshTokenRotation:
+    """
+    Refresh tokens de un solo uso con detección de reutilización.
+    """
+
+    def test_rotation_keeps_family(self):
+        first = issue_refresh_token(1)
+        user_id, family = consume_refresh_token(first)
+        second = issue_refresh_token(user_id, family)
+
+        assert user_id == 1
+        assert consume_refresh_token(second) == (1, family)
+
+    def test_reuse_revokes_family_and_access_tokens(self):
+        first = issue_refresh_token(1)
+        _, family = consume_refresh_token(first)
+        second = issue_refresh_token(1, family)
+        old_access = security.create_access_token({"sub": "1", "email": "a@b.com", "role": "user"})
+
+        with pytest.raises(RefreshTokenError):
+            consume_refresh_token(first)  # Robado y reutilizado
+
+        # La familia queda cerrada: el token legítimo tampoco sirve ya
+        with pytest.raises(RefreshTokenError):
+            consume_refresh_token(second)
+        assert security.decode_access_token(old_access) is None
+
+    def test_unknown_token(self):
+        with pytest.raises(RefreshTokenError):
+            consume_refresh_token("inventado")
+
+
+class TestAccessTokenRevocation:
+    """
+    Revocación compacta: una marca de tiempo por usuario.
+    """
+
+    def test_tokens_issued_before_revocation_are_rejected(self):
+        # Mismo segundo: el iat tiene resolución de milisegundos
+        old = security.create_access_token({"sub": "7", "email": "a@b.com", "role": "admin"})
+        tokens.revoke_user_tokens(7)
+        time.sleep(0.01)
+        new = security.create_access_token({"sub": "7", "email": "a@b.com", "role": "user"})
+
+        assert security.decode_access_token(old) is None
+        assert security.decode_access_token(new)["role"] == "user"
+
+    def test_revocations_cached_in_process(self, monkeypatch):
+        token = security.create_access_token({"sub": "9", "email": "a@b.com", "role": "user"})
+        lookups = []
+        get = tokens.revocation_store.get
+        monkeypatch.setattr(tokens.revocation_store, "get", lambda *args: lookups.append(args) or get(*args))
+
+        for _ in range(5):
+            assert security.decode_access_token(token) is not None
+        assert len(lookups) == 1  # El resto, de la caché en memoria
+
+        # Revocación desde otro worker: visible al caducar la entrada cacheada
+        tokens.revocation_store.set("9", time.time(), 60)
+        tokens.revocation_cache.delete("9")
+        assert security.decode_access_token(token) is None
+
+    def test_other_users_unaffected(self):
+        token = security.create_access_token({"sub": "8", "email": "a@b.com", "role": "user"})
+        tokens.revoke_user_tokens(7)
+
+        assert security.decode_access_token(token) is not None
+
+
+@pytest.fixture()
+def auth_api(client, monkeypatch):
+    stub = PostgrestStub()
+    seed(stub, users=1, history_days=1)
+    monkeypatch.setattr(limiter, "enabled", False)  # /login admite 5 por minuto
+    with stub.serve() as url:
+        supabase.set_client(create_client(url, "test-service-key"))
+        try:
+            yield client, stub
+        finally:
+            supabase.set_client(None)
+
+
+def login(client):
+    response = client.post("/api/auth/login", json={
+        "email": "bench0@example.com",
+        "password": PASSWORD,
+        "recaptcha_token": RECAPTCHA_BYPASS,
+    })
+    assert response.status_code == 200
+    return response.json()
+
+
+class TestSessionRoutes:
+    """
+    Login, /refresh, /logout y /me servido desde los claims.
+    """
+
+    def test_login_returns_refresh_token(self, auth_api):
+        client, _ = auth_api
+
+        session = login(client)
+
+        assert session["refresh_token"]
+        assert session["expires_in"] == services.settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+    def test_refresh_rotates_and_detects_reuse(self, auth_api):
+        client, _ = auth_api
+        session = login(client)
+
+        rotated = client.post("/api/auth/refresh", json={"refresh_token": session["refresh_token"]})
+        reused = client.post("/api/auth/refresh", json={"refresh_token": session["refresh_token"]})
+        after_reuse = client.post("/api/auth/refresh", json={"refresh_token": rotated.json()["refresh_token"]})
+
+        assert rotated.status_code == 200
+        assert rotated.json()["refresh_token"] != session["refresh_token"]
+        assert reused.status_code == 401
+        assert after_reuse.status_code == 401
+
+    def test_refresh_picks_up_role_changes(self, auth_api):
+        client, stub = auth_api
+        session = login(client)
+        stub.tables["users"][0]["role_id"] = 1
+
+        refreshed = client.post("/api/auth/refresh", json={"refresh_token": session["refresh_token"]})
+
+        assert refreshed.json()["role"] == "admin"
+
+    def test_logout_closes_session(self, auth_api):
+        client, _ = auth_api
+        session = login(client)
+
+        client.post("/api/auth/logout", json={"refresh_token": session["refresh_token"]})
+        response = client.post("/api/auth/refresh", json={"refresh_token": session["refresh_token"]})
+
+        assert response.status_code == 401
+
+    def test_refresh_and_logout_off_the_event_loop(self, auth_api, monkeypatch):
+        client, _ = auth_api
+        session = login(client)
+        loops = []
+
+        def on_thread(function):
+            def wrapper(*args):
+                try:
+                    loops.append(asyncio.get_running_loop())
+                except RuntimeError:
+                    loops.append(None)  # Hilo del threadpool: sin event loop
+                return function(*args)
+            return wrapper
+
+        monkeypatch.setattr(auth_routes, "refresh_session", on_thread(auth_routes.refresh_session))
+        monkeypatch.setattr(auth_routes, "logout_session", on_thread(auth_routes.logout_session))
+
+        rotated = client.post("/api/auth/refresh", json={"refresh_token": session["refresh_token"]})
+        client.post("/api/auth/logout", json={"refresh_token": rotated.json()["refresh_token"]})
+
+        assert rotated.status_code == 200
+        assert loops == [None, None]
+
+    def test_me_without_db_calls(self, auth_api):
+        client, stub = auth_api
+        session = login(client)
+        stub.reset_counters()
+
+        with capture_traces() as traces:
+            response = client.get("/api/auth/me", headers={"Authorization": f"Bearer {session['access_token']}"})
+
+        assert response.status_code == 200
+        assert response.json()["email"] == "bench0@example.com"
+        assert response.json()["full_name"] == "Usuario 0"
+        assert traces[-1].count == 0 and stub.total_round_trips == 0
+
+    def test_password_reset_closes_every_session(self, auth_api):
+        client, _ = auth_api
+        sessions = [login(client), login(client)]  # Dos dispositivos
+        services.reset_codes.set("bench0@example.com", {"code": "ABC123"}, 60)
+
+        services.reset_password_with_code("bench0@example.com", "ABC123", "nueva-clave")
+
+        for session in sessions:
+            refreshed = client.post("/api/auth/refresh", json={"refresh_token": session["refresh_token"]})
+            me = client.get("/api/auth/me", headers={"Authorization": f"Bearer {session['access_token']}"})
+            assert refreshed.status_code == 401 and me.status_code == 401
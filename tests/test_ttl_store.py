@@ -0,0 +1,168 @@
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+from supabase import create_client
+
+from app.api import services
+from app.core.database import supabase
+from app.core.ttl_store import MemoryTTLStore, SQLiteTTLStore, open_store
+from fakes.postgrest_stub import PostgrestStub
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        store = MemoryTTLStore("test", max_entries=3)
+    else:
+        store = SQLiteTTLStore(str(tmp_path / "ttl.sqlite3"), "test", max_entries=3, cap_check_every=1)
+    yield store
+    store.close()
+
+
+class TestTTLStore:
+    """
+    Pruebas comunes a los backends del almacén TTL.
+    """
+
+    def test_set_get_and_expiry(self, store):
+        store.set("a", {"code": "ABC"}, ttl_seconds=60)
+        store.set("b", 1, ttl_seconds=0.01)
+        time.sleep(0.02)
+
+        assert store.get("a") == {"code": "ABC"}
+        assert store.get("b") is None
+        assert store.get("missing", "x") == "x"
+
+    def test_pop_is_single_use(self, store):
+        store.set("a", "valor", ttl_seconds=60)
+
+        assert store.pop("a") == "valor"
+        assert store.pop("a") is None
+
+    def test_incr_keeps_window(self, store):
+        assert store.incr("attempts", ttl_seconds=0.05) == 1
+        assert store.incr("attempts", ttl_seconds=60) == 2
+        time.sleep(0.06)
+
+        # El TTL se fijó al crear el contador: ha expirado y empieza de nuevo
+        assert store.incr("attempts", ttl_seconds=60) == 1
+
+    def test_incr_is_atomic_across_threads(self, store):
+        def worker():
+            for _ in range(50):
+                store.incr("hits", ttl_seconds=60)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert store.get("hits") == 200
+
+    def test_max_entries_cap(self, store):
+        for i in range(5):
+            store.set(f"k{i}", i, ttl_seconds=60 + i)
+
+        assert [store.get(f"k{i}") for i in range(5)] == [None, None, 2, 3, 4]
+
+    def test_sqlite_cap_is_amortized(self, tmp_path):
+        store = SQLiteTTLStore(str(tmp_path / "ttl.sqlite3"), "test", max_entries=3, cap_check_every=4)
+        try:
+            for i in range(6):
+                store.set(f"k{i}", i, ttl_seconds=60 + i)
+            # Recortado en la 4ª escritura; la 5ª y la 6ª esperan a la siguiente comprobación
+            assert [store.get(f"k{i}") for i in range(6)] == [None, 1, 2, 3, 4, 5]
+
+            store.sweep()
+            assert [store.get(f"k{i}") for i in range(6)] == [None, None, None, 3, 4, 5]
+        finally:
+            store.close()
+
+    def test_sweep_removes_expired(self, store):
+        store.set("old", 1, ttl_seconds=0.01)
+        store.set("new", 2, ttl_seconds=60)
+        time.sleep(0.02)
+
+        assert store.sweep() == 1
+        assert store.get("new") == 2
+
+
+class TestSharedBackend:
+    """
+    El backend SQLite se comparte entre procesos (workers) y espacios de nombres.
+    """
+
+    def test_visible_from_another_worker(self, tmp_path):
+        path = str(tmp_path / "ttl.sqlite3")
+        worker_a = SQLiteTTLStore(path, "reset_codes")
+        worker_b = SQLiteTTLStore(path, "reset_codes")
+        other = SQLiteTTLStore(path, "otro")
+
+        worker_a.set("ana@example.com", {"code": "ABC123"}, ttl_seconds=60)
+
+        assert worker_b.pop("ana@example.com") == {"code": "ABC123"}
+        assert worker_a.get("ana@example.com") is None
+        assert other.get("ana@example.com") is None
+
+    def test_open_store_from_url(self, tmp_path):
+        memory = open_store("x", url="memory://")
+        shared = open_store("x", url=f"sqlite:///{tmp_path / 'ttl.sqlite3'}")
+        try:
+            assert isinstance(memory, MemoryTTLStore)
+            assert isinstance(shared, SQLiteTTLStore)
+            with pytest.raises(ValueError):
+                open_store("x", url="ftp://nope")
+        finally:
+            memory.close()
+            shared.close()
+
+
+@pytest.fixture()
+def reset_store(tmp_path):
+    stub = PostgrestStub()
+    stub.insert("users", [{"id": 1, "email": "ana@example.com", "hashed_password": "viejo"}])
+    store = SQLiteTTLStore(str(tmp_path / "ttl.sqlite3"), "reset_codes")
+    with stub.serve() as url:
+        supabase.set_client(create_client(url, "test-service-key"))
+        services.reset_codes.set_client(store)
+        try:
+            yield stub, store
+        finally:
+            services.reset_codes.set_client(None)
+            supabase.set_client(None)
+            store.close()
+
+
+class TestPasswordResetCodes:
+    """
+    Pruebas de los códigos de recuperación sobre el almacén compartido.
+    """
+
+    def test_code_is_single_use(self, reset_store):
+        stub, store = reset_store
+        store.set("ana@example.com", {"code": "ABC123"}, ttl_seconds=60)
+
+        services.reset_password_with_code("ana@example.com", "abc123", "nueva-clave")
+
+        assert stub.tables["users"][0]["hashed_password"] != "viejo"
+        with pytest.raises(HTTPException) as exc:
+            services.reset_password_with_code("ana@example.com", "ABC123", "otra-clave")
+        assert exc.value.status_code == 400
+
+    def test_too_many_wrong_codes_invalidate_request(self, reset_store, monkeypatch):
+        _, store = reset_store
+        monkeypatch.setattr(services.settings, "PASSWORD_RESET_MAX_ATTEMPTS", 3)
+        store.set("ana@example.com", {"code": "ABC123"}, ttl_seconds=60)
+
+        details = []
+        for _ in range(3):
+            with pytest.raises(HTTPException) as exc:
+                services.reset_password_with_code("ana@example.com", "ZZZZZZ", "nueva-clave")
+            details.append(exc.value.detail)
+
+        assert details[:2] == ["Código incorrecto"] * 2
+        assert "Demasiados intentos" in details[2]
+        assert store.get("ana@example.com") is None
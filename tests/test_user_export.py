@@ -0,0 +1,128 @@
+import asyncio
+import csv
+import gzip
+import io
+import json
+import tracemalloc
+
+import pytest
+from supabase import create_client
+
+from app.api import user_export
+from app.api.user_export import EXPORT_COLUMNS, export_users
+from app.core.database import supabase
+from app.core.security import create_access_token
+from fakes.data import seed
+from fakes.postgrest_stub import PostgrestStub
+
+
+@pytest.fixture()
+def export_api(client, monkeypatch):
+    monkeypatch.setattr(user_export.settings, "USER_EXPORT_PAGE_SIZE", 2)
+    stub = PostgrestStub()
+    seed(stub, users=5, history_days=1)
+    stub.insert("user_stats", [{"user_id": 1, "total_habits_completed": 12, "current_streak": 3,
+                                "longest_streak": 5, "average_sleep_hours": 7.5}])
+    with stub.serve() as url:
+        supabase.set_client(create_client(url, "test-service-key"))
+        token = create_access_token({"sub": "1", "email": "bench0@example.com", "role": "admin"})
+        try:
+            yield client, stub, {"Authorization": f"Bearer {token}"}
+        finally:
+            supabase.set_client(None)
+
+
+class TestExportRoute:
+    """
+    GET /api/auth/users/export: páginas keyset, CSV/NDJSON y gzip.
+    """
+
+    def test_csv_joins_roles_profiles_and_stats(self, export_api):
+        client, stub, headers = export_api
+        stub.reset_counters()
+
+        response = client.get("/api/auth/users/export", headers=headers)
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert [int(row["id"]) for row in rows] == [1, 2, 3, 4, 5]
+        assert rows[0]["role"] == "user" and rows[0]["profile_name"] == "Usuario 0"
+        assert rows[0]["current_streak"] == "3" and rows[1]["current_streak"] == ""
+        # 5 usuarios en páginas de 2: 2 + 2 + 1 (la última, incompleta, cierra)
+        assert stub.round_trips[("RPC", "export_users")] == 3 == stub.total_round_trips
+
+    def test_ndjson(self, export_api):
+        client, _, headers = export_api
+
+        response = client.get("/api/auth/users/export?format=ndjson", headers=headers)
+
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert len(lines) == 5
+        assert list(lines[0]) == list(EXPORT_COLUMNS)
+        assert lines[0]["average_sleep_hours"] == 7.5
+
+    def test_gzip(self, export_api):
+        client, _, headers = export_api
+
+        response = client.get("/api/auth/users/export?gzip=true", headers=headers)
+
+        assert response.headers["content-disposition"].endswith('usuarios.csv.gz"')
+        text = gzip.decompress(response.content).decode("utf-8")
+        assert text.splitlines()[0] == ",".join(EXPORT_COLUMNS)
+        assert len(text.splitlines()) == 6
+
+    def test_admin_only(self, export_api):
+        client, _, _ = export_api
+        token = create_access_token({"sub": "2", "email": "x@example.com", "role": "user"})
+
+        response = client.get("/api/auth/users/export", headers={"Authorization": f"Bearer {token}"})
+
+        assert response.status_code == 403
+
+
+class TestExportMemory:
+    """
+    La memoria depende del tamaño de página, no del número de usuarios.
+    """
+
+    @pytest.fixture()
+    def synthetic_users(self):
+        stub = PostgrestStub()
+        total = {"users": 0}
+
+        # Filas generadas al vuelo: el stub no guarda nada
+        def pages(stub, p_after=0, p_limit=1000):
+            last = min(p_after + p_limit, total["users"])
+            return [{"id": i, "email": f"u{i}@example.com", "role": "user"} for i in range(p_after + 1, last + 1)]
+
+        stub.register_function("export_users", pages)
+        with stub.serve() as url:
+            supabase.set_client(create_client(url, "test-service-key"))
+            try:
+                yield total
+            finally:
+                supabase.set_client(None)
+
+    def peak_bytes(self, total, users):
+        total["users"] = users
+
+        async def drain():
+            exported = 0
+            async for chunk in export_users("ndjson", compress=True, page_size=500):
+                exported += len(chunk)
+            return exported
+
+        tracemalloc.start()
+        try:
+            assert asyncio.run(drain()) > 0
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def test_flat_memory(self, synthetic_users):
+        self.peak_bytes(synthetic_users, 500)  # Calentamiento
+        small = self.peak_bytes(synthetic_users, 1_000)
+        large = self.peak_bytes(synthetic_users, 10_000)
+
+        assert large < small * 1.5
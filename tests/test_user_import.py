@@ -0,0 +1,217 @@
+import asyncio
+import json
+import tracemalloc
+
+import pytest
+from supabase import create_client
+
+from app.api import user_import
+from app.api.user_import import import_users, parse_records
+from app.core.database import supabase
+from app.core.security import create_access_token, verify_password
+from fakes.data import seed
+from fakes.postgrest_stub import PostgrestStub
+
+CSV = (
+    "email,password,full_name,age,phone,gender\n"
+    "ana@colegio.edu,secreto1,Ana,12,600000001,Femenino\n"
+    "bench0@example.com,secreto2,Ya existe,30,600000002,Otro\n"
+    "sin-arroba,secreto3,Mal,30,600000003,Otro\n"
+    '"luis@colegio.edu",secreto4,"Luis ""Lucho""\nPérez",13,600000004,Masculino\n'
+    "ana@colegio.edu,secreto5,Ana otra vez,12,600000005,Femenino\n"
+)
+
+
+async def last_line(report) -> dict:
+    """Consume el informe sin guardarlo (para medir solo la importación)."""
+    last = b""
+    async for chunk in report:
+        last = chunk or last
+    return json.loads(last.splitlines()[-1])
+
+
+def report_lines(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+async def chunked(data: bytes, size: int = 7):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+@pytest.fixture()
+def import_api(client, monkeypatch):
+    monkeypatch.setattr(user_import.settings, "USER_IMPORT_CHUNK_SIZE", 2)
+    monkeypatch.setattr(user_import.settings, "USER_IMPORT_HASH_WORKERS", 2)
+    stub = PostgrestStub()
+    seed(stub, users=1, history_days=1)
+    stub.tables["users"][0]["role_id"] = 1
+    with stub.serve() as url:
+        supabase.set_client(create_client(url, "test-service-key"))
+        token = create_access_token({"sub": "1", "email": "bench0@example.com", "role": "admin"})
+        try:
+            yield client, stub, {"Authorization": f"Bearer {token}"}
+        finally:
+            supabase.set_client(None)
+            user_import.shutdown_hash_pool()
+
+
+class TestParsing:
+    """
+    Lectura en streaming de CSV y NDJSON, con trozos que cortan líneas.
+    """
+
+    def collect(self, data: bytes, fmt: str):
+        async def run():
+            return [record async for record in parse_records(chunked(data), fmt)]
+        return asyncio.run(run())
+
+    def test_csv_with_quoted_newline(self):
+        records = self.collect(CSV.encode("utf-8"), "csv")
+
+        assert len(records) == 5
+        assert records[3][1]["full_name"] == 'Luis "Lucho"\nPérez'
+
+    def test_csv_wrong_column_count(self):
+        [(number, record, error)] = self.collect(b"email,password\na@b.com\n", "csv")
+
+        assert number == 1 and record is None and "columnas" in error
+
+    def test_ndjson_invalid_line(self):
+        records = self.collect(b'{"email": "a@b.com"}\n\nno-json\n[1]\n', "ndjson")
+
+        assert [number for number, _, _ in records] == [1, 2, 3]
+        assert records[0][1] == {"email": "a@b.com"}
+        assert records[1][2].startswith("JSON inválido") and records[2][2]
+
+
+class TestBulkImportRoute:
+    """
+    POST /api/auth/users/import: validación, hash en procesos e inserción por bloques.
+    """
+
+    def test_csv_report(self, import_api):
+        client, stub, headers = import_api
+        stub.reset_counters()
+
+        response = client.post(
+            "/api/auth/users/import", content=CSV.encode("utf-8"),
+            headers={**headers, "Content-Type": "text/csv"},
+        )
+
+        assert response.status_code == 200
+        lines = report_lines(response)
+        assert [line.get("status") for line in lines[:-1]] == ["created", "duplicate", "invalid", "created", "duplicate"]
+        assert lines[2]["errors"][0]["field"] == "email"
+        assert lines[-1] == {"summary": {"created": 2, "duplicate": 2, "invalid": 1, "error": 0}}
+        # 4 filas válidas en bloques de 2: dos llamadas, usuarios y perfiles juntos
+        assert stub.round_trips[("RPC", "import_users")] == 2 == stub.total_round_trips
+
+        luis = next(u for u in stub.tables["users"] if u["email"] == "luis@colegio.edu")
+        assert verify_password("secreto4", luis["hashed_password"])
+        assert any(p["id"] == luis["id"] for p in stub.tables["profiles"])
+
+    def test_ndjson_by_query_param(self, import_api):
+        client, _, headers = import_api
+        body = "\n".join(json.dumps({
+            "email": f"alumno{i}@colegio.edu", "password": "secreto", "full_name": f"Alumno {i}",
+            "age": 10, "phone": "600000000", "gender": "Otro",
+        }) for i in range(3))
+
+        response = client.post("/api/auth/users/import?format=ndjson", content=body, headers=headers)
+
+        assert report_lines(response)[-1]["summary"]["created"] == 3
+
+    def test_unknown_format(self, import_api):
+        client, _, headers = import_api
+
+        response = client.post("/api/auth/users/import", content=b"x", headers={**headers, "Content-Type": "text/plain"})
+
+        assert response.status_code == 415
+
+    def test_admin_only(self, import_api):
+        client, _, _ = import_api
+        token = create_access_token({"sub": "2", "email": "x@example.com", "role": "user"})
+
+        response = client.post(
+            "/api/auth/users/import", content=CSV, headers={"Authorization": f"Bearer {token}", "Content-Type": "text/csv"},
+        )
+
+        assert response.status_code == 403
+
+    def test_hash_pool_does_not_fork(self, import_api):
+        # Copiar con fork el proceso de uvicorn (con hilos) puede colgar a los hijos
+        assert user_import.get_hash_pool()._mp_context.get_start_method() in ("forkserver", "spawn")
+
+
+class TestImportMemory:
+    """
+    La memoria no crece con el tamaño del archivo.
+    """
+
+    @pytest.fixture()
+    def cheap_import(self, monkeypatch):
+        async def fake_hashes(passwords):
+            return ["hash"] * len(passwords)
+
+        monkeypatch.setattr(user_import, "hash_passwords", fake_hashes)
+        stub = PostgrestStub()
+        # Sin guardar filas: así solo se mide la importación
+        stub.register_function("import_users", lambda stub, p_users: [
+            {"id": i, "email": row["email"]} for i, row in enumerate(p_users)
+        ])
+        with stub.serve() as url:
+            supabase.set_client(create_client(url, "test-service-key"))
+            try:
+                yield
+            finally:
+                supabase.set_client(None)
+
+    def peak_bytes(self, rows: int) -> int:
+        async def source():
+            for i in range(rows):
+                yield (json.dumps({
+                    "email": f"u{i}@colegio.edu", "password": "secreto", "full_name": f"Usuario {i}",
+                    "age": 10, "phone": "600000000", "gender": "Otro",
+                }) + "\n").encode()
+
+        tracemalloc.start()
+        try:
+            summary = asyncio.run(last_line(import_users(source(), "ndjson")))["summary"]
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        assert summary["created"] == rows
+        return peak
+
+    def test_report_streams_while_reading(self, cheap_import, monkeypatch):
+        monkeypatch.setattr(user_import.settings, "USER_IMPORT_CHUNK_SIZE", 2)
+        sent = []
+
+        async def source():
+            for i in range(6):
+                sent.append(i)
+                yield (json.dumps({
+                    "email": f"u{i}@colegio.edu", "password": "secreto", "full_name": f"Usuario {i}",
+                    "age": 10, "phone": "600000000", "gender": "Otro",
+                }) + "\n").encode()
+
+        async def first_chunk():
+            report = import_users(source(), "ndjson")
+            chunk = await report.__anext__()
+            await report.aclose()
+            return chunk
+
+        chunk = asyncio.run(first_chunk())
+
+        # El primer bloque llega al cliente antes de leer el resto del cuerpo
+        assert [json.loads(line)["status"] for line in chunk.splitlines()] == ["created", "created"]
+        assert len(sent) < 6
+
+    def test_flat_memory(self, cheap_import, monkeypatch):
+        monkeypatch.setattr(user_import.settings, "USER_IMPORT_CHUNK_SIZE", 200)
+        self.peak_bytes(200)  # Calentamiento: conexiones, cachés de importación...
+        small = self.peak_bytes(500)
+        large = self.peak_bytes(5_000)
+
+        assert large < small * 1.5
@@ -0,0 +1,121 @@
+import pytest
+from supabase import create_client
+
+from app.core.database import supabase
+from app.core.security import create_access_token
+from fakes.data import seed
+from fakes.postgrest_stub import PostgrestStub
+
+
+@pytest.fixture()
+def search_api(client):
+    stub = PostgrestStub()
+    seed(stub, users=12, history_days=1)
+    for i, user in enumerate(stub.tables["users"]):
+        user["age"] = 20 + i
+        user["is_active"] = i % 3 != 0
+        user["created_at"] = f"2026-01-{1 + i % 4:02d}T00:00:00+00:00"  # Empates en la columna de orden
+    stub.tables["users"][0]["role_id"] = 1
+    stub.tables["users"][5]["full_name"] = "Zoe Martínez"
+    with stub.serve() as url:
+        supabase.set_client(create_client(url, "test-service-key"))
+        token = create_access_token({"sub": "1", "email": "bench0@example.com", "role": "admin"})
+        try:
+            yield client, stub, {"Authorization": f"Bearer {token}"}
+        finally:
+            supabase.set_client(None)
+
+
+def search(client, headers, **params):
+    response = client.get("/api/auth/users/search", params=params, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+class TestUserSearch:
+    """
+    GET /api/auth/users/search: texto, filtros, orden estable y keyset.
+    """
+
+    def test_substring_and_prefix(self, search_api):
+        client, _, headers = search_api
+
+        substring = search(client, headers, q="martín")
+        prefix = search(client, headers, q="martín", match="prefix")
+        by_email = search(client, headers, q="bench1", match="prefix")
+
+        assert [u["full_name"] for u in substring["items"]] == ["Zoe Martínez"]
+        assert prefix["items"] == []
+        assert {u["email"] for u in by_email["items"]} == {"bench1@example.com", "bench10@example.com", "bench11@example.com"}
+
+    def test_filters(self, search_api):
+        client, _, headers = search_api
+
+        page = search(client, headers, role="user", is_active="true", min_age=22, max_age=26)
+
+        assert [u["age"] for u in page["items"]] == [22, 24, 25]
+        assert all(u["role"] == "user" and u["is_active"] for u in page["items"])
+
+    def test_keyset_pages_are_stable(self, search_api):
+        client, stub, headers = search_api
+        seen, cursor = [], None
+
+        while True:
+            params = {"sort": "created_at", "order": "desc", "limit": 5}
+            page = search(client, headers, **params, **({"cursor": cursor} if cursor else {}))
+            seen += [u["id"] for u in page["items"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+
+        expected = sorted(stub.tables["users"], key=lambda u: (u["created_at"], u["id"]), reverse=True)
+        assert seen == [u["id"] for u in expected]
+
+    @pytest.mark.parametrize("order", ["asc", "desc"])
+    def test_null_created_at_pages_last(self, search_api, order):
+        client, stub, headers = search_api
+        for user in stub.tables["users"][3:8]:
+            user["created_at"] = None
+        seen, cursor = [], None
+
+        while True:
+            params = {"sort": "created_at", "order": order, "limit": 4}
+            page = search(client, headers, **params, **({"cursor": cursor} if cursor else {}))
+            seen += [u["id"] for u in page["items"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+
+        dated = [u for u in stub.tables["users"] if u["created_at"] is not None]
+        nulls = [u for u in stub.tables["users"] if u["created_at"] is None]
+        expected = (
+            sorted(dated, key=lambda u: (u["created_at"], u["id"]), reverse=order == "desc")
+            + sorted(nulls, key=lambda u: u["id"], reverse=order == "desc")
+        )
+        assert seen == [u["id"] for u in expected]  # Ninguna se pierde ni se repite
+
+    def test_one_round_trip_per_page(self, search_api):
+        client, stub, headers = search_api
+        stub.reset_counters()
+
+        search(client, headers, q="bench", sort="email", limit=3)
+
+        assert stub.round_trips[("RPC", "search_users")] == 1 == stub.total_round_trips
+
+    def test_cursor_for_other_sort_rejected(self, search_api):
+        client, _, headers = search_api
+        cursor = search(client, headers, sort="email", limit=2)["next_cursor"]
+
+        response = client.get("/api/auth/users/search", params={"sort": "id", "cursor": cursor}, headers=headers)
+        garbage = client.get("/api/auth/users/search", params={"cursor": "no-es-un-cursor"}, headers=headers)
+
+        assert response.status_code == 400
+        assert garbage.status_code == 400
+
+    def test_admin_only(self, search_api):
+        client, _, _ = search_api
+        token = create_access_token({"sub": "2", "email": "x@example.com", "role": "user"})
+
+        response = client.get("/api/auth/users/search", headers={"Authorization": f"Bearer {token}"})
+
+        assert response.status_code == 403